@@ -9,6 +9,7 @@ from info import __doc__
 from quadrature import *
 from odepack import *
 from quadpack import *
+from batchquad import *
 from ode import *
 
 __all__ = filter(lambda s:not s.startswith('_'),dir())
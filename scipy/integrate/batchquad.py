@@ -0,0 +1,426 @@
+"""Adaptive quadrature of many integrals at once
+
+The integrals are computed together, in the manner of QUADPACK's QAG
+with the 21-point Gauss-Kronrod rule: at each step, the subinterval with
+the largest error estimate of every integral not yet converged is
+bisected, and the rule is applied to all the new subintervals with a
+single call of the integrand on an array of points.  Double and triple
+integrals nest the same scheme, so that the integrand is again evaluated
+on whole arrays of points.
+"""
+
+__all__ = ['quad_batch', 'dblquad_batch', 'tplquad_batch']
+
+import numpy
+from numpy import asarray, zeros, ones, empty, arange, where, isfinite, \
+     isinf, finfo, newaxis, concatenate, minimum, maximum
+
+# nodes and weights of the 21-point Kronrod rule and of the embedded
+# 10-point Gauss rule on [-1,1], from QUADPACK's dqk21
+_xgk = asarray([0.995657163025808080735527280689003,
+                0.973906528517171720077964012084452,
+                0.930157491355708226001207180059508,
+                0.865063366688984510732096688423493,
+                0.780817726586416897063717578345042,
+                0.679409568299024406234327365114874,
+                0.562757134668604683339000099272694,
+                0.433395394129247190799265943165784,
+                0.294392862701460198131126603103866,
+                0.148874338981631210884826001129720,
+                0.0])
+_wgk = asarray([0.011694638867371874278064396062192,
+                0.032558162307964727478818972459390,
+                0.054755896574351996031381300244580,
+                0.075039674810919952767043140916190,
+                0.093125454583697605535065465083366,
+                0.109387158802297641899210590325805,
+                0.123491976262065851077958109831074,
+                0.134709217311473325928054001771707,
+                0.142775938577060080797094273138717,
+                0.147739104901338491374841515972068,
+                0.149445554002916905664936468389821])
+_wg = asarray([0.066671344308688137593568809893332,
+               0.149451349150580593145776339657697,
+               0.219086362515982043995534934228163,
+               0.269266719309996355091226921569469,
+               0.295524224714752870173892994651338])
+
+_nodes = concatenate((-_xgk[:-1], _xgk[::-1]))
+_kronrod = concatenate((_wgk[:-1], _wgk[::-1]))
+_gauss = zeros(21)
+_gauss[1:10:2] = _wg
+_gauss[-2:-11:-2] = _wg
+
+_epmach = finfo(float).eps
+_uflow = finfo(float).tiny
+
+
+def _qk21(func, lo, hi, columns):
+    """The 21-point Gauss-Kronrod rule on the intervals [lo, hi], with the
+    estimates of its error, as dqk21 does."""
+    centr = 0.5*(lo + hi)
+    hlgth = 0.5*(hi - lo)
+    x = centr[:,newaxis] + hlgth[:,newaxis]*_nodes
+    f = asarray(func(*((x,) + columns)), dtype=float) + zeros(x.shape)
+    resk = numpy.dot(f, _kronrod)
+    resg = numpy.dot(f, _gauss)
+    reskh = 0.5*resk
+    resabs = numpy.dot(abs(f), _kronrod)*abs(hlgth)
+    resasc = numpy.dot(abs(f - reskh[:,newaxis]), _kronrod)*abs(hlgth)
+    abserr = abs((resk - resg)*hlgth)
+    ratio = 200*abserr/where(resasc == 0, 1, resasc)
+    scaled = resasc*minimum(1, ratio**1.5)
+    abserr = where((resasc != 0) & (abserr != 0), scaled, abserr)
+    abserr = where(resabs > _uflow/(50*_epmach),
+                   maximum(50*_epmach*resabs, abserr), abserr)
+    return resk*hlgth, abserr
+
+
+class _Mapped(object):
+    """The integrand on [0,1), for integrals over infinite intervals, as
+    in dqagi.
+
+    Called with (t, kind, bound, *columns): for kind 0, x = t; for kind
+    1, x = bound + t/(1-t); for kind -1, x = bound - t/(1-t); for kind 2,
+    x = t/(1-t), and f(x) + f(-x) is integrated.
+    """
+    def __init__(self, func):
+        self.func = func
+
+    def __call__(self, t, kind, bound, *columns):
+        finite = kind == 0
+        u = where(finite, 0, t)
+        x = where(finite, t, bound + where(kind == -1, -1, 1)*u/(1 - u))
+        jac = where(finite, 1, 1/(1 - u)**2)
+        fold = kind == 2
+        if fold.any():
+            # f(-x) for the rows of kind 2, f(x) again for the others
+            x = concatenate((x, where(fold, -x, x)), axis=1)
+        f = asarray(self.func(*((x,) + columns)), dtype=float) + zeros(x.shape)
+        if fold.any():
+            n = t.shape[1]
+            f = f[:,:n] + where(fold, f[:,n:], 0)
+        return f*jac
+
+
+def _integrate(func, a, b, params, epsabs, epsrel, limit):
+    """Integrals of func over [a, b], all together.
+
+    Returns the integrals, their error estimates, the number of
+    evaluations, the number of subintervals and the error codes.
+    """
+    s = len(a)
+    columns = tuple([params[:,j:j+1] for j in range(params.shape[1])])
+    # the subintervals of each integral, with the estimates of the
+    # integral and of its error over them
+    lo = empty((s, limit))
+    hi = empty((s, limit))
+    est = zeros((s, limit))
+    err = zeros((s, limit))
+    lo[:,0], hi[:,0] = a, b
+    est[:,0], err[:,0] = _qk21(func, a, b, columns)
+    last = ones(s, dtype=int)
+    result = est[:,0].copy()
+    abserr = err[:,0].copy()
+    ier = zeros(s, dtype=int)
+    ier[~isfinite(abserr)] = 3
+    rows = arange(s)
+    while 1:
+        # the error estimates of the rule are occasionally optimistic:
+        # ask for 1/8 of the tolerance
+        converged = abserr <= maximum(epsabs, epsrel*abs(result))/8
+        ier[rows[(last[rows] == limit) & ~converged[rows] &
+                 (ier[rows] == 0)]] = 1
+        rows = rows[~converged[rows] & (ier[rows] == 0)]
+        if len(rows) == 0:
+            break
+        # bisect the subinterval with the largest error
+        j = err[rows].argmax(axis=1)
+        left, right = lo[rows,j], hi[rows,j]
+        mid = 0.5*(left + right)
+        small = (mid == left) | (mid == right)
+        ier[rows[small]] = 3
+        rows, j = rows[~small], j[~small]
+        left, mid, right = left[~small], mid[~small], right[~small]
+        if len(rows) == 0:
+            break
+        m = len(rows)
+        both = tuple([concatenate((c[rows], c[rows])) for c in columns])
+        r, e = _qk21(func, concatenate((left, mid)),
+                     concatenate((mid, right)), both)
+        k = last[rows]
+        hi[rows,j], est[rows,j], err[rows,j] = mid, r[:m], e[:m]
+        lo[rows,k], hi[rows,k] = mid, right
+        est[rows,k], err[rows,k] = r[m:], e[m:]
+        last[rows] += 1
+        result[rows] = est[rows].sum(axis=1)
+        abserr[rows] = err[rows].sum(axis=1)
+        ier[rows[~isfinite(abserr[rows])]] = 3
+    return result, abserr, 21*(2*last - 1), last, ier
+
+
+def _batch(func, a, b, params, epsabs, epsrel, limit, chunksize):
+    """_integrate over broadcast limits and parameters, with infinite
+    limits mapped to finite ones, chunk by chunk."""
+    a = asarray(a, dtype=float)
+    b = asarray(b, dtype=float)
+    if params is None:
+        params = zeros((1, 0))
+    params = asarray(params, dtype=float)
+    if params.ndim == 1:
+        params = params[newaxis,:]
+    shape = numpy.broadcast(a, b, zeros(len(params))).shape
+    s = 1
+    for n in shape:
+        s *= n
+    a = (a + zeros(shape)).ravel()
+    b = (b + zeros(shape)).ravel()
+    params = params + zeros((s, params.shape[1]))
+    sign = ones(s)
+    if isinf(a).any() or isinf(b).any():
+        # integrate from the lower limit to the higher one, after which
+        # kind is 0 for finite limits, 1 for [a, inf), -1 for (-inf, b]
+        # and 2 for (-inf, inf)
+        swap = b < a
+        sign[swap] = -1
+        a, b = where(swap, b, a), where(swap, a, b)
+        kind = where(isinf(b), 1, 0) - where(isinf(a), 1, 0)
+        kind[isinf(a) & isinf(b)] = 2
+        bound = where(kind == 1, a, where(kind == -1, b, 0))
+        a = where(kind == 0, a, 0)
+        b = where(kind == 0, b, 1)
+        params = concatenate((kind[:,newaxis], bound[:,newaxis], params),
+                             axis=1)
+        func = _Mapped(func)
+    out = [empty(s), empty(s), empty(s, dtype=int), empty(s, dtype=int),
+           empty(s, dtype=int)]
+    chunksize = max(1, int(chunksize))
+    for start in range(0, s, chunksize):
+        stop = min(start + chunksize, s)
+        values = _integrate(func, a[start:stop], b[start:stop],
+                            params[start:stop], epsabs, epsrel, limit)
+        for k in range(5):
+            out[k][start:stop] = values[k]
+    out[0] *= sign
+    return [v.reshape(shape) for v in out]
+
+
+def _report(result, abserr, neval, last, ier, full_output, limit):
+    if full_output:
+        return result, abserr, {'neval': neval, 'last': last, 'ier': ier}
+    failed = (ier != 0).sum()
+    if failed:
+        print "Warning: %d of the %d integrals did not converge within " \
+              "%d subintervals." % (failed, ier.size, limit)
+    return result, abserr
+
+
+def quad_batch(func, a, b, params=None, epsabs=1.49e-8, epsrel=1.49e-8,
+               limit=50, chunksize=10000, full_output=0):
+    """Compute many definite integrals together.
+
+    Each integral is computed by adaptive Gauss-Kronrod quadrature, as
+    quad does for finite limits, and all the integrals are refined
+    together, with one call of func per step.
+
+    Parameters
+    ----------
+    func : callable func(x, *p)
+        The integrands.  x is a 2-D array holding points of one integral
+        per row, each parameter p is a column of shape (m,1) holding its
+        value for the integrals of the m rows, and func returns the values
+        of the integrands at x, as an array of the shape of x.
+    a, b : float or array_like
+        Lower and upper limits of integration, one per integral or the
+        same for all.  Use inf and -inf for infinite limits.
+    params : array_like, shape (k,) or (n,k), optional
+        Parameters of the integrands passed to func, one row per integral
+        or the same for all.
+    epsabs, epsrel : float, optional
+        Absolute and relative error tolerances of each integral.
+    limit : int, optional
+        Maximum number of subintervals of each integral.
+    chunksize : int, optional
+        Number of integrals computed together.  Memory is about
+        (4*limit + 2*50)*chunksize floats.
+    full_output : bool, optional
+        If True, also return a dictionary of information.
+
+    Returns
+    -------
+    y : ndarray
+        The integrals, with the broadcast shape of a, b and the rows of
+        params.
+    abserr : ndarray
+        Estimates of their absolute errors.
+    infodict : dict
+        Only returned if full_output is True, with entries of the shape of
+        y: 'neval', the number of evaluations of each integrand, 'last',
+        the number of subintervals, and 'ier', 0 for integrals that
+        converged, 1 when limit subintervals were not enough and 3 when a
+        subinterval became too small to bisect or func was not finite.
+
+    See also:
+      quad - adaptive quadrature of one integral using QUADPACK
+      dblquad_batch, tplquad_batch - many double and triple integrals
+      fixed_quad - fixed-order Gaussian quadrature
+
+    Notes
+    -----
+    An integral is accepted when its error estimate is below 1/8 of the
+    tolerance, as the estimates of the 21-point rule are occasionally
+    optimistic.  Infinite intervals are mapped to [0,1) as quad does,
+    with x = a + t/(1-t), and the integrand over (-inf, inf) is folded
+    onto [0, inf).
+
+    Examples
+    --------
+    Integrate exp(-k*x**2) over [0, c] for 100000 pairs (k, c):
+
+    >>> k = numpy.linspace(0.5, 2, 100000)
+    >>> c = numpy.linspace(1, 3, 100000)
+    >>> y, err = quad_batch(lambda x, k: numpy.exp(-k*x**2), 0, c,
+    ...                     params=k[:,numpy.newaxis])
+
+    """
+    values = _batch(func, a, b, params, epsabs, epsrel, limit, chunksize)
+    return _report(*(values + [full_output, limit]))
+
+
+def _limit(fun, x, columns):
+    """The value of a limit of integration at the points x."""
+    if callable(fun):
+        fun = fun(*((x,) + columns))
+    return asarray(fun, dtype=float) + zeros(x.shape)
+
+
+class _Inner(object):
+    """The integral over the innermost variable, as a function of the
+    outer one, evaluated at arrays of points as quad_batch does.
+
+    func(y, x, *p) is integrated over y from lower(x, *p) to
+    upper(x, *p).
+    """
+    def __init__(self, func, lower, upper, epsabs, epsrel, limit,
+                 chunksize):
+        self.func = func
+        self.lower = lower
+        self.upper = upper
+        self.epsabs = epsabs
+        self.epsrel = epsrel
+        self.limit = limit
+        self.chunksize = chunksize
+
+    def __call__(self, x, *columns):
+        lo = _limit(self.lower, x, columns)
+        hi = _limit(self.upper, x, columns)
+        # one inner integral per point, with x as its first parameter
+        params = [x.ravel()]
+        for c in columns:
+            params.append((c + zeros(x.shape)).ravel())
+        params = numpy.array(params).T
+        values = _batch(self.func, lo.ravel(), hi.ravel(), params,
+                        self.epsabs, self.epsrel, self.limit,
+                        self.chunksize)
+        return values[0].reshape(x.shape)
+
+
+class _Swapped(object):
+    """fun(x, y, *p) called as fun(y, x, *p)."""
+    def __init__(self, fun):
+        self.fun = fun
+
+    def __call__(self, y, x, *p):
+        if callable(self.fun):
+            return self.fun(*((x, y) + p))
+        return self.fun
+
+
+def dblquad_batch(func, a, b, gfun, hfun, params=None, epsabs=1.49e-8,
+                  epsrel=1.49e-8, limit=50, chunksize=10000,
+                  full_output=0):
+    """Compute many double integrals together.
+
+    Computes the integrals of func(y, x) for x from a to b and y from
+    gfun(x) to hfun(x), as dblquad does, with the inner and outer
+    integrals computed as by quad_batch.
+
+    Parameters
+    ----------
+    func : callable func(y, x, *p)
+        The integrands, called with arrays y and x of the same shape, and
+        with each parameter as a column holding its value for the
+        integral of each row of points.
+    a, b : float or array_like
+        Limits of integration in x, one per integral or the same for all.
+    gfun, hfun : callable gfun(x, *p) or float
+        Lower and upper limits of integration in y, called with arrays
+        of points x and columns of parameters as func, or constants.
+    params, epsabs, epsrel, limit, chunksize, full_output :
+        As for quad_batch.  The tolerances and limit apply to the inner
+        integrals as well.
+
+    Returns
+    -------
+    y, abserr[, infodict] :
+        As for quad_batch.  The error estimates and infodict are those of
+        the outer integrals.
+
+    Notes
+    -----
+    Each step of an outer integral computes 42 inner integrals, so
+    chunksize bounds the inner integrals computed together rather than
+    the outer ones.
+
+    See also:
+      dblquad - double integral using QUADPACK
+      quad_batch, tplquad_batch - many simple and triple integrals
+
+    """
+    inner = _Inner(func, gfun, hfun, epsabs, epsrel, limit, chunksize)
+    values = _batch(inner, a, b, params, epsabs, epsrel, limit,
+                    max(1, chunksize // 42))
+    return _report(*(values + [full_output, limit]))
+
+
+def tplquad_batch(func, a, b, gfun, hfun, qfun, rfun, params=None,
+                  epsabs=1.49e-8, epsrel=1.49e-8, limit=50, chunksize=10000,
+                  full_output=0):
+    """Compute many triple integrals together.
+
+    Computes the integrals of func(z, y, x) for x from a to b, y from
+    gfun(x) to hfun(x) and z from qfun(x, y) to rfun(x, y), as tplquad
+    does, with the nested integrals computed as by quad_batch.
+
+    Parameters
+    ----------
+    func : callable func(z, y, x, *p)
+        The integrands, called with arrays z, y and x of the same shape,
+        and with each parameter as a column holding its value for the
+        integral of each row of points.
+    a, b : float or array_like
+        Limits of integration in x, one per integral or the same for all.
+    gfun, hfun : callable gfun(x, *p) or float
+        Lower and upper limits of integration in y.
+    qfun, rfun : callable qfun(x, y, *p) or float
+        Lower and upper limits of integration in z.
+    params, epsabs, epsrel, limit, chunksize, full_output :
+        As for dblquad_batch.
+
+    Returns
+    -------
+    y, abserr[, infodict] :
+        As for dblquad_batch.
+
+    See also:
+      tplquad - triple integral using QUADPACK
+      quad_batch, dblquad_batch - many simple and double integrals
+
+    """
+    inner = _Inner(func, _Swapped(qfun), _Swapped(rfun), epsabs, epsrel,
+                   limit, chunksize)
+    middle = _Inner(inner, gfun, hfun, epsabs, epsrel, limit,
+                    max(1, chunksize // 42))
+    values = _batch(middle, a, b, params, epsabs, epsrel, limit,
+                    max(1, chunksize // 42**2))
+    return _report(*(values + [full_output, limit]))
@@ -12,6 +12,9 @@ Integration routines
    fixed_quad    -- Integrate func(x) using Gaussian quadrature of order n.
    quadrature    -- Integrate with given tolerance using Gaussian quadrature.
    romberg       -- Integrate func using Romberg integration.
+   quad_batch    -- Many integrals at once, by vectorized adaptive quadrature.
+   dblquad_batch -- Many double integrals at once.
+   tplquad_batch -- Many triple integrals at once.
 
  Methods for Integrating Functions given fixed samples.
 
@@ -28,6 +31,8 @@ Integration routines
 
    odeint        -- General integration of ordinary differential equations.
    ode           -- Integrate ODE using VODE and ZVODE routines.
+   ode_ensemble  -- Integrate an ODE system from many initial values or
+                    parameter sets.
 
 """
 
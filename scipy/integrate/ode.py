@@ -27,8 +27,14 @@ methods::
     integrator = integrator.set_f_params(*args)
     integrator = integrator.set_jac_params(*args)
     y1 = integrator.integrate(t1,step=0,relax=0)
+    dense = integrator.integrate_dense(t1)
     flag = integrator.successful()
 
+integrate_dense() is supported by the dopri5 and dop853 integrators. It
+returns a DenseOutput, the continuous solution the integrator computes
+over its own steps, which can be evaluated at any number of times
+without further steps.
+
 class complex_ode
 -----------------
 
@@ -36,6 +42,15 @@ This class has the same generic interface as ode, except it can handle complex
 f, y and Jacobians by transparently translating them into the equivalent
 real valued system. It supports the real valued solvers (i.e not zvode) and is
 an alternative to ode with the zvode solver, sometimes performing better. 
+
+function ode_ensemble
+---------------------
+
+Integrates one system from many initial values or parameter sets, either
+as stacked systems, if f evaluates many members at once, or member by
+member, in this process or in a pool of processes::
+
+    ys, success = ode_ensemble(f, y0, t, params, integrator='dopri5')
 """
 
 integrator_info = \
@@ -195,21 +210,27 @@ if __doc__:
 #             self.success = 0
 #         return t1,y1
 #
-#     # In addition, one can define step() and run_relax() methods (they
-#     # take the same arguments as run()) if the integrator can support
-#     # these features (see IntegratorBase doc strings).
+#     # In addition, one can define step(), run_relax() and run_dense()
+#     # methods (they take the same arguments as run()) if the integrator
+#     # can support these features (see IntegratorBase doc strings).
 #
 # if myodeint.runner:
 #     IntegratorBase.integrator_classes.append(myodeint)
 
-__all__ = ['ode', 'complex_ode']
+__all__ = ['ode', 'complex_ode', 'DenseOutput', 'ode_ensemble']
 __version__ = "$Id$"
 __docformat__ = "restructuredtext en"
 
 import re
 import warnings
 
-from numpy import asarray, array, zeros, int32, isscalar, real, imag
+from numpy import asarray, array, zeros, int32, isscalar, real, imag, \
+     empty, searchsorted, where, newaxis, sqrt, tile, nan
+
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
 
 import vode as _vode
 import _dop
@@ -326,6 +347,30 @@ The integration:
                             self.f_params,self.jac_params)
         return self.y
 
+    def integrate_dense(self, t):
+        """
+        Find y=y(t), set y as an initial condition, and return the
+        continuous solution from the previous time to t.
+
+        Returns
+        -------
+        dense : DenseOutput
+            Callable returning the solution at any time between the
+            previous time and t, from the interpolants the integrator
+            computes at each step.  Evaluating it takes no more steps.
+
+        Notes
+        -----
+        Only the dopri5 and dop853 integrators provide dense output.
+        """
+        if not self._integrator.supports_dense:
+            raise ValueError('%s does not provide dense output'
+                             % self._integrator.__class__.__name__)
+        self.y,self.t,dense = self._integrator.run_dense(
+            self.f,self.jac or (lambda :None),self.y,self.t,t,
+            self.f_params,self.jac_params)
+        return dense
+
     def successful(self):
         """Check if integration was successful."""
         try:
@@ -410,6 +455,300 @@ class complex_ode(ode):
         y = ode.integrate(self, t, step, relax)
         return y[::2] + 1j*y[1::2]
 
+    def integrate_dense(self, t):
+        """
+        Find y=y(t), set y as an initial condition, and return the
+        continuous solution from the previous time to t, as a DenseOutput
+        returning complex values.
+        """
+        dense = ode.integrate_dense(self, t)
+        dense._complex = True
+        return dense
+
+class DenseOutput(object):
+    """
+    Continuous solution of an ODE over the steps of an integrator.
+
+    Calling it with a time, or an array of times, returns the solution
+    there, with shape t.shape + (n,).  Times outside the integration
+    interval are extrapolated from the first or the last step.
+
+    Attributes
+    ----------
+    ts : ndarray
+        The times at the ends of the steps, from the first to the last.
+    con : ndarray, shape (len(ts)-1, m, n)
+        The coefficients of the interpolating polynomial of each step:
+        m = 5 for dopri5, m = 8 for dop853.
+    """
+
+    def __init__(self, ts, con):
+        self.ts = asarray(ts, float)
+        self.con = asarray(con, float)
+        self._complex = False
+
+    def __call__(self, t):
+        t = asarray(t, float)
+        tt = t.ravel()
+        ts = self.ts
+        if ts[-1] < ts[0]:
+            i = searchsorted(-ts, -tt, side='right') - 1
+        else:
+            i = searchsorted(ts, tt, side='right') - 1
+        i = i.clip(0, len(self.con)-1)
+        h = ts[i+1] - ts[i]
+        s = ((tt - ts[i]) / where(h == 0, 1, h))[:,newaxis]
+        s1 = 1 - s
+        c = self.con[i]
+        if c.shape[1] == 5:
+            # CONTD5 of dopri5
+            y = c[:,0] + s*(c[:,1] + s1*(c[:,2] + s*(c[:,3] + s1*c[:,4])))
+        else:
+            # CONTD8 of dop853
+            conpar = c[:,4] + s*(c[:,5] + s1*(c[:,6] + s*c[:,7]))
+            y = c[:,0] + s*(c[:,1] + s1*(c[:,2] + s*(c[:,3] + s1*conpar)))
+        if self._complex:
+            y = y[:,::2] + 1j*y[:,1::2]
+        return y.reshape(t.shape + y.shape[-1:])
+
+#------------------------------------------------------------------------------
+# Ensembles
+#------------------------------------------------------------------------------
+
+class _Stacked(object):
+    """Rhs of s members of a vectorized system, stacked in one system."""
+
+    def __init__(self, f, shape, columns):
+        self.f = f
+        self.shape = shape
+        self.columns = columns
+
+    def __call__(self, t, y):
+        dy = self.f(*((t, y.reshape(self.shape)) + self.columns))
+        return asarray(dy, float).ravel()
+
+def _solve(r, t):
+    """Integrate r from t[0] and return its values at the times t, nan
+    past a failure, and whether it succeeded."""
+    ys = empty((len(t), len(r.y)))
+    ys[:] = nan
+    ys[0] = r.y
+    if len(t) < 2:
+        return ys, r.successful()
+    if r._integrator.supports_dense:
+        dense = r.integrate_dense(t[-1])
+        if r.successful():
+            ys[1:-1] = dense(t[1:-1])
+            ys[-1] = r.y
+        else:
+            reached = (t - dense.ts[-1])*(t[-1] - t[0]) <= 0
+            ys[reached] = dense(t[reached])
+    else:
+        for i in range(1, len(t)):
+            ys[i] = r.integrate(t[i])
+            if not r.successful():
+                ys[i] = nan
+                break
+    return ys, r.successful()
+
+class _EnsembleChunk(object):
+    """Integration of a chunk of members, as a picklable callable.
+
+    Called with (y0, p), arrays of the initial values and of the
+    parameters (or None) with one row per member, it returns their
+    values at the times t and whether they succeeded.
+    """
+
+    def __init__(self, f, t, integrator, params, vectorized):
+        self.f = f
+        self.t = t
+        self.integrator = integrator
+        self.params = params
+        self.vectorized = vectorized
+
+    def __call__(self, chunk):
+        y0, p = chunk
+        s, n = y0.shape
+        if self.vectorized:
+            columns = ()
+            if p is not None:
+                columns = tuple([p[:,j:j+1] for j in range(p.shape[1])])
+            r = ode(_Stacked(self.f, (s, n), columns))
+            r.set_integrator(self.integrator,
+                             **_stacked_params(self.integrator, self.params,
+                                               s, n))
+            r.set_initial_value(y0.ravel(), self.t[0])
+            ys, success = _solve(r, self.t)
+            ys = ys.reshape((len(self.t), s, n)).swapaxes(0, 1)
+            return ys, [success]*s
+        ys = empty((s, len(self.t), n))
+        success = []
+        for i in range(s):
+            r = ode(self.f).set_integrator(self.integrator, **self.params)
+            r.set_initial_value(y0[i], self.t[0])
+            if p is not None:
+                r.set_f_params(*p[i])
+            ys[i], ok = _solve(r, self.t)
+            success.append(ok)
+        return ys, success
+
+def _stacked_params(name, params, s, n):
+    """Integrator parameters for s members of n equations stacked in one
+    system, with the error of each member within the tolerances."""
+    integrator = find_integrator(name)
+    if integrator is None:
+        raise ValueError('No integrator name match with %r or is not '
+                         'available.' % name)
+    default = integrator(**params)
+    params = params.copy()
+    # the integrators control the RMS norm of the error over the s*n
+    # equations: dividing the tolerances by sqrt(s) bounds the RMS norm
+    # of each member
+    rtol = asarray(default.rtol, float)
+    atol = asarray(default.atol, float)
+    if rtol.ndim or atol.ndim:
+        rtol = tile(rtol + zeros(n), s)
+        atol = tile(atol + zeros(n), s)
+    params['rtol'] = rtol / sqrt(s)
+    params['atol'] = atol / sqrt(s)
+    # the Jacobian of the stacked system is block diagonal, within a band
+    if getattr(default, 'meth', None) is not None and \
+       default.ml is None and default.mu is None and \
+       (default.meth == 2 or default.with_jacobian):
+        params['lband'] = params['uband'] = n - 1
+    return params
+
+def _serial_map(function, sequence):
+    for item in sequence:
+        yield function(item)
+
+def ode_ensemble(f, y0, t, params=None, integrator='dopri5',
+                 vectorized=False, chunksize=100, backend='serial',
+                 workers=None, **integrator_params):
+    """
+    Integrate an ODE system from many initial values or parameter sets.
+
+    Parameters
+    ----------
+    f : f(t, y, *p)
+        Rhs of the equation for one member of the ensemble, as for ode,
+        with its parameters p.  If vectorized, y has shape (s,n) and holds
+        one member per row, each parameter is a column of shape (s,1)
+        holding its value for the s members, and f returns the rhs of
+        the s members as an array of shape (s,n).
+    y0 : array_like, shape (n,) or (S,n)
+        Initial values, the same for all the members or one row per
+        member.
+    t : sequence
+        Increasing or decreasing times at which the solution is returned.
+        t[0] is the initial time.
+    params : array_like, shape (k,) or (S,k), optional
+        Parameters passed to f, the same for all the members or one row
+        per member.
+    integrator : str, optional
+        Name of the integrator, as for ode.set_integrator.
+    vectorized : bool, optional
+        If True, the members of each chunk are integrated together as one
+        system, with one call of f for all of them per evaluation.
+    chunksize : int, optional
+        Number of members integrated together, as one system if
+        vectorized, and in one task of the backend.
+    backend : {'serial', 'processes'} or object, optional
+        How the chunks are distributed:
+
+        - 'serial' : one after the other in this process.
+        - 'processes' : over a multiprocessing.Pool of workers processes.
+          f must be picklable.
+        - an object with a map(function, sequence) method, such as a
+          multiprocessing.Pool that is kept open between calls.
+    workers : int, optional
+        Number of processes.  Defaults to the number of CPUs.
+    integrator_params :
+        Additional parameters for the integrator, as for
+        ode.set_integrator.
+
+    Returns
+    -------
+    ys : ndarray, shape (S, len(t), n)
+        The solution of each member at the times t, nan past a failure.
+    success : ndarray of bools, shape (S,)
+        Whether the integration of each member succeeded.
+
+    Notes
+    -----
+    The solution at the times t is taken from the dense output of the
+    dopri5 and dop853 integrators, so any number of times costs no more
+    steps.  The other integrators are stopped at each time.
+
+    A stacked system takes the steps of its most demanding member, and
+    fails as a whole.  Its tolerances are divided by sqrt(s), so that
+    the error estimate of each member stays within the tolerances
+    given.  With vode and a Jacobian (method='bdf' or with_jacobian),
+    the Jacobian of the stacked system is approximated as a banded one.
+    The dense output of a stacked system holds up to 8*s*n floats per
+    step, which chunksize bounds.
+
+    Examples
+    --------
+    Damped oscillators for 10000 damping coefficients, integrated 1000 at
+    a time:
+
+    >>> def f(t, y, c):
+    ...     return numpy.hstack((y[:,1:], -c*y[:,1:] - y[:,:1]))
+    >>> c = numpy.linspace(0, 2, 10000)[:,numpy.newaxis]
+    >>> t = numpy.linspace(0, 10, 101)
+    >>> ys, success = ode_ensemble(f, [1.0, 0.0], t, c, vectorized=True,
+    ...                            chunksize=1000)
+
+    """
+    t = asarray(t, float)
+    y0 = asarray(y0, float)
+    if y0.ndim == 1:
+        y0 = y0[newaxis,:]
+    if params is not None:
+        params = asarray(params, float)
+        if params.ndim == 1:
+            params = params[newaxis,:]
+    S = len(y0)
+    if params is not None:
+        S = max(S, len(params))
+        params = params + zeros((S, params.shape[1]))
+    y0 = y0 + zeros((S, y0.shape[1]))
+    chunksize = max(1, int(chunksize))
+    chunks = []
+    for start in range(0, S, chunksize):
+        p = None
+        if params is not None:
+            p = params[start:start+chunksize]
+        chunks.append((y0[start:start+chunksize], p))
+    task = _EnsembleChunk(f, t, integrator, integrator_params, vectorized)
+    pool = None
+    if backend is None or backend == 'serial':
+        mapper = _serial_map
+    elif backend == 'processes':
+        if multiprocessing is None:
+            raise RuntimeError("the 'processes' backend needs the "
+                               "multiprocessing module")
+        pool = multiprocessing.Pool(workers)
+        mapper = pool.imap
+    elif hasattr(backend, 'map'):
+        mapper = backend.map
+    else:
+        raise ValueError("unknown backend %r" % (backend,))
+    ys = empty((S, len(t), y0.shape[1]))
+    success = zeros(S, bool)
+    try:
+        start = 0
+        for chunk_ys, chunk_success in mapper(task, chunks):
+            ys[start:start+len(chunk_ys)] = chunk_ys
+            success[start:start+len(chunk_ys)] = chunk_success
+            start += len(chunk_ys)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return ys, success
+
 #------------------------------------------------------------------------------
 # ODE integrators
 #------------------------------------------------------------------------------
@@ -426,6 +765,7 @@ class IntegratorBase(object):
     success = None           # success==1 if integrator was called successfully
     supports_run_relax = None
     supports_step = None
+    supports_dense = None
     integrator_classes = []
     scalar = float
 
@@ -453,6 +793,12 @@ class IntegratorBase(object):
         raise NotImplementedError,'%s does not support run_relax() method' %\
               (self.__class__.__name__)
 
+    def run_dense(self,f,jac,y0,t0,t1,f_params,jac_params):
+        """Integrate from t=t0 to t=t1 and return (y1,t1,dense), where
+        dense is a DenseOutput over the steps taken."""
+        raise NotImplementedError,'%s does not support run_dense() method' %\
+              (self.__class__.__name__)
+
     #XXX: __str__ method for getting visual state of the integrator
 
 class vode(IntegratorBase):
@@ -695,6 +1041,8 @@ class dopri5(IntegratorBase):
 
     runner = getattr(_dop,'dopri5',None)
     name = 'dopri5'
+    supports_dense = 1
+    ncon = 5  # coefficients of the dense output per component
 
     messages = { 1 : 'computation successful',
                  2 : 'comput. successful (interrupted by solout)',
@@ -727,7 +1075,8 @@ class dopri5(IntegratorBase):
         self.success = 1
 
     def reset(self,n,has_jac):
-        work = zeros((8*n+21,), float)
+        # room for the dense output of all the components
+        work = zeros(((8+self.ncon)*n+21,), float)
         work[1] = self.safety
         work[2] = self.dfactor
         work[3] = self.ifactor
@@ -735,23 +1084,60 @@ class dopri5(IntegratorBase):
         work[5] = self.max_step
         work[6] = self.first_step
         self.work = work
-        iwork = zeros((21,), int32)
+        iwork = zeros((21+n,), int32)
         iwork[0] = self.nsteps
         self.iwork = iwork
         self.call_args = [self.rtol,self.atol,self._solout,self.work,self.iwork]
         self.success = 1
 
+    def _direction(self,t0,t1):
+        # the runner leaves its last step in work[6] to start the next
+        # call with: turn it around if the next call goes backwards
+        if self.work[6]*(t1-t0) < 0:
+            self.work[6] = -self.work[6]
+
     def run(self,f,jac,y0,t0,t1,f_params,jac_params):
-        x,y,iwork,idid = self.runner(*((f,t0,y0,t1) + tuple(self.call_args)))
+        self._direction(t0,t1)
+        x,y,iwork,idid = self.runner(*((f,t0,y0,t1) + tuple(self.call_args)),
+                                     **{'fcn_extra_args':tuple(f_params)})
         if idid < 0:
             warnings.warn(self.name + ': ' + 
                 self.messages.get(idid, 'Unexpected idid=%s'%idid))
             self.success = 0
         return y,x
-        
-    def _solout(self, *args):
-        # dummy solout function
-        pass
+
+    def run_dense(self,f,jac,y0,t0,t1,f_params,jac_params):
+        # iout=2 with dense output of all the components (iwork[4]) makes
+        # the coefficients of each step available to _solout
+        self._direction(t0,t1)
+        self._steps = [t0], []
+        self.iwork[4] = len(y0)
+        try:
+            x,y,iwork,idid = self.runner(
+                *((f,t0,y0,t1) + tuple(self.call_args)),
+                **{'iout':2, 'fcn_extra_args':tuple(f_params)})
+        finally:
+            self.iwork[4] = 0
+        if idid < 0:
+            warnings.warn(self.name + ': ' + 
+                self.messages.get(idid, 'Unexpected idid=%s'%idid))
+            self.success = 0
+        ts, con = self._steps
+        del self._steps
+        if not con:
+            # no step taken: a constant solution
+            ts.append(t0)
+            con.append(zeros((self.ncon, len(y0))))
+            con[0][0] = y0
+        return y,x,DenseOutput(ts, con)
+
+    def _solout(self, nr, xold, x, y, con, *args):
+        # called after each step if iout > 0, and first at the initial
+        # time, before any coefficients are computed
+        if nr > 1:
+            self._steps[0].append(x)
+            self._steps[1].append(con.reshape((self.ncon, -1)).copy())
+        return 1
 
 if dopri5.runner is not None:
     IntegratorBase.integrator_classes.append(dopri5)
@@ -760,6 +1146,7 @@ class dop853(dopri5):
 
     runner = getattr(_dop,'dop853',None)
     name = 'dop853'
+    ncon = 8
 
     def __init__(self,
                  rtol=1e-6,atol=1e-12,
@@ -784,7 +1171,7 @@ class dop853(dopri5):
         self.success = 1
 
     def reset(self,n,has_jac):
-        work = zeros((11*n+21,), float)
+        work = zeros(((11+self.ncon)*n+21,), float)
         work[1] = self.safety
         work[2] = self.dfactor
         work[3] = self.ifactor
@@ -792,7 +1179,7 @@ class dop853(dopri5):
         work[5] = self.max_step
         work[6] = self.first_step
         self.work = work
-        iwork = zeros((21,), int32)
+        iwork = zeros((21+n,), int32)
         iwork[0] = self.nsteps
         self.iwork = iwork
         self.call_args = [self.rtol,self.atol,self._solout,self.work,self.iwork]
@@ -0,0 +1,86 @@
+""" Unit tests for the batched adaptive quadrature of batchquad.py
+"""
+
+import numpy as np
+from numpy import exp, sqrt, pi, inf, cos, sin
+from numpy.testing import *
+
+from scipy.integrate import quad, dblquad, tplquad, quad_batch, \
+     dblquad_batch, tplquad_batch
+
+
+def gauss(x, k):
+    return exp(-k*x**2)
+
+
+class TestQuadBatch(TestCase):
+    def setUp(self):
+        self.k = np.linspace(0.5, 2, 200)
+
+    def test_quad(self):
+        c = np.linspace(-1, 3, 200)
+        y, err = quad_batch(gauss, 0, c, params=self.k[:,np.newaxis])
+        assert_equal(y.shape, (200,))
+        ref = [quad(gauss, 0, ci, args=(ki,))[0]
+               for ki, ci in zip(self.k, c)]
+        assert_array_almost_equal(y, ref, decimal=12)
+        assert np.all(err < 1e-8)
+
+    def test_infinite(self):
+        k = self.k[:,np.newaxis]
+        for a, b, scale in [(0, inf, 0.5), (-inf, 0, 0.5), (inf, 0, -0.5),
+                            (-inf, inf, 1)]:
+            y, err = quad_batch(gauss, a, b, params=k)
+            assert_array_almost_equal(y, scale*sqrt(pi/self.k), decimal=10)
+        # finite and infinite limits together
+        b = np.where(self.k < 1, inf, 1.0)
+        y, err = quad_batch(gauss, 0, b, params=k)
+        ref = [quad(gauss, 0, bi, args=(ki,))[0]
+               for ki, bi in zip(self.k, b)]
+        assert_array_almost_equal(y, ref, decimal=10)
+
+    def test_shared(self):
+        # one integrand over many intervals, and no parameters
+        b = np.linspace(0, 10, 50)
+        y, err = quad_batch(cos, 0, b)
+        assert_array_almost_equal(y, sin(b), decimal=12)
+
+    def test_full_output(self):
+        y, err, info = quad_batch(lambda x: 1/sqrt(x), 0, [1.0, 4.0],
+                                  limit=20, full_output=1)
+        assert_array_almost_equal(y, [2, 4], decimal=4)
+        assert_array_equal(info['ier'], [1, 1])
+        assert_array_equal(info['last'], [20, 20])
+        assert_array_equal(info['neval'], [21*39, 21*39])
+        y, err, info = quad_batch(cos, 0, [1.0, 2.0], full_output=1)
+        assert_array_equal(info['ier'], [0, 0])
+        assert_array_equal(info['last'], [1, 1])
+
+    def test_chunks(self):
+        k = self.k[:,np.newaxis]
+        y, err = quad_batch(gauss, -1, 2, params=k)
+        y2, err2 = quad_batch(gauss, -1, 2, params=k, chunksize=7)
+        assert_array_almost_equal(y2, y, decimal=14)
+
+
+class TestMultipleBatch(TestCase):
+    def test_dblquad(self):
+        k = np.linspace(0.5, 2, 20)
+        f = lambda y, x, k: exp(-k*(x*x + y*y))
+        y, err = dblquad_batch(f, 0, 1, 0, lambda x, k: x*k,
+                               params=k[:,np.newaxis])
+        for i in [0, 7, 19]:
+            ref = dblquad(f, 0, 1, lambda x: 0, lambda x: x*k[i],
+                          args=(k[i],))[0]
+            assert_almost_equal(y[i], ref, decimal=10)
+
+    def test_tplquad(self):
+        y, err = tplquad_batch(lambda z, y, x: x*y*z, 0, [1.0, 2.0], 0,
+                               lambda x: 1-x, 0, lambda x, y: 1-x-y)
+        ref = tplquad(lambda z, y, x: x*y*z, 0, 2, lambda x: 0,
+                      lambda x: 1-x, lambda x, y: 0, lambda x, y: 1-x-y)[0]
+        assert_array_almost_equal(y, [1/720., ref], decimal=12)
+
+
+if __name__ == "__main__":
+    run_module_suite()
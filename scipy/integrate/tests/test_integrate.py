@@ -8,7 +8,7 @@ from numpy import arange, zeros, array, dot, sqrt, cos, sin, eye, pi, exp, \
                   allclose
 
 from numpy.testing import *
-from scipy.integrate import odeint, ode, complex_ode
+from scipy.integrate import odeint, ode, complex_ode, ode_ensemble
 
 #------------------------------------------------------------------------------
 # Test ODE integrators
@@ -134,6 +134,96 @@ class TestComplexOde(TestCase):
             if hasattr(problem, 'jac'): continue
             self._do_problem(problem, 'dop853')
 
+class TestDenseOutput(TestCase):
+    """
+    Check ode.integrate_dense
+    """
+    def test_dense(self):
+        t = numpy.linspace(0, 3, 31)
+        for integrator in ['dopri5', 'dop853']:
+            ig = ode(lambda t, y, k: [y[1], -k*y[0]])
+            ig.set_integrator(integrator, rtol=1e-10)
+            ig.set_initial_value([1.0, 0.0], t=0.0).set_f_params(4.0)
+            dense = ig.integrate_dense(3.0)
+            assert ig.successful()
+            assert_equal(ig.t, 3.0)
+            assert_almost_equal(ig.y[0], cos(6), decimal=9)
+            assert_equal(dense(t).shape, (31, 2))
+            assert_equal(dense(1.0).shape, (2,))
+            assert allclose(dense(t)[:,0], cos(2*t), atol=1e-8)
+            assert_equal(dense.ts[0], 0.0)
+            # backwards
+            dense = ig.integrate_dense(0.0)
+            assert allclose(dense(t)[:,0], cos(2*t), atol=1e-8)
+
+    def test_complex(self):
+        t = numpy.linspace(0, 2, 21)
+        ig = complex_ode(lambda t, y: 1j*y).set_integrator('dopri5')
+        ig.set_initial_value([1.0], t=0.0)
+        dense = ig.integrate_dense(2.0)
+        assert allclose(dense(t)[:,0], exp(1j*t), atol=1e-6)
+
+    def test_unsupported(self):
+        ig = ode(lambda t, y: -y).set_integrator('vode')
+        ig.set_initial_value([1.0], t=0.0)
+        assert_raises(ValueError, ig.integrate_dense, 1.0)
+
+def oscillator(t, y, c):
+    return [y[1], -c*y[1] - y[0]]
+
+def oscillators(t, y, c):
+    return numpy.hstack((y[:,1:], -c*y[:,1:] - y[:,:1]))
+
+def damped(t, c):
+    """Solution of oscillator for y(0) = [1, 0] and c < 2"""
+    w = sqrt(1 - c**2/4)
+    return exp(-c*t/2)*(cos(w*t) + c/(2*w)*sin(w*t))
+
+class SerialMap(object):
+    def __init__(self):
+        self.calls = 0
+
+    def map(self, function, sequence):
+        self.calls += 1
+        return [function(x) for x in sequence]
+
+class TestOdeEnsemble(TestCase):
+    """
+    Check integrate.ode_ensemble
+    """
+    def setUp(self):
+        self.c = numpy.linspace(0.1, 1.5, 50)[:,numpy.newaxis]
+        self.t = numpy.linspace(0, 10, 21)
+        self.exact = damped(self.t, self.c)
+
+    def test_members(self):
+        for integrator in ['dopri5', 'vode']:
+            ys, success = ode_ensemble(oscillator, [1.0, 0.0], self.t,
+                                       self.c, integrator=integrator,
+                                       rtol=1e-8)
+            assert_equal(ys.shape, (50, 21, 2))
+            assert success.all()
+            assert allclose(ys[:,:,0], self.exact, atol=1e-6)
+
+    def test_vectorized(self):
+        for integrator, params in [('dopri5', {}), ('dop853', {}),
+                                   ('vode', {}), ('vode', {'method':'bdf'})]:
+            ys, success = ode_ensemble(oscillators, [1.0, 0.0], self.t,
+                                       self.c, integrator=integrator,
+                                       vectorized=True, chunksize=20,
+                                       rtol=1e-8, **params)
+            assert success.all()
+            assert allclose(ys[:,:,0], self.exact, atol=1e-6), integrator
+
+    def test_initial_values(self):
+        y0 = numpy.vstack((numpy.linspace(-1, 1, 10), numpy.zeros(10))).T
+        mapper = SerialMap()
+        ys, success = ode_ensemble(oscillator, y0, self.t, [0.5],
+                                   chunksize=3, backend=mapper)
+        assert_equal(mapper.calls, 1)
+        assert_array_equal(ys[:,0], y0)
+        assert allclose(ys[:,:,0], y0[:,:1]*damped(self.t, 0.5), atol=1e-5)
+
 #------------------------------------------------------------------------------
 # Test problems
 #------------------------------------------------------------------------------
@@ -35,6 +35,7 @@ from interpolation import *
 from measurements import *
 from morphology import *
 from io import *
+from slabs import *
 
 from info import __doc__
 __version__ = '2.0'
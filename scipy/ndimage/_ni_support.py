@@ -28,8 +28,13 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import sys
 import types
 import numpy
+try:
+    import threading
+except ImportError:
+    threading = None
 
 def _extend_mode_to_code(mode):
     """Convert an extension mode to the corresponding integer code.
@@ -62,6 +67,46 @@ def _normalize_sequence(input, rank, array_type = None):
             raise RuntimeError, err
     return normalized
 
+def _extend_indices(length, size, origin, mode):
+    """Indices of the elements of an axis extended for a filter.
+
+    Returns the index into an axis of the given length for each of the
+    length + size - 1 positions covered by a filter of the given size and
+    origin, applying the boundary conditions of the extension mode code in
+    the same way as the C filters.  Positions that take the constant value
+    are given the index -1.
+    """
+    cc = numpy.arange(length + size - 1) - (size // 2 + origin)
+    before, after = cc < 0, cc >= length
+    if mode == 4:
+        cc[before | after] = -1
+    elif mode == 0 or length <= 1:
+        cc = numpy.clip(cc, 0, length - 1)
+    elif mode == 1:
+        cc[before] += length * (-cc[before] // length)
+        cc[cc < 0] += length
+        cc[after] -= length * (cc[after] // length)
+    elif mode == 2:
+        sz2 = 2 * length
+        far = cc < -sz2
+        cc[far] += sz2 * (-cc[far] // sz2)
+        cc[before] = numpy.where(cc[before] < -length, cc[before] + sz2,
+                                 -cc[before] - 1)
+        cc[after] -= sz2 * (cc[after] // sz2)
+        cc[after] = numpy.where(cc[after] >= length, sz2 - cc[after] - 1,
+                                cc[after])
+    elif mode == 3:
+        sz2 = 2 * length - 2
+        cc[before] += sz2 * (-cc[before] // sz2)
+        cc[before] = numpy.where(cc[before] <= 1 - length, cc[before] + sz2,
+                                 -cc[before])
+        cc[after] -= sz2 * (cc[after] // sz2)
+        cc[after] = numpy.where(cc[after] >= length, sz2 - cc[after],
+                                cc[after])
+    else:
+        raise RuntimeError, 'boundary mode not supported'
+    return cc
+
 import warnings
 def _get_output(output, input, output_type = None, shape = None):
     if output_type is not None:
@@ -98,3 +143,136 @@ def _check_axis(axis, rank):
     if axis < 0 or axis >= rank:
         raise ValueError, 'invalid axis'
     return axis
+
+# Support for running the filters on several threads.  The C filter
+# functions release the GIL while they loop over the array, so the tiles
+# of an array can be filtered at the same time by separate threads.
+# number of threads used by the filters, see filters.set_num_threads:
+_num_threads = 1
+
+# do not split arrays in tiles with fewer elements than this:
+_min_tile_size = 65536
+
+def _split_range(length, pieces):
+    """Split range(length) in the given number of contiguous pieces.
+    """
+    bounds = [(length * ii) // pieces for ii in range(pieces + 1)]
+    return zip(bounds[:-1], bounds[1:])
+
+def _run_threads(jobs):
+    """Call each of the jobs on its own thread and wait for all of them.
+
+    The first exception raised by a job is raised again in the calling
+    thread.
+    """
+    errors = []
+    def run(job):
+        try:
+            job()
+        except:
+            errors.append(sys.exc_info())
+    threads = [threading.Thread(target = run, args = (job,))
+               for job in jobs[1:]]
+    for thread in threads:
+        thread.start()
+    run(jobs[0])
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0][0], errors[0][1], errors[0][2]
+
+def _tile_count(input, length, min_length = 1):
+    """Return the number of tiles to use for splitting an axis of input.
+    """
+    if threading is None or _num_threads < 2:
+        return 1
+    return max(1, min(_num_threads, input.size // _min_tile_size,
+                      length // max(min_length, 1)))
+
+def _index(rank, axis, start, stop):
+    index = [slice(None)] * rank
+    index[axis] = slice(start, stop)
+    return tuple(index)
+
+def _filter_tiled1d(function, input, output, axis):
+    """Call function(input, output) for a filter working along axis.
+
+    The lines along axis are filtered independently of each other, so
+    the array is split along another axis and the tiles are filtered on
+    separate threads, writing directly into the output.  The result is
+    identical to a single call of function on the whole array.
+    """
+    axes = [ii for ii in range(input.ndim) if ii != axis]
+    if not axes:
+        function(input, output)
+        return
+    tile_axis = axes[0]
+    for ii in axes:
+        if input.shape[ii] > input.shape[tile_axis]:
+            tile_axis = ii
+    tiles = _tile_count(input, input.shape[tile_axis])
+    if tiles < 2:
+        function(input, output)
+        return
+    def job(start, stop):
+        index = _index(input.ndim, tile_axis, start, stop)
+        return lambda: function(input[index], output[index])
+    _run_threads([job(start, stop) for start, stop in
+                  _split_range(input.shape[tile_axis], tiles)])
+
+def _filter_tiled(function, input, output, fshape, origins, mode):
+    """Call function(input, output) for a filter with the given footprint.
+
+    The array is split along one axis in tiles that are filtered on
+    separate threads.  If the footprint has length one and no origin
+    along an axis, the array is split along that axis and the tiles are
+    written directly into the output.  Otherwise each tile is extended by the rows that the
+    footprint reaches into neighbouring tiles, filtered into a temporary
+    array, and only its inner part is copied to the output.  The result
+    is identical to a single call of function on the whole array.
+    """
+    # the C filters read the neighbours of an element after writing to
+    # the output, so an input that is also the output is never split:
+    if input.ndim == 0 or numpy.may_share_memory(input, output):
+        function(input, output)
+        return
+    # an origin shifts the footprint off its own row, so such an axis
+    # needs a halo like any other:
+    flat_axes = [ii for ii in range(input.ndim)
+                 if fshape[ii] == 1 and origins[ii] == 0]
+    if flat_axes:
+        tile_axis = flat_axes[0]
+        for ii in flat_axes:
+            if input.shape[ii] > input.shape[tile_axis]:
+                tile_axis = ii
+        lo = hi = 0
+        tiles = _tile_count(input, input.shape[tile_axis])
+    else:
+        tile_axis = 0
+        lo = fshape[0] // 2 + origins[0]
+        hi = max(fshape[0] - 1 - lo, 0)
+        lo = max(lo, 0)
+        # with the wrap mode the borders of a tile are not the borders of
+        # the array:
+        if mode == _extend_mode_to_code('wrap'):
+            tiles = 1
+        else:
+            tiles = _tile_count(input, input.shape[0], fshape[0])
+    if tiles < 2:
+        function(input, output)
+        return
+    size = input.shape[tile_axis]
+    def job(start, stop):
+        index = _index(input.ndim, tile_axis, start, stop)
+        if lo == 0 and hi == 0:
+            return lambda: function(input[index], output[index])
+        first, last = max(start - lo, 0), min(stop + hi, size)
+        def run():
+            tile = input[_index(input.ndim, tile_axis, first, last)]
+            result = numpy.zeros(tile.shape, dtype = output.dtype)
+            function(tile, result)
+            output[index] = result[_index(input.ndim, tile_axis,
+                                          start - first, stop - first)]
+        return run
+    _run_threads([job(start, stop) for start, stop in
+                  _split_range(size, tiles)])
@@ -92,6 +92,35 @@ docdict = {
 
 docfiller = doccer.filldoc(docdict)
 
+def set_num_threads(num_threads):
+    """Set the number of threads used by the filters.
+
+    The correlation, convolution, uniform, minimum, maximum, rank,
+    percentile and median filters, and the filters built on them such as
+    the gaussian filters, split large arrays in tiles that are filtered
+    at the same time on the given number of threads.  The results are
+    identical to filtering on a single thread.
+
+    Parameters
+    ----------
+    num_threads : integer
+        number of threads to use. The default of 1 filters arrays in a
+        single call, without starting any threads.
+    """
+    num_threads = int(num_threads)
+    if num_threads < 1:
+        raise ValueError, 'number of threads must be at least 1'
+    _ni_support._num_threads = num_threads
+
+
+def get_num_threads():
+    """Return the number of threads used by the filters.
+
+    See set_num_threads.
+    """
+    return _ni_support._num_threads
+
+
 @docfiller
 def correlate1d(input, weights, axis = -1, output = None, mode = "reflect",
                 cval = 0.0, origin = 0):
@@ -125,8 +154,9 @@ def correlate1d(input, weights, axis = -1, output = None, mode = "reflect",
         (len(weights) // 2 + origin > len(weights))):
         raise ValueError, 'invalid origin'
     mode = _ni_support._extend_mode_to_code(mode)
-    _nd_image.correlate1d(input, weights, axis, output, mode, cval,
-                          origin)
+    _ni_support._filter_tiled1d(lambda input, output:
+        _nd_image.correlate1d(input, weights, axis, output, mode, cval,
+                              origin), input, output, axis)
     return return_value
 
 
@@ -492,7 +522,9 @@ def _correlate_or_convolve(input, weights, output, mode, cval, origin,
         weights = weights.copy()
     output, return_value = _ni_support._get_output(output, input)
     mode = _ni_support._extend_mode_to_code(mode)
-    _nd_image.correlate(input, weights, output, mode, cval, origins)
+    _ni_support._filter_tiled(lambda input, output:
+        _nd_image.correlate(input, weights, output, mode, cval, origins),
+        input, output, weights.shape, origins, mode)
     return return_value
 
 
@@ -600,8 +632,9 @@ def uniform_filter1d(input, size, axis = -1, output = None,
     if (size // 2 + origin < 0) or (size // 2 + origin > size):
         raise ValueError, 'invalid origin'
     mode = _ni_support._extend_mode_to_code(mode)
-    _nd_image.uniform_filter1d(input, size, axis, output, mode, cval,
-                               origin)
+    _ni_support._filter_tiled1d(lambda input, output:
+        _nd_image.uniform_filter1d(input, size, axis, output, mode, cval,
+                                   origin), input, output, axis)
     return return_value
 
 
@@ -676,8 +709,9 @@ def minimum_filter1d(input, size, axis = -1, output = None,
     if (size // 2 + origin < 0) or (size // 2 + origin > size):
         raise ValueError, 'invalid origin'
     mode = _ni_support._extend_mode_to_code(mode)
-    _nd_image.min_or_max_filter1d(input, size, axis, output, mode, cval,
-                                  origin, 1)
+    _ni_support._filter_tiled1d(lambda input, output:
+        _nd_image.min_or_max_filter1d(input, size, axis, output, mode, cval,
+                                      origin, 1), input, output, axis)
     return return_value
 
 
@@ -710,8 +744,9 @@ def maximum_filter1d(input, size, axis = -1, output = None,
     if (size // 2 + origin < 0) or (size // 2 + origin > size):
         raise ValueError, 'invalid origin'
     mode = _ni_support._extend_mode_to_code(mode)
-    _nd_image.min_or_max_filter1d(input, size, axis, output, mode, cval,
-                                  origin, 0)
+    _ni_support._filter_tiled1d(lambda input, output:
+        _nd_image.min_or_max_filter1d(input, size, axis, output, mode, cval,
+                                      origin, 0), input, output, axis)
     return return_value
 
 
@@ -774,8 +809,10 @@ def _min_or_max_filter(input, size, footprint, structure, output, mode,
             if not structure.flags.contiguous:
                 structure = structure.copy()
         mode = _ni_support._extend_mode_to_code(mode)
-        _nd_image.min_or_max_filter(input, footprint, structure, output,
-                                    mode, cval, origins, minimum)
+        _ni_support._filter_tiled(lambda input, output:
+            _nd_image.min_or_max_filter(input, footprint, structure, output,
+                                        mode, cval, origins, minimum),
+            input, output, footprint.shape, origins, mode)
     return return_value
 
 
@@ -815,6 +852,83 @@ def maximum_filter(input, size = None, footprint = None, output = None,
                               cval, origin, 0)
 
 
+# the sliding histogram is used for footprints of at least this size:
+_histogram_min_size = 25
+
+# maximum number of distinct values handled by the sliding histogram:
+_histogram_max_bins = 1 << 20
+
+def _rank_filter_histogram(input, rank, fshape, output, mode, cval,
+                           origins):
+    """Rank filter with a rectangular footprint using a sliding histogram.
+
+    The values of the input are replaced by codes that number them in
+    increasing order, and the input is extended at the borders according
+    to the mode.  For each element the C code finds the code of given rank
+    in a histogram of the window, that is updated as the window slides
+    along the last axis.  Returns False if the input has too many distinct
+    values, or values that cannot be ordered.
+    """
+    if mode == 4 and numpy.array(cval).astype(input.dtype) != cval:
+        # the C code compares the unconverted constant with the values,
+        # that cannot be done on their codes
+        return False
+    if input.dtype.kind == 'b' or (input.dtype.kind in 'iu' and
+                                   input.dtype.itemsize <= 2):
+        # small integers are their own codes, apart from an offset:
+        data = input.astype(numpy.int32)
+        low, high = data.min(), data.max()
+        if mode == 4:
+            border = int(cval)
+            low, high = min(low, border), max(high, border)
+            border -= low
+        values = numpy.arange(low, high + 1).astype(input.dtype)
+        codes = data - low
+    elif input.dtype.kind in 'iuf':
+        data = input.ravel()
+        if mode == 4:
+            data = numpy.concatenate((data, numpy.array([cval], input.dtype)))
+        if input.dtype.kind == 'f' and numpy.isnan(data).any():
+            return False
+        order = data.argsort()
+        data = data[order]
+        first = numpy.concatenate(([True], data[1:] != data[:-1]))
+        values = data[first]
+        if len(values) > _histogram_max_bins:
+            return False
+        codes = numpy.empty(len(data), numpy.int32)
+        codes[order] = numpy.cumsum(first) - 1
+        if mode == 4:
+            border = codes[-1]
+            codes = codes[:-1]
+        codes = codes.reshape(input.shape)
+    else:
+        return False
+    indices = []
+    for length, size, origin in zip(input.shape, fshape, origins):
+        indices.append(_ni_support._extend_indices(length, size, origin,
+                                                   mode))
+    extended = codes[numpy.ix_(*[numpy.maximum(ii, 0) for ii in indices])]
+    extended = extended.astype(numpy.uint32)
+    if mode == 4:
+        for axis in range(input.ndim):
+            index = [slice(None)] * input.ndim
+            index[axis] = numpy.flatnonzero(indices[axis] < 0)
+            extended[tuple(index)] = border
+    result = numpy.zeros(input.shape, numpy.uint32)
+    # the tiles of the output along the first axis are independent:
+    tiles = _ni_support._tile_count(input, input.shape[0], fshape[0])
+    def job(start, stop):
+        return lambda: _nd_image.rank_filter_histogram(
+            extended[start:stop + fshape[0] - 1], fshape, len(values), rank,
+            result[start:stop])
+    _ni_support._run_threads([job(start, stop) for start, stop in
+                              _ni_support._split_range(input.shape[0],
+                                                       tiles)])
+    output[...] = values[result]
+    return True
+
+
 @docfiller
 def _rank_filter(input, rank, size = None, footprint = None, output = None,
      mode = "reflect", cval = 0.0, origin = 0, operation = 'rank'):
@@ -863,8 +977,16 @@ def _rank_filter(input, rank, size = None, footprint = None, output = None,
     else:
         output, return_value = _ni_support._get_output(output, input)
         mode = _ni_support._extend_mode_to_code(mode)
-        _nd_image.rank_filter(input, rank, footprint, output, mode, cval,
-                              origins)
+        if (input.ndim > 0 and input.size > 0 and
+            filter_size >= _histogram_min_size and
+            filter_size == footprint.size and
+            _rank_filter_histogram(input, rank, footprint.shape, output,
+                                   mode, cval, origins)):
+            return return_value
+        _ni_support._filter_tiled(lambda input, output:
+            _nd_image.rank_filter(input, rank, footprint, output, mode, cval,
+                                  origins),
+            input, output, footprint.shape, origins, mode)
         return return_value
 
 
@@ -926,6 +1048,14 @@ def median_filter(input, size = None, footprint = None, output = None,
         The ``origin`` parameter controls the placement of the filter.
         Default 0
 
+    Notes
+    -----
+    For rectangular footprints of at least 25 elements, the median is
+    found with a histogram of the window that is updated as the window
+    slides along the last axis, so the cost per element grows with the
+    size of a cross-section of the footprint instead of the whole
+    footprint.  This also applies to rank_filter and percentile_filter.
+
     """
     return _rank_filter(input, 0, size, footprint, output, mode, cval,
                         origin, 'median')
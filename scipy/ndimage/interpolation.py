@@ -55,7 +55,9 @@ def spline_filter1d(input, order = 3, axis = -1, output = numpy.float64,
         output[...] = numpy.array(input)
     else:
         axis = _ni_support._check_axis(axis, input.ndim)
-        _nd_image.spline_filter1d(input, order, axis, output)
+        _ni_support._filter_tiled1d(lambda input, output:
+            _nd_image.spline_filter1d(input, order, axis, output),
+            input, output, axis)
     return return_value
 
 
@@ -84,10 +86,69 @@ def spline_filter(input, order = 3, output = numpy.float64,
         output[...] = input[...]
     return return_value
 
+def _vectorized_transform(filtered, mapping, output, order, mode, cval,
+                          extra_arguments, extra_keywords, block_size):
+    """Apply a vectorized mapping to blocks of the output.
+
+    The output elements are processed in blocks of at most block_size
+    elements in C order.  The coordinates of a block are passed to the
+    mapping as an array of shape (output rank, block length), and the
+    input coordinates it returns are interpolated as in map_coordinates.
+    """
+    shape = output.shape
+    size = output.size
+    strides = [1] * len(shape)
+    for ii in range(len(shape) - 2, -1, -1):
+        strides[ii] = strides[ii + 1] * shape[ii + 1]
+    if output.flags.c_contiguous:
+        flat = output.reshape(-1)
+    else:
+        flat = None
+    for start in range(0, size, block_size):
+        stop = min(start + block_size, size)
+        index = numpy.arange(start, stop)
+        coordinates = numpy.array([(index // stride) % dim for stride, dim
+                                   in zip(strides, shape)])
+        coordinates = mapping(coordinates, *extra_arguments,
+                              **extra_keywords)
+        coordinates = numpy.asarray(coordinates, dtype = numpy.float64)
+        if coordinates.shape != (filtered.ndim, stop - start):
+            raise RuntimeError, 'invalid shape for coordinate array'
+        if flat is not None:
+            block = flat[start:stop]
+        else:
+            block = numpy.zeros(stop - start, dtype = output.dtype)
+        _nd_image.geometric_transform(filtered, None, coordinates, None,
+                            None, block, order, mode, cval, None, None)
+        if flat is None:
+            output.flat[start:stop] = block
+
+
+def _map_coordinates_tiled(filtered, coordinates, output, order, mode,
+                           cval):
+    """Interpolate filtered at the given coordinates into output.
+
+    The output is split along its first axis in tiles that are
+    interpolated on separate threads, as set by set_num_threads.
+    """
+    tiles = _ni_support._tile_count(output, output.shape[0])
+    if tiles < 2:
+        _nd_image.geometric_transform(filtered, None, coordinates, None,
+                            None, output, order, mode, cval, None, None)
+        return
+    def job(start, stop):
+        return lambda: _nd_image.geometric_transform(filtered, None,
+                            coordinates[:, start:stop], None, None,
+                            output[start:stop], order, mode, cval, None, None)
+    _ni_support._run_threads([job(start, stop) for start, stop in
+                    _ni_support._split_range(output.shape[0], tiles)])
+
+
 def geometric_transform(input, mapping, output_shape = None,
                         output_type = None, output = None, order = 3,
                         mode = 'constant', cval = 0.0, prefilter = True,
-                        extra_arguments = (), extra_keywords = {}):
+                        extra_arguments = (), extra_keywords = {},
+                        vectorized = False, block_size = 65536):
     """Apply an arbritrary geometric transform.
 
     The given mapping function is used to find, for each point in the
@@ -108,6 +169,14 @@ def geometric_transform(input, mapping, output_shape = None,
     extra_keywords arguments can be used to provide extra arguments
     and keywords that are passed to the mapping function at each call.
 
+    If vectorized is True, mapping is called once for each block of at
+    most block_size output points instead of once per point.  It is then
+    passed an integer array of shape (output rank, n) holding the
+    coordinates of n output points, and must return an array of shape
+    (input rank, n) with the corresponding input coordinates.  The output
+    points are passed in C order, and block_size bounds the size of the
+    coordinate arrays held in memory.
+
     Example
     -------
     >>> a = arange(12.).reshape((4,3))
@@ -115,6 +184,14 @@ def geometric_transform(input, mapping, output_shape = None,
     ...     return (output_coordinates[0]-0.5, output_coordinates[1]-0.5)
     ...
     >>> print geometric_transform(a,shift_func)
+    array([[ 0.    ,  0.    ,  0.    ],
+           [ 0.    ,  1.3625,  2.7375],
+           [ 0.    ,  4.8125,  6.1875],
+           [ 0.    ,  8.2625,  9.6375]])
+    >>> def vectorized_shift_func(output_coordinates):
+    ...     return output_coordinates - 0.5
+    ...
+    >>> print geometric_transform(a, vectorized_shift_func, vectorized=True)
     array([[ 0.    ,  0.    ,  0.    ],
            [ 0.    ,  1.3625,  2.7375],
            [ 0.    ,  4.8125,  6.1875],
@@ -136,7 +213,13 @@ def geometric_transform(input, mapping, output_shape = None,
         filtered = input
     output, return_value = _ni_support._get_output(output, input,
                                         output_type, shape = output_shape)
-    _nd_image.geometric_transform(filtered, mapping, None, None, None,
+    if vectorized:
+        if block_size < 1:
+            raise ValueError, 'block_size must be at least 1'
+        _vectorized_transform(filtered, mapping, output, order, mode, cval,
+                              extra_arguments, extra_keywords, block_size)
+    else:
+        _nd_image.geometric_transform(filtered, mapping, None, None, None,
                output, order, mode, cval, extra_arguments, extra_keywords)
     return return_value
 
@@ -240,8 +323,7 @@ def map_coordinates(input, coordinates, output_type = None, output = None,
         filtered = input
     output, return_value = _ni_support._get_output(output, input,
                                         output_type, shape = output_shape)
-    _nd_image.geometric_transform(filtered, None, coordinates, None, None,
-               output, order, mode, cval, None, None)
+    _map_coordinates_tiled(filtered, coordinates, output, order, mode, cval)
     return return_value
 
 
@@ -475,3 +557,166 @@ def rotate(input, angle, axes = (1, 0), reshape = True,
                 else:
                     coordinates[jj] = 0
     return return_value
+
+
+# the methods of SplineInterpolator take arguments named after these:
+_shift = shift
+_zoom = zoom
+
+class SplineInterpolator(object):
+    """Spline interpolation of an array with cached spline coefficients.
+
+    The functions map_coordinates, affine_transform, shift, zoom, rotate
+    and geometric_transform filter their input with spline_filter on
+    every call before interpolating it.  A SplineInterpolator computes the
+    spline coefficients of its array once for each spline order and keeps
+    them, so that repeated transforms of the same array only pay for the
+    interpolation.  Its methods take the same arguments as the functions
+    of the same name, without input and prefilter, and return identical
+    results.
+
+    Parameters
+    ----------
+    input : array_like
+        the array to interpolate.
+    order : int, optional
+        the default order of the spline interpolation, in the range 0-5.
+        Default is 3.
+    mode : str, optional
+        the default mode for points outside the boundaries of the input
+        ('constant', 'nearest', 'reflect' or 'wrap').  Default is
+        'constant'.
+    cval : scalar, optional
+        the default value used for points outside the boundaries of the
+        input if mode is 'constant'.  Default is 0.0.
+
+    Notes
+    -----
+    The coefficients are stored as float64 arrays of the shape of the
+    input, one for each order used.  The spline filter and the
+    interpolation by map_coordinates are split over the threads set with
+    set_num_threads.
+
+    Examples
+    --------
+    >>> interpolator = SplineInterpolator(image, order=3)
+    >>> rotated = [interpolator.rotate(angle, reshape=False)
+    ...            for angle in range(0, 360, 10)]
+    >>> values = interpolator.map_coordinates([[0.5, 2.5], [1.5, 3.0]])
+
+    """
+    def __init__(self, input, order = 3, mode = 'constant', cval = 0.0):
+        if order < 0 or order > 5:
+            raise RuntimeError, 'spline order not supported'
+        input = numpy.asarray(input)
+        if numpy.iscomplexobj(input):
+            raise TypeError, 'Complex type not supported'
+        if input.ndim < 1:
+            raise RuntimeError, 'input and output rank must be > 0'
+        _extend_mode_to_code(mode)
+        self.input = input
+        self.order = order
+        self.mode = mode
+        self.cval = cval
+        self._coefficients = {}
+
+    def coefficients(self, order = None, axes = None):
+        """Return the spline coefficients of the array.
+
+        The coefficients are those computed by spline_filter for the
+        given order (the default order if None), filtering only along the
+        given axes if axes is not None.  They are computed on the first
+        call and returned from the cache afterwards.  For orders 0 and 1
+        the array itself is returned.
+        """
+        if order is None:
+            order = self.order
+        if order < 0 or order > 5:
+            raise RuntimeError, 'spline order not supported'
+        if order < 2:
+            return self.input
+        if axes is None:
+            axes = range(self.input.ndim)
+        axes = [_ni_support._check_axis(axis, self.input.ndim)
+                for axis in axes]
+        axes.sort()
+        key = (order, tuple(axes))
+        if key not in self._coefficients:
+            filtered = numpy.zeros(self.input.shape, dtype = numpy.float64)
+            input = self.input
+            for axis in axes:
+                spline_filter1d(input, order, axis, output = filtered)
+                input = filtered
+            self._coefficients[key] = filtered
+        return self._coefficients[key]
+
+    def clear(self):
+        """Remove all cached spline coefficients."""
+        self._coefficients = {}
+
+    def _defaults(self, output, order, mode, cval):
+        if output is None:
+            output = self.input.dtype.type
+        if order is None:
+            order = self.order
+        if mode is None:
+            mode = self.mode
+        if cval is None:
+            cval = self.cval
+        return output, order, mode, cval
+
+    def map_coordinates(self, coordinates, output = None, order = None,
+                        mode = None, cval = None):
+        """Map the array to new coordinates, see map_coordinates."""
+        output, order, mode, cval = self._defaults(output, order, mode, cval)
+        return map_coordinates(self.coefficients(order), coordinates,
+                               None, output, order, mode, cval, False)
+
+    def geometric_transform(self, mapping, output_shape = None,
+                            output = None, order = None, mode = None,
+                            cval = None, extra_arguments = (),
+                            extra_keywords = {}, vectorized = False,
+                            block_size = 65536):
+        """Apply an arbitrary geometric transform, see
+        geometric_transform."""
+        output, order, mode, cval = self._defaults(output, order, mode, cval)
+        return geometric_transform(self.coefficients(order), mapping,
+                                   output_shape, None, output, order, mode,
+                                   cval, False, extra_arguments,
+                                   extra_keywords, vectorized, block_size)
+
+    def affine_transform(self, matrix, offset = 0.0, output_shape = None,
+                         output = None, order = None, mode = None,
+                         cval = None):
+        """Apply an affine transformation, see affine_transform."""
+        output, order, mode, cval = self._defaults(output, order, mode, cval)
+        return affine_transform(self.coefficients(order), matrix, offset,
+                                output_shape, None, output, order, mode,
+                                cval, False)
+
+    def shift(self, shift, output = None, order = None, mode = None,
+              cval = None):
+        """Shift the array, see shift."""
+        output, order, mode, cval = self._defaults(output, order, mode, cval)
+        return _shift(self.coefficients(order), shift, None, output, order,
+                      mode, cval, False)
+
+    def zoom(self, zoom, output = None, order = None, mode = None,
+             cval = None):
+        """Zoom the array, see zoom."""
+        output, order, mode, cval = self._defaults(output, order, mode, cval)
+        return _zoom(self.coefficients(order), zoom, None, output, order,
+                     mode, cval, False)
+
+    def rotate(self, angle, axes = (1, 0), reshape = True, output = None,
+               order = None, mode = None, cval = None):
+        """Rotate the array, see rotate."""
+        output, order, mode, cval = self._defaults(output, order, mode, cval)
+        # rotate interpolates each plane of the rotation separately, so
+        # the coefficients are only filtered along the axes of the plane:
+        if self.input.ndim > 2:
+            filtered = self.coefficients(order, axes)
+        else:
+            filtered = self.coefficients(order)
+        return rotate(filtered, angle, axes, reshape, None, output, order,
+                      mode, cval, False)
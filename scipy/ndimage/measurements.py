@@ -443,6 +443,242 @@ def histogram(input, min, max, bins, labels = None, index = None):
         raise RuntimeError, 'min must be < max'
     return _nd_image.histogram(input, min, max, bins, labels, index)
 
+_statistics = ['count', 'sum', 'mean', 'variance', 'standard_deviation',
+               'minimum', 'maximum', 'minimum_position', 'maximum_position',
+               'center_of_mass']
+
+def _flat_to_coordinates(flat, shape):
+    """Convert an array of indices into the flattened array to an array
+    of coordinates with one row per index."""
+    coordinates = numpy.zeros((len(flat), len(shape)), dtype = numpy.intp)
+    for ii in range(len(shape) - 1, -1, -1):
+        coordinates[:, ii] = flat % shape[ii]
+        flat = flat // shape[ii]
+    return coordinates
+
+def _chunk_statistics(values, rows, start, n, wanted, shape):
+    """Calculate the statistics of one chunk of the flattened arrays.
+
+    values and rows are the values and the result rows of the elements
+    start to start + len(values) of the flattened input, where a row of
+    -1 marks elements that are not measured.  Returns a dict of partial
+    results that can be merged with those of other chunks.
+    """
+    partial = {}
+    partial['count'] = numpy.zeros(n, dtype = numpy.float64)
+    partial['sum'] = numpy.zeros(n, dtype = numpy.float64)
+    partial['m2'] = None
+    partial['minimum'] = None
+    partial['maximum'] = None
+    partial['minimum_position'] = None
+    partial['maximum_position'] = None
+    partial['moments'] = None
+    if 'variance' in wanted:
+        partial['m2'] = numpy.zeros(n, dtype = numpy.float64)
+    if 'minimum' in wanted or 'maximum' in wanted:
+        partial['minimum'] = numpy.zeros(n, dtype = numpy.float64)
+        partial['maximum'] = numpy.zeros(n, dtype = numpy.float64)
+        partial['minimum'][...] = numpy.inf
+        partial['maximum'][...] = -numpy.inf
+        partial['minimum_position'] = numpy.zeros(n, dtype = numpy.intp)
+        partial['maximum_position'] = numpy.zeros(n, dtype = numpy.intp)
+    if 'center_of_mass' in wanted:
+        partial['moments'] = numpy.zeros((n, len(shape)),
+                                         dtype = numpy.float64)
+    _nd_image.labeled_statistics(values, rows, start, shape,
+                partial['count'], partial['sum'], partial['m2'],
+                partial['minimum'], partial['maximum'],
+                partial['minimum_position'], partial['maximum_position'],
+                partial['moments'])
+    return partial
+
+def _merge_statistics(a, b):
+    """Merge the partial statistics b of a chunk into those of a."""
+    count = a['count'] + b['count']
+    if a['m2'] is not None:
+        delta = b['sum'] / numpy.maximum(b['count'], 1) - \
+                a['sum'] / numpy.maximum(a['count'], 1)
+        a['m2'] = a['m2'] + b['m2'] + delta ** 2 * a['count'] * \
+                  b['count'] / numpy.maximum(count, 1)
+    a['count'] = count
+    a['sum'] = a['sum'] + b['sum']
+    if a['minimum'] is not None:
+        # for equal values the position found first is kept:
+        better = b['minimum'] < a['minimum']
+        a['minimum'] = numpy.where(better, b['minimum'], a['minimum'])
+        a['minimum_position'] = numpy.where(better, b['minimum_position'],
+                                            a['minimum_position'])
+        better = b['maximum'] > a['maximum']
+        a['maximum'] = numpy.where(better, b['maximum'], a['maximum'])
+        a['maximum_position'] = numpy.where(better, b['maximum_position'],
+                                            a['maximum_position'])
+    if a['moments'] is not None:
+        a['moments'] = a['moments'] + b['moments']
+    return a
+
+def labeled_statistics(input, labels = None, index = None,
+                       statistics = None):
+    """Calculate several statistics of labeled regions in a single pass.
+
+    The statistics that are computed separately by sum, mean, variance,
+    standard_deviation, minimum, maximum, minimum_position,
+    maximum_position and center_of_mass are computed together for all
+    requested labels, in one pass over the input and the labels.
+
+    Parameters
+    ----------
+    input : array_like
+        the values to measure.
+    labels : array_like of integers, optional
+        labels of the elements of input, of the same shape as input.
+        Labels of any integer type are supported.  If None, all elements
+        of input are measured as a single region with label 1.
+    index : int or sequence of ints, optional
+        the labels of the regions to measure.  If None, every positive
+        label that occurs in labels is measured as a region of its own,
+        unlike the separate functions, that measure all of them together.
+    statistics : sequence of strings, optional
+        the statistics to compute, from 'count', 'sum', 'mean',
+        'variance', 'standard_deviation', 'minimum', 'maximum',
+        'minimum_position', 'maximum_position' and 'center_of_mass'.  By
+        default all of them are computed.
+
+    Returns
+    -------
+    result : structured array
+        one record per measured label, with a 'label' field and a field
+        for each requested statistic.  Positions and centers of mass
+        have one element per dimension of input.  Statistics of labels
+        that do not occur in labels follow those of the separate
+        functions: a count of zero, zero minimum, maximum and positions,
+        and a NaN mean.
+
+    Notes
+    -----
+    The variance is the sample variance, as computed by variance.  Large
+    arrays are split into chunks that are measured on separate threads,
+    as set with set_num_threads, and the partial results are merged.
+
+    Examples
+    --------
+    >>> result = labeled_statistics(image, labels, statistics=['count',
+    ...                             'mean', 'maximum_position'])
+    >>> result['mean'][result['count'] > 100]
+
+    """
+    if statistics is None:
+        statistics = _statistics
+    for name in statistics:
+        if name not in _statistics:
+            raise ValueError, 'unknown statistic: %s' % name
+    wanted = list(statistics)
+    if 'standard_deviation' in wanted:
+        wanted.append('variance')
+    if 'minimum_position' in wanted or 'maximum_position' in wanted:
+        wanted.append('minimum')
+    input = numpy.asarray(input)
+    if numpy.iscomplexobj(input):
+        raise TypeError, 'Complex type not supported'
+    if labels is None:
+        labels = numpy.ones(input.shape, dtype = numpy.int8)
+    else:
+        labels = numpy.asarray(labels)
+        labels = _broadcast(labels, input.shape)
+        if labels.shape != input.shape:
+            raise RuntimeError, 'input and labels shape are not equal'
+    if labels.dtype.kind not in 'iub':
+        raise TypeError, 'labels must be of integer type'
+    if input.ndim < 1:
+        raise RuntimeError, 'input must have at least one dimension'
+    values = input.ravel()
+    labels = labels.ravel()
+    # find the result row of every element, -1 if it is not measured:
+    high = 0
+    if labels.size > 0:
+        high = max(int(labels.max()), 0)
+    if index is None and 0 < labels.size and high <= labels.size:
+        # the labels that occur are found by counting, and the rows by a
+        # table lookup:
+        positive = numpy.where(labels > 0, labels, 0).astype(numpy.intp)
+        table = numpy.bincount(positive)
+        table[0] = 0
+        index = numpy.flatnonzero(table).astype(numpy.int64)
+        n = len(index)
+        table = numpy.zeros(high + 1, dtype = numpy.intp) - 1
+        table[index] = numpy.arange(n)
+        rows = table[positive]
+    else:
+        if index is None:
+            index = numpy.unique(labels[labels > 0])
+        index = numpy.asarray(index, dtype = numpy.int64).ravel()
+        n = len(index)
+        order = numpy.argsort(index, kind = 'mergesort')
+        sorted_index = index[order]
+        rows = numpy.zeros(labels.shape, dtype = numpy.intp) - 1
+        if n > 0:
+            found = numpy.searchsorted(sorted_index, labels)
+            found = numpy.minimum(found, n - 1)
+            match = sorted_index[found] == labels
+            rows[match] = order[found[match]]
+    # measure the chunks, on separate threads for large arrays:
+    tiles = _ni_support._tile_count(values, values.size)
+    chunks = _ni_support._split_range(values.size, tiles)
+    partials = [None] * len(chunks)
+    def job(ii, start, stop):
+        def run():
+            partials[ii] = _chunk_statistics(
+                numpy.asarray(values[start:stop], dtype = numpy.float64),
+                rows[start:stop], start, n, wanted, input.shape)
+        return run
+    jobs = [job(ii, start, stop) for ii, (start, stop) in enumerate(chunks)]
+    if len(jobs) > 1:
+        _ni_support._run_threads(jobs)
+    else:
+        jobs[0]()
+    result = partials[0]
+    for partial in partials[1:]:
+        result = _merge_statistics(result, partial)
+    # assemble the structured array:
+    count = result['count']
+    fields = [('label', numpy.int64)]
+    for name in statistics:
+        if name == 'count':
+            fields.append((name, numpy.intp))
+        elif name in ['minimum_position', 'maximum_position']:
+            fields.append((name, numpy.intp, (input.ndim,)))
+        elif name == 'center_of_mass':
+            fields.append((name, numpy.float64, (input.ndim,)))
+        else:
+            fields.append((name, numpy.float64))
+    output = numpy.zeros(n, dtype = fields)
+    output['label'] = index
+    empty = count == 0
+    err = numpy.seterr(divide = 'ignore', invalid = 'ignore')
+    try:
+        for name in statistics:
+            if name in ['count', 'sum']:
+                output[name] = result[name]
+            elif name == 'mean':
+                output[name] = result['sum'] / count
+            elif name in ['variance', 'standard_deviation']:
+                variance = numpy.where(count > 1, result['m2'] /
+                                       numpy.maximum(count - 1, 1), 0.0)
+                if name == 'variance':
+                    output[name] = variance
+                else:
+                    output[name] = numpy.sqrt(variance)
+            elif name in ['minimum', 'maximum']:
+                output[name] = numpy.where(empty, 0.0, result[name])
+            elif name in ['minimum_position', 'maximum_position']:
+                output[name] = _flat_to_coordinates(result[name],
+                                                    input.shape)
+            elif name == 'center_of_mass':
+                output[name] = result['moments'] / \
+                               result['sum'][:, numpy.newaxis]
+    finally:
+        numpy.seterr(**err)
+    return output
+
 def watershed_ift(input, markers, structure = None, output = None):
     """Apply watershed from markers using a iterative forest transform
     algorithm.
@@ -83,6 +83,82 @@ def generate_binary_structure(rank, connectivity):
     return numpy.asarray(output <= connectivity, dtype = bool)
 
 
+def _binary_erosion_frontier(input, structure, iterations, mask, output,
+                             border_value, origin, invert, cit):
+    """Iterate a binary erosion, revisiting only elements next to changes.
+
+    The first iteration is done over the whole array.  An element can
+    only change in the next iteration if one of the elements under its
+    structuring element has just changed, so each later iteration only
+    evaluates those elements, taken from the list of the elements that
+    changed in the previous one.  If that list gets too long, the whole
+    array is processed again instead.  The result is identical to
+    repeating the erosion over the whole array.
+    """
+    # offsets of the structuring element from the element it is
+    # centered on, as computed by the C erosion:
+    offsets = numpy.transpose(numpy.nonzero(structure))
+    offsets = offsets - [ss // 2 + oo for ss, oo in zip(structure.shape,
+                                                        origin)]
+    if len(offsets) > 0:
+        pad = numpy.abs(offsets).max(axis = 0)
+    else:
+        pad = numpy.zeros(input.ndim, int)
+    # the current state is held in a flat array padded on all sides with
+    # the border value, so that the neighbours of any element of the
+    # array can be read at fixed offsets:
+    shape = [ii + 2 * jj for ii, jj in zip(input.shape, pad)]
+    strides = numpy.ones(input.ndim, int)
+    for ii in range(input.ndim - 2, -1, -1):
+        strides[ii] = strides[ii + 1] * shape[ii + 1]
+    interior = tuple([slice(jj, jj + ii) for ii, jj in zip(input.shape,
+                                                             pad)])
+    state = numpy.zeros(shape, bool)
+    state[...] = bool(border_value)
+    active = numpy.zeros(shape, bool)
+    if mask is None:
+        active[interior] = True
+    else:
+        active[interior] = mask != 0
+    value = state.reshape(-1)
+    active = active.reshape(-1)
+    flat_offsets = numpy.dot(offsets, strides)
+
+    def flat_index(changed):
+        coordinates = numpy.transpose(numpy.nonzero(changed)) + pad
+        return numpy.dot(coordinates, strides)
+
+    def full_pass(current):
+        result = numpy.zeros(input.shape, bool)
+        _nd_image.binary_erosion(current, structure, mask, result,
+                                 border_value, origin, invert, cit, 0)
+        changed = flat_index(result != (current != 0))
+        state[interior] = result
+        return changed
+
+    changed = full_pass(input)
+    ii = 1
+    while len(changed) > 0 and (ii < iterations or iterations < 1):
+        if len(changed) * len(flat_offsets) > input.size:
+            changed = full_pass(state[interior].copy())
+        else:
+            # the elements that have a changed element under their
+            # structuring element:
+            candidates = changed[:, numpy.newaxis] - flat_offsets
+            candidates = numpy.unique(candidates.ravel())
+            candidates = candidates[active[candidates]]
+            neighbours = value[candidates[:, numpy.newaxis] + flat_offsets]
+            if invert:
+                result = neighbours.any(axis = 1)
+            else:
+                result = neighbours.all(axis = 1)
+            update = result != value[candidates]
+            changed = candidates[update]
+            value[changed] = result[update]
+        ii += 1
+    output[...] = state[interior]
+
+
 def _binary_erosion(input, structure, iterations, mask, output,
                     border_value, origin, invert, brute_force):
     input = numpy.asarray(input)
@@ -137,6 +213,10 @@ def _binary_erosion(input, structure, iterations, mask, output,
         _nd_image.binary_erosion2(output, structure, mask, iterations - 1,
                                   origin, invert, coordinate_list)
         return return_value
+    elif not brute_force and input.ndim > 0:
+        _binary_erosion_frontier(input, structure, iterations, mask, output,
+                                 border_value, origin, invert, cit)
+        return return_value
     else:
         tmp_in = numpy.zeros(input.shape, bool)
         if return_value is None:
@@ -169,7 +249,10 @@ def binary_erosion(input, structure = None, iterations = 1, mask = None,
     times. If iterations is less than 1, the erosion is repeated until
     the result does not change anymore. If a mask is given, only those
     elements with a true value at the corresponding mask element are
-    modified at each iteration.
+    modified at each iteration. Unless brute_force is true, the
+    iterations after the first only visit the elements next to those
+    that changed in the previous iteration, so that their cost depends
+    on the number of changes rather than on the size of the array.
     """
     return _binary_erosion(input, structure, iterations, mask,
                            output, border_value, origin, 0, brute_force)
@@ -185,7 +268,9 @@ def binary_dilation(input, structure = None, iterations = 1, mask = None,
     iterations is less than 1, the dilation is repeated until the
     result does not change anymore.  If a mask is given, only those
     elements with a true value at the corresponding mask element are
-    modified at each iteration.
+    modified at each iteration.  Unless brute_force is true, the
+    iterations after the first only visit the elements next to those
+    that changed in the previous iteration.
     """
     input = numpy.asarray(input)
     if structure is None:
@@ -0,0 +1,275 @@
+"""Out-of-core processing of large arrays in slabs
+
+The functions in this module read their input in slabs of consecutive
+rows along the first axis, process one slab at a time and write the
+results slab by slab to the output.  Combined with numpy.memmap for the
+input and the output, arrays that are much larger than the available
+memory can be filtered and labeled, using at most about max_memory bytes
+for the slabs held in memory.
+"""
+
+__all__ = ['slab_filter', 'slab_label']
+
+import numpy
+import _ni_support
+import measurements
+import morphology
+
+# default memory budget for the slabs, in bytes
+_max_memory = 256 * 1024 * 1024
+
+def _slab_rows(input, itemsize, depth, max_memory):
+    """Return the number of rows of input processed per slab.
+
+    itemsize is the number of bytes needed per element of a slab, and
+    depth the number of rows added on both sides of a slab.
+    """
+    row_bytes = itemsize
+    for ii in input.shape[1:]:
+        row_bytes *= ii
+    rows = max_memory // max(row_bytes, 1) - depth[0] - depth[1]
+    if rows < 1:
+        raise ValueError, 'max_memory too small to hold a single slab'
+    return rows
+
+def _slabs(length, rows):
+    """Return the (start, stop) rows of the slabs covering range(length).
+    """
+    return [(start, min(start + rows, length))
+            for start in range(0, length, rows)]
+
+def _flush(output):
+    if isinstance(output, numpy.memmap):
+        output.flush()
+
+def slab_filter(input, function, depth, output = None,
+                max_memory = None, extra_arguments = (),
+                extra_keywords = None):
+    """Apply a filter to an array in slabs along the first axis.
+
+    The input is read in slabs of consecutive rows along the first axis,
+    each extended with depth rows of the neighbouring slabs as a halo.
+    The filter is applied to each extended slab in memory, and the rows
+    of the slab without the halo are written to the output.  If depth is
+    at least the number of rows the filter reaches along the first axis,
+    the result is identical to filtering the whole array at once.
+
+    Parameters
+    ----------
+    input : array
+        input array, typically a numpy.memmap.
+    function : callable
+        filter applied to each extended slab as
+        ``function(slab, *extra_arguments, **extra_keywords)``, returning
+        an array of the shape of the slab, for instance
+        scipy.ndimage.gaussian_filter or scipy.ndimage.binary_erosion.
+    depth : integer or tuple of two integers
+        number of rows of the halo before and after each slab.  For a
+        gaussian filter this is int(4 * sigma + 0.5) along the first axis,
+        for a footprint of size n it is n // 2, and for morphology with k
+        iterations of a structure of size n it is k * (n // 2).
+    output : array or dtype, optional
+        array in which to store the result, typically a numpy.memmap.  By
+        default an array in memory is allocated.
+    max_memory : integer, optional
+        maximum number of bytes of a slab and its result held in memory.
+        Default is 256MB.
+    extra_arguments : sequence, optional
+        extra positional arguments passed to function.
+    extra_keywords : dict, optional
+        extra keyword arguments passed to function.
+
+    Returns
+    -------
+    output : array
+        the filtered array, or None if output was given as an array.
+
+    Notes
+    -----
+    The borders of the slabs are borders of the array only along the
+    first axis, so the 'wrap' mode must not be used along that axis.
+
+    Examples
+    --------
+    >>> a = numpy.memmap('in.dat', dtype=numpy.float32, mode='r',
+    ...                  shape=(2048, 2048, 2048))
+    >>> b = numpy.memmap('out.dat', dtype=numpy.float32, mode='w+',
+    ...                  shape=a.shape)
+    >>> slab_filter(a, gaussian_filter, int(4 * 3.0 + 0.5), output=b,
+    ...             extra_arguments=(3.0,))
+
+    """
+    if extra_keywords is None:
+        extra_keywords = {}
+    if max_memory is None:
+        max_memory = _max_memory
+    if not isinstance(input, numpy.ndarray):
+        input = numpy.asarray(input)
+    if input.ndim < 1:
+        raise RuntimeError, 'input must have at least one dimension'
+    depth = _ni_support._normalize_sequence(depth, 2)
+    if depth[0] < 0 or depth[1] < 0:
+        raise ValueError, 'depth must be non-negative'
+    output, return_value = _ni_support._get_output(output, input)
+    length = input.shape[0]
+    rows = _slab_rows(input, input.itemsize + 2 * output.itemsize, depth,
+                      max_memory)
+    for start, stop in _slabs(length, rows):
+        first = max(start - depth[0], 0)
+        last = min(stop + depth[1], length)
+        slab = numpy.array(input[first:last])
+        result = function(slab, *extra_arguments, **extra_keywords)
+        result = numpy.asarray(result)
+        if result.shape != slab.shape:
+            err = 'function must return an array of the shape of the slab'
+            raise RuntimeError, err
+        output[start:stop] = result[start - first:stop - first]
+    _flush(output)
+    return return_value
+
+def _boundary_pairs(last, first, structure):
+    """Return the pairs of labels connected across a slab boundary.
+
+    last is the last row of labels of a slab, first the first row of the
+    next slab, and structure the structuring element used for labeling.
+    """
+    if structure.ndim == 1:
+        if structure[2] and last > 0 and first > 0:
+            return numpy.array([[last, first]], dtype = numpy.int32)
+        return numpy.zeros((0, 2), dtype = numpy.int32)
+    pairs = []
+    neighbours = numpy.transpose(numpy.nonzero(structure[2])) - 1
+    for offsets in neighbours:
+        ilast = []
+        ifirst = []
+        for offset, size in zip(offsets, last.shape):
+            ilast.append(slice(max(-offset, 0), size - max(offset, 0)))
+            ifirst.append(slice(max(offset, 0), size - max(-offset, 0)))
+        lo = numpy.asarray(last[tuple(ilast)]).ravel()
+        hi = numpy.asarray(first[tuple(ifirst)]).ravel()
+        mask = (lo > 0) & (hi > 0)
+        if mask.any():
+            pairs.append(numpy.transpose([lo[mask], hi[mask]]))
+    if not pairs:
+        return numpy.zeros((0, 2), dtype = numpy.int32)
+    return numpy.concatenate(pairs)
+
+def _merge_labels(pairs, max_label):
+    """Return a map from labels to merged, consecutive labels.
+
+    Each component is given the smallest of its labels before they are
+    numbered consecutively, so that the numbering follows the order in
+    which the components first appear in the array.
+    """
+    parent = numpy.arange(max_label + 1)
+    def find(label):
+        while parent[label] != label:
+            parent[label] = parent[parent[label]]
+            label = parent[label]
+        return label
+    if len(pairs) > 0:
+        pairs = pairs.astype(numpy.int64)
+        codes = numpy.unique(pairs[:, 0] * (max_label + 1) + pairs[:, 1])
+        for code in codes:
+            root1 = find(code // (max_label + 1))
+            root2 = find(code % (max_label + 1))
+            if root1 < root2:
+                parent[root2] = root1
+            elif root2 < root1:
+                parent[root1] = root2
+    while True:
+        grandparent = parent[parent]
+        if numpy.all(grandparent == parent):
+            break
+        parent = grandparent
+    roots = numpy.flatnonzero(parent == numpy.arange(max_label + 1))
+    labels = numpy.zeros(max_label + 1, dtype = numpy.int32)
+    labels[roots] = numpy.arange(len(roots))
+    return labels[parent], len(roots) - 1
+
+def slab_label(input, structure = None, output = None, max_memory = None):
+    """Label features in an array, working in slabs along the first axis.
+
+    The input is labeled one slab of consecutive rows at a time and the
+    labels are written to the output.  Features that cross the boundary
+    between two slabs are then merged in a second pass over the output.
+    The result is identical to that of scipy.ndimage.label.
+
+    Parameters
+    ----------
+    input : array
+        input array, typically a numpy.memmap. Any non-zero values are
+        counted as features and zero values as the background.
+    structure : array_like, optional
+        structuring element that defines feature connections, as in
+        scipy.ndimage.label.
+    output : array or dtype, optional
+        array of type int32 in which to store the labels, typically a
+        numpy.memmap.  By default an array in memory is allocated.
+    max_memory : integer, optional
+        maximum number of bytes of a slab and its labels held in memory.
+        Default is 256MB.
+
+    Returns
+    -------
+    labeled_array : array
+        the labeled features. Only returned if output is not an array.
+    num_features : integer
+        the number of features found.
+
+    See Also
+    --------
+    label : label features of an array held in memory
+
+    """
+    if max_memory is None:
+        max_memory = _max_memory
+    if not isinstance(input, numpy.ndarray):
+        input = numpy.asarray(input)
+    if numpy.iscomplexobj(input):
+        raise TypeError, 'Complex type not supported'
+    if input.ndim < 1:
+        raise RuntimeError, 'input must have at least one dimension'
+    if structure is None:
+        structure = morphology.generate_binary_structure(input.ndim, 1)
+    structure = numpy.asarray(structure, dtype = bool)
+    if structure.ndim != input.ndim:
+        raise RuntimeError, 'structure and input must have equal rank'
+    for ii in structure.shape:
+        if ii != 3:
+            raise RuntimeError, 'structure dimensions must be equal to 3'
+    if isinstance(output, numpy.ndarray):
+        if output.dtype.type != numpy.int32:
+            raise RuntimeError, 'output type must be int32'
+    else:
+        output = numpy.int32
+    output, return_value = _ni_support._get_output(output, input)
+    length = input.shape[0]
+    rows = _slab_rows(input, input.itemsize + 8, (0, 0), max_memory)
+    slabs = _slabs(length, rows)
+    # label the slabs, numbering the labels of each slab after those of
+    # the previous slabs:
+    max_label = 0
+    pairs = []
+    last = None
+    for start, stop in slabs:
+        labels, num = measurements.label(numpy.asarray(input[start:stop]),
+                                         structure)
+        labels[labels > 0] += max_label
+        if last is not None:
+            pairs.append(_boundary_pairs(last, labels[0], structure))
+        last = labels[-1].copy()
+        output[start:stop] = labels
+        max_label += num
+    # merge the labels of features that cross slab boundaries:
+    pairs = [p for p in pairs if len(p) > 0]
+    if pairs:
+        labels, max_label = _merge_labels(numpy.concatenate(pairs),
+                                          max_label)
+        for start, stop in slabs:
+            output[start:stop] = labels[output[start:stop]]
+    _flush(output)
+    if return_value is None:
+        return max_label
+    else:
+        return return_value, max_label
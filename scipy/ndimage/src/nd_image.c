@@ -261,6 +261,27 @@ exit:
     return PyErr_Occurred() ? NULL : Py_BuildValue("");
 }
 
+static PyObject *Py_RankFilterHistogram(PyObject *obj, PyObject *args)
+{
+    PyArrayObject *input = NULL, *output = NULL;
+    maybelong *fshape = NULL;
+    long nbins;
+    int rank;
+
+    if (!PyArg_ParseTuple(args, "O&O&liO&", NI_ObjectToInputArray, &input,
+                                        NI_ObjectToLongSequence, &fshape, &nbins, &rank,
+                                        NI_ObjectToOutputArray, &output))
+        goto exit;
+    if (!NI_RankFilterHistogram(input, fshape, nbins, rank, output))
+        goto exit;
+exit:
+    Py_XDECREF(input);
+    Py_XDECREF(output);
+    if (fshape)
+        free(fshape);
+    return PyErr_Occurred() ? NULL : Py_BuildValue("");
+}
+
 static int Py_Filter1DFunc(double *iline, maybelong ilen,
                                                      double *oline, maybelong olen, void *data)
 {
@@ -1069,6 +1090,48 @@ static PyObject *Py_CenterOfMass(PyObject *obj, PyObject *args)
     return result;
 }
 
+static PyObject *Py_LabeledStatistics(PyObject *obj, PyObject *args)
+{
+    PyArrayObject *values = NULL, *rows = NULL, *count = NULL, *sum = NULL;
+    PyArrayObject *m2 = NULL, *minimum = NULL, *maximum = NULL;
+    PyArrayObject *min_pos = NULL, *max_pos = NULL, *moments = NULL;
+    PyObject *shape_object;
+    maybelong *shape = NULL;
+    long offset;
+    int rank;
+
+    if (!PyArg_ParseTuple(args, "O&O&lOO&O&O&O&O&O&O&O&",
+                    NI_ObjectToInputArray, &values,
+                    NI_ObjectToInputArray, &rows, &offset, &shape_object,
+                    NI_ObjectToIoArray, &count, NI_ObjectToIoArray, &sum,
+                    NI_ObjectToOptionalOutputArray, &m2,
+                    NI_ObjectToOptionalOutputArray, &minimum,
+                    NI_ObjectToOptionalOutputArray, &maximum,
+                    NI_ObjectToOptionalOutputArray, &min_pos,
+                    NI_ObjectToOptionalOutputArray, &max_pos,
+                    NI_ObjectToOptionalOutputArray, &moments))
+        goto exit;
+    rank = NI_ObjectToLongSequenceAndLength(shape_object, &shape);
+    if (rank < 0)
+        goto exit;
+    NI_LabeledStatistics(values, rows, offset, shape, rank, count, sum, m2,
+                                             minimum, maximum, min_pos, max_pos, moments);
+exit:
+    Py_XDECREF(values);
+    Py_XDECREF(rows);
+    Py_XDECREF(count);
+    Py_XDECREF(sum);
+    Py_XDECREF(m2);
+    Py_XDECREF(minimum);
+    Py_XDECREF(maximum);
+    Py_XDECREF(min_pos);
+    Py_XDECREF(max_pos);
+    Py_XDECREF(moments);
+    if (shape)
+        free(shape);
+    return PyErr_Occurred() ? NULL : Py_BuildValue("");
+}
+
 static PyObject *Py_Histogram(PyObject *obj, PyObject *args)
 {
     PyArrayObject *input = NULL, *labels = NULL, **histograms = NULL;
@@ -1273,6 +1336,8 @@ static PyMethodDef methods[] = {
         METH_VARARGS, NULL},
     {"rank_filter",           (PyCFunction)Py_RankFilter,
      METH_VARARGS, NULL},
+    {"rank_filter_histogram", (PyCFunction)Py_RankFilterHistogram,
+     METH_VARARGS, NULL},
     {"generic_filter",        (PyCFunction)Py_GenericFilter,
      METH_VARARGS, NULL},
     {"generic_filter1d",      (PyCFunction)Py_GenericFilter1D,
@@ -1297,6 +1362,8 @@ static PyMethodDef methods[] = {
      METH_VARARGS, NULL},
     {"center_of_mass",        (PyCFunction)Py_CenterOfMass,
      METH_VARARGS, NULL},
+    {"labeled_statistics",    (PyCFunction)Py_LabeledStatistics,
+     METH_VARARGS, NULL},
     {"histogram",             (PyCFunction)Py_Histogram,
      METH_VARARGS, NULL},
     {"distance_transform_bf", (PyCFunction)Py_DistanceTransformBruteForce,
@@ -45,6 +45,7 @@ int NI_Correlate1D(PyArrayObject *input, PyArrayObject *weights,
     double *ibuffer = NULL, *obuffer = NULL;
     Float64 *fw;
     NI_LineBuffer iline_buffer, oline_buffer;
+    NI_BEGIN_THREADS_DEF;
 
     /* test for symmetry or anti-symmetry: */
     filter_size = weights->dimensions[0];
@@ -85,6 +86,7 @@ int NI_Correlate1D(PyArrayObject *input, PyArrayObject *weights,
         goto exit;
     length = input->nd > 0 ? input->dimensions[axis] : 1;
     fw += size1;
+    NI_BEGIN_THREADS;
     /* iterate over all the array lines: */
     do {
         /* copy lines from array to buffer: */
@@ -124,6 +126,7 @@ int NI_Correlate1D(PyArrayObject *input, PyArrayObject *weights,
             goto exit;
     } while(more);
 exit:
+    NI_END_THREADS;
     if (ibuffer) free(ibuffer);
     if (obuffer) free(obuffer);
     return PyErr_Occurred() ? 0 : 1;
@@ -162,6 +165,7 @@ int NI_Correlate(PyArrayObject* input, PyArrayObject* weights,
     Float64 *pw;
     Float64 *ww = NULL;
     int ll;
+    NI_BEGIN_THREADS_DEF;
 
     /* get the the footprint: */
     fsize = 1;
@@ -213,6 +217,7 @@ int NI_Correlate(PyArrayObject* input, PyArrayObject* weights,
     size = 1;
     for(ll = 0; ll < input->nd; ll++)
         size *= input->dimensions[ll];
+    NI_BEGIN_THREADS;
     /* iterator over the elements: */
     oo = offsets;
     for(jj = 0; jj < size; jj++) {
@@ -243,6 +248,7 @@ int NI_Correlate(PyArrayObject* input, PyArrayObject* weights,
             CASE_CORRELATE_POINT(pi, ww, oo, filter_size, cvalue, Float64,
                                                      tmp, border_flag_value);
         default:
+            NI_END_THREADS;
             PyErr_SetString(PyExc_RuntimeError, "array type not supported");
             goto exit;
         }
@@ -261,12 +267,14 @@ int NI_Correlate(PyArrayObject* input, PyArrayObject* weights,
             CASE_FILTER_OUT(po, tmp, Float32);
             CASE_FILTER_OUT(po, tmp, Float64);
         default:
+            NI_END_THREADS;
             PyErr_SetString(PyExc_RuntimeError, "array type not supported");
             goto exit;
         }
         NI_FILTER_NEXT2(fi, ii, io, oo, pi, po);
     }
 exit:
+    NI_END_THREADS;
     if (offsets) free(offsets);
     if (ww) free(ww);
     if (pf) free(pf);
@@ -282,6 +290,7 @@ NI_UniformFilter1D(PyArrayObject *input, long filter_size,
     int more;
     double *ibuffer = NULL, *obuffer = NULL;
     NI_LineBuffer iline_buffer, oline_buffer;
+    NI_BEGIN_THREADS_DEF;
 
     size1 = filter_size / 2;
     size2 = filter_size - size1 - 1;
@@ -301,6 +310,7 @@ NI_UniformFilter1D(PyArrayObject *input, long filter_size,
         goto exit;
     length = input->nd > 0 ? input->dimensions[axis] : 1;
 
+    NI_BEGIN_THREADS;
     /* iterate over all the array lines: */
     do {
         /* copy lines from array to buffer: */
@@ -330,6 +340,7 @@ NI_UniformFilter1D(PyArrayObject *input, long filter_size,
     } while(more);
 
  exit:
+    NI_END_THREADS;
     if (ibuffer) free(ibuffer);
     if (obuffer) free(obuffer);
     return PyErr_Occurred() ? 0 : 1;
@@ -344,6 +355,7 @@ NI_MinOrMaxFilter1D(PyArrayObject *input, long filter_size,
     int more;
     double *ibuffer = NULL, *obuffer = NULL;
     NI_LineBuffer iline_buffer, oline_buffer;
+    NI_BEGIN_THREADS_DEF;
 
     size1 = filter_size / 2;
     size2 = filter_size - size1 - 1;
@@ -363,6 +375,7 @@ NI_MinOrMaxFilter1D(PyArrayObject *input, long filter_size,
         goto exit;
     length = input->nd > 0 ? input->dimensions[axis] : 1;
 
+    NI_BEGIN_THREADS;
     /* iterate over all the array lines: */
     do {
         /* copy lines from array to buffer: */
@@ -395,6 +408,7 @@ NI_MinOrMaxFilter1D(PyArrayObject *input, long filter_size,
     } while(more);
 
  exit:
+    NI_END_THREADS;
     if (ibuffer) free(ibuffer);
     if (obuffer) free(obuffer);
     return PyErr_Occurred() ? 0 : 1;
@@ -439,6 +453,7 @@ int NI_MinOrMaxFilter(PyArrayObject* input, PyArrayObject* footprint,
     int ll;
     double *ss = NULL;
     Float64 *ps;
+    NI_BEGIN_THREADS_DEF;
 
     /* get the the footprint: */
     fsize = 1;
@@ -484,6 +499,7 @@ int NI_MinOrMaxFilter(PyArrayObject* input, PyArrayObject* footprint,
     size = 1;
     for(ll = 0; ll < input->nd; ll++)
         size *= input->dimensions[ll];
+    NI_BEGIN_THREADS;
     /* iterator over the elements: */
     oo = offsets;
     for(jj = 0; jj < size; jj++) {
@@ -514,6 +530,7 @@ int NI_MinOrMaxFilter(PyArrayObject* input, PyArrayObject* footprint,
             CASE_MIN_OR_MAX_POINT(pi, oo, filter_size, cvalue, Float64,
                                                         minimum, tmp, border_flag_value, ss);
         default:
+            NI_END_THREADS;
             PyErr_SetString(PyExc_RuntimeError, "array type not supported");
             goto exit;
         }
@@ -532,12 +549,14 @@ int NI_MinOrMaxFilter(PyArrayObject* input, PyArrayObject* footprint,
             CASE_FILTER_OUT(po, tmp, Float32);
             CASE_FILTER_OUT(po, tmp, Float64);
         default:
+            NI_END_THREADS;
             PyErr_SetString(PyExc_RuntimeError, "array type not supported");
             goto exit;
         }
         NI_FILTER_NEXT2(fi, ii, io, oo, pi, po);
     }
 exit:
+    NI_END_THREADS;
     if (offsets) free(offsets);
     if (ss) free(ss);
     return PyErr_Occurred() ? 0 : 1;
@@ -605,6 +624,7 @@ int NI_RankFilter(PyArrayObject* input, int rank,
     Bool *pf = NULL;
     double *buffer = NULL;
     int ll;
+    NI_BEGIN_THREADS_DEF;
 
     /* get the the footprint: */
     fsize = 1;
@@ -644,6 +664,7 @@ int NI_RankFilter(PyArrayObject* input, int rank,
     size = 1;
     for(ll = 0; ll < input->nd; ll++)
         size *= input->dimensions[ll];
+    NI_BEGIN_THREADS;
     /* iterator over the elements: */
     oo = offsets;
     for(jj = 0; jj < size; jj++) {
@@ -674,6 +695,7 @@ int NI_RankFilter(PyArrayObject* input, int rank,
             CASE_RANK_POINT(pi, oo, filter_size, cvalue, Float64,
                                             rank, buffer, tmp, border_flag_value);
         default:
+            NI_END_THREADS;
             PyErr_SetString(PyExc_RuntimeError, "array type not supported");
             goto exit;
         }
@@ -692,17 +714,183 @@ int NI_RankFilter(PyArrayObject* input, int rank,
             CASE_FILTER_OUT(po, tmp, Float32);
             CASE_FILTER_OUT(po, tmp, Float64);
         default:
+            NI_END_THREADS;
             PyErr_SetString(PyExc_RuntimeError, "array type not supported");
             goto exit;
         }
         NI_FILTER_NEXT2(fi, ii, io, oo, pi, po);
     }
 exit:
+    NI_END_THREADS;
     if (offsets) free(offsets);
     if (buffer) free(buffer);
     return PyErr_Occurred() ? 0 : 1;
 }
 
+/* Rank filter over a rectangular footprint using a sliding histogram
+     (Huang's algorithm). The input holds the codes of the values in the
+     range [0, nbins), extended at the borders by the size of the footprint
+     minus one along each axis. For each line of the output along the last
+     axis, the histogram is updated by removing the column of the footprint
+     that leaves the window and adding the one that enters it, so the cost
+     per element does not depend on the length of the footprint along the
+     last axis. The histogram is kept in blocks of 256 bins, so that the
+     search for the rank can skip empty parts of a large histogram: */
+
+#define NI_HIST_ADD(_code, _hist, _coarse, _cand, _lt) \
+{                                                      \
+    ++_hist[_code];                                      \
+    ++_coarse[(_code) >> 8];                             \
+    if ((_code) < _cand)                                 \
+        ++_lt;                                             \
+}
+
+#define NI_HIST_REMOVE(_code, _hist, _coarse, _cand, _lt) \
+{                                                         \
+    --_hist[_code];                                         \
+    --_coarse[(_code) >> 8];                                \
+    if ((_code) < _cand)                                    \
+        --_lt;                                                \
+}
+
+int NI_RankFilterHistogram(PyArrayObject* input, maybelong *fshape,
+                                                     maybelong nbins, int rank, PyArrayObject* output)
+{
+    maybelong *offsets = NULL, *hist = NULL, *coarse = NULL;
+    maybelong istrides[MAXDIM], ostrides[MAXDIM], idx[MAXDIM];
+    maybelong ncols, flen, olen, lines, size, cand = 0, lt = 0;
+    maybelong ll, jj, kk, xx;
+    UInt32 *pi, *po;
+    int rank_m1, ii;
+    NI_BEGIN_THREADS_DEF;
+
+    if (input->descr->type_num != tUInt32 ||
+            output->descr->type_num != tUInt32) {
+        PyErr_SetString(PyExc_RuntimeError, "arrays must be of type uint32");
+        goto exit;
+    }
+    if (input->nd != output->nd || input->nd < 1) {
+        PyErr_SetString(PyExc_RuntimeError, "array ranks not correct");
+        goto exit;
+    }
+    rank_m1 = input->nd - 1;
+    size = 1;
+    for(ii = 0; ii <= rank_m1; ii++) {
+        if (fshape[ii] < 1 ||
+                input->dimensions[ii] != output->dimensions[ii] + fshape[ii] - 1) {
+            PyErr_SetString(PyExc_RuntimeError, "array shapes not correct");
+            goto exit;
+        }
+        istrides[ii] = input->strides[ii] / sizeof(UInt32);
+        ostrides[ii] = output->strides[ii] / sizeof(UInt32);
+        size *= output->dimensions[ii];
+    }
+    if (size == 0)
+        goto exit;
+    /* offsets of the elements of one column of the footprint: */
+    ncols = 1;
+    for(ii = 0; ii < rank_m1; ii++)
+        ncols *= fshape[ii];
+    offsets = (maybelong*)malloc(ncols * sizeof(maybelong));
+    hist = (maybelong*)calloc(nbins, sizeof(maybelong));
+    coarse = (maybelong*)calloc((nbins + 255) / 256, sizeof(maybelong));
+    if (!offsets || !hist || !coarse) {
+        PyErr_NoMemory();
+        goto exit;
+    }
+    for(ii = 0; ii < rank_m1; ii++)
+        idx[ii] = 0;
+    for(kk = 0; kk < ncols; kk++) {
+        maybelong offset = 0;
+        for(ii = 0; ii < rank_m1; ii++)
+            offset += idx[ii] * istrides[ii];
+        offsets[kk] = offset;
+        for(ii = rank_m1 - 1; ii >= 0; ii--) {
+            if (idx[ii] < fshape[ii] - 1) {
+                idx[ii]++;
+                break;
+            } else {
+                idx[ii] = 0;
+            }
+        }
+    }
+    flen = fshape[rank_m1];
+    olen = output->dimensions[rank_m1];
+    lines = size / olen;
+    pi = (void *)PyArray_DATA(input);
+    po = (void *)PyArray_DATA(output);
+
+    NI_BEGIN_THREADS;
+    for(ii = 0; ii < rank_m1; ii++)
+        idx[ii] = 0;
+    for(ll = 0; ll < lines; ll++) {
+        UInt32 *pli = pi, *plo = po;
+        for(ii = 0; ii < rank_m1; ii++) {
+            pli += idx[ii] * istrides[ii];
+            plo += idx[ii] * ostrides[ii];
+        }
+        /* fill the histogram with the first window of the line: */
+        for(jj = 0; jj < flen - 1; jj++) {
+            UInt32 *pc = pli + jj * istrides[rank_m1];
+            for(kk = 0; kk < ncols; kk++)
+                NI_HIST_ADD(pc[offsets[kk]], hist, coarse, cand, lt);
+        }
+        for(xx = 0; xx < olen; xx++) {
+            UInt32 *pc = pli + (xx + flen - 1) * istrides[rank_m1];
+            /* add the column entering the window: */
+            for(kk = 0; kk < ncols; kk++)
+                NI_HIST_ADD(pc[offsets[kk]], hist, coarse, cand, lt);
+            /* move the candidate until exactly rank values are smaller: */
+            while (lt > rank) {
+                if (!(cand & 255) && lt - coarse[(cand >> 8) - 1] > rank) {
+                    lt -= coarse[(cand >> 8) - 1];
+                    cand -= 256;
+                } else {
+                    --cand;
+                    lt -= hist[cand];
+                }
+            }
+            for(;;) {
+                if (!(cand & 255) && lt + coarse[cand >> 8] <= rank) {
+                    lt += coarse[cand >> 8];
+                    cand += 256;
+                } else if (lt + hist[cand] <= rank) {
+                    lt += hist[cand];
+                    ++cand;
+                } else {
+                    break;
+                }
+            }
+            plo[xx * ostrides[rank_m1]] = (UInt32)cand;
+            /* remove the column leaving the window: */
+            pc = pli + xx * istrides[rank_m1];
+            for(kk = 0; kk < ncols; kk++)
+                NI_HIST_REMOVE(pc[offsets[kk]], hist, coarse, cand, lt);
+        }
+        /* empty the histogram for the next line: */
+        for(jj = olen; jj < olen + flen - 1; jj++) {
+            UInt32 *pc = pli + jj * istrides[rank_m1];
+            for(kk = 0; kk < ncols; kk++)
+                NI_HIST_REMOVE(pc[offsets[kk]], hist, coarse, cand, lt);
+        }
+        /* next line: */
+        for(ii = rank_m1 - 1; ii >= 0; ii--) {
+            if (idx[ii] < output->dimensions[ii] - 1) {
+                idx[ii]++;
+                break;
+            } else {
+                idx[ii] = 0;
+            }
+        }
+    }
+exit:
+    NI_END_THREADS;
+    if (offsets) free(offsets);
+    if (hist) free(hist);
+    if (coarse) free(coarse);
+    return PyErr_Occurred() ? 0 : 1;
+}
+
 int NI_GenericFilter1D(PyArrayObject *input,
                 int (*function)(double*, maybelong, double*, maybelong, void*),
                 void* data, long filter_size, int axis, PyArrayObject *output,
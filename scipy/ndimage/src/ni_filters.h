@@ -45,6 +45,8 @@ int NI_MinOrMaxFilter(PyArrayObject*, PyArrayObject*, PyArrayObject*,
                                             int);
 int NI_RankFilter(PyArrayObject*, int, PyArrayObject*, PyArrayObject*,
                                     NI_ExtendMode, double, maybelong*);
+int NI_RankFilterHistogram(PyArrayObject*, maybelong*, maybelong, int,
+                                                     PyArrayObject*);
 int NI_GenericFilter1D(PyArrayObject*, int (*)(double*, maybelong, 
                                              double*, maybelong, void*), void*, long, int,
                                              PyArrayObject*, NI_ExtendMode, double, long);
@@ -206,6 +206,7 @@ int NI_SplineFilter1D(PyArrayObject *input, int order, int axis,
     maybelong kk, ll, lines, len;
     double *buffer = NULL, weight, pole[2];
     NI_LineBuffer iline_buffer, oline_buffer;
+    NI_BEGIN_THREADS_DEF;
 
     len = input->nd > 0 ? input->dimensions[axis] : 1;
     if (len < 1)
@@ -252,6 +253,7 @@ int NI_SplineFilter1D(PyArrayObject *input, int order, int axis,
                                                  NI_EXTEND_DEFAULT, 0.0, &oline_buffer))
         goto exit;
 
+    NI_BEGIN_THREADS;
     /* iterate over all the array lines: */
     do {
         /* copy lines from array to buffer: */
@@ -303,6 +305,7 @@ int NI_SplineFilter1D(PyArrayObject *input, int order, int axis,
     } while(more);
 
  exit:
+    NI_END_THREADS;
     if (buffer) free(buffer);
     return PyErr_Occurred() ? 0 : 1;
 }
@@ -361,6 +364,7 @@ NI_GeometricTransform(PyArrayObject *input, int (*map)(maybelong*, double*,
     Float64 *matrix = matrix_ar ? (Float64*)PyArray_DATA(matrix_ar) : NULL;
     Float64 *shift = shift_ar ? (Float64*)PyArray_DATA(shift_ar) : NULL;
     int irank = 0, orank, qq;
+    NI_BEGIN_THREADS_DEF;
 
     for(kk = 0; kk < input->nd; kk++) {
         idimensions[kk] = input->dimensions[kk];
@@ -459,6 +463,9 @@ NI_GeometricTransform(PyArrayObject *input, int (*map)(maybelong*, double*,
     size = 1;
     for(qq = 0; qq < output->nd; qq++)
         size *= output->dimensions[qq];
+    /* a mapping function is called with the GIL held: */
+    if (!map)
+        NI_BEGIN_THREADS;
     for(kk = 0; kk < size; kk++) {
         double t = 0.0;
         int constant = 0, edge = 0, offset = 0;
@@ -497,6 +504,7 @@ NI_GeometricTransform(PyArrayObject *input, int (*map)(maybelong*, double*,
                 CASE_MAP_COORDINATES(p, icoor, irank, cstride, Float32);
                 CASE_MAP_COORDINATES(p, icoor, irank, cstride, Float64);
             default:
+                NI_END_THREADS;
                 PyErr_SetString(PyExc_RuntimeError,
                                                 "coordinate array data type not supported");
                 goto exit;
@@ -590,6 +598,7 @@ NI_GeometricTransform(PyArrayObject *input, int (*map)(maybelong*, double*,
                     CASE_INTERP_COEFF(coeff, pi, idxs[hh], Float32);
                     CASE_INTERP_COEFF(coeff, pi, idxs[hh], Float64);
                 default:
+                    NI_END_THREADS;
                     PyErr_SetString(PyExc_RuntimeError, "data type not supported");
                     goto exit;
                 }
@@ -620,6 +629,7 @@ NI_GeometricTransform(PyArrayObject *input, int (*map)(maybelong*, double*,
             CASE_INTERP_OUT(po, t, Float32);
             CASE_INTERP_OUT(po, t, Float64);
         default:
+            NI_END_THREADS;
             PyErr_SetString(PyExc_RuntimeError, "data type not supported");
             goto exit;
         }
@@ -631,6 +641,7 @@ NI_GeometricTransform(PyArrayObject *input, int (*map)(maybelong*, double*,
     }
 
  exit:
+    NI_END_THREADS;
     if (edge_offsets)
         free(edge_offsets);
     if (data_offsets) {
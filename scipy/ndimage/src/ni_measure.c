@@ -649,6 +649,148 @@ int NI_Statistics(PyArrayObject *input, PyArrayObject *labels,
 }
 
 
+/* check an array passed to NI_LabeledStatistics, which may be NULL: */
+static int _NI_CheckStatisticsArray(PyArrayObject *array, int type,
+                                                                        maybelong size)
+{
+    if (!array)
+        return 1;
+    if (array->descr->type_num != type || array->nd < 1 ||
+            array->dimensions[0] != size || !PyArray_ISCARRAY(array)) {
+        PyErr_SetString(PyExc_RuntimeError,
+                                        "statistics arrays not correct");
+        return 0;
+    }
+    return 1;
+}
+
+/* Calculate the count, sum, minimum, maximum, their positions and the
+     moments of the values for each row in a single pass, and the sum of
+     squared deviations from the mean in a second pass if m2 is given.
+     The values and rows are those of the flattened input array, starting
+     at the given offset.  A negative row means that the value is not
+     measured.  The results are accumulated into the given arrays, which
+     must be initialized by the caller: */
+int NI_LabeledStatistics(PyArrayObject *values, PyArrayObject *rows,
+                maybelong offset, maybelong *shape, int rank, PyArrayObject *count,
+                PyArrayObject *sum, PyArrayObject *m2, PyArrayObject *minimum,
+                PyArrayObject *maximum, PyArrayObject *min_pos,
+                PyArrayObject *max_pos, PyArrayObject *moments)
+{
+    maybelong jj, kk, size, n, row, tmp, coordinates[MAXDIM];
+    maybelong vstride, rstride, *pminp = NULL, *pmaxp = NULL;
+    double *pcount, *psum, *pm2 = NULL, *pmin = NULL, *pmax = NULL;
+    double *pmom = NULL;
+    char *pv, *pr;
+    int bad = 0;
+    NI_BEGIN_THREADS_DEF;
+
+    if (values->descr->type_num != tFloat64 || values->nd != 1 ||
+            rows->descr->type_num != NPY_INTP || rows->nd != 1 ||
+            rows->dimensions[0] != values->dimensions[0]) {
+        PyErr_SetString(PyExc_RuntimeError, "values or rows not correct");
+        goto exit;
+    }
+    if (rank > MAXDIM) {
+        PyErr_SetString(PyExc_RuntimeError, "too many dimensions");
+        goto exit;
+    }
+    n = count->nd > 0 ? count->dimensions[0] : 0;
+    if (!_NI_CheckStatisticsArray(count, tFloat64, n) ||
+            !_NI_CheckStatisticsArray(sum, tFloat64, n) ||
+            !_NI_CheckStatisticsArray(m2, tFloat64, n) ||
+            !_NI_CheckStatisticsArray(minimum, tFloat64, n) ||
+            !_NI_CheckStatisticsArray(maximum, tFloat64, n) ||
+            !_NI_CheckStatisticsArray(min_pos, NPY_INTP, n) ||
+            !_NI_CheckStatisticsArray(max_pos, NPY_INTP, n) ||
+            !_NI_CheckStatisticsArray(moments, tFloat64, n))
+        goto exit;
+    if ((min_pos && !minimum) || (max_pos && !maximum) ||
+            (moments && (moments->nd != 2 || moments->dimensions[1] != rank))) {
+        PyErr_SetString(PyExc_RuntimeError, "statistics arrays not correct");
+        goto exit;
+    }
+    pcount = (double*)PyArray_DATA(count);
+    psum = (double*)PyArray_DATA(sum);
+    if (m2)
+        pm2 = (double*)PyArray_DATA(m2);
+    if (minimum)
+        pmin = (double*)PyArray_DATA(minimum);
+    if (maximum)
+        pmax = (double*)PyArray_DATA(maximum);
+    if (min_pos)
+        pminp = (maybelong*)PyArray_DATA(min_pos);
+    if (max_pos)
+        pmaxp = (maybelong*)PyArray_DATA(max_pos);
+    if (moments)
+        pmom = (double*)PyArray_DATA(moments);
+    size = values->dimensions[0];
+    vstride = values->strides[0];
+    rstride = rows->strides[0];
+    /* coordinates of the first element: */
+    tmp = offset;
+    for(kk = rank - 1; kk >= 0; kk--) {
+        coordinates[kk] = shape[kk] > 0 ? tmp % shape[kk] : 0;
+        tmp = shape[kk] > 0 ? tmp / shape[kk] : 0;
+    }
+
+    NI_BEGIN_THREADS;
+    pv = (void *)PyArray_DATA(values);
+    pr = (void *)PyArray_DATA(rows);
+    for(jj = 0; jj < size; jj++) {
+        row = *(maybelong*)pr;
+        if (row >= n) {
+            bad = 1;
+            break;
+        }
+        if (row >= 0) {
+            double val = *(double*)pv;
+            pcount[row] += 1.0;
+            psum[row] += val;
+            if (pmin && val < pmin[row]) {
+                pmin[row] = val;
+                if (pminp)
+                    pminp[row] = offset + jj;
+            }
+            if (pmax && val > pmax[row]) {
+                pmax[row] = val;
+                if (pmaxp)
+                    pmaxp[row] = offset + jj;
+            }
+            if (pmom)
+                for(kk = 0; kk < rank; kk++)
+                    pmom[row * rank + kk] += val * coordinates[kk];
+        }
+        if (pmom) {
+            for(kk = rank - 1; kk >= 0; kk--) {
+                if (++coordinates[kk] < shape[kk])
+                    break;
+                coordinates[kk] = 0;
+            }
+        }
+        pv += vstride;
+        pr += rstride;
+    }
+    if (pm2 && !bad) {
+        pv = (void *)PyArray_DATA(values);
+        pr = (void *)PyArray_DATA(rows);
+        for(jj = 0; jj < size; jj++) {
+            row = *(maybelong*)pr;
+            if (row >= 0) {
+                double val = *(double*)pv - psum[row] / pcount[row];
+                pm2[row] += val * val;
+            }
+            pv += vstride;
+            pr += rstride;
+        }
+    }
+    NI_END_THREADS;
+    if (bad)
+        PyErr_SetString(PyExc_RuntimeError, "row index out of range");
+ exit:
+    return PyErr_Occurred() ? 0 : 1;
+}
+
 int NI_CenterOfMass(PyArrayObject *input, PyArrayObject *labels,
                             maybelong min_label, maybelong max_label, maybelong *indices,
                             maybelong n_results, double *center_of_mass)
@@ -53,6 +53,11 @@ int NI_Statistics(PyArrayObject*, PyArrayObject*, maybelong, maybelong,
                                     maybelong*, maybelong, double*, maybelong*, double*, 
                                     double*, double*, maybelong*, maybelong*);
 
+int NI_LabeledStatistics(PyArrayObject*, PyArrayObject*, maybelong,
+                                                 maybelong*, int, PyArrayObject*, PyArrayObject*,
+                                                 PyArrayObject*, PyArrayObject*, PyArrayObject*,
+                                                 PyArrayObject*, PyArrayObject*, PyArrayObject*);
+
 int NI_WatershedIFT(PyArrayObject*, PyArrayObject*, PyArrayObject*, 
                                         PyArrayObject*);
 
@@ -135,6 +135,34 @@ int NI_InitLineBuffer(PyArrayObject *array, int axis, maybelong size1,
         PyErr_SetString(PyExc_RuntimeError, "buffer too small");
         return 0;
     }
+    /* check the array type and the extension mode here, so that copying
+         lines to and from the buffer cannot fail later on, when the filters
+         may be running without the GIL: */
+    switch (array->descr->type_num) {
+    case tBool:
+    case tUInt8:
+    case tUInt16:
+    case tUInt32:
+#if HAS_UINT64
+    case tUInt64:
+#endif
+    case tInt8:
+    case tInt16:
+    case tInt32:
+    case tInt64:
+    case tFloat32:
+    case tFloat64:
+        break;
+    default:
+        PyErr_Format(PyExc_RuntimeError, "array type %d not supported",
+                                 array->descr->type_num);
+        return 0;
+    }
+    if (size1 + size2 > 0 && (extend_mode < NI_EXTEND_FIRST ||
+                                                        extend_mode > NI_EXTEND_LAST)) {
+        PyErr_SetString(PyExc_RuntimeError, "mode not supported");
+        return 0;
+    }
     /* Initialize a line iterator to move over the array: */
     if (!NI_InitPointIterator(array, &(buffer->iterator)))
         return 0;
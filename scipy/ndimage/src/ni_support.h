@@ -52,6 +52,26 @@ typedef enum {
     NI_EXTEND_DEFAULT = NI_EXTEND_MIRROR
 } NI_ExtendMode;
 
+/* Release the GIL around the inner loops of a filter, so that several
+     threads can filter different parts of an array at the same time.  No
+     Python API calls may be made between NI_BEGIN_THREADS and
+     NI_END_THREADS, and NI_END_THREADS may be used more than once: */
+#ifdef WITH_THREAD
+#define NI_BEGIN_THREADS_DEF PyThreadState *_save = NULL
+#define NI_BEGIN_THREADS _save = PyEval_SaveThread()
+#define NI_END_THREADS                                         \
+do {                                                           \
+    if (_save) {                                                 \
+        PyEval_RestoreThread(_save);                               \
+        _save = NULL;                                              \
+    }                                                            \
+} while(0)
+#else
+#define NI_BEGIN_THREADS_DEF
+#define NI_BEGIN_THREADS
+#define NI_END_THREADS
+#endif
+
 /******************************************************************/
 /* Iterators */
 /******************************************************************/
@@ -30,3 +30,144 @@ def test_orders_gauss():
     yield assert_equal, 0, sndi.gaussian_filter1d(arr, 1, axis=-1, order=3)
     yield assert_raises, ValueError, sndi.gaussian_filter1d, arr, 1, -1, -1
     yield assert_raises, ValueError, sndi.gaussian_filter1d, arr, 1, -1, 4
+
+
+def _check_threads(func, x, mode):
+    # Filtering in tiles on several threads gives identical results
+    from scipy.ndimage import _ni_support
+    min_tile_size = _ni_support._min_tile_size
+    _ni_support._min_tile_size = 100
+    try:
+        sndi.set_num_threads(1)
+        expected = func(x, mode)
+        sndi.set_num_threads(4)
+        result = func(x, mode)
+    finally:
+        sndi.set_num_threads(1)
+        _ni_support._min_tile_size = min_tile_size
+    assert_equal(result, expected)
+
+
+def test_threads():
+    np.random.seed(1234)
+    arr = np.random.rand(37, 29, 11)
+    footprint = np.random.rand(3, 4, 2) > 0.3
+    weights = np.arange(24.).reshape(4, 3, 2)
+    filters = [
+        lambda x, mode: sndi.gaussian_filter(x, 2, mode=mode),
+        lambda x, mode: sndi.uniform_filter(x, 5, mode=mode),
+        lambda x, mode: sndi.correlate(x, weights, mode=mode,
+                                       origin=(1, 0, 0)),
+        lambda x, mode: sndi.maximum_filter(x, footprint=footprint,
+                                            mode=mode, origin=(-1, 1, 0)),
+        lambda x, mode: sndi.median_filter(x, size=(5, 3, 3), mode=mode),
+        ]
+    for mode in ['reflect', 'constant', 'nearest', 'mirror', 'wrap']:
+        for func in filters:
+            for x in [arr, (arr * 100).astype(np.int16), arr[:, ::2].T]:
+                yield _check_threads, func, x, mode
+
+
+def _check_tiled_origin(x, mode):
+    # A footprint of length one with an origin reads the previous row
+    from scipy.ndimage import _ni_support
+    def function(input, output):
+        output[1:] = input[:-1]
+        output[0] = input[0]
+    expected = np.zeros(x.shape)
+    function(x, expected)
+    result = np.zeros(x.shape)
+    min_tile_size = _ni_support._min_tile_size
+    _ni_support._min_tile_size = 100
+    try:
+        sndi.set_num_threads(4)
+        _ni_support._filter_tiled(function, x, result, (1, 5), (1, 0),
+                                  _ni_support._extend_mode_to_code(mode))
+    finally:
+        sndi.set_num_threads(1)
+        _ni_support._min_tile_size = min_tile_size
+    assert_equal(result, expected)
+
+
+def test_tiled_origin():
+    np.random.seed(1234)
+    arr = np.random.rand(37, 29)
+    for mode in ['reflect', 'constant', 'nearest', 'mirror']:
+        yield _check_tiled_origin, arr, mode
+
+
+def test_threads_inplace():
+    from scipy.ndimage import _ni_support
+    min_tile_size = _ni_support._min_tile_size
+    _ni_support._min_tile_size = 100
+    try:
+        arr = np.random.rand(40, 30)
+        expected = sndi.gaussian_filter(arr, 2)
+        sndi.set_num_threads(3)
+        assert_equal(sndi.get_num_threads(), 3)
+        sndi.gaussian_filter(arr, 2, output=arr)
+        assert_equal(arr, expected)
+    finally:
+        sndi.set_num_threads(1)
+        _ni_support._min_tile_size = min_tile_size
+    assert_raises(ValueError, sndi.set_num_threads, 0)
+
+
+def _check_rank_filter_histogram(arr, kwargs):
+    # The sliding histogram gives the results of the generic rank filter
+    from scipy.ndimage import filters
+    min_size = filters._histogram_min_size
+    try:
+        filters._histogram_min_size = 1
+        res = [sndi.median_filter(arr, **kwargs),
+               sndi.rank_filter(arr, 2, **kwargs),
+               sndi.percentile_filter(arr, 80, **kwargs)]
+        filters._histogram_min_size = np.inf
+        expected = [sndi.median_filter(arr, **kwargs),
+                    sndi.rank_filter(arr, 2, **kwargs),
+                    sndi.percentile_filter(arr, 80, **kwargs)]
+    finally:
+        filters._histogram_min_size = min_size
+    assert_equal(res, expected)
+
+
+def test_rank_filter_histogram():
+    np.random.seed(1234)
+    data = np.random.rand(17, 23) * 200 - 50
+    for dtype in [np.uint8, np.int8, np.int16, np.uint16, np.int32,
+                  np.float32, np.float64]:
+        arr = data.astype(dtype)
+        for mode in ['reflect', 'constant', 'nearest', 'mirror', 'wrap']:
+            for size, origin in [((5, 5), 0), ((3, 7), (1, -2)),
+                                 ((20, 1), (-3, 0))]:
+                kwargs = dict(size=size, mode=mode, cval=7, origin=origin)
+                yield _check_rank_filter_histogram, arr, kwargs
+
+
+def test_rank_filter_histogram_cval():
+    # Constants that the input type cannot represent
+    np.random.seed(1234)
+    data = np.random.rand(13, 17) * 255
+    for dtype, cvals in [(np.uint8, [0.5, -1, 300]),
+                         (np.int16, [-1.5, 7.5]),
+                         (np.float32, [0.1, 1e40])]:
+        arr = data.astype(dtype)
+        for cval in cvals:
+            kwargs = dict(size=5, mode='constant', cval=cval,
+                          output=np.float64)
+            yield _check_rank_filter_histogram, arr, kwargs
+
+
+def test_rank_filter_histogram_1d():
+    from scipy.ndimage import filters
+    min_size = filters._histogram_min_size
+    filters._histogram_min_size = 1
+    try:
+        arr = np.array([3, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5], dtype=np.uint8)
+        assert_equal(sndi.median_filter(arr, size=5),
+                     [3, 3, 3, 4, 4, 5, 5, 5, 5, 5, 5])
+        arr = arr / 8.0
+        assert_equal(sndi.median_filter(arr, size=5) * 8,
+                     [3, 3, 3, 4, 4, 5, 5, 5, 5, 5, 5])
+    finally:
+        filters._histogram_min_size = min_size
@@ -1760,6 +1760,42 @@ class TestNdimage(TestCase):
                                 extra_keywords = {'b': 2})
             self.failUnless(diff(out, [5, 7]) < eps)
 
+    def test_geometric_transform25(self):
+        "geometric transform 25"
+        data = numpy.array([[4, 1, 3, 2],
+                            [7, 6, 8, 5],
+                            [3, 5, 3, 6]])
+        def mapping(x):
+            return (x[0] * 0.7 + 0.3, x[1] * 1.1 - 0.4)
+        def vectorized_mapping(x):
+            return numpy.array([x[0] * 0.7 + 0.3, x[1] * 1.1 - 0.4])
+        for order in range(0, 6):
+            for mode in ['constant', 'nearest', 'reflect', 'wrap']:
+                expected = ndimage.geometric_transform(data, mapping,
+                                        (4, 5), order=order, mode=mode)
+                for block_size in [1, 7, 100]:
+                    out = ndimage.geometric_transform(data,
+                                vectorized_mapping, (4, 5), order=order,
+                                mode=mode, vectorized=True,
+                                block_size=block_size)
+                    assert_array_equal(out, expected)
+
+    def test_geometric_transform26(self):
+        "geometric transform 26"
+        data = [[1, 2, 3, 4],
+                [5, 6, 7, 8],
+                [9, 10, 11, 12]]
+        def mapping(x, a, b):
+            return (a + 0 * x[0], x[0] * b)
+        output = numpy.zeros((2, 3))[:, 0]
+        for order in range(0, 6):
+            ndimage.geometric_transform(data, mapping, (2,),
+                                output=output, order=order, extra_arguments = (1,),
+                                extra_keywords = {'b': 2}, vectorized=True)
+            self.failUnless(diff(output, [5, 7]) < eps)
+        self.assertRaises(RuntimeError, ndimage.geometric_transform, data,
+                          lambda x: x[:1], vectorized=True)
+
     def test_map_coordinates01(self):
         "map coordinates 1"
         data = numpy.array([[4, 1, 3, 2],
@@ -2253,6 +2289,69 @@ class TestNdimage(TestCase):
                                            reshape = False)
             self.failUnless(diff(out, true) < eps)
 
+    def test_spline_interpolator01(self):
+        "spline interpolator 1"
+        data = numpy.arange(60, dtype = numpy.float64).reshape((6, 10))
+        data = numpy.sin(data) * 10
+        coordinates = [[0.5, 2.25, 4.0, -1.0], [1.5, 3.0, 8.75, 2.0]]
+        for order in range(0, 6):
+            interpolator = ndimage.SplineInterpolator(data, order)
+            for mode in ['constant', 'nearest', 'reflect', 'wrap']:
+                assert_array_equal(interpolator.map_coordinates(coordinates,
+                                                          mode = mode),
+                                   ndimage.map_coordinates(data, coordinates,
+                                            order = order, mode = mode))
+                assert_array_equal(interpolator.shift([1.5, -0.25],
+                                                      mode = mode),
+                                   ndimage.shift(data, [1.5, -0.25],
+                                            order = order, mode = mode))
+            assert_array_equal(interpolator.zoom(1.5),
+                               ndimage.zoom(data, 1.5, order = order))
+            assert_array_equal(interpolator.affine_transform([[0.8, 0.2],
+                                                    [-0.3, 1.1]], [0.5, 1]),
+                               ndimage.affine_transform(data, [[0.8, 0.2],
+                                     [-0.3, 1.1]], [0.5, 1], order = order))
+            assert_array_equal(interpolator.rotate(30),
+                               ndimage.rotate(data, 30, order = order))
+            assert_array_equal(interpolator.geometric_transform(
+                                        lambda x: (x[0] * 0.5, x[1] + 0.5)),
+                               ndimage.geometric_transform(data,
+                                        lambda x: (x[0] * 0.5, x[1] + 0.5),
+                                        order = order))
+
+    def test_spline_interpolator02(self):
+        "spline interpolator 2"
+        data = numpy.arange(60, dtype = numpy.int32).reshape((3, 4, 5))
+        interpolator = ndimage.SplineInterpolator(data)
+        out = interpolator.rotate(25, axes = (0, 2))
+        assert_equal(out.dtype, numpy.int32)
+        assert_array_equal(out, ndimage.rotate(data, 25, axes = (0, 2)))
+        coefficients = interpolator.coefficients()
+        self.failUnless(interpolator.coefficients() is coefficients)
+        assert_array_equal(coefficients, ndimage.spline_filter(data))
+        self.failUnless(interpolator.coefficients(1) is data)
+        interpolator.clear()
+        self.failUnless(interpolator.coefficients() is not coefficients)
+
+    def test_spline_interpolator03(self):
+        "spline interpolator 3"
+        from scipy.ndimage import _ni_support
+        data = numpy.sin(numpy.arange(600.0)).reshape((20, 30))
+        coordinates = numpy.random.random((2, 30, 40)) * 20
+        expected = ndimage.map_coordinates(data, coordinates)
+        filtered = ndimage.spline_filter(data)
+        min_tile_size = _ni_support._min_tile_size
+        _ni_support._min_tile_size = 100
+        ndimage.set_num_threads(3)
+        try:
+            interpolator = ndimage.SplineInterpolator(data)
+            assert_array_equal(interpolator.coefficients(), filtered)
+            assert_array_equal(interpolator.map_coordinates(coordinates),
+                               expected)
+        finally:
+            ndimage.set_num_threads(1)
+            _ni_support._min_tile_size = min_tile_size
+
     def test_watershed_ift01(self):
         "watershed_ift 1"
         data = numpy.array([[0, 0, 0, 0, 0, 0, 0],
@@ -3277,6 +3376,65 @@ class TestNdimage(TestCase):
         e2 = diff(true2, output[1])
         self.failUnless(e1 < eps and e2 < eps)
 
+    def test_labeled_statistics01(self):
+        "labeled statistics 1"
+        numpy.random.seed(0)
+        input = numpy.random.randint(0, 20, (30, 40)).astype(numpy.float64)
+        labels = numpy.random.randint(0, 6, (30, 40))
+        index = [1, 2, 3, 4, 5, 7]
+        result = ndimage.labeled_statistics(input, labels)
+        assert_array_equal(result['label'], [1, 2, 3, 4, 5])
+        # large labels, far apart
+        big = labels.astype(numpy.int64) * 10 ** 12
+        result = ndimage.labeled_statistics(input, big,
+                                            statistics = ['count'])
+        assert_array_equal(result['label'],
+                           [ii * 10 ** 12 for ii in [1, 2, 3, 4, 5]])
+        assert_array_equal(result['count'],
+                           [(labels == ii).sum() for ii in [1, 2, 3, 4, 5]])
+        result = ndimage.labeled_statistics(input, labels, index)
+        assert_array_equal(result['label'], index)
+        assert_array_equal(result['count'][:-1],
+                           [(labels == ii).sum() for ii in index[:-1]])
+        assert_equal(result['count'][-1], 0)
+        for name in ['sum', 'mean', 'variance', 'standard_deviation',
+                     'minimum', 'maximum']:
+            true = getattr(ndimage, name)(input, labels, index[:-1])
+            assert_array_almost_equal(result[name][:-1], true)
+        for name in ['minimum_position', 'maximum_position',
+                     'center_of_mass']:
+            true = getattr(ndimage, name)(input, labels, index[:-1])
+            assert_array_almost_equal(result[name][:-1], true)
+        assert_equal(result['minimum'][-1], 0)
+        assert_equal(result['maximum_position'][-1], [0, 0])
+
+    def test_labeled_statistics02(self):
+        "labeled statistics 2"
+        from scipy.ndimage import _ni_support
+        numpy.random.seed(1)
+        input = numpy.random.randint(0, 5, (60, 50)).astype(numpy.int16)
+        labels = numpy.random.randint(0, 1000, (60, 50)).astype(numpy.int64)
+        labels[labels > 500] += 10 ** 10
+        index = numpy.unique(labels)
+        names = ['count', 'mean', 'variance', 'minimum_position',
+                 'maximum_position']
+        true = ndimage.labeled_statistics(input, labels, index, names)
+        assert_equal(true.dtype.names, tuple(['label'] + names))
+        min_tile_size = _ni_support._min_tile_size
+        _ni_support._min_tile_size = 100
+        ndimage.set_num_threads(4)
+        try:
+            result = ndimage.labeled_statistics(input, labels, index, names)
+        finally:
+            ndimage.set_num_threads(1)
+            _ni_support._min_tile_size = min_tile_size
+        for name in names:
+            assert_array_almost_equal(result[name], true[name])
+        result = ndimage.labeled_statistics(input, statistics = ['sum'])
+        assert_array_equal(result['sum'], [input.sum()])
+        assert_raises(ValueError, ndimage.labeled_statistics, input,
+                      statistics = ['median'])
+
     def test_distance_transform_bf01(self):
         "brute force distance transform 1"
         for type in self.types:
@@ -4408,6 +4566,51 @@ class TestNdimage(TestCase):
                                        border_value = 1, origin = (-1, -1))
         self.failUnless(diff(out, true) < eps)
 
+    def test_binary_erosion37(self):
+        "binary erosion 37"
+        numpy.random.seed(0)
+        data = numpy.random.random((30, 40)) > 0.4
+        mask = numpy.random.random((30, 40)) > 0.1
+        structs = [[[1, 1, 0], [1, 0, 1], [0, 1, 1]],
+                   [[0, 1, 0], [1, 1, 1], [0, 1, 0]],
+                   [[1, 0, 0, 1], [1, 1, 1, 1], [0, 0, 1, 0]]]
+        for struct in structs:
+            for origin in [0, (1, 0), (0, -1)]:
+                for border_value in [0, 1]:
+                    for iterations in [2, 5]:
+                        for msk in [None, mask]:
+                            for func in [ndimage.binary_erosion,
+                                         ndimage.binary_dilation]:
+                                true = func(data, struct, iterations, msk,
+                                            origin = origin,
+                                            border_value = border_value,
+                                            brute_force = True)
+                                out = func(data, struct, iterations, msk,
+                                           origin = origin,
+                                           border_value = border_value)
+                                assert_array_equal(out, true)
+
+    def test_binary_erosion38(self):
+        "binary erosion 38"
+        numpy.random.seed(0)
+        data = numpy.zeros((50, 60), numpy.uint8)
+        data[10, 20] = 1
+        mask = numpy.random.random((50, 60)) > 0.3
+        struct = [[0, 1, 1],
+                  [1, 0, 1],
+                  [0, 1, 1]]
+        for origin in [(1, 1), (0, 1)]:
+            true = ndimage.binary_dilation(data, struct, -1, mask,
+                                           origin = origin,
+                                           brute_force = True)
+            out = numpy.zeros(data.shape, numpy.int32)
+            ndimage.binary_dilation(data, struct, -1, mask, out,
+                                    origin = origin)
+            assert_array_equal(out, true)
+            out = ndimage.binary_propagation(data, struct, mask,
+                                             origin = origin)
+            assert_array_equal(out, true)
+
     def test_binary_dilation01(self):
         "binary dilation 1"
         for type in self.types:
@@ -0,0 +1,92 @@
+''' Tests for out-of-core processing in slabs '''
+
+import os
+import tempfile
+
+import numpy as np
+
+from numpy.testing import assert_equal, assert_raises
+
+import scipy.ndimage as sndi
+
+
+def test_slab_filter():
+    np.random.seed(1234)
+    arr = np.random.rand(60, 40, 20).astype(np.float32)
+    row_bytes = 40 * 20 * 12
+    for max_memory in [20 * row_bytes, 37 * row_bytes, 100 * row_bytes]:
+        res = sndi.slab_filter(arr, sndi.gaussian_filter, 8,
+                               max_memory=max_memory, extra_arguments=(2.0,))
+        yield assert_equal, res, sndi.gaussian_filter(arr, 2.0)
+        res = sndi.slab_filter(arr, sndi.median_filter, (2, 1),
+                               max_memory=max_memory,
+                               extra_keywords={'size': 4})
+        yield assert_equal, res, sndi.median_filter(arr, size=4)
+
+
+def test_slab_filter_morphology():
+    np.random.seed(1234)
+    arr = np.random.rand(60, 40) > 0.3
+    res = sndi.slab_filter(arr, sndi.binary_erosion, 3, max_memory=1200,
+                           extra_keywords={'iterations': 3})
+    assert_equal(res, sndi.binary_erosion(arr, iterations=3))
+
+
+def test_slab_filter_memmap():
+    fname = tempfile.mktemp('.dat')
+    try:
+        arr = np.arange(30 * 20, dtype=np.float64).reshape(30, 20)
+        out = np.memmap(fname, dtype=np.float64, mode='w+', shape=arr.shape)
+        res = sndi.slab_filter(arr, sndi.uniform_filter, 2, output=out,
+                               max_memory=10 * 20 * 24,
+                               extra_arguments=(5,))
+        assert_equal(res, None)
+        del out
+        out = np.memmap(fname, dtype=np.float64, mode='r', shape=arr.shape)
+        assert_equal(np.asarray(out), sndi.uniform_filter(arr, 5))
+        del out
+    finally:
+        os.remove(fname)
+
+
+def test_slab_filter_errors():
+    arr = np.zeros((10, 10))
+    assert_raises(ValueError, sndi.slab_filter, arr, sndi.uniform_filter, 4,
+                  max_memory=10 * 24 * 8)
+    assert_raises(ValueError, sndi.slab_filter, arr, sndi.uniform_filter, -1)
+    assert_raises(RuntimeError, sndi.slab_filter, arr, lambda x: x[1:], 1,
+                  max_memory=10 * 24 * 4)
+
+
+def test_slab_label():
+    np.random.seed(1234)
+    for shape in [(50,), (40, 30), (23, 17, 9)]:
+        row_bytes = int(np.prod(shape[1:])) * 9
+        for connectivity in range(1, len(shape) + 1):
+            arr = np.random.rand(*shape) > 0.5
+            structure = sndi.generate_binary_structure(len(shape),
+                                                       connectivity)
+            expected, num = sndi.label(arr, structure)
+            for rows in [1, 3, 7, shape[0]]:
+                res = sndi.slab_label(arr, structure,
+                                      max_memory=rows * row_bytes)
+                yield assert_equal, res[1], num
+                yield assert_equal, res[0], expected
+
+
+def test_slab_label_output():
+    arr = np.array([[1, 0, 1],
+                    [1, 0, 1],
+                    [1, 1, 1],
+                    [0, 0, 0],
+                    [1, 0, 1]])
+    out = np.zeros(arr.shape, dtype=np.int32)
+    num = sndi.slab_label(arr, output=out, max_memory=2 * 3 * 16)
+    assert_equal(num, 3)
+    assert_equal(out, [[1, 0, 1],
+                       [1, 0, 1],
+                       [1, 1, 1],
+                       [0, 0, 0],
+                       [2, 0, 3]])
+    assert_raises(RuntimeError, sndi.slab_label, arr,
+                  output=np.zeros(arr.shape))
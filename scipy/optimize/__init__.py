@@ -7,12 +7,15 @@ from info import __doc__
 from optimize import *
 from minpack import *
 from zeros import *
+from numdiff import *
+from evaluator import *
 from anneal import *
+from gridsearch import *
 from lbfgsb import fmin_l_bfgs_b
 from tnc import fmin_tnc
 from cobyla import fmin_cobyla
 from nonlin import broyden1, broyden2, broyden3, broyden_generalized, \
-    anderson, anderson2
+    anderson, anderson2, broyden_limited, newton_krylov
 from slsqp import fmin_slsqp
 from nnls import nnls
 
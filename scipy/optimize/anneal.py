@@ -7,7 +7,7 @@ from numpy import asarray, tan, exp, ones, squeeze, sign, \
      all, log, sqrt, pi, shape, array, minimum, where
 from numpy import random
 
-__all__ = ['anneal']
+__all__ = ['anneal', 'anneal_parallel']
 
 _double_min = numpy.finfo(float).min
 _double_max = numpy.finfo(float).max
@@ -23,6 +23,7 @@ class base_schedule(object):
         self.feval = 0
         self.k = 0
         self.T = None
+        self.random = random
 
     def init(self, **options):
         self.__dict__.update(options)
@@ -56,7 +57,7 @@ class base_schedule(object):
         fmax = _double_min
         fmin = _double_max
         for _ in range(self.Ninit):
-            x0 = random.uniform(size=self.dims)*(urange-lrange) + lrange
+            x0 = self.random.uniform(size=self.dims)*(urange-lrange) + lrange
             fval = self.func(x0, *self.args)
             self.feval += 1
             if fval > fmax:
@@ -76,7 +77,7 @@ class base_schedule(object):
             self.accepted += 1
             return 1
         p = exp(-dE*1.0/self.boltzmann/T)
-        if (p > random.uniform(0.0, 1.0)):
+        if (p > self.random.uniform(0.0, 1.0)):
             self.accepted += 1
             return 1
         return 0
@@ -100,7 +101,7 @@ class fast_sa(base_schedule):
 
     def update_guess(self, x0):
         x0 = asarray(x0)
-        u = squeeze(random.uniform(0.0, 1.0, size=self.dims))
+        u = squeeze(self.random.uniform(0.0, 1.0, size=self.dims))
         T = self.T
         y = sign(u-0.5)*T*((1+1.0/T)**abs(2*u-1)-1.0)
         xc = y*(self.upper - self.lower)
@@ -115,7 +116,7 @@ class fast_sa(base_schedule):
 class cauchy_sa(base_schedule):
     def update_guess(self, x0):
         x0 = asarray(x0)
-        numbers = squeeze(random.uniform(-pi/2, pi/2, size=self.dims))
+        numbers = squeeze(self.random.uniform(-pi/2, pi/2, size=self.dims))
         xc = self.learn_rate * self.T * tan(numbers)
         xnew = x0 + xc
         return xnew
@@ -129,7 +130,7 @@ class boltzmann_sa(base_schedule):
     def update_guess(self, x0):
         std = minimum(sqrt(self.T)*ones(self.dims), (self.upper-self.lower)/3.0/self.learn_rate)
         x0 = asarray(x0)
-        xc = squeeze(random.normal(0, 1.0, size=self.dims))
+        xc = squeeze(self.random.normal(0, 1.0, size=self.dims))
 
         xnew = x0 + xc*std*self.learn_rate
         return xnew
@@ -207,7 +208,7 @@ def anneal(func, x0, args=(), schedule='fast', full_output=0,
       fmin_l_bfgs_b, fmin_tnc,
              fmin_cobyla -- constrained multivariate optimizers
 
-      anneal, brute -- global optimizers
+      anneal, anneal_parallel, brute, grid_search -- global optimizers
 
       fminbound, brent, golden, bracket -- local scalar minimizers
 
@@ -300,6 +301,236 @@ def anneal(func, x0, args=(), schedule='fast', full_output=0,
         return best_state.x, retval
 
 
+class _chain(object):
+    """A Markov chain of anneal_parallel: its schedule and its states."""
+    def __init__(self, schedule, x, cost):
+        self.schedule = schedule
+        self.last, self.best = _state(), _state()
+        self.last.x, self.best.x = array(x), array(x)
+        self.last.cost, self.best.cost = cost, cost
+        self.fqueue = [100, 300, 500, 700]
+
+    def step(self, x, cost):
+        self.schedule.feval += 1
+        if self.schedule.accept_test(cost - self.last.cost):
+            self.last.x = array(x)
+            self.last.cost = cost
+            if cost < self.best.cost:
+                self.best.x = array(x)
+                self.best.cost = cost
+
+    def cool(self):
+        self.schedule.update_temp()
+        self.fqueue.append(squeeze(self.last.cost))
+        self.fqueue.pop(0)
+
+
+class _segment(object):
+    """Run a group of chains for a number of temperatures, picklable.
+
+    At each of the dwell steps, a proposal is made for every chain of the
+    group, and the proposals are evaluated with a single call of func if
+    it is vectorized.
+    """
+    def __init__(self, temperatures, vectorized):
+        self.temperatures = temperatures
+        self.vectorized = vectorized
+
+    def __call__(self, chains):
+        schedule = chains[0].schedule
+        func, args = schedule.func, schedule.args
+        for _ in range(self.temperatures):
+            for _ in range(schedule.dwell):
+                xs = [c.schedule.update_guess(c.last.x) for c in chains]
+                if self.vectorized:
+                    costs = asarray(func(array(xs), *args)).ravel()
+                else:
+                    costs = [func(x, *args) for x in xs]
+                for c, x, cost in zip(chains, xs, costs):
+                    c.step(x, cost)
+            for c in chains:
+                c.cool()
+        return chains
+
+
+def anneal_parallel(func, x0, args=(), schedule='fast', full_output=0,
+                    nchains=4, exchange=True, ladder=2.0, swap_interval=1,
+                    vectorized=False, backend='serial', workers=None,
+                    seed=None, T0=None, Tf=1e-12, maxeval=None,
+                    maxaccept=None, maxiter=400, boltzmann=1.0,
+                    learn_rate=0.5, feps=1e-6, quench=1.0, m=1.0, n=1.0,
+                    lower=-100, upper=100, dwell=50):
+    """Minimize a function using several simulated annealing chains.
+
+    nchains Markov chains are run side by side, each with its own
+    schedule and random numbers.  With exchange, they form a replica
+    exchange (parallel tempering) ensemble: chain i starts at the
+    temperature T0*ladder**i and follows its schedule from there, and
+    every swap_interval temperatures neighbouring chains try to swap
+    their states, so that good states found by the hot chains move down
+    to the cold ones.  Without exchange, the chains are independent
+    restarts at the same temperatures.  The best state of all the chains
+    is returned.
+
+    Inputs:
+
+    func, x0, args, schedule, T0, Tf, maxeval, maxaccept, maxiter,
+    boltzmann, learn_rate, feps, quench, m, n, lower, upper, dwell
+                  -- As for anneal.  maxeval and maxaccept count the
+                     evaluations and acceptances of all the chains, Tf
+                     and feps apply to the coldest chain and to all the
+                     chains, and maxiter counts temperatures.
+    full_output   -- Return optional outputs
+    nchains       -- Number of chains
+    exchange      -- Swap states between chains if True
+    ladder        -- Ratio of the temperatures of successive chains
+                     with exchange
+    swap_interval -- Number of temperatures between the swaps, and
+                     between the checks of the stopping conditions
+    vectorized    -- If True, func(x,*args) is called with an array of
+                     shape (k,)+shape(x0) of k proposals, and returns
+                     their k values
+    backend       -- 'serial', 'processes' to spread the chains over a
+                     multiprocessing.Pool, or an object with a
+                     map(function, sequence) method.  func, args and the
+                     chains are pickled at each swap interval.
+    workers       -- Number of groups of chains run in parallel.
+                     Defaults to the number of CPUs for 'processes'
+                     and to nchains for a map object.
+    seed          -- Seed of the random numbers.  The results depend on
+                     the seed only, not on the backend.
+
+    Outputs: (xmin, {Jmin, T, feval, iters, accept,} retval)
+
+    As for anneal, with T the temperature of the coldest chain, iters the
+    number of temperatures, and feval and accept summed over the chains.
+
+    """
+    if nchains < 1:
+        raise ValueError, "nchains must be at least 1"
+    x0 = asarray(x0)
+    lower = asarray(lower)
+    upper = asarray(upper)
+    rng = random.RandomState(seed)
+
+    schedules = []
+    for i in range(nchains):
+        s = eval(schedule+'_sa()')
+        s.init(dims=shape(x0),func=func,args=args,boltzmann=boltzmann,T0=T0,
+               learn_rate=learn_rate, lower=lower, upper=upper,
+               m=m, n=n, quench=quench, dwell=dwell)
+        s.random = random.RandomState(rng.randint(2**30))
+        schedules.append(s)
+
+    feval = 0
+    if T0 is None:
+        # the starting temperature and point of anneal, from Ninit
+        # random points evaluated together
+        Ninit = schedules[0].Ninit
+        xs = rng.uniform(size=(Ninit,)+shape(x0))*(upper-lower) + lower
+        if vectorized:
+            fs = asarray(func(xs, *args)).ravel()
+        else:
+            fs = asarray([func(x, *args) for x in xs])
+        feval += Ninit
+        T0 = (fs.max() - fs.min())*1.5
+        x0 = xs[fs.argmin()]
+    if vectorized:
+        cost = asarray(func(array([x0]), *args)).ravel()[0]
+    else:
+        cost = func(x0, *args)
+    feval += 1
+
+    chains = []
+    for i in range(nchains):
+        schedules[i].T0 = T0
+        if exchange:
+            schedules[i].T0 = T0*ladder**i
+        schedules[i].T = schedules[i].T0
+        chains.append(_chain(schedules[i], x0, cost))
+
+    pool = None
+    if backend is None or backend == 'serial':
+        mapper = map
+        ngroups = 1
+    elif backend == 'processes':
+        import multiprocessing
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        pool = multiprocessing.Pool(workers)
+        mapper = pool.map
+        ngroups = workers
+    elif hasattr(backend, 'map'):
+        mapper = backend.map
+        ngroups = workers or nchains
+    else:
+        raise ValueError, "unknown backend %r" % (backend,)
+    ngroups = max(1, min(ngroups, nchains))
+    size = -(-nchains // ngroups)
+    segment = _segment(swap_interval, vectorized)
+
+    iters = 0
+    swaps = 0
+    try:
+        while 1:
+            groups = [chains[i:i+size] for i in range(0, nchains, size)]
+            chains = []
+            for group in mapper(segment, groups):
+                chains.extend(group)
+            iters += swap_interval
+            if exchange:
+                # alternate between the even and the odd pairs
+                for i in range(swaps % 2, nchains - 1, 2):
+                    a, b = chains[i], chains[i+1]
+                    delta = (a.last.cost - b.last.cost) * \
+                            (1.0/a.schedule.T - 1.0/b.schedule.T)/boltzmann
+                    if delta >= 0 or rng.uniform() < exp(delta):
+                        a.last, b.last = b.last, a.last
+                swaps += 1
+            # Stopping conditions, as for anneal
+            af = asarray([c.fqueue for c in chains])*1.0
+            if all(abs((af-af[:,:1])/af[:,:1]) < feps):
+                retval = 0
+                break
+            if (Tf is not None) and (chains[0].schedule.T < Tf):
+                retval = 1
+                break
+            total = feval
+            for c in chains:
+                total += c.schedule.feval
+            if (maxeval is not None) and (total > maxeval):
+                retval = 2
+                break
+            if (iters > maxiter):
+                print "Warning: Maximum number of iterations exceeded."
+                retval = 3
+                break
+            accepted = 0
+            for c in chains:
+                accepted += c.schedule.accepted
+            if (maxaccept is not None) and (accepted > maxaccept):
+                retval = 4
+                break
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    best = chains[0].best
+    for c in chains[1:]:
+        if c.best.cost < best.cost:
+            best = c.best
+    if full_output:
+        accepted = 0
+        for c in chains:
+            feval += c.schedule.feval
+            accepted += c.schedule.accepted
+        return best.x, best.cost, chains[0].schedule.T, \
+               feval, iters, accepted, retval
+    else:
+        return best.x, retval
+
+
 
 if __name__ == "__main__":
     from numpy import cos
@@ -0,0 +1,160 @@
+"""Memoized evaluation of an objective function and its gradient
+
+Line searches and quasi-Newton methods often need the function value and
+the gradient at the same point through separate calls, and come back to
+points they have already tried.  An Evaluator remembers the values at
+the most recent points, so that such calls cost nothing, counts the
+calls actually made and can keep a trace of them.
+"""
+
+__all__ = ['Evaluator']
+
+import time
+import numpy
+from numpy import asarray, sqrt, finfo
+from numdiff import _approx_gradient
+
+_epsilon = sqrt(finfo(float).eps)
+
+
+class Evaluator(object):
+    """Objective function and gradient with a cache of recent values.
+
+    Parameters
+    ----------
+    f : callable f(x,*args)
+        Objective function.  If fprime is True, it returns the function
+        value and the gradient together, as a tuple (f, g).
+    fprime : callable fprime(x,*args), True or None, optional
+        Gradient of f, True if f returns it, or None to approximate it by
+        forward differences of f.
+    args : tuple, optional
+        Extra arguments passed to f and fprime.
+    epsilon : float or ndarray, optional
+        Step of the forward differences if fprime is None.
+    cache_size : int, optional
+        Number of points whose values are remembered.  When the cache is
+        full, the point used least recently is forgotten.
+    trace : bool, optional
+        If True, every call of f or fprime is recorded in the trace.
+
+    Attributes
+    ----------
+    nfev : int
+        Number of calls of f made, including those of the finite
+        differences.
+    ngev : int
+        Number of gradients computed, by calls of fprime, by calls of f
+        returning the gradient, or by finite differences.
+    trace : list
+        A tuple (x, f, gnorm, seconds) for each call, in the order of the
+        calls: a copy of the point, the function value or None, the
+        2-norm of the gradient or None, and the wall time of the call.
+        Records are appended as the calls are made, so the list can also
+        be read while an optimizer runs, for instance in its callback.
+
+    Notes
+    -----
+    Points are compared exactly, with the same type and shape.
+
+    An Evaluator can be passed as f to fmin_bfgs, fmin_cg and fmin_ncg,
+    with fprime and args left out, to read its trace and counters after
+    the run.  Its fun and grad methods can be passed as f and fprime to
+    line_search and to the other optimizers.
+
+    Examples
+    --------
+    >>> ev = Evaluator(rosen, rosen_der, trace=True)
+    >>> xopt = fmin_bfgs(ev, [0.8, 1.2, 0.7], disp=0)
+    >>> x, f, gnorm, seconds = ev.trace[-1]
+
+    """
+    def __init__(self, f, fprime=None, args=(), epsilon=_epsilon,
+                 cache_size=8, trace=False):
+        self.f = f
+        self.fprime = fprime
+        self.args = tuple(args)
+        self.epsilon = epsilon
+        self.cache_size = cache_size
+        self.record = trace
+        self.nfev = 0
+        self.ngev = 0
+        self.trace = []
+        # [f, g] of the points in the cache, by key, and the keys from
+        # the least to the most recently used
+        self._values = {}
+        self._keys = []
+
+    def _entry(self, x):
+        x = asarray(x)
+        key = (x.dtype.str, x.shape, x.tostring())
+        entry = self._values.get(key)
+        if entry is None:
+            entry = [None, None]
+            self._values[key] = entry
+        else:
+            self._keys.remove(key)
+        self._keys.append(key)
+        while len(self._keys) > max(self.cache_size, 0):
+            del self._values[self._keys.pop(0)]
+        return entry
+
+    def _call(self, function, x):
+        start = time.time()
+        value = function(*((x,)+self.args))
+        return value, time.time() - start
+
+    def _trace(self, x, f, g, seconds):
+        if self.record:
+            gnorm = None
+            if g is not None:
+                g = asarray(g).ravel()
+                gnorm = sqrt(numpy.dot(g, g))
+            self.trace.append((numpy.array(x, copy=True), f, gnorm, seconds))
+
+    def _f(self, x):
+        """f(x), always calling f."""
+        if self.fprime is True:
+            (fx, gx), seconds = self._call(self.f, x)
+            self.ngev += 1
+        else:
+            fx, seconds = self._call(self.f, x)
+            gx = None
+        self.nfev += 1
+        self._trace(x, fx, gx, seconds)
+        return fx, gx
+
+    def fun(self, x):
+        """Return f(x), calling f only if x is not in the cache."""
+        entry = self._entry(x)
+        if entry[0] is None:
+            fx, gx = self._f(x)
+            entry[0] = fx
+            if gx is not None:
+                entry[1] = asarray(gx)
+        return entry[0]
+
+    __call__ = fun
+
+    def grad(self, x):
+        """Return the gradient at x, computing it only if x is not in the
+        cache."""
+        entry = self._entry(x)
+        if entry[1] is None:
+            if self.fprime is True:
+                self.fun(x)
+            elif self.fprime is None:
+                f0 = self.fun(x)
+                entry[1] = _approx_gradient(x, lambda y: self._f(y)[0],
+                                            self.epsilon, f0=f0)
+                self.ngev += 1
+            else:
+                gx, seconds = self._call(self.fprime, x)
+                self.ngev += 1
+                self._trace(x, None, gx, seconds)
+                entry[1] = gx
+        return entry[1]
+
+    def fun_and_grad(self, x):
+        """Return f(x) and the gradient at x."""
+        return self.fun(x), self.grad(x)
@@ -0,0 +1,227 @@
+"""Brute force minimization over grids too large to hold in memory
+
+The grid is walked in chunks of consecutive points, which are built and
+evaluated one chunk at a time, in a single process or spread over a pool
+of processes.  Only the best points found so far are kept, and the local
+optimizer polishing them is run from each of them.
+"""
+
+__all__ = ['grid_search']
+
+import heapq
+import numpy
+from numpy import mgrid, asarray, empty, arange, argsort, isnan
+
+from optimize import fmin
+
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
+
+
+def _grid_axes(ranges, Ns):
+    """Return the points of the grid along each axis, as numpy.mgrid."""
+    axes = []
+    for r in ranges:
+        if type(r) is not type(slice(None)):
+            if len(r) < 3:
+                r = tuple(r) + (complex(Ns),)
+            r = slice(*r)
+        axes.append(asarray(mgrid[r], dtype=float))
+    return axes
+
+
+class _ChunkSearch(object):
+    """The best points of a chunk of the grid, as a picklable callable.
+
+    Called with (start, stop), it evaluates func at the points of the
+    flattened grid numbered start to stop - 1 in C order, and returns a
+    list of (value, index) of the keep smallest values.
+    """
+    def __init__(self, func, args, axes, keep, vectorized):
+        self.func = func
+        self.args = args
+        self.axes = axes
+        self.keep = keep
+        self.vectorized = vectorized
+
+    def points(self, index):
+        index = asarray(index)
+        x = empty((len(index), len(self.axes)))
+        for k in range(len(self.axes)-1, -1, -1):
+            n = len(self.axes[k])
+            x[:,k] = self.axes[k][index % n]
+            index = index // n
+        return x
+
+    def __call__(self, bounds):
+        start, stop = bounds
+        x = self.points(arange(start, stop))
+        if self.vectorized:
+            values = self.func(*((x,)+self.args))
+        else:
+            values = [self.func(*((xi,)+self.args)) for xi in x]
+        values = asarray(values, dtype=float).ravel()
+        order = argsort(values, kind='mergesort')
+        order = order[~isnan(values[order])][:self.keep]
+        return [(values[i], start + i) for i in order]
+
+
+class _Polish(object):
+    """finish(func, x0, args=args, full_output=1, disp=0), picklable."""
+    def __init__(self, func, args, finish):
+        self.func = func
+        self.args = args
+        self.finish = finish
+
+    def __call__(self, x0):
+        vals = self.finish(self.func, x0, args=self.args, full_output=1,
+                           disp=0)
+        return asarray(vals[0], dtype=float), vals[1], vals[-1]
+
+
+def _serial_map(function, sequence):
+    for item in sequence:
+        yield function(item)
+
+def _chunks(size, chunksize):
+    for start in xrange(0, size, chunksize):
+        yield start, min(start + chunksize, size)
+
+def _push(heap, keep, value, index):
+    """Keep the keep smallest (value, index) in heap, a max-heap."""
+    item = (-value, -index)
+    if len(heap) < keep:
+        heapq.heappush(heap, item)
+    elif item > heap[0]:
+        heapq.heapreplace(heap, item)
+
+def grid_search(func, ranges, args=(), Ns=20, full_output=0, finish=fmin,
+                keep=1, chunksize=4096, vectorized=False, backend='serial',
+                workers=None):
+    """Minimize a function by brute force over a grid, chunk by chunk.
+
+    As brute, but the grid is never held in memory: it is evaluated in
+    chunks of consecutive points, and only the keep best points are kept.
+    Each of them is then polished with finish, and the best polished point
+    is returned.
+
+    Parameters
+    ----------
+    func : callable func(x,*args)
+        Objective function to be minimized, called with a 1-D array.
+    ranges : tuple
+        Each element is a tuple of parameters or a slice object to be
+        handed to numpy.mgrid, as for brute.
+    args : tuple, optional
+        Extra arguments passed to func.
+    Ns : int, optional
+        Default number of samples, if those are not provided.
+    full_output : bool, optional
+        If True, also return all the polished points.
+    finish : callable, optional
+        Local optimizer, called as finish(func, x0, args=args,
+        full_output=1, disp=0) from each point kept, and returning the
+        point found first, its value second and a warning flag last, as
+        fmin does.  If None, the grid points are returned as they are.
+    keep : int, optional
+        Number of best grid points kept and polished.
+    chunksize : int, optional
+        Number of grid points evaluated together.
+    vectorized : bool, optional
+        If True, func is called with a 2-D array holding one point per
+        row and returns one value per point.
+    backend : {'serial', 'processes'} or object, optional
+        How the chunks, and then the polishing runs, are distributed:
+
+        - 'serial' : one after the other in this process.
+        - 'processes' : over a multiprocessing.Pool of workers processes.
+          func, args and finish must be picklable.
+        - an object with a map(function, sequence) method, such as a
+          multiprocessing.Pool that is kept open between calls.
+    workers : int, optional
+        Number of processes.  Defaults to the number of CPUs.
+
+    Returns
+    -------
+    xmin : ndarray
+        The best point found.
+    fval : float
+        The value of func at xmin.
+    xs : ndarray, shape (keep, N)
+        The polished points, sorted by value.  Only returned if
+        full_output is True.
+    fs : ndarray, shape (keep,)
+        Their values.  Only returned if full_output is True.
+
+    Notes
+    -----
+    The grid points of a chunk are generated from the points along each
+    axis, so memory is proportional to chunksize, not to the size of the
+    grid.  Without finish, xmin is the point brute would find: ties
+    between equal values go to the first point in the order of the grid.
+    Points where func is nan are ignored.
+
+    Examples
+    --------
+    Search a grid of 30**6 points in 8 processes, and polish the 10 best
+    ones with fmin:
+
+    >>> ranges = [(-3, 3)]*6
+    >>> xmin, fval = grid_search(objective, ranges, Ns=30, keep=10,
+    ...                          vectorized=True, chunksize=100000,
+    ...                          backend='processes', workers=8)
+
+    """
+    axes = _grid_axes(ranges, Ns)
+    size = 1
+    for axis in axes:
+        size *= len(axis)
+    if size == 0:
+        raise ValueError, "the grid has no points"
+    keep = max(1, min(int(keep), size))
+    chunksize = max(1, int(chunksize))
+    search = _ChunkSearch(func, args, axes, keep, vectorized)
+    pool = None
+    if backend is None or backend == 'serial':
+        mapper = _serial_map
+    elif backend == 'processes':
+        if multiprocessing is None:
+            raise RuntimeError, "the 'processes' backend needs the " \
+                  "multiprocessing module"
+        pool = multiprocessing.Pool(workers)
+        mapper = pool.imap_unordered
+    elif hasattr(backend, 'map'):
+        mapper = backend.map
+    else:
+        raise ValueError, "unknown backend %r" % (backend,)
+    try:
+        heap = []
+        for best in mapper(search, _chunks(size, chunksize)):
+            for value, index in best:
+                _push(heap, keep, value, index)
+        if not heap:
+            raise ValueError, "func is nan at all the points of the grid"
+        heap.sort()
+        heap.reverse()
+        xs = search.points([-item[1] for item in heap])
+        fs = asarray([-item[0] for item in heap])
+        flags = [0]*len(fs)
+        if callable(finish):
+            results = list(mapper(_Polish(func, args, finish), list(xs)))
+            xs = asarray([r[0] for r in results]).reshape(xs.shape)
+            fs = asarray([r[1] for r in results], dtype=float)
+            flags = [r[2] for r in results]
+            order = argsort(fs, kind='mergesort')
+            xs, fs = xs[order], fs[order]
+            flags = [flags[i] for i in order]
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    if flags[0] > 0:
+        print "Warning: Final optimization did not succeed"
+    if full_output:
+        return xs[0], fs[0], xs, fs
+    return xs[0], fs[0]
@@ -16,6 +16,8 @@ A collection of general-purpose optimization routines.::
                      function, gradient and Hessian).
    leastsq     --  Minimize the sum of squares of M equations in
                      N unknowns given a starting estimate.
+   curve_fit_batch -- Fit one model to many datasets at once with a
+                     vectorized Levenberg-Marquardt iteration.
 
 Constrained Optimizers (multivariate)::
 
@@ -35,7 +37,11 @@ Constrained Optimizers (multivariate)::
 Global Optimizers::
 
    anneal      --  Simulated Annealing
+   anneal_parallel --  Several annealing chains, independent or exchanging
+                         states (parallel tempering), over a pool of processes
    brute       --  Brute force searching optimizer
+   grid_search --  Brute force search evaluating the grid in chunks,
+                     over a pool of processes, and polishing the best points
 
 Scalar function minimizers::
 
@@ -57,6 +63,10 @@ Scalar function solvers::
    bisect      --  Bisection method
    newton      --  Secant method or Newton's method
 
+   bisect_array, ridder_array, brentq_array, brenth_array, newton_array
+               --  The same methods applied to arrays of independent
+                     problems, with vectorized function evaluations
+
    fixed_point --  Single-variable fixed-point solver.
 
 A collection of general-purpose nonlinear multidimensional solvers::
@@ -82,12 +92,27 @@ A collection of general-purpose nonlinear multidimensional solvers::
                            taking inversion to improve the stability
    anderson2           --  the Anderson method, the same as anderson, but
                            formulated differently
+   broyden_limited     --  Broyden's second method as broyden3, keeping only
+                           the last M update pairs, for large systems
+   newton_krylov       --  matrix-free inexact Newton method, solving the
+                           Newton steps with GMRES or LGMRES and finite
+                           difference Jacobian-vector products, for large
+                           systems
 
 Utility Functions::
 
    line_search --  Return a step that satisfies the strong Wolfe conditions.
    check_grad  --  Check the supplied derivative using finite difference
                      techniques.
+   approx_jacobian   --  Finite-difference gradient or Jacobian, with the
+                           points evaluated serially, in threads, in
+                           processes or in a single vectorized call.
+   FiniteDifferences --  The same approximation as a derivative function
+                           to pass to the optimizers.
+   group_columns     --  Group the columns of a sparse Jacobian that can be
+                           estimated together (Curtis, Powell and Reid).
+   Evaluator         --  Objective function and gradient with a cache of the
+                           values at recent points and a trace of the calls.
 """
 
 postpone_import = 1
@@ -2,11 +2,14 @@ import _minpack
 
 from numpy import atleast_1d, dot, take, triu, shape, eye, \
                   transpose, zeros, product, greater, array, \
-                  all, where, isscalar, asarray, inf
+                  all, where, isscalar, asarray, inf, sqrt, finfo, \
+                  ones, arange, newaxis, isfinite, maximum
+from numdiff import approx_jacobian, group_columns
 
 error = _minpack.error
 
-__all__ = ['fsolve', 'leastsq', 'newton', 'fixed_point','bisection', 'curve_fit']
+__all__ = ['fsolve', 'leastsq', 'newton', 'fixed_point','bisection', 'curve_fit',
+           'curve_fit_batch']
 
 def check_func(thefunc, x0, args, numinputs, output_shape=None):
     res = atleast_1d(thefunc(*((x0[:numinputs],)+args)))
@@ -18,8 +21,37 @@ def check_func(thefunc, x0, args, numinputs, output_shape=None):
             raise TypeError, "There is a mismatch between the input and output shape of %s." % thefunc.func_name
     return shape(res)
 
+class _GroupedJacobian(object):
+    """func and its Jacobian by forward differences over column groups.
 
-def fsolve(func,x0,args=(),fprime=None,full_output=0,col_deriv=0,xtol=1.49012e-8,maxfev=0,band=None,epsfcn=0.0,factor=100,diag=None, warning=True):
+    The steps are those of MINPACK's fdjac1 and fdjac2, and the value of
+    func at x is reused from the last call of fun, as hybrd and lmdif do.
+    """
+    def __init__(self, func, sparsity, epsfcn):
+        self.func = func
+        self.sparsity = sparsity
+        self.groups = group_columns(sparsity)
+        self.eps = sqrt(max(epsfcn, finfo(float).eps))
+        self.x = None
+        self.fx = None
+
+    def fun(self, x, *args):
+        self.fx = self.func(*((x,)+args))
+        self.x = array(x, copy=True)
+        return self.fx
+
+    def jac(self, x, *args):
+        f0 = None
+        if self.x is not None and all(self.x == x):
+            f0 = self.fx
+        h = self.eps*abs(x)
+        h[h == 0] = self.eps
+        J = approx_jacobian(x, self.func, h, args, f0=f0,
+                            sparsity=self.sparsity, groups=self.groups)
+        return J.toarray()
+
+
+def fsolve(func,x0,args=(),fprime=None,full_output=0,col_deriv=0,xtol=1.49012e-8,maxfev=0,band=None,epsfcn=0.0,factor=100,diag=None, warning=True, sparsity=None):
     """
     Find the roots of a function.
 
@@ -39,6 +71,8 @@ def fsolve(func,x0,args=(),fprime=None,full_output=0,col_deriv=0,xtol=1.49012e-8
     fprime
         A function or method to compute the Jacobian of func with derivatives
         across the rows. If this is None, the Jacobian will be estimated.
+        Pass a FiniteDifferences instance to estimate it with central
+        differences, or with evaluations in parallel.
     full_output
         Non-zero to return the optional outputs.
     col_deriv
@@ -94,6 +128,11 @@ def fsolve(func,x0,args=(),fprime=None,full_output=0,col_deriv=0,xtol=1.49012e-8
     diag
         A sequency of N positive entries that serve as a scale factors for the
         variables.
+    sparsity
+        Sparsity structure of the Jacobian, an (N,N) array or sparse matrix
+        whose nonzero entries mark the elements of the Jacobian that may be
+        nonzero (only for fprime=None).  Columns that have no row in common
+        are then estimated with a single function call.  Generalizes `band`.
 
     Notes
     -----
@@ -125,6 +164,9 @@ def fsolve(func,x0,args=(),fprime=None,full_output=0,col_deriv=0,xtol=1.49012e-8
     if type(args) != type(()): args = (args,)
     check_func(func,x0,args,n,(n,))
     Dfun = fprime
+    if Dfun is None and sparsity is not None:
+        grouped = _GroupedJacobian(func, sparsity, epsfcn)
+        func, Dfun, col_deriv = grouped.fun, grouped.jac, 0
     if Dfun is None:
         if band is None:
             ml,mu = -10,-10
@@ -169,7 +211,7 @@ def fsolve(func,x0,args=(),fprime=None,full_output=0,col_deriv=0,xtol=1.49012e-8
         return retval[0]
 
 
-def leastsq(func,x0,args=(),Dfun=None,full_output=0,col_deriv=0,ftol=1.49012e-8,xtol=1.49012e-8,gtol=0.0,maxfev=0,epsfcn=0.0,factor=100,diag=None,warning=True):
+def leastsq(func,x0,args=(),Dfun=None,full_output=0,col_deriv=0,ftol=1.49012e-8,xtol=1.49012e-8,gtol=0.0,maxfev=0,epsfcn=0.0,factor=100,diag=None,warning=True,sparsity=None):
     """Minimize the sum of squares of a set of equations.
 
   Description:
@@ -190,7 +232,9 @@ def leastsq(func,x0,args=(),Dfun=None,full_output=0,col_deriv=0,ftol=1.49012e-8,
     args -- Any extra arguments to func are placed in this tuple.
     Dfun -- A function or method to compute the Jacobian of func with
             derivatives across the rows. If this is None, the
-            Jacobian will be estimated.
+            Jacobian will be estimated.  Pass a FiniteDifferences
+            instance to estimate it with central differences, or
+            with evaluations in parallel.
     full_output -- non-zero to return all optional outputs.
     col_deriv -- non-zero to specify that the Jacobian function
                  computes derivatives down the columns (faster, because
@@ -250,6 +294,11 @@ def leastsq(func,x0,args=(),Dfun=None,full_output=0,col_deriv=0,ftol=1.49012e-8,
              (factor * || diag * x||). Should be in interval (0.1,100).
    diag -- A sequency of N positive entries that serve as a
            scale factors for the variables.
+   sparsity -- Sparsity structure of the Jacobian, an (M,N) array or
+               sparse matrix whose nonzero entries mark the elements
+               of the Jacobian that may be nonzero (for Dfun=None).
+               Columns that have no row in common are then estimated
+               with a single function call.
 
   Remarks:
 
@@ -282,6 +331,9 @@ def leastsq(func,x0,args=(),Dfun=None,full_output=0,col_deriv=0,ftol=1.49012e-8,
     n = len(x0)
     if type(args) != type(()): args = (args,)
     m = check_func(func,x0,args,n)[0]
+    if Dfun is None and sparsity is not None:
+        grouped = _GroupedJacobian(func, sparsity, epsfcn)
+        func, Dfun, col_deriv = grouped.fun, grouped.jac, 0
     if Dfun is None:
         if (maxfev == 0):
             maxfev = 200*(n+1)
@@ -429,6 +481,278 @@ def curve_fit(f, xdata, ydata, p0=None, sigma=None, **kw):
         
     return popt, pcov
 
+def _batch_cholesky(A):
+    """Cholesky factors of a stack of symmetric matrices A[k].
+
+    Returns L with A[k] = dot(L[k], L[k].T), and a mask of the matrices
+    that are positive definite (their factor is not valid otherwise).
+    """
+    s, m = A.shape[0], A.shape[1]
+    L = zeros((s, m, m))
+    ok = ones(s, dtype=bool)
+    for j in range(m):
+        d = A[:,j,j] - (L[:,j,:j]**2).sum(axis=-1)
+        ok &= d > 0
+        L[:,j,j] = sqrt(where(d > 0, d, 1.0))
+        L[:,j+1:,j] = (A[:,j+1:,j] - (L[:,j+1:,:j]*L[:,j,newaxis,:j]).sum(axis=-1)) \
+                      / L[:,j,j,newaxis]
+    return L, ok
+
+def _batch_cho_solve(L, b):
+    """Solve dot(L[k], L[k].T) x[k] = b[k] for a stack of Cholesky factors."""
+    m = L.shape[1]
+    y = zeros(b.shape)
+    for j in range(m):
+        y[:,j] = (b[:,j] - (L[:,j,:j]*y[:,:j]).sum(axis=-1)) / L[:,j,j]
+    x = zeros(b.shape)
+    for j in range(m-1, -1, -1):
+        x[:,j] = (y[:,j] - (L[:,j+1:,j]*x[:,j+1:]).sum(axis=-1)) / L[:,j,j]
+    return x
+
+class _BatchModel(object):
+    """Weighted residuals of f for a stack of series, with their Jacobians.
+
+    The parameters of the series are the rows of an (s,m) array, passed
+    to f as m columns of shape (s,1), so that f evaluates all the series
+    in one call by broadcasting them against xdata.
+    """
+    def __init__(self, f, xdata, epsfcn):
+        self.f = f
+        self.xdata = xdata
+        self.eps = sqrt(max(epsfcn, finfo(float).eps))
+
+    def residuals(self, p, y, w):
+        """Weighted residuals of the series with data y and weights w
+        (None for no weights) at the parameters p."""
+        columns = [p[:,j:j+1] for j in range(p.shape[1])]
+        r = asarray(self.f(self.xdata, *columns), dtype=float) - y
+        if w is not None:
+            r *= w
+        if r.shape != y.shape:
+            r = r + zeros(y.shape)
+        return r
+
+    def normal_equations(self, p, y, w, r):
+        """Return J.T*J and J.T*r of forward-difference Jacobians J at p."""
+        s, m = p.shape
+        jac = []
+        for j in range(m):
+            h = self.eps*abs(p[:,j])
+            h[h == 0] = self.eps
+            pj = p.copy()
+            pj[:,j] += h
+            d = self.residuals(pj, y, w)
+            d -= r
+            d /= h[:,newaxis]
+            jac.append(d)
+        JtJ = zeros((s, m, m))
+        Jtr = zeros((s, m))
+        for i in range(m):
+            Jtr[:,i] = (jac[i]*r).sum(axis=-1)
+            for j in range(i+1):
+                JtJ[:,i,j] = JtJ[:,j,i] = (jac[i]*jac[j]).sum(axis=-1)
+        return JtJ, Jtr
+
+def curve_fit_batch(f, xdata, ydata, p0=None, sigma=None, ftol=1.49012e-8,
+                    xtol=1.49012e-8, gtol=0.0, maxiter=None, epsfcn=0.0):
+    """
+    Fit a function to many independent datasets at once.
+
+    Each row of ydata is fitted as by curve_fit, with a Levenberg-Marquardt
+    iteration carried out on all the rows together.  The model function is
+    evaluated for all the rows that have not converged in a single call,
+    so the Python overhead is paid per iteration instead of per dataset.
+
+    Parameters
+    ----------
+    f : callable
+        The model function, f(x, ...), as for curve_fit.  Each parameter
+        is passed as a column of shape (s,1) holding its value for s
+        series, and f must return an array of shape (s,N), or one that
+        broadcasts to it.  Models written with numpy operations usually
+        do so without changes.
+    xdata : An N-length sequence or an (k,N)-shaped array
+        The independent variable where the data is measured, the same for
+        all the series.
+    ydata : (S,N)-shaped array
+        The dependent data of S series, one per row.
+    p0 : None, scalar, M-length sequence or (S,M)-shaped array
+        Initial guess for the parameters, the same for all the series or
+        one per series.  If None, all the parameters start at 1, as for
+        curve_fit.
+    sigma : None, N-length sequence or (S,N)-shaped array
+        If not None, the standard deviations of ydata, used as weights.
+    ftol, xtol, gtol : float
+        Relative error desired in the sum of squares and in the
+        parameters, and orthogonality desired between the residuals and
+        the columns of the Jacobian, as for leastsq.
+    maxiter : int
+        Maximum number of Levenberg-Marquardt steps, accepted or not.
+        Default is 100*(M+1).
+    epsfcn : float
+        Variable to determine the step of the forward-difference
+        Jacobians, as for leastsq.
+
+    Returns
+    -------
+    popt : (S,M)-shaped array
+        Optimal values of the parameters of each series.
+    pcov : (S,M,M)-shaped array
+        The estimated covariance of popt for each series, inf where it
+        cannot be estimated.
+    status : (S,)-shaped integer array
+        How the fit of each series ended:
+
+        - 1, 2, 3 : the sum of squares (1), the parameters (2) or both (3)
+          have converged.
+        - 4 : the residuals are orthogonal to the Jacobian (gtol).
+        - 5 : maxiter steps were made without convergence.
+        - -1 : the residuals are not finite, at p0 or after any step,
+          however short.
+
+    See Also
+    --------
+    curve_fit : fit a single dataset with leastsq
+
+    Notes
+    -----
+    The steps solve (J.T*J + lambda*diag(J.T*J)) dp = -J.T*r, with
+    lambda divided by 10 after a step that reduces the sum of squares and
+    multiplied by 10 otherwise.  Each Jacobian costs M evaluations of f,
+    made for all the series whose last step was accepted.  Memory is
+    about (M+2)*S*N floats.
+
+    Examples
+    --------
+    >>> def func(x, a, b, c):
+    ...     return a*np.exp(-b*x) + c
+
+    >>> x = np.linspace(0, 4, 50)
+    >>> y = func(x, np.random.uniform(1, 3, size=(10000,1)), 1.3, 0.5)
+    >>> yn = y + 0.2*np.random.normal(size=y.shape)
+    >>> popt, pcov, status = curve_fit_batch(func, x, yn)
+
+    """
+    ydata = asarray(ydata, dtype=float)
+    if ydata.ndim != 2:
+        raise ValueError, "ydata must hold one series per row"
+    S, N = ydata.shape
+    if p0 is None or isscalar(p0):
+        # determine number of parameters by inspecting the function
+        import inspect
+        args, varargs, varkw, defaults = inspect.getargspec(f)
+        if len(args) < 2:
+            raise ValueError, "p0 not given as a sequence and inspection"\
+                " cannot determine the number of fit parameters"
+        if p0 is None:
+            p0 = 1.0
+        p0 = [p0]*(len(args)-1)
+    p = asarray(p0, dtype=float)
+    if p.ndim == 1:
+        p = p[newaxis,:]
+    p = p + zeros((S, p.shape[-1]))
+    M = p.shape[1]
+    weights = None
+    if sigma is not None:
+        weights = 1.0/asarray(sigma, dtype=float) + zeros((S, N))
+    if maxiter is None:
+        maxiter = 100*(M+1)
+    model = _BatchModel(f, xdata, epsfcn)
+    eps = finfo(float).eps
+
+    # rows holds the series not converged yet, and y, w their data and
+    # weights
+    status = zeros(S, dtype=int)
+    rows, y, w = arange(S), ydata, weights
+    r = model.residuals(p, y, w)
+    cost = (r**2).sum(axis=-1)
+    bad = ~isfinite(cost)
+    if bad.any():
+        status[bad] = -1
+        rows, r, cost, y = rows[~bad], r[~bad], cost[~bad], y[~bad]
+        if w is not None:
+            w = w[~bad]
+    lam = 1e-3*ones(len(rows))
+    JtJ, Jtr = model.normal_equations(p[rows], y, w, r)
+
+    for it in range(maxiter):
+        if len(rows) == 0:
+            break
+        # zero residuals, or residuals orthogonal to the Jacobian
+        denom = sqrt(JtJ.diagonal(axis1=1, axis2=2)*cost[:,newaxis])
+        gnorm = where(denom > 0, abs(Jtr)/where(denom > 0, denom, 1), 0)
+        gnorm = gnorm.max(axis=-1)
+        done = (cost == 0)*1 + ((cost > 0) & (gnorm <= gtol))*4
+
+        # Levenberg-Marquardt steps
+        diag = JtJ.diagonal(axis1=1, axis2=2).copy()
+        diag = where(diag > eps*diag.max(axis=-1)[:,newaxis], diag,
+                     eps*diag.max(axis=-1)[:,newaxis] + eps)
+        A = JtJ.copy()
+        for j in range(M):
+            A[:,j,j] += lam*diag[:,j]
+        L, ok = _batch_cholesky(A)
+        dp = -_batch_cho_solve(L, Jtr)
+        dp[~ok] = 0
+        pnew = p[rows] + dp
+        rnew = model.residuals(pnew, y, w)
+        costnew = (rnew**2).sum(axis=-1)
+        accepted = (costnew < cost) & ok
+
+        # convergence tests, as in MINPACK
+        actred = where(accepted, cost - costnew, 0)
+        predred = -(2*(dp*Jtr).sum(axis=-1) +
+                    (dp*(JtJ*dp[:,newaxis,:]).sum(axis=-1)).sum(axis=-1))
+        fconv = accepted & (actred <= ftol*cost) & (predred <= ftol*cost)
+        pnorm = sqrt((p[rows]**2).sum(axis=-1))
+        short = sqrt((dp**2).sum(axis=-1)) <= xtol*(pnorm + xtol)
+        finite = isfinite(costnew)
+        xconv = ok & finite & short
+        # a step with non-finite residuals is rejected like any other,
+        # unless it is too short to be shortened any further
+        done = where(done > 0, done,
+                     where(finite | ~short, fconv*1 + xconv*2, -1))
+
+        p[rows[accepted]] = pnew[accepted]
+        r[accepted] = rnew[accepted]
+        cost[accepted] = costnew[accepted]
+        lam = where(accepted, maximum(lam/10, 1e-12), lam*10)
+
+        status[rows[done != 0]] = done[done != 0]
+        keep = done == 0
+        if not keep.all():
+            rows, r, cost, lam = rows[keep], r[keep], cost[keep], lam[keep]
+            JtJ, Jtr, accepted = JtJ[keep], Jtr[keep], accepted[keep]
+            y = y[keep]
+            if w is not None:
+                w = w[keep]
+        if accepted.all():
+            JtJ, Jtr = model.normal_equations(p[rows], y, w, r)
+        elif accepted.any():
+            wa = None
+            if w is not None:
+                wa = w[accepted]
+            JtJ[accepted], Jtr[accepted] = model.normal_equations(
+                p[rows[accepted]], y[accepted], wa, r[accepted])
+    status[rows] = 5
+
+    # covariance, from the Jacobian at the solution
+    pcov = inf*ones((S, M, M))
+    rows = arange(S)[status > 0]
+    if N > M and len(rows) > 0:
+        w = None
+        if weights is not None:
+            w = weights[rows]
+        r = model.residuals(p[rows], ydata[rows], w)
+        JtJ, Jtr = model.normal_equations(p[rows], ydata[rows], w, r)
+        L, ok = _batch_cholesky(JtJ)
+        cov = zeros((len(rows), M, M))
+        for j in range(M):
+            cov[:,:,j] = _batch_cho_solve(L, eye(M)[j] + zeros((len(rows), M)))
+        s_sq = (r**2).sum(axis=-1)/(N-M)
+        pcov[rows[ok]] = (cov*s_sq[:,newaxis,newaxis])[ok]
+    return p, pcov, status
+
 def check_gradient(fcn,Dfcn,x0,args=(),col_deriv=0):
     """Perform a simple check on the gradient for correctness.
     """
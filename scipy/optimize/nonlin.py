@@ -46,9 +46,17 @@ details.
                            taking inversion to improve the stability
    anderson2           --  the Anderson method, the same as anderson, but
                            formulated differently
-
- The broyden2 is the best. For large systems, use broyden3. excitingmixing is
- also very effective. There are some more solvers implemented (see their
+   broyden_limited     --  Broyden's second method as broyden3, keeping only
+                           the last M update pairs, for large systems
+   newton_krylov       --  matrix-free inexact Newton method, solving the
+                           Newton steps with GMRES or LGMRES and finite
+                           difference Jacobian-vector products, for large
+                           systems
+
+ The broyden2 is the best. For large systems, use broyden3, or
+ broyden_limited and newton_krylov, which work on arrays and keep only O(N)
+ storage, for up to millions of unknowns. excitingmixing is also very
+ effective. There are some more solvers implemented (see their
  docstrings), however, those are of mediocre quality.
 
 
@@ -466,3 +474,242 @@ def excitingmixing(F,xin,iter=10,alpha=0.1,alphamax=1.0, verbose = False):
             print "%d: |F(x)|=%.3f" %(n,norm(Fxm))
 
     return xm
+
+#
+# Large-scale solvers.
+#
+# These work on flat float arrays: F is called with a 1-D array and may
+# return any array_like of the same size, and no NxN matrix is ever formed.
+#
+
+def _vector_function(F):
+    def func(x):
+        return numpy.asarray(F(x), dtype=float).ravel()
+    return func
+
+def _max_norm(v):
+    if len(v) == 0:
+        return 0.
+    return abs(v).max()
+
+def _backtrack(func, x, dx, Fx, smin=1e-2):
+    """Backtracking line search on |F(x + s*dx)|.
+
+    Starting with s=1, the step is shortened by safeguarded quadratic
+    interpolation of |F|**2 until |F(x + s*dx)| <= (1 - 1e-4*s)*|F(x)|,
+    which holds for small enough s if dx is an inexact Newton step.  The
+    step is halved where F is not finite.  The last step tried is taken
+    if s falls below smin.
+
+    Returns s, x + s*dx and F(x + s*dx).
+    """
+    phi0 = numpy.dot(Fx, Fx)
+    s = 1.
+    while 1:
+        x1 = x + s*dx
+        Fx1 = func(x1)
+        phi = numpy.dot(Fx1, Fx1)
+        if phi <= (1 - 1e-4*s)**2*phi0 or s <= smin:
+            return s, x1, Fx1
+        if numpy.isfinite(phi):
+            # minimum of the parabola through phi0, -2*phi0 and phi
+            snew = phi0*s*s/(phi - phi0 + 2*phi0*s)
+            s = min(max(snew, 0.1*s), 0.5*s)
+        else:
+            # F is not defined at x1, or overflows
+            s = 0.5*s
+
+def _report(n, Fx, callback, x, verbose):
+    if verbose:
+        print "%d:  |F(x)|=%g" % (n, _max_norm(Fx))
+    if callback is not None:
+        callback(x, Fx)
+
+def broyden_limited(F, xin, iter=100, alpha=0.4, M=20, f_tol=6e-6,
+                    line_search=False, callback=None, verbose=False):
+    """Limited-memory Broyden's second method, for large systems.
+
+    This is broyden3 keeping only the last M update pairs: the inverse
+    Jacobian is approximated by -alpha*I plus a sum of at most M rank one
+    updates z*y.T, and the oldest update is dropped to make room for a new
+    one.  Storage is 2*M*N floats and an iteration costs O(M*N) besides
+    the evaluation of F.
+
+    Parameters
+    ----------
+    F : callable F(x)
+        Function whose root is sought.  Called with a 1-D ndarray and
+        returns an array_like of the same size.
+    xin : array_like
+        Starting point.
+    iter : int
+        Maximum number of iterations.
+    alpha : float
+        The initial Jacobian approximation is -1/alpha*I.
+    M : int
+        Number of update pairs kept.
+    f_tol : float
+        The iteration stops once max(abs(F(x))) <= f_tol.
+    line_search : bool
+        Backtrack along each step until |F(x)| decreases.
+    callback : callable callback(x, Fx), optional
+        Called after each iteration with the current x and F(x).
+    verbose : bool
+        Print max(abs(F(x))) after each iteration.
+
+    Returns
+    -------
+    x : ndarray
+        The last iterate.
+    """
+    func = _vector_function(F)
+    x = numpy.array(xin, dtype=float).ravel()
+    N = len(x)
+    M = max(int(M), 0)
+    Z = numpy.zeros((M, N))
+    Y = numpy.zeros((M, N))
+    # number of update pairs stored so far
+    stored = [0]
+    def Gmul(f):
+        "G*f with G=-alpha*1+z*y.T+z*y.T ..."
+        k = min(stored[0], M)
+        return -alpha*f + numpy.dot(numpy.dot(Y[:k], f), Z[:k])
+    Fx = func(x)
+    for n in range(iter):
+        if _max_norm(Fx) <= f_tol:
+            break
+        dx = -Gmul(Fx)
+        if line_search:
+            s, x1, Fx1 = _backtrack(func, x, dx, Fx)
+            dx = s*dx
+        else:
+            x1 = x + dx
+            Fx1 = func(x1)
+        dF = Fx1 - Fx
+        x, Fx = x1, Fx1
+        dF2 = numpy.dot(dF, dF)
+        if M > 0 and dF2 > 0:
+            # G := G + (dx - G*dF)*dF.T/|dF|**2
+            z = dx - Gmul(dF)
+            slot = stored[0] % M
+            Z[slot] = z
+            Y[slot] = dF/dF2
+            stored[0] += 1
+        _report(n+1, Fx, callback, x, verbose)
+    return x
+
+def newton_krylov(F, xin, iter=50, f_tol=6e-6, method='lgmres',
+                  inner_tol=None, inner_maxiter=20, inner_M=None,
+                  rdiff=None, line_search=True, callback=None,
+                  verbose=False):
+    """Matrix-free inexact Newton method, for large systems.
+
+    Each Newton step J*dx = -F(x) is solved approximately with a Krylov
+    method of scipy.sparse.linalg.  The products of the Jacobian with a
+    vector are approximated by a finite difference of F along that
+    vector, so that neither the Jacobian nor any other NxN matrix is
+    formed.  Storage is a few vectors of size N plus those of the Krylov
+    method.
+
+    Parameters
+    ----------
+    F : callable F(x)
+        Function whose root is sought.  Called with a 1-D ndarray and
+        returns an array_like of the same size.
+    xin : array_like
+        Starting point.
+    iter : int
+        Maximum number of Newton iterations.
+    f_tol : float
+        The iteration stops once max(abs(F(x))) <= f_tol.
+    method : {'lgmres', 'gmres'}
+        Krylov method of scipy.sparse.linalg used for the Newton steps.
+    inner_tol : float, optional
+        Relative residual to which the Newton steps are solved.  By
+        default it is chosen at each iteration from the decrease of |F|
+        (Eisenstat and Walker), loosely far from the root and tightly
+        near it.
+    inner_maxiter : int
+        maxiter of the Krylov method.
+    inner_M : LinearOperator, optional
+        Preconditioner for the Krylov method, approximating the inverse
+        of the Jacobian.  Good preconditioning greatly reduces the number
+        of evaluations of F.
+    rdiff : float, optional
+        Relative step of the finite differences.  Default is sqrt(eps).
+    line_search : bool
+        Backtrack along each Newton step until |F(x)| decreases enough.
+    callback : callable callback(x, Fx), optional
+        Called after each Newton iteration with the current x and F(x).
+    verbose : bool
+        Print max(abs(F(x))) after each iteration.
+
+    Returns
+    -------
+    x : ndarray
+        The last iterate.
+
+    Examples
+    --------
+    Steady state of a 1-D reaction-diffusion equation with 10**6 points:
+
+    >>> def F(u):
+    ...     d2u = -2*u
+    ...     d2u[1:] += u[:-1]
+    ...     d2u[:-1] += u[1:]
+    ...     return d2u + 0.1*(1 - u**3)
+    >>> u = newton_krylov(F, numpy.zeros(10**6))
+
+    """
+    from scipy.sparse.linalg import LinearOperator, gmres, lgmres
+    if method == 'lgmres':
+        solver = lgmres
+    elif method == 'gmres':
+        solver = gmres
+    else:
+        raise ValueError, "method must be 'lgmres' or 'gmres'"
+    if rdiff is None:
+        rdiff = math.sqrt(numpy.finfo(float).eps)
+    func = _vector_function(F)
+    x = numpy.array(xin, dtype=float).ravel()
+    N = len(x)
+    Fx = func(x)
+    fnorm = math.sqrt(numpy.dot(Fx, Fx))
+    eta_max = 0.9
+    eta = eta_max
+    for n in range(iter):
+        if _max_norm(Fx) <= f_tol:
+            break
+        omega = rdiff*max(1., math.sqrt(numpy.dot(x, x)))
+        def matvec(v, x=x, Fx=Fx):
+            v = numpy.asarray(v, dtype=float).ravel()
+            vnorm = math.sqrt(numpy.dot(v, v))
+            if vnorm == 0:
+                return numpy.zeros(N)
+            h = omega/vnorm
+            return (func(x + h*v) - Fx)/h
+        J = LinearOperator((N, N), matvec=matvec, dtype=float)
+        if inner_tol is not None:
+            eta = inner_tol
+        # the Krylov methods also stop once the absolute residual is
+        # below tol, so solve for a right hand side of unit norm
+        dx, info = solver(J, -Fx/fnorm, tol=eta, maxiter=inner_maxiter,
+                          M=inner_M)
+        dx = fnorm*numpy.asarray(dx, dtype=float).ravel()
+        if line_search:
+            s, x, Fx = _backtrack(func, x, dx, Fx)
+        else:
+            x = x + dx
+            Fx = func(x)
+        _report(n+1, Fx, callback, x, verbose)
+        fnorm_old, fnorm = fnorm, math.sqrt(numpy.dot(Fx, Fx))
+        if _max_norm(Fx) <= f_tol:
+            break
+        # forcing term, choice 2 of Eisenstat and Walker
+        eta_old = eta
+        eta = 0.9*(fnorm/fnorm_old)**2
+        if 0.9*eta_old**2 > 0.1:
+            eta = max(eta, 0.9*eta_old**2)
+        # no need to solve for more than the accuracy asked of F
+        eta = max(min(eta, eta_max), 0.5*f_tol/max(fnorm, f_tol))
+    return x
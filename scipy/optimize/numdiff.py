@@ -0,0 +1,387 @@
+"""Finite-difference approximations of gradients and Jacobians
+
+The function is evaluated at all the perturbed points of one
+approximation together, so that the evaluations can be spread over a
+pool of threads or processes, or done with a single call of a function
+that accepts a stack of points.
+
+Sparse Jacobians with a known sparsity structure are estimated with the
+method of Curtis, Powell and Reid: columns that have no row in common
+are perturbed together, so that one evaluation gives several columns.
+"""
+
+__all__ = ['approx_jacobian', 'FiniteDifferences', 'group_columns']
+
+import sys
+import numpy
+from numpy import asarray, atleast_1d, zeros, ones, sqrt, finfo, \
+     argsort, searchsorted, arange
+
+try:
+    import threading
+except ImportError:
+    threading = None
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
+
+_epsilon = sqrt(finfo(float).eps)
+_central_epsilon = finfo(float).eps**(1/3.)
+
+_methods = ['forward', 'central']
+
+
+class _Call(object):
+    """f with its extra arguments, as one picklable callable of x."""
+    def __init__(self, f, args):
+        self.f = f
+        self.args = args
+
+    def __call__(self, x):
+        return self.f(*((x,)+self.args))
+
+
+class _Scalar(object):
+    """f, with values holding a single element returned as scalars."""
+    def __init__(self, f):
+        self.f = f
+
+    def __call__(self, x, *args):
+        value = asarray(self.f(*((x,)+args)), dtype=float)
+        if value.size == 1:
+            return value.ravel()[0]
+        return value
+
+
+def _approx_gradient(xk, f, epsilon=None, args=(), f0=None):
+    """approx_jacobian of f at xk, of shape (n,) if f returns one value
+    in an array, such as an array of shape (1,) or (1,1)."""
+    if f0 is not None and numpy.size(f0) == 1:
+        f0 = numpy.ravel(f0)[0]
+    return approx_jacobian(xk, _Scalar(f), epsilon, args, f0=f0)
+
+
+class _Points(object):
+    """The points at which f is evaluated, built when they are needed.
+
+    The sequence holds xk first if with_xk is set, then xk + h[k]*e_k
+    for every coordinate k and, for central differences, xk - h[k]*e_k.
+    If columns is given, the k-th points are instead perturbed along all
+    the coordinates in columns[k] at once.
+    """
+    def __init__(self, xk, h, method, with_xk, columns=None):
+        self.xk = xk
+        self.h = h
+        self.with_xk = with_xk
+        self.columns = columns
+        if columns is None:
+            self.count = len(xk)
+        else:
+            self.count = len(columns)
+        self.length = self.count*(1 + (method == 'central')) + with_xk
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, i):
+        if i < 0 or i >= self.length:
+            raise IndexError, "point index out of range"
+        x = self.xk.copy()
+        if self.with_xk:
+            if i == 0:
+                return x
+            i -= 1
+        k = i % self.count
+        if self.columns is not None:
+            k = self.columns[k]
+        if i < self.count:
+            x[k] += self.h[k]
+        else:
+            x[k] -= self.h[k]
+        return x
+
+    def array(self):
+        return numpy.array(list(self))
+
+
+def _cpu_count():
+    if multiprocessing is not None:
+        try:
+            return multiprocessing.cpu_count()
+        except NotImplementedError:
+            pass
+    return 1
+
+
+def _thread_map(call, points, workers):
+    """Evaluate call at the points in up to workers threads."""
+    values = [None]*len(points)
+    errors = []
+    def run(start, stop):
+        try:
+            for i in range(start, stop):
+                values[i] = call(points[i])
+        except:
+            errors.append(sys.exc_info())
+    chunk = -(-len(points) // workers)
+    threads = [threading.Thread(target=run, args=(start, start + chunk))
+               for start in range(0, len(points), chunk)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0][0], errors[0][1], errors[0][2]
+    return values
+
+
+def _evaluate(f, points, args, backend, workers):
+    """Return the values of f at the rows of points, stacked in an array."""
+    if backend == 'vectorized':
+        return asarray(f(*((points.array(),)+args)), dtype=float)
+    call = _Call(f, args)
+    if backend is None or backend == 'serial':
+        values = [call(x) for x in points]
+    elif backend == 'threads':
+        if threading is None:
+            raise RuntimeError, "threads are not available"
+        if workers is None:
+            workers = _cpu_count()
+        values = _thread_map(call, points, workers)
+    elif backend == 'processes':
+        if multiprocessing is None:
+            raise RuntimeError, "the 'processes' backend needs the " \
+                  "multiprocessing module"
+        pool = multiprocessing.Pool(workers)
+        try:
+            values = pool.map(call, list(points))
+        finally:
+            pool.close()
+            pool.join()
+    elif hasattr(backend, 'map'):
+        values = list(backend.map(call, list(points)))
+    else:
+        raise ValueError, "unknown backend %r" % (backend,)
+    return asarray(values, dtype=float)
+
+
+def _structure(sparsity):
+    """Return the rows, columns and shape of the nonzeros of sparsity."""
+    from scipy.sparse import csr_matrix
+    S = csr_matrix(sparsity).tocoo()
+    mask = S.data != 0
+    return S.row[mask], S.col[mask], S.shape
+
+def group_columns(sparsity):
+    """Group the columns of a sparse Jacobian for its estimation.
+
+    Columns are assigned greedily, in order, to the first group holding
+    no column with a nonzero in a common row (Curtis, Powell and Reid).
+    All the columns of a group can then be estimated with a single
+    function evaluation.
+
+    Parameters
+    ----------
+    sparsity : array_like or sparse matrix, shape (m,n)
+        Sparsity structure of the Jacobian.  Nonzero entries mark the
+        elements that may be nonzero.
+
+    Returns
+    -------
+    groups : ndarray of ints, shape (n,)
+        Group of each column, numbered from 0.
+
+    Examples
+    --------
+    The columns of a tridiagonal Jacobian fall into three groups:
+
+    >>> S = numpy.eye(6) + numpy.eye(6, k=1) + numpy.eye(6, k=-1)
+    >>> group_columns(S)
+    array([0, 1, 2, 0, 1, 2])
+
+    """
+    from scipy.sparse import csr_matrix
+    rows, cols, shape = _structure(sparsity)
+    A = csr_matrix((ones(len(rows)), (rows, cols)), shape=shape)
+    # columns i and j intersect if G[i,j] is nonzero
+    G = (A.transpose() * A).tocsr()
+    n = shape[1]
+    groups = -ones(n, dtype=int)
+    for j in range(n):
+        used = groups[G.indices[G.indptr[j]:G.indptr[j+1]]]
+        used = used[used >= 0]
+        # one of the first len(used) + 1 groups is free
+        free = ones(len(used) + 1, dtype=bool)
+        free[used[used <= len(used)]] = False
+        groups[j] = free.argmax()
+    return groups
+
+def approx_jacobian(xk, f, epsilon=None, args=(), method='forward',
+                    backend='serial', workers=None, f0=None, sparsity=None,
+                    groups=None):
+    """Finite-difference approximation of the Jacobian of f at xk.
+
+    Parameters
+    ----------
+    xk : array_like
+        Point at which the Jacobian is approximated.
+    f : callable f(x,*args)
+        Function returning a scalar or a 1-D array.
+    epsilon : float or ndarray, optional
+        Step taken along each coordinate, either one step for all the
+        coordinates or one per coordinate.  The default is sqrt(eps) for
+        forward differences and eps**(1/3) for central differences.
+    args : tuple, optional
+        Extra arguments passed to f.
+    method : {'forward', 'central'}, optional
+        Forward differences take one evaluation per coordinate, plus one
+        at xk if f0 is not given.  Central differences take two
+        evaluations per coordinate and are accurate to second order in
+        the step.
+    backend : {'serial', 'threads', 'processes', 'vectorized'} or object
+        How the function is evaluated at the perturbed points:
+
+        - 'serial' : one point after the other.
+        - 'threads' : in a pool of workers threads.  Only worthwhile if
+          f releases the GIL, as extension modules and I/O bound
+          functions do.
+        - 'processes' : in a multiprocessing.Pool of workers processes,
+          created for each approximation.  f and args must be picklable.
+        - 'vectorized' : with a single call of f on a 2-D array holding
+          one point per row.  f must return an array with one value (or
+          one row of values) per point.
+        - an object with a map(function, sequence) method, such as a
+          multiprocessing.Pool that is kept open between calls.
+    workers : int, optional
+        Number of threads or processes.  Defaults to the number of CPUs.
+    f0 : scalar or ndarray, optional
+        f(xk), if it is already known.  Saves one evaluation with forward
+        differences.
+    sparsity : array_like or sparse matrix, shape (m,n), optional
+        Sparsity structure of the Jacobian.  If given, columns without a
+        common nonzero row are estimated together, and the Jacobian is
+        returned as a CSR matrix with the nonzeros of sparsity.
+    groups : ndarray of ints, optional
+        group_columns(sparsity), if it is already known.
+
+    Returns
+    -------
+    jac : ndarray or csr_matrix
+        The gradient of shape (n,) if f returns a scalar, otherwise the
+        Jacobian of shape (m,n), where m is the length of f(xk).  A
+        csr_matrix of shape (m,n) if sparsity is given.
+
+    See Also
+    --------
+    FiniteDifferences : the same approximation as a gradient function
+    approx_fprime : forward-difference gradient
+    group_columns : groups of columns estimated together
+
+    """
+    if method not in _methods:
+        raise ValueError, "method must be one of %s" % _methods
+    xk = atleast_1d(asarray(xk, dtype=float))
+    n = len(xk)
+    if epsilon is None:
+        if method == 'forward':
+            epsilon = _epsilon
+        else:
+            epsilon = _central_epsilon
+    h = zeros(n) + epsilon
+    if sparsity is None:
+        columns = None
+        count = n
+    else:
+        if groups is None:
+            groups = group_columns(sparsity)
+        groups = asarray(groups)
+        if groups.shape != (n,):
+            raise ValueError, "sparsity must have one column per variable"
+        count = 0
+        if n > 0:
+            count = groups.max() + 1
+        order = argsort(groups, kind='mergesort')
+        bounds = searchsorted(groups[order], arange(count + 1))
+        columns = [order[bounds[g]:bounds[g+1]] for g in range(count)]
+    points = _Points(xk, h, method, method == 'forward' and f0 is None,
+                     columns)
+    values = _evaluate(f, points, args, backend, workers)
+    if method == 'forward':
+        if f0 is None:
+            f0, values = values[0], values[1:]
+        diff = values - asarray(f0, dtype=float)
+    else:
+        diff = values[:count] - values[count:]
+        h = 2*h
+    if sparsity is not None:
+        from scipy.sparse import csr_matrix
+        rows, cols, shape = _structure(sparsity)
+        diff = diff.reshape((count, -1))
+        if shape[0] != diff.shape[1]:
+            raise ValueError, "sparsity must have one row per function value"
+        data = diff[groups[cols], rows] / h[cols]
+        return csr_matrix((data, (rows, cols)), shape=shape)
+    if diff.ndim == 1:
+        return diff / h
+    return (diff / h[:,numpy.newaxis]).T
+
+
+class FiniteDifferences(object):
+    """Finite-difference gradient or Jacobian of a function.
+
+    An instance is a callable fprime(x,*args) returning
+    approx_jacobian(x, f, ...), so it can be passed wherever a gradient
+    (fmin_bfgs, fmin_cg, fmin_ncg, fmin_l_bfgs_b, fmin_tnc, fmin_slsqp)
+    or a Jacobian (leastsq, fsolve) function is expected, to choose how
+    the derivatives are approximated.
+
+    Parameters
+    ----------
+    f : callable f(x,*args)
+        Function to differentiate.
+    epsilon, method, backend, workers, sparsity :
+        As for approx_jacobian.  The columns of a sparse Jacobian are
+        grouped once, when the instance is created.
+
+    Attributes
+    ----------
+    nfev : int
+        Number of evaluations of f made so far.
+
+    Examples
+    --------
+    Evaluate the 2*n perturbed points of each gradient of an expensive
+    objective in parallel processes:
+
+    >>> grad = FiniteDifferences(objective, method='central',
+    ...                          backend='processes', workers=8)
+    >>> xopt = fmin_bfgs(objective, x0, fprime=grad)
+
+    """
+    def __init__(self, f, epsilon=None, method='forward', backend='serial',
+                 workers=None, sparsity=None):
+        if method not in _methods:
+            raise ValueError, "method must be one of %s" % _methods
+        self.f = f
+        self.epsilon = epsilon
+        self.method = method
+        self.backend = backend
+        self.workers = workers
+        self.sparsity = sparsity
+        self.groups = None
+        if sparsity is not None:
+            self.groups = group_columns(sparsity)
+        self.nfev = 0
+
+    def __call__(self, x, *args):
+        n = len(atleast_1d(x))
+        if self.groups is not None and n > 0:
+            n = self.groups.max() + 1
+        if self.method == 'forward':
+            self.nfev += n + 1
+        else:
+            self.nfev += 2*n
+        return approx_jacobian(x, self.f, self.epsilon, args, self.method,
+                               self.backend, self.workers,
+                               sparsity=self.sparsity, groups=self.groups)
@@ -26,6 +26,8 @@ import numpy
 from numpy import atleast_1d, eye, mgrid, argmin, zeros, shape, empty, \
      squeeze, vectorize, asarray, absolute, sqrt, Inf, asfarray, isinf
 import linesearch
+from numdiff import _approx_gradient
+from evaluator import Evaluator
 
 # These have been copied from Numeric's MLab.py
 # I don't think they made the transition to scipy_core
@@ -103,6 +105,14 @@ def wrap_function(function, args):
         return function(x, *args)
     return ncalls, function_wrapper
 
+def _evaluator(f, fprime, args, epsilon=_epsilon):
+    """Return an Evaluator of f and fprime, or f if it is one."""
+    if isinstance(f, Evaluator):
+        if fprime is not None or args:
+            raise ValueError, "fprime and args must be given to the Evaluator"
+        return f
+    return Evaluator(f, fprime, args, epsilon)
+
 def fmin(func, x0, args=(), xtol=1e-4, ftol=1e-4, maxiter=None, maxfun=None,
          full_output=0, disp=1, retall=0, callback=None):
     """Minimize a function using the downhill simplex algorithm.
@@ -417,7 +427,9 @@ def line_search(f, myfprime, xk, pk, gfk, old_fval, old_old_fval,
         f : callable f(x,*args)
             Objective function.
         myfprime : callable f'(x,*args)
-            Objective function gradient (can be None).
+            Objective function gradient (can be None).  Pass the fun and
+            grad methods of an Evaluator as f and myfprime to reuse the
+            values at points where both are needed.
         xk : ndarray
             Starting point.
         pk : ndarray
@@ -610,14 +622,13 @@ def line_search_BFGS(f, xk, pk, gfk, old_fval, args=(), c1=1e-4, alpha0=1):
 
 
 def approx_fprime(xk,f,epsilon,*args):
-    f0 = f(*((xk,)+args))
-    grad = numpy.zeros((len(xk),), float)
-    ei = numpy.zeros((len(xk),), float)
-    for k in range(len(xk)):
-        ei[k] = epsilon
-        grad[k] = (f(*((xk+ei,)+args)) - f0)/epsilon
-        ei[k] = 0.0
-    return grad
+    """Forward-difference approximation of the gradient of f at xk.
+
+    epsilon is the step along each coordinate, a scalar or an array with
+    one step per coordinate.  See numdiff.approx_jacobian for central
+    differences and for evaluating the perturbed points in parallel.
+    """
+    return _approx_gradient(xk, f, epsilon, args)
 
 def check_grad(func, grad, x0, *args):
     return sqrt(sum((grad(x0,*args)-approx_fprime(x0,func,_epsilon,*args))**2))
@@ -636,11 +647,14 @@ def fmin_bfgs(f, x0, fprime=None, args=(), gtol=1e-5, norm=Inf,
     :Parameters:
 
       f : callable f(x,*args)
-          Objective function to be minimized.
+          Objective function to be minimized, or an Evaluator.
       x0 : ndarray
           Initial guess.
       fprime : callable f'(x,*args)
-          Gradient of f.
+          Gradient of f.  If None, it is approximated by forward
+          differences; pass a FiniteDifferences instance to use central
+          differences or to evaluate the points in parallel.  If True,
+          f returns the function value and the gradient together.
       args : tuple
           Extra arguments passed to f and fprime.
       gtol : float
@@ -692,6 +706,10 @@ def fmin_bfgs(f, x0, fprime=None, args=(), gtol=1e-5, norm=Inf,
         and Shanno (BFGS) See Wright, and Nocedal 'Numerical
         Optimization', 1999, pg. 198.
 
+        The values of f and fprime at the last points tried are cached
+        (see Evaluator), so func_calls and grad_calls count the calls
+        actually made.
+
     *See Also*:
 
       scikits.openopt : SciKit which offers a unified syntax to call
@@ -703,17 +721,14 @@ def fmin_bfgs(f, x0, fprime=None, args=(), gtol=1e-5, norm=Inf,
         x0.shape = (1,)
     if maxiter is None:
         maxiter = len(x0)*200
-    func_calls, f = wrap_function(f, args)
-    if fprime is None:
-        grad_calls, myfprime = wrap_function(approx_fprime, (f, epsilon))
-    else:
-        grad_calls, myfprime = wrap_function(fprime, args)
+    evaluator = _evaluator(f, fprime, args, epsilon)
+    f, myfprime = evaluator.fun, evaluator.grad
+    old_fval = f(x0)
     gfk = myfprime(x0)
     k = 0
     N = len(x0)
     I = numpy.eye(N,dtype=int)
     Hk = I
-    old_fval = f(x0)
     old_old_fval = old_fval + 5000
     xk = x0
     if retall:
@@ -772,8 +787,8 @@ def fmin_bfgs(f, x0, fprime=None, args=(), gtol=1e-5, norm=Inf,
                   "due to precision loss"
             print "         Current function value: %f" % fval
             print "         Iterations: %d" % k
-            print "         Function evaluations: %d" % func_calls[0]
-            print "         Gradient evaluations: %d" % grad_calls[0]
+            print "         Function evaluations: %d" % evaluator.nfev
+            print "         Gradient evaluations: %d" % evaluator.ngev
 
     elif k >= maxiter:
         warnflag = 1
@@ -781,18 +796,18 @@ def fmin_bfgs(f, x0, fprime=None, args=(), gtol=1e-5, norm=Inf,
             print "Warning: Maximum number of iterations has been exceeded"
             print "         Current function value: %f" % fval
             print "         Iterations: %d" % k
-            print "         Function evaluations: %d" % func_calls[0]
-            print "         Gradient evaluations: %d" % grad_calls[0]
+            print "         Function evaluations: %d" % evaluator.nfev
+            print "         Gradient evaluations: %d" % evaluator.ngev
     else:
         if disp:
             print "Optimization terminated successfully."
             print "         Current function value: %f" % fval
             print "         Iterations: %d" % k
-            print "         Function evaluations: %d" % func_calls[0]
-            print "         Gradient evaluations: %d" % grad_calls[0]
+            print "         Function evaluations: %d" % evaluator.nfev
+            print "         Gradient evaluations: %d" % evaluator.ngev
 
     if full_output:
-        retlist = xk, fval, gfk, Hk, func_calls[0], grad_calls[0], warnflag
+        retlist = xk, fval, gfk, Hk, evaluator.nfev, evaluator.ngev, warnflag
         if retall:
             retlist += (allvecs,)
     else:
@@ -809,11 +824,15 @@ def fmin_cg(f, x0, fprime=None, args=(), gtol=1e-5, norm=Inf, epsilon=_epsilon,
 
     :Parameters:
         f : callable f(x,*args)
-            Objective function to be minimized.
+            Objective function to be minimized, or an Evaluator.
         x0 : ndarray
             Initial guess.
         fprime : callable f'(x,*args)
-            Function which computes the gradient of f.
+            Function which computes the gradient of f.  If None, it is
+            approximated by forward differences; pass a FiniteDifferences
+            instance to use central differences or to evaluate the points
+            in parallel.  If True, f returns the function value and the
+            gradient together.
         args : tuple
             Extra arguments passed to f and fprime.
         gtol : float
@@ -867,16 +886,13 @@ def fmin_cg(f, x0, fprime=None, args=(), gtol=1e-5, norm=Inf, epsilon=_epsilon,
     x0 = asarray(x0).flatten()
     if maxiter is None:
         maxiter = len(x0)*200
-    func_calls, f = wrap_function(f, args)
-    if fprime is None:
-        grad_calls, myfprime = wrap_function(approx_fprime, (f, epsilon))
-    else:
-        grad_calls, myfprime = wrap_function(fprime, args)
+    evaluator = _evaluator(f, fprime, args, epsilon)
+    f, myfprime = evaluator.fun, evaluator.grad
+    old_fval = f(x0)
     gfk = myfprime(x0)
     k = 0
     N = len(x0)
     xk = x0
-    old_fval = f(xk)
     old_old_fval = old_fval + 5000
 
     if retall:
@@ -925,8 +941,8 @@ def fmin_cg(f, x0, fprime=None, args=(), gtol=1e-5, norm=Inf, epsilon=_epsilon,
             print "Warning: Desired error not necessarily achieved due to precision loss"
             print "         Current function value: %f" % fval
             print "         Iterations: %d" % k
-            print "         Function evaluations: %d" % func_calls[0]
-            print "         Gradient evaluations: %d" % grad_calls[0]
+            print "         Function evaluations: %d" % evaluator.nfev
+            print "         Gradient evaluations: %d" % evaluator.ngev
 
     elif k >= maxiter:
         warnflag = 1
@@ -934,19 +950,19 @@ def fmin_cg(f, x0, fprime=None, args=(), gtol=1e-5, norm=Inf, epsilon=_epsilon,
             print "Warning: Maximum number of iterations has been exceeded"
             print "         Current function value: %f" % fval
             print "         Iterations: %d" % k
-            print "         Function evaluations: %d" % func_calls[0]
-            print "         Gradient evaluations: %d" % grad_calls[0]
+            print "         Function evaluations: %d" % evaluator.nfev
+            print "         Gradient evaluations: %d" % evaluator.ngev
     else:
         if disp:
             print "Optimization terminated successfully."
             print "         Current function value: %f" % fval
             print "         Iterations: %d" % k
-            print "         Function evaluations: %d" % func_calls[0]
-            print "         Gradient evaluations: %d" % grad_calls[0]
+            print "         Function evaluations: %d" % evaluator.nfev
+            print "         Gradient evaluations: %d" % evaluator.ngev
 
 
     if full_output:
-        retlist = xk, fval, func_calls[0], grad_calls[0], warnflag
+        retlist = xk, fval, evaluator.nfev, evaluator.ngev, warnflag
         if retall:
             retlist += (allvecs,)
     else:
@@ -964,11 +980,12 @@ def fmin_ncg(f, x0, fprime, fhess_p=None, fhess=None, args=(), avextol=1e-5,
     :Parameters:
 
         f : callable f(x,*args)
-            Objective function to be minimized.
+            Objective function to be minimized, or an Evaluator.
         x0 : ndarray
             Initial guess.
         fprime : callable f'(x,*args)
-            Gradient of f.
+            Gradient of f.  If True, f returns the function value and the
+            gradient together.
         fhess_p : callable fhess_p(x,p,*args)
             Function which computes the Hessian of f times an
             arbitrary vector, p.
@@ -1030,8 +1047,8 @@ def fmin_ncg(f, x0, fprime, fhess_p=None, fhess=None, args=(), avextol=1e-5,
 
     """
     x0 = asarray(x0).flatten()
-    fcalls, f = wrap_function(f, args)
-    gcalls, fprime = wrap_function(fprime, args)
+    evaluator = _evaluator(f, fprime, args, epsilon)
+    f, fprime, args = evaluator.fun, evaluator.grad, evaluator.args
     hcalls = 0
     if maxiter is None:
         maxiter = len(x0)*200
@@ -1109,8 +1126,8 @@ def fmin_ncg(f, x0, fprime, fhess_p=None, fhess=None, args=(), avextol=1e-5,
             print "Warning: Maximum number of iterations has been exceeded"
             print "         Current function value: %f" % fval
             print "         Iterations: %d" % k
-            print "         Function evaluations: %d" % fcalls[0]
-            print "         Gradient evaluations: %d" % gcalls[0]
+            print "         Function evaluations: %d" % evaluator.nfev
+            print "         Gradient evaluations: %d" % evaluator.ngev
             print "         Hessian evaluations: %d" % hcalls
     else:
         warnflag = 0
@@ -1118,12 +1135,12 @@ def fmin_ncg(f, x0, fprime, fhess_p=None, fhess=None, args=(), avextol=1e-5,
             print "Optimization terminated successfully."
             print "         Current function value: %f" % fval
             print "         Iterations: %d" % k
-            print "         Function evaluations: %d" % fcalls[0]
-            print "         Gradient evaluations: %d" % gcalls[0]
+            print "         Function evaluations: %d" % evaluator.nfev
+            print "         Gradient evaluations: %d" % evaluator.ngev
             print "         Hessian evaluations: %d" % hcalls
 
     if full_output:
-        retlist = xk, fval, fcalls[0], gcalls[0], hcalls, warnflag
+        retlist = xk, fval, evaluator.nfev, evaluator.ngev, hcalls, warnflag
         if retall:
             retlist += (allvecs,)
     else:
@@ -1866,6 +1883,12 @@ def brute(func, ranges, args=(), Ns=20, full_output=0, finish=fmin):
         Find the minimum of a function evaluated on a grid given by
         the tuple ranges.
 
+    *See Also*:
+
+      grid_search : the same search, evaluating the grid in chunks that
+                    can be spread over processes, for grids that do not
+                    fit in memory.
+
     """
     N = len(ranges)
     if N > 40:
@@ -0,0 +1,78 @@
+""" Unit tests for the parallel annealing of anneal.py
+"""
+
+import numpy as np
+from numpy.testing import *
+
+from scipy.optimize import anneal_parallel
+from scipy.optimize.gridsearch import multiprocessing
+
+
+def bumps(x):
+    # minimum at about [-0.195, -0.1]
+    return np.cos(14.5*x[0] - 0.3) + (x[1] + 0.2)*x[1] + (x[0] + 0.2)*x[0]
+
+def bumps_rows(x):
+    return np.cos(14.5*x[:,0] - 0.3) + (x[:,1] + 0.2)*x[:,1] + \
+           (x[:,0] + 0.2)*x[:,0]
+
+
+class SerialMap(object):
+    def __init__(self):
+        self.calls = 0
+
+    def map(self, function, sequence):
+        self.calls += 1
+        return [function(x) for x in sequence]
+
+
+class TestAnnealParallel(TestCase):
+    def setUp(self):
+        self.options = dict(lower=[-3, -3], upper=[3, 3], maxiter=300,
+                            feps=1e-4, seed=1234, dwell=20)
+
+    def test_exchange(self):
+        for schedule in ['fast', 'cauchy', 'boltzmann']:
+            x, f, T, feval, iters, accept, retval = \
+                anneal_parallel(bumps, [1.0, 1.0], schedule=schedule,
+                                full_output=1, **self.options)
+            assert_equal(f, bumps(x))
+            assert f < bumps([-0.195, -0.1]) + 0.05
+            assert feval > iters*20*4
+
+    def test_independent(self):
+        x, f, T, feval, iters, accept, retval = \
+            anneal_parallel(bumps, [1.0, 1.0], exchange=False, nchains=3,
+                            full_output=1, T0=5.0, **self.options)
+        assert_equal(f, bumps(x))
+        assert_equal(feval, 1 + 3*20*iters)
+
+    def test_backends(self):
+        ref = anneal_parallel(bumps, [1.0, 1.0], full_output=1,
+                              swap_interval=5, **self.options)
+        res = anneal_parallel(bumps_rows, [1.0, 1.0], full_output=1,
+                              swap_interval=5, vectorized=True,
+                              **self.options)
+        assert_array_equal(res[0], ref[0])
+        assert_equal(res[1:], ref[1:])
+        mapper = SerialMap()
+        backends = [mapper]
+        if multiprocessing is not None:
+            backends.append('processes')
+        for backend in backends:
+            res = anneal_parallel(bumps, [1.0, 1.0], full_output=1,
+                                  swap_interval=5, backend=backend,
+                                  workers=2, **self.options)
+            assert_array_equal(res[0], ref[0])
+            assert_equal(res[1:], ref[1:])
+        assert_equal(mapper.calls, ref[4] // 5)
+
+    def test_bad_arguments(self):
+        assert_raises(ValueError, anneal_parallel, bumps, [1.0, 1.0],
+                      nchains=0)
+        assert_raises(ValueError, anneal_parallel, bumps, [1.0, 1.0],
+                      backend='gpu')
+
+
+if __name__ == "__main__":
+    run_module_suite()
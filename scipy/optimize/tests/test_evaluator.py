@@ -0,0 +1,135 @@
+""" Unit tests for the memoized evaluation of evaluator.py
+"""
+
+import numpy as np
+from numpy.testing import *
+
+from scipy.optimize import Evaluator, rosen, rosen_der, fmin_bfgs, \
+     fmin_cg, fmin_ncg, approx_fprime
+
+
+class Counted(object):
+    def __init__(self):
+        self.fcalls = 0
+        self.gcalls = 0
+
+    def f(self, x, a=1.0):
+        self.fcalls += 1
+        return a*rosen(x)
+
+    def g(self, x, a=1.0):
+        self.gcalls += 1
+        return a*rosen_der(x)
+
+    def fg(self, x):
+        return self.f(x), self.g(x)
+
+
+class TestEvaluator(TestCase):
+    def setUp(self):
+        self.x = np.array([0.8, 1.2, 0.7])
+        self.c = Counted()
+
+    def test_cache(self):
+        ev = Evaluator(self.c.f, self.c.g, args=(2.0,), cache_size=2)
+        assert_equal(ev(self.x), 2*rosen(self.x))
+        assert_equal(ev.fun(self.x.copy()), 2*rosen(self.x))
+        assert_array_equal(ev.grad(self.x), 2*rosen_der(self.x))
+        assert_array_equal(ev.grad(self.x), 2*rosen_der(self.x))
+        assert_equal((self.c.fcalls, self.c.gcalls), (1, 1))
+        assert_equal((ev.nfev, ev.ngev), (1, 1))
+        # the least recently used point is forgotten
+        ev.fun(self.x + 1)
+        ev.fun(self.x)
+        ev.fun(self.x + 2)
+        ev.fun(self.x)
+        assert_equal(self.c.fcalls, 3)
+        ev.fun(self.x + 1)
+        assert_equal(self.c.fcalls, 4)
+
+    def test_no_cache(self):
+        ev = Evaluator(self.c.f, self.c.g, cache_size=0)
+        ev.fun(self.x)
+        ev.fun(self.x)
+        assert_equal(ev.nfev, 2)
+
+    def test_combined(self):
+        ev = Evaluator(self.c.fg, True)
+        f, g = ev.fun_and_grad(self.x)
+        assert_equal(f, rosen(self.x))
+        assert_array_equal(g, rosen_der(self.x))
+        ev.grad(self.x + 1)
+        ev.fun(self.x + 1)
+        assert_equal((ev.nfev, ev.ngev), (2, 2))
+        assert_equal(self.c.fcalls, 2)
+
+    def test_finite_differences(self):
+        ev = Evaluator(self.c.f, epsilon=1e-7)
+        ev.fun(self.x)
+        g = ev.grad(self.x)
+        assert_array_equal(g, approx_fprime(self.x, rosen, 1e-7))
+        assert_equal((ev.nfev, ev.ngev), (4, 1))
+
+    def test_trace(self):
+        ev = Evaluator(self.c.f, self.c.g, trace=True)
+        ev.fun(self.x)
+        ev.grad(self.x)
+        ev.fun(self.x)
+        assert_equal(len(ev.trace), 2)
+        x, f, gnorm, seconds = ev.trace[0]
+        assert_array_equal(x, self.x)
+        assert_equal((f, gnorm), (rosen(self.x), None))
+        assert seconds >= 0
+        x, f, gnorm, seconds = ev.trace[1]
+        assert_equal(f, None)
+        assert_almost_equal(gnorm, np.sqrt(np.sum(rosen_der(self.x)**2)))
+        assert_equal(Evaluator(rosen).trace, [])
+
+
+class TestOptimizers(TestCase):
+    def setUp(self):
+        self.x0 = [0.8, 1.2, 0.7]
+
+    def test_bfgs(self):
+        c = Counted()
+        ev = Evaluator(c.f, c.g, trace=True)
+        x, fopt, gopt, Hopt, fc, gc, warnflag = \
+            fmin_bfgs(ev, self.x0, full_output=True, disp=False)
+        assert_array_almost_equal(x, [1, 1, 1], decimal=4)
+        assert_equal((fc, gc), (c.fcalls, c.gcalls))
+        assert_equal(len(ev.trace), fc + gc)
+        ref = fmin_bfgs(rosen, self.x0, rosen_der, disp=False)
+        assert_array_equal(x, ref)
+
+    def test_combined(self):
+        for fmin in [fmin_bfgs, fmin_cg, fmin_ncg]:
+            c = Counted()
+            x = fmin(c.fg, self.x0, True, disp=False)
+            assert_array_almost_equal(x, [1, 1, 1], decimal=4)
+            ref = fmin(rosen, self.x0, rosen_der, disp=False)
+            assert_array_equal(x, ref)
+            assert_equal(c.fcalls, c.gcalls)
+
+    def test_approximate_gradient(self):
+        c = Counted()
+        x, fopt, fc, gc, warnflag = fmin_cg(c.f, self.x0, full_output=True,
+                                            disp=False)
+        assert_array_almost_equal(x, [1, 1, 1], decimal=4)
+        assert_equal(fc, c.fcalls)
+
+    def test_single_value_array(self):
+        # objectives returning an array of one element, as dot(x.T, A)
+        f = lambda x: np.array([rosen(x)])
+        ref = fmin_bfgs(rosen, self.x0, disp=False)
+        assert_array_equal(fmin_bfgs(f, self.x0, disp=False), ref)
+        ref = fmin_cg(rosen, self.x0, disp=False)
+        assert_array_equal(fmin_cg(f, self.x0, disp=False), ref)
+
+    def test_bad_arguments(self):
+        ev = Evaluator(rosen, rosen_der)
+        assert_raises(ValueError, fmin_bfgs, ev, self.x0, rosen_der)
+        assert_raises(ValueError, fmin_cg, ev, self.x0, args=(1,))
+
+
+if __name__ == "__main__":
+    run_module_suite()
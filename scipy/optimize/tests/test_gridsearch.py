@@ -0,0 +1,91 @@
+""" Unit tests for the chunked brute force search of gridsearch.py
+"""
+
+import numpy as np
+from numpy.testing import *
+
+from scipy.optimize import grid_search, brute, fmin
+from scipy.optimize.gridsearch import multiprocessing
+
+
+def bumps(x, a=1.0):
+    return np.sum(a*np.sin(3*x)**2 + (x - 0.3)**2)
+
+def bumps_rows(x, a=1.0):
+    return np.sum(a*np.sin(3*x)**2 + (x - 0.3)**2, axis=1)
+
+
+class SerialMap(object):
+    def __init__(self):
+        self.calls = 0
+
+    def map(self, function, sequence):
+        self.calls += 1
+        return [function(x) for x in sequence]
+
+
+class TestGridSearch(TestCase):
+    def setUp(self):
+        self.ranges = ((-2, 2), slice(-1, 1.5, 0.25), (0, 1, 7j))
+
+    def test_brute(self):
+        x0, f0 = brute(bumps, self.ranges, args=(0.5,), Ns=9,
+                       full_output=1, finish=None)[:2]
+        for chunksize in [1, 7, 100, 10000]:
+            x, f = grid_search(bumps, self.ranges, args=(0.5,), Ns=9,
+                               finish=None, chunksize=chunksize)
+            assert_array_equal(x, x0)
+            assert_equal(f, f0)
+
+    def test_keep(self):
+        x, f, xs, fs = grid_search(bumps, self.ranges, Ns=9, finish=None,
+                                   keep=5, full_output=1, chunksize=13)
+        grid = np.mgrid[-2:2:9j, -1:1.5:0.25, 0:1:7j].reshape(3, -1).T
+        values = np.array([bumps(p) for p in grid])
+        order = np.argsort(values, kind='mergesort')[:5]
+        assert_array_equal(xs, grid[order])
+        assert_array_equal(fs, values[order])
+        assert_array_equal(x, xs[0])
+
+    def test_finish(self):
+        x, f, xs, fs = grid_search(bumps, self.ranges, Ns=9, keep=3,
+                                   full_output=1)
+        assert_equal(xs.shape, (3, 3))
+        assert np.all(np.diff(fs) >= 0)
+        ref = fmin(bumps, [0, 0, 0], disp=0)
+        assert_array_almost_equal(x, ref, decimal=3)
+        assert f <= bumps(ref) + 1e-6
+
+    def test_vectorized(self):
+        ref = grid_search(bumps, self.ranges, Ns=9, keep=4, finish=None,
+                          full_output=1)
+        res = grid_search(bumps_rows, self.ranges, Ns=9, keep=4,
+                          finish=None, full_output=1, vectorized=True,
+                          chunksize=50)
+        assert_array_equal(res[2], ref[2])
+        assert_array_almost_equal(res[3], ref[3], decimal=14)
+
+    def test_backends(self):
+        ref = grid_search(bumps, self.ranges, Ns=9, keep=3, full_output=1,
+                          chunksize=40)
+        mapper = SerialMap()
+        backends = [mapper]
+        if multiprocessing is not None:
+            backends.append('processes')
+        for backend in backends:
+            res = grid_search(bumps, self.ranges, Ns=9, keep=3,
+                              full_output=1, chunksize=40, backend=backend,
+                              workers=2)
+            assert_array_equal(res[2], ref[2])
+            assert_array_equal(res[3], ref[3])
+        assert_equal(mapper.calls, 2)
+
+    def test_bad_arguments(self):
+        assert_raises(ValueError, grid_search, bumps, self.ranges,
+                      backend='gpu')
+        assert_raises(ValueError, grid_search, bumps, ((0, 1, 0j),))
+        assert_raises(ValueError, grid_search, lambda x: np.nan, self.ranges)
+
+
+if __name__ == "__main__":
+    run_module_suite()
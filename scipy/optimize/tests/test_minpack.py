@@ -7,7 +7,8 @@ import numpy as np
 from numpy import array, float64
 
 from scipy import optimize
-from scipy.optimize.minpack import fsolve, leastsq
+from scipy.optimize.minpack import fsolve, leastsq, curve_fit, \
+     curve_fit_batch
 
 class TestFSolve(TestCase):
     def pressure_network(self, flow_rates, Qtot, k):
@@ -122,5 +123,114 @@ class TestLeastSq(TestCase):
         assert_(ier in (1,2,3,4), 'solution not found: %s'%mesg)
         assert_array_equal(p0, p0_copy)
 
+class TestSparsity(TestCase):
+    def setUp(self):
+        self.n = 40
+        self.x0 = -np.ones(self.n)
+        self.S = np.eye(self.n) + np.eye(self.n, k=1) + np.eye(self.n, k=-1)
+        self.calls = 0
+
+    def broyden_tridiagonal(self, x):
+        self.calls += 1
+        F = (3 - 2*x)*x + 1
+        F[1:] -= x[:-1]
+        F[:-1] -= 2*x[1:]
+        return F
+
+    def test_fsolve(self):
+        x = fsolve(self.broyden_tridiagonal, self.x0)
+        dense_calls, self.calls = self.calls, 0
+        xs = fsolve(self.broyden_tridiagonal, self.x0, sparsity=self.S)
+        assert_array_almost_equal(xs, x)
+        assert_array_almost_equal(self.broyden_tridiagonal(xs), 0)
+        assert_(self.calls*2 < dense_calls)
+
+    def test_leastsq(self):
+        from scipy.sparse import csr_matrix
+        x, ier = leastsq(self.broyden_tridiagonal, self.x0)
+        dense_calls, self.calls = self.calls, 0
+        xs, ier = leastsq(self.broyden_tridiagonal, self.x0,
+                          sparsity=csr_matrix(self.S))
+        assert_(ier in (1,2,3,4))
+        assert_array_almost_equal(xs, x)
+        assert_(self.calls*4 < dense_calls)
+
+decay_calls = [0]
+
+def decay(x, a, b, c):
+    decay_calls[0] += 1
+    return a*np.exp(-b*x) + c
+
+class TestCurveFitBatch(TestCase):
+    def setUp(self):
+        np.random.seed(1234)
+        self.x = np.linspace(0, 4, 30)
+        self.p = np.array([2.5, 1.3, 0.5]) * \
+                 np.random.uniform(0.7, 1.3, size=(20, 3))
+        self.func = decay
+
+    def data(self, noise=0.05):
+        y = self.func(self.x, *[self.p[:,i:i+1] for i in range(3)])
+        return y + noise*np.random.normal(size=y.shape)
+
+    def test_curve_fit(self):
+        y = self.data()
+        sigma = np.random.uniform(0.5, 2, size=y.shape)
+        for s in [None, sigma]:
+            decay_calls[0] = 0
+            popt, pcov, status = curve_fit_batch(self.func, self.x, y,
+                                                 sigma=s)
+            assert_equal(popt.shape, (20, 3))
+            assert_equal(pcov.shape, (20, 3, 3))
+            assert_(np.all((status >= 1) & (status <= 4)))
+            assert_(decay_calls[0] < 200)
+            for k in range(len(y)):
+                if s is None:
+                    ref, refcov = curve_fit(self.func, self.x, y[k])
+                else:
+                    ref, refcov = curve_fit(self.func, self.x, y[k],
+                                            sigma=s[k])
+                assert_array_almost_equal(popt[k], ref, decimal=5)
+                assert_array_almost_equal(pcov[k]/refcov, 1, decimal=3)
+
+    def test_p0(self):
+        y = self.data(noise=0)
+        popt, pcov, status = curve_fit_batch(self.func, self.x, y,
+                                             p0=self.p*1.1)
+        assert_array_almost_equal(popt, self.p, decimal=6)
+        popt2, pcov, status = curve_fit_batch(self.func, self.x, y,
+                                              p0=[2.0, 1.0, 1.0])
+        assert_array_almost_equal(popt2, self.p, decimal=6)
+
+    def test_status(self):
+        y = self.data()
+        y[3,5] = np.nan
+        popt, pcov, status = curve_fit_batch(self.func, self.x, y)
+        assert_equal(status[3], -1)
+        assert_(np.all(np.isinf(pcov[3])))
+        popt, pcov, status = curve_fit_batch(self.func, self.x, y[:2],
+                                             maxiter=2)
+        assert_equal(status, [5, 5])
+        assert_raises(ValueError, curve_fit_batch, self.func, self.x, y[0])
+
+    def test_nonfinite_step(self):
+        # the first step of the first series leads to a < 0, and is
+        # rejected
+        func = lambda x, a: np.sqrt(a)*x
+        y = np.vstack((np.sqrt(0.1)*self.x, 2*self.x))
+        err = np.seterr(invalid='ignore')
+        try:
+            popt, pcov, status = curve_fit_batch(func, self.x, y)
+        finally:
+            np.seterr(**err)
+        assert_(np.all((status >= 1) & (status <= 4)))
+        assert_array_almost_equal(popt, [[0.1], [4.0]])
+        # no step towards the optimum of the first series is finite
+        func = lambda x, a: np.where(a >= 1, np.sqrt(a), np.nan)*x
+        y = np.vstack((0.5*self.x, 2*self.x))
+        popt, pcov, status = curve_fit_batch(func, self.x, y)
+        assert_equal(status[0], -1)
+        assert_(status[1] >= 1 and status[1] <= 4)
+
 if __name__ == "__main__":
     run_module_suite()
@@ -6,7 +6,7 @@ May 2007
 from numpy.testing import *
 
 from scipy.optimize import nonlin
-from numpy import matrix, diag
+from numpy import matrix, diag, asarray, zeros, log, exp, seterr
 
 
 def F(x):
@@ -90,5 +90,65 @@ class TestNonlin(TestCase):
         assert nonlin.norm(F(x))<1e-9
 
 
+def reaction_diffusion(u):
+    """Steady state of u'' + c*(1 - u**3) = 0 with u=0 at both ends."""
+    u = asarray(u)
+    d2u = -2*u
+    d2u[1:] += u[:-1]
+    d2u[:-1] += u[1:]
+    return d2u + 0.5*(1 - u**3)
+
+class TestLargeScale(TestCase):
+    def setUp(self):
+        self.xin=[1,1,1,1,1]
+
+    def test_broyden_limited(self):
+        x = nonlin.broyden_limited(F,self.xin,iter=12,alpha=1,M=20,f_tol=0)
+        assert nonlin.norm(x)<1e-9
+        assert nonlin.norm(F(x))<1e-9
+        # with fewer pairs than iterations
+        x = nonlin.broyden_limited(F,self.xin,iter=40,alpha=1,M=3)
+        assert abs(asarray(F(x))).max() <= 6e-6
+
+    def test_broyden_limited_large(self):
+        u = nonlin.broyden_limited(reaction_diffusion, zeros(2000), iter=200,
+                                   alpha=0.3, M=10, line_search=True)
+        assert abs(reaction_diffusion(u)).max() <= 6e-6
+
+    def test_newton_krylov(self):
+        for method in ['lgmres', 'gmres']:
+            x = nonlin.newton_krylov(F, self.xin, method=method, f_tol=1e-10)
+            assert nonlin.norm(x)<1e-9
+            assert nonlin.norm(F(x))<1e-9
+
+    def test_newton_krylov_large(self):
+        calls = []
+        def callback(x, Fx):
+            calls.append(abs(Fx).max())
+        u = nonlin.newton_krylov(reaction_diffusion, zeros(20000),
+                                 callback=callback)
+        assert abs(reaction_diffusion(u)).max() <= 6e-6
+        assert_equal(calls[-1], abs(reaction_diffusion(u)).max())
+        assert len(calls) < 20
+
+    def test_newton_krylov_exact(self):
+        # a residual of exactly zero with f_tol=0
+        x = nonlin.newton_krylov(lambda x: asarray(x) - 3, [2.0], f_tol=0)
+        assert_equal(x, [3.0])
+
+    def test_newton_krylov_domain(self):
+        # the first Newton step leaves the domain of F
+        err = seterr(invalid='ignore')
+        try:
+            x = nonlin.newton_krylov(lambda x: log(x) - 0.1, [10.0])
+        finally:
+            seterr(**err)
+        assert abs(x[0] - exp(0.1)) < 1e-5
+
+    def test_bad_method(self):
+        assert_raises(ValueError, nonlin.newton_krylov, F, self.xin,
+                      method='cg')
+
+
 if __name__ == "__main__":
     run_module_suite()
@@ -0,0 +1,193 @@
+""" Unit tests for the finite-difference Jacobians of numdiff.py
+"""
+
+import numpy as np
+from numpy.testing import *
+
+from scipy.optimize import approx_jacobian, FiniteDifferences, \
+     group_columns, approx_fprime, rosen, rosen_der, fmin_bfgs, leastsq
+from scipy.optimize.numdiff import multiprocessing
+
+
+def residuals(x, a):
+    return np.array([x[0]**2 - a, x[0]*x[1], np.sin(x[1]) + x[2]])
+
+def jacobian(x, a):
+    return np.array([[2*x[0], 0, 0],
+                     [x[1], x[0], 0],
+                     [0, np.cos(x[1]), 1]])
+
+def rosen_rows(x):
+    return 100*(x[:,1:] - x[:,:-1]**2)**2 + (1 - x[:,:-1])**2
+
+def rosen_stack(x):
+    return rosen_rows(x).sum(axis=1)
+
+
+class SerialMap(object):
+    def __init__(self):
+        self.calls = 0
+
+    def map(self, function, sequence):
+        self.calls += 1
+        return [function(x) for x in sequence]
+
+
+class TestApproxJacobian(TestCase):
+    def setUp(self):
+        self.x = np.array([0.5, -1.2, 0.8, 1.5, 2.0])
+
+    def test_gradient(self):
+        g = approx_jacobian(self.x, rosen)
+        assert_equal(g.shape, self.x.shape)
+        assert_array_almost_equal(g, rosen_der(self.x), decimal=4)
+        g = approx_jacobian(self.x, rosen, method='central')
+        assert_array_almost_equal(g, rosen_der(self.x), decimal=7)
+
+    def test_jacobian(self):
+        x = np.array([1.5, 0.3, -2.0])
+        for method, decimal in [('forward', 6), ('central', 9)]:
+            J = approx_jacobian(x, residuals, args=(2.0,), method=method)
+            assert_equal(J.shape, (3, 3))
+            assert_array_almost_equal(J, jacobian(x, 2.0), decimal=decimal)
+
+    def test_backends(self):
+        x = np.array([1.5, 0.3, -2.0])
+        mapper = SerialMap()
+        backends = ['serial', 'threads', mapper]
+        if multiprocessing is not None:
+            backends.append('processes')
+        for method in ['forward', 'central']:
+            ref = approx_jacobian(x, residuals, args=(2.0,), method=method)
+            for backend in backends:
+                J = approx_jacobian(x, residuals, args=(2.0,), method=method,
+                                    backend=backend, workers=2)
+                assert_array_equal(J, ref)
+        assert_equal(mapper.calls, 2)
+
+    def test_vectorized(self):
+        for method in ['forward', 'central']:
+            ref = approx_jacobian(self.x, rosen, method=method)
+            g = approx_jacobian(self.x, rosen_stack, method=method,
+                                backend='vectorized')
+            assert_array_almost_equal(g, ref, decimal=12)
+            ref = approx_jacobian(self.x, lambda x: rosen_rows(x[None])[0],
+                                  method=method)
+            J = approx_jacobian(self.x, rosen_rows, method=method,
+                                backend='vectorized')
+            assert_array_almost_equal(J, ref, decimal=12)
+
+    def test_steps(self):
+        calls = []
+        def f(x):
+            calls.append(x.copy())
+            return x.sum()
+        epsilon = np.array([1e-3, 1e-4, 1e-5])
+        x = np.zeros(3)
+        approx_jacobian(x, f, epsilon, f0=0.0)
+        assert_equal(len(calls), 3)
+        assert_array_equal(calls, np.diag(epsilon))
+        calls[:] = []
+        approx_jacobian(x, f, epsilon, method='central')
+        assert_array_equal(calls, np.vstack((np.diag(epsilon),
+                                             -np.diag(epsilon))))
+
+    def test_approx_fprime(self):
+        g = approx_fprime(self.x, rosen, 1e-7)
+        ref = np.empty(len(self.x))
+        f0 = rosen(self.x)
+        for k in range(len(self.x)):
+            ei = np.zeros(len(self.x))
+            ei[k] = 1e-7
+            ref[k] = (rosen(self.x + ei) - f0)/1e-7
+        assert_array_equal(g, ref)
+
+    def test_approx_fprime_single_value(self):
+        # a value in an array of one element gives a gradient of shape (n,)
+        g = approx_fprime(self.x, rosen, 1e-7)
+        for shape in [(1,), (1,1)]:
+            f = lambda x: np.reshape(rosen(x), shape)
+            assert_array_equal(approx_fprime(self.x, f, 1e-7), g)
+
+    def test_bad_arguments(self):
+        assert_raises(ValueError, approx_jacobian, self.x, rosen,
+                      method='backward')
+        assert_raises(ValueError, approx_jacobian, self.x, rosen,
+                      backend='gpu')
+        assert_raises(ValueError, FiniteDifferences, rosen, method='backward')
+
+
+class TestFiniteDifferences(TestCase):
+    def test_fmin_bfgs(self):
+        grad = FiniteDifferences(rosen, method='central', backend='threads')
+        x = fmin_bfgs(rosen, [0.8, 1.2, 0.7], fprime=grad, disp=0)
+        assert_array_almost_equal(x, [1, 1, 1], decimal=4)
+        assert grad.nfev > 0
+        assert_equal(grad.nfev % 6, 0)
+
+    def test_leastsq(self):
+        Dfun = FiniteDifferences(residuals, method='central')
+        x, ier = leastsq(residuals, [1.0, 0.5, 0.5], args=(2.0,), Dfun=Dfun)
+        assert_array_almost_equal(residuals(x, 2.0), 0, decimal=8)
+
+
+class TestSparse(TestCase):
+    def setUp(self):
+        self.x = np.linspace(-1, 2, 12)
+        self.S = np.eye(12) + np.eye(12, k=1) + np.eye(12, k=-3)
+        self.calls = 0
+
+    def f(self, x):
+        self.calls += 1
+        F = x**3
+        F[:-1] += np.sin(x[1:])
+        F[3:] += x[:-3]*x[3:]
+        return F
+
+    def test_group_columns(self):
+        groups = group_columns(self.S)
+        assert_equal(groups.shape, (12,))
+        # columns of a group have no row in common
+        for g in range(groups.max() + 1):
+            assert np.all(self.S[:,groups == g].sum(axis=1) <= 1)
+        assert groups.max() + 1 <= 4
+        assert_equal(group_columns(np.eye(5, 7)), np.zeros(7))
+        assert_equal(group_columns(np.ones((2, 3))), [0, 1, 2])
+
+    def test_jacobian(self):
+        for method in ['forward', 'central']:
+            self.calls = 0
+            ref = approx_jacobian(self.x, self.f, method=method)
+            dense_calls, self.calls = self.calls, 0
+            J = approx_jacobian(self.x, self.f, method=method,
+                                sparsity=self.S)
+            assert_equal(J.format, 'csr')
+            assert_array_almost_equal(J.toarray(), ref, decimal=12)
+            assert self.calls < dense_calls/2
+            for backend in ['threads', 'vectorized']:
+                if backend == 'vectorized':
+                    f = lambda X: np.array([self.f(x) for x in X])
+                else:
+                    f = self.f
+                J2 = approx_jacobian(self.x, f, method=method,
+                                     sparsity=self.S, backend=backend)
+                assert_array_equal(J2.toarray(), J.toarray())
+
+    def test_finite_differences(self):
+        from scipy.sparse import csc_matrix
+        jac = FiniteDifferences(self.f, sparsity=csc_matrix(self.S))
+        self.calls = 0
+        J = jac(self.x)
+        assert_equal(jac.nfev, self.calls)
+        ref = approx_jacobian(self.x, self.f)
+        assert_array_almost_equal(J.toarray(), ref, decimal=12)
+
+    def test_bad_sparsity(self):
+        assert_raises(ValueError, approx_jacobian, self.x, self.f,
+                      sparsity=self.S[:,:-1])
+        assert_raises(ValueError, approx_jacobian, self.x, self.f,
+                      sparsity=self.S[:-1])
+
+
+if __name__ == "__main__":
+    run_module_suite()
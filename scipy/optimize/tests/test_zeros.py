@@ -2,6 +2,7 @@
 
 from math import sqrt
 
+import numpy as np
 from numpy.testing import *
 
 from scipy.optimize import zeros as cc
@@ -29,5 +30,75 @@ class TestBasic(TestCase) :
         self.run_check(cc.brenth, 'brenth')
 
 
+class TestArray(TestCase):
+    def setUp(self):
+        self.c = np.linspace(0.5, 30, 25)
+        self.p = np.arange(25) % 4 + 1.0
+
+    def f(self, x, c, p):
+        return x*(x*x + p) - c
+
+    def run_check(self, method, scalar):
+        zero, r = method(self.f, -1, 4, args=(self.c, self.p),
+                         full_output=True)
+        assert_equal(zero.shape, self.c.shape)
+        assert r.converged.all()
+        for i in range(len(self.c)):
+            x, s = scalar(self.f, -1, 4, args=(self.c[i], self.p[i]),
+                          full_output=True)
+            assert_almost_equal(zero[i], x, decimal=12)
+            assert_equal(r.iterations[i], s.iterations)
+            assert_equal(r.function_calls[i], s.function_calls)
+
+    def test_bisect(self):
+        self.run_check(cc.bisect_array, cc.bisect)
+    def test_ridder(self):
+        self.run_check(cc.ridder_array, cc.ridder)
+    def test_brentq(self):
+        self.run_check(cc.brentq_array, cc.brentq)
+    def test_brenth(self):
+        self.run_check(cc.brenth_array, cc.brenth)
+
+    def test_functions(self):
+        for method in [cc.bisect_array, cc.ridder_array, cc.brentq_array,
+                       cc.brenth_array]:
+            zero = method(lambda x: x**2 - 1, .5, sqrt(3), xtol=0.1e-12)
+            assert_almost_equal(zero, 1.0, decimal=12)
+
+    def test_broadcast(self):
+        c = np.array([[1., 8.], [27., 64.]])
+        zero = cc.brentq_array(lambda x, c, p: x**p - c, 0, [5., 10.],
+                               args=(c, 3))
+        assert_almost_equal(zero, [[1., 2.], [3., 4.]], decimal=12)
+
+    def test_flags(self):
+        a = np.array([-1., 3.])
+        zero, r = cc.brentq_array(self.f, a, 4, args=(10., 1.),
+                                  full_output=True, disp=False)
+        assert_almost_equal(zero[0], 2.0, decimal=12)
+        assert np.isnan(zero[1])
+        assert_equal(r.converged, [True, False])
+        assert_equal(list(r.flag), [cc.CONVERGED, cc.SIGNERR])
+        assert_raises(ValueError, cc.brentq_array, self.f, a, 4,
+                      args=(10., 1.))
+
+        zero, r = cc.brentq_array(self.f, -1, 4, args=(self.c, self.p),
+                                  maxiter=2, full_output=True, disp=False)
+        assert not r.converged.any()
+        assert_equal(r.iterations, 2)
+        assert_raises(RuntimeError, cc.brentq_array, self.f, -1, 4,
+                      args=(self.c, self.p), maxiter=2)
+
+    def test_newton(self):
+        root = self.c**(1/3.)
+        zero, r = cc.newton_array(lambda x, c: x**3 - c, 2.0,
+                                  args=(self.c,), full_output=True)
+        assert r.converged.all()
+        assert_almost_equal(zero, root, decimal=8)
+        zero = cc.newton_array(lambda x, c: x**3 - c, 2.0,
+                               fprime=lambda x, c: 3*x**2, args=(self.c,))
+        assert_almost_equal(zero, root, decimal=8)
+
+
 if __name__ == '__main__' :
     run_module_suite()
@@ -1,14 +1,17 @@
 ## Automatically adapted for scipy Oct 07, 2005 by convertcode.py
 
 import _zeros
-from numpy import finfo
+from numpy import finfo, asarray, zeros, where, minimum, sqrt, \
+     broadcast, ndarray, seterr, arange, array
 
 _iter = 100
 _xtol = 1e-12
 # not actually used at the moment
 _rtol = finfo(float).eps * 2
 
-__all__ = ['bisect','ridder','brentq','brenth']
+__all__ = ['bisect','ridder','brentq','brenth',
+           'bisect_array','ridder_array','brentq_array','brenth_array',
+           'newton_array']
 
 CONVERGED = 'converged'
 SIGNERR = 'sign error'
@@ -37,6 +40,21 @@ def results_c(full_output, r):
     else:
         return r
 
+class RootArrayResults(object):
+    """Convergence information of the array root-finders.
+
+    The attributes are arrays with one entry per problem: root,
+    iterations and function_calls, the boolean array converged, and flag
+    holding the strings of flag_map.
+    """
+    def __init__(self, root, iterations, function_calls, flag):
+        self.root = root
+        self.iterations = iterations
+        self.function_calls = function_calls
+        self.converged = flag == 0
+        self.flag = array([flag_map[f] for f in flag.ravel()],
+                          dtype=object).reshape(flag.shape)
+
 def bisect(f, a, b, args=(),
            xtol=_xtol, rtol=_rtol, maxiter=_iter,
            full_output=False, disp=True):
@@ -334,3 +352,461 @@ def brenth(f, a, b, args=(),
         args = (args,)
     r = _zeros._brenth(f,a, b, xtol, maxiter, args, full_output, disp)
     return results_c(full_output, r)
+
+# Array versions of the solvers.  They solve many independent scalar
+# problems at once: every step of the algorithm is applied to all the
+# problems that have not converged yet, with a single call of f on the
+# array of their current points.
+
+_ECONVERGED = 0
+_ESIGNERR = -1
+_ECONVERR = -2
+
+_array_doc = """
+    The ends of the brackets a and b, and the elements of the extra
+    arguments that are arrays, are broadcast to a common shape, giving
+    one independent problem per element.  All problems are advanced
+    together, and f is called as ``f(x, *args)`` with x holding the
+    current points of the problems that have not converged yet and the
+    array arguments reduced to the matching elements, so f must work
+    elementwise on arrays.  Arguments that are not arrays are passed to
+    f unchanged.
+
+    Parameters
+    ----------
+    f : function
+        Python function returning an array of the shape of its first
+        argument.  f must be continuous, and f(a) and f(b) must have
+        opposite signs for every problem.
+    a : array_like
+        One end of the bracketing intervals [a,b].
+    b : array_like
+        The other end of the bracketing intervals [a,b].
+    args : tuple, optional
+        containing extra arguments for the function `f`.  Array arguments
+        hold one value per problem.
+    xtol : number, optional
+        The routine converges when a root is known to lie within xtol of
+        the value returned.  Should be >= 0.
+    rtol : number, optional
+        Tolerance relative to the size of the root, added to xtol.
+    maxiter : number, optional
+        Maximum number of iterations for each problem.  Must be >= 0.
+    full_output : bool, optional
+        If `full_output` is False, the roots are returned.  If
+        `full_output` is True, the return value is ``(x, r)``, where `x`
+        holds the roots, and `r` is a RootArrayResults object.
+    disp : {True, bool} optional
+        If True, raise ValueError if f(a) and f(b) have the same sign for
+        some problem and RuntimeError if some problem did not converge.
+        If False, these problems are only reported in the flags of the
+        RootArrayResults, and the roots of problems with a sign error
+        are nan.
+
+    Returns
+    -------
+    x0 : array
+        Zeros of `f`, with the broadcast shape of `a`, `b` and the array
+        arguments.
+    r : RootArrayResults (present if ``full_output = True``)
+        Object containing the number of iterations and function calls,
+        and the convergence flags of every problem.  In particular,
+        ``r.converged`` is True where the routine converged.
+"""
+
+class _ArrayProblems(object):
+    """Independent scalar problems f(x, *args) = 0 solved together.
+
+    The starting points and the arguments that are arrays are broadcast
+    to a common shape and flattened.  The problems are identified by
+    their index in the flattened arrays, which also holds their results.
+    """
+    def __init__(self, f, starts, args):
+        if type(args) != type(()) :
+            args = (args,)
+        starts = [asarray(x, dtype=float) for x in starts]
+        per_element = [isinstance(arg, ndarray) and arg.ndim > 0
+                       for arg in args]
+        arrays = list(starts)
+        for arg, per in zip(args, per_element):
+            if per:
+                arrays.append(arg)
+        if len(arrays) > 1:
+            self.shape = broadcast(*arrays).shape
+        else:
+            self.shape = arrays[0].shape
+        self.starts = [(zeros(self.shape) + x).ravel() for x in starts]
+        self.args = []
+        for arg, per in zip(args, per_element):
+            if per:
+                arg = (zeros(self.shape, dtype=arg.dtype) + arg).ravel()
+            self.args.append(arg)
+        self.per_element = per_element
+        self.f = f
+        self.size = len(self.starts[0])
+        self.root = zeros(self.size)
+        self.iterations = zeros(self.size, dtype=int)
+        self.function_calls = zeros(self.size, dtype=int)
+        self.flag = zeros(self.size, dtype=int)
+
+    def call(self, func, x, index):
+        """Return func at the points x of the problems in index."""
+        if len(index) == 0:
+            return zeros(0)
+        fargs = [x]
+        for arg, per in zip(self.args, self.per_element):
+            if per:
+                arg = arg[index]
+            fargs.append(arg)
+        return zeros(x.shape) + asarray(func(*fargs), dtype=float)
+
+    def __call__(self, x, index):
+        self.function_calls[index] += 1
+        return self.call(self.f, x, index)
+
+    def done(self, index, root, flag=_ECONVERGED):
+        self.root[index] = root
+        self.flag[index] = flag
+
+    def check_bracket(self, xa, xb, fa, fb, disp):
+        """Settle the problems with a sign error or a root at an end.
+
+        Returns a mask of the problems that are left to iterate.
+        """
+        index = arange(self.size)
+        signerr = fa*fb > 0
+        if signerr.any():
+            if disp:
+                raise ValueError, "f(a) and f(b) must have different signs"
+            self.done(index[signerr], float('nan'), _ESIGNERR)
+        at_a = (fa == 0) & ~signerr
+        self.done(index[at_a], xa[at_a])
+        at_b = (fb == 0) & ~signerr & ~at_a
+        self.done(index[at_b], xb[at_b])
+        return ~(signerr | at_a | at_b)
+
+    def results(self, full_output, disp):
+        if disp:
+            failed = (self.flag == _ECONVERR).sum()
+            if failed:
+                msg = "Failed to converge after %d iterations for %d of " \
+                      "%d problems." % (self.iterations.max(), failed,
+                                        self.size)
+                raise RuntimeError, msg
+        root = self.root.reshape(self.shape)
+        if full_output:
+            r = RootArrayResults(root=root,
+                                 iterations=self.iterations.reshape(self.shape),
+                                 function_calls=
+                                     self.function_calls.reshape(self.shape),
+                                 flag=self.flag.reshape(self.shape))
+            return root, r
+        return root
+
+def _solve_array(solver, f, starts, args, xtol, rtol, maxiter,
+                 full_output, disp, *extra):
+    if xtol < 0:
+        raise ValueError, "xtol must be >= 0"
+    if maxiter < 0:
+        raise ValueError, "maxiter should be > 0"
+    problems = _ArrayProblems(f, starts, args)
+    olderr = seterr(all='ignore')
+    try:
+        solver(problems, xtol, rtol, maxiter, disp, *extra)
+    finally:
+        seterr(**olderr)
+    return problems.results(full_output, disp)
+
+def _sign(x):
+    return where(x > 0, 1.0, -1.0)
+
+def _bisect_array(problems, xtol, rtol, maxiter, disp):
+    xa, xb = problems.starts
+    index = arange(problems.size)
+    fa = problems(xa, index)
+    fb = problems(xb, index)
+    keep = problems.check_bracket(xa, xb, fa, fb, disp)
+    index, xa, xb, fa = index[keep], xa[keep], xb[keep], fa[keep]
+    tol = xtol + rtol*(abs(xa) + abs(xb))
+    dm = xb - xa
+    for i in range(maxiter):
+        if len(index) == 0:
+            break
+        problems.iterations[index] += 1
+        dm *= .5
+        xm = xa + dm
+        fm = problems(xm, index)
+        xa = where(fm*fa >= 0, xm, xa)
+        conv = (fm == 0) | (abs(dm) < tol)
+        problems.done(index[conv], xm[conv])
+        keep = ~conv
+        index, xa, fa, dm, tol = (index[keep], xa[keep], fa[keep],
+                                  dm[keep], tol[keep])
+    problems.done(index, xa, _ECONVERR)
+
+def _ridder_array(problems, xtol, rtol, maxiter, disp):
+    xa, xb = problems.starts
+    index = arange(problems.size)
+    fa = problems(xa, index)
+    fb = problems(xb, index)
+    keep = problems.check_bracket(xa, xb, fa, fb, disp)
+    index, xa, xb, fa, fb = (index[keep], xa[keep], xb[keep], fa[keep],
+                             fb[keep])
+    tol = xtol + rtol*(abs(xa) + abs(xb))
+    xn = xa
+    for i in range(maxiter):
+        if len(index) == 0:
+            break
+        problems.iterations[index] += 1
+        dm = 0.5*(xb - xa)
+        xm = xa + dm
+        fm = problems(xm, index)
+        dn = _sign(fb - fa)*dm*fm/sqrt(fm*fm - fa*fb)
+        xn = xm - _sign(dn)*minimum(abs(dn), abs(dm) - .5*tol)
+        fn = problems(xn, index)
+        # keep the root bracketed by the smallest of [xn,xm], [xa,xn]
+        # and [xn,xb]
+        left = fn*fm < 0.0
+        right = ~left & (fn*fa < 0.0)
+        xa, fa, xb, fb = (where(right, xa, xn), where(right, fa, fn),
+                          where(left, xm, where(right, xn, xb)),
+                          where(left, fm, where(right, fn, fb)))
+        conv = (fn == 0.0) | (abs(xb - xa) < tol)
+        problems.done(index[conv], xn[conv])
+        keep = ~conv
+        index, xa, xb, fa, fb, tol, xn = (index[keep], xa[keep], xb[keep],
+                                          fa[keep], fb[keep], tol[keep],
+                                          xn[keep])
+    problems.done(index, xn, _ECONVERR)
+
+def _brent_array(problems, xtol, rtol, maxiter, disp, hyperbolic):
+    """Brent's method, following the scalar brentq and brenth exactly."""
+    xpre, xcur = problems.starts
+    index = arange(problems.size)
+    fpre = problems(xpre, index)
+    fcur = problems(xcur, index)
+    keep = problems.check_bracket(xpre, xcur, fpre, fcur, disp)
+    index, xpre, xcur, fpre, fcur = (index[keep], xpre[keep], xcur[keep],
+                                     fpre[keep], fcur[keep])
+    xblk = zeros(len(index))
+    fblk = zeros(len(index))
+    spre = zeros(len(index))
+    scur = zeros(len(index))
+    for i in range(maxiter):
+        if len(index) == 0:
+            break
+        problems.iterations[index] += 1
+        new = fpre*fcur < 0
+        xblk = where(new, xpre, xblk)
+        fblk = where(new, fpre, fblk)
+        spre = where(new, xcur - xpre, spre)
+        scur = where(new, xcur - xpre, scur)
+        swap = abs(fblk) < abs(fcur)
+        xpre, xcur, xblk = (where(swap, xcur, xpre), where(swap, xblk, xcur),
+                            where(swap, xcur, xblk))
+        fpre, fcur, fblk = (where(swap, fcur, fpre), where(swap, fblk, fcur),
+                            where(swap, fcur, fblk))
+
+        tol = xtol + rtol*abs(xcur)
+        sbis = (xblk - xcur)/2
+        conv = (fcur == 0) | (abs(sbis) < tol)
+        problems.done(index[conv], xcur[conv])
+        keep = ~conv
+        index, xpre, xcur, xblk, fpre, fcur, fblk, spre, scur, tol, sbis = \
+            (index[keep], xpre[keep], xcur[keep], xblk[keep], fpre[keep],
+             fcur[keep], fblk[keep], spre[keep], scur[keep], tol[keep],
+             sbis[keep])
+        if len(index) == 0:
+            break
+
+        # interpolate where xpre == xblk and extrapolate elsewhere; steps
+        # that are not short enough are replaced by bisection
+        stry = -fcur*(xcur - xpre)/(fcur - fpre)
+        dpre = (fpre - fcur)/(xpre - xcur)
+        dblk = (fblk - fcur)/(xblk - xcur)
+        if hyperbolic:
+            sext = -fcur*(fblk - fpre)/(fblk*dpre - fpre*dblk)
+        else:
+            sext = -fcur*(fblk*dblk - fpre*dpre)/(dblk*dpre*(fblk - fpre))
+        stry = where(xpre == xblk, stry, sext)
+        good = (abs(spre) > tol) & (abs(fcur) < abs(fpre)) & \
+               (2*abs(stry) < minimum(abs(spre), 3*abs(sbis) - tol))
+        spre, scur = where(good, scur, sbis), where(good, stry, sbis)
+
+        xpre = xcur
+        fpre = fcur
+        xcur = xcur + where(abs(scur) > tol, scur, where(sbis > 0, tol, -tol))
+        fcur = problems(xcur, index)
+    problems.done(index, xcur, _ECONVERR)
+
+def _newton_array(problems, tol, rtol, maxiter, disp, fprime):
+    p0 = problems.starts[0]
+    index = arange(problems.size)
+    if fprime is not None:
+        for i in range(maxiter):
+            if len(index) == 0:
+                break
+            problems.iterations[index] += 1
+            fval = problems(p0, index)
+            fpval = problems.call(fprime, p0, index)
+            flat = fpval == 0
+            problems.done(index[flat], p0[flat], _ECONVERR)
+            p = p0 - fval/fpval
+            conv = ~flat & (abs(p - p0) < tol)
+            problems.done(index[conv], p[conv])
+            keep = ~(flat | conv)
+            index, p0 = index[keep], p[keep]
+        problems.done(index, p0, _ECONVERR)
+    else: # Secant method
+        p1 = p0*(1 + 1e-4)
+        q0 = problems(p0, index)
+        q1 = problems(p1, index)
+        for i in range(maxiter):
+            if len(index) == 0:
+                break
+            problems.iterations[index] += 1
+            flat = q1 == q0
+            problems.done(index[flat], (p1[flat] + p0[flat])/2.0)
+            p = p1 - q1*(p1 - p0)/(q1 - q0)
+            conv = ~flat & (abs(p - p1) < tol)
+            problems.done(index[conv], p[conv])
+            keep = ~(flat | conv)
+            index, p0, q0, p1 = index[keep], p1[keep], q1[keep], p[keep]
+            q1 = problems(p1, index)
+        problems.done(index, p1, _ECONVERR)
+
+def bisect_array(f, a, b, args=(),
+                 xtol=_xtol, rtol=_rtol, maxiter=_iter,
+                 full_output=False, disp=True):
+    return _solve_array(_bisect_array, f, (a, b), args, xtol, rtol, maxiter,
+                        full_output, disp)
+
+def ridder_array(f, a, b, args=(),
+                 xtol=_xtol, rtol=_rtol, maxiter=_iter,
+                 full_output=False, disp=True):
+    return _solve_array(_ridder_array, f, (a, b), args, xtol, rtol, maxiter,
+                        full_output, disp)
+
+def brentq_array(f, a, b, args=(),
+                 xtol=_xtol, rtol=_rtol, maxiter=_iter,
+                 full_output=False, disp=True):
+    return _solve_array(_brent_array, f, (a, b), args, xtol, rtol, maxiter,
+                        full_output, disp, False)
+
+def brenth_array(f, a, b, args=(),
+                 xtol=_xtol, rtol=_rtol, maxiter=_iter,
+                 full_output=False, disp=True):
+    return _solve_array(_brent_array, f, (a, b), args, xtol, rtol, maxiter,
+                        full_output, disp, True)
+
+bisect_array.__doc__ = \
+"""Find roots of many independent scalar problems by bisection.
+
+    Array version of bisect, solving one problem per element of the
+    brackets [a,b].
+""" + _array_doc + """
+    See Also
+    --------
+    bisect : find a single root by bisection
+    brentq_array, brenth_array, ridder_array, newton_array
+
+"""
+
+ridder_array.__doc__ = \
+"""Find roots of many independent scalar problems with Ridders' method.
+
+    Array version of ridder, solving one problem per element of the
+    brackets [a,b].
+""" + _array_doc + """
+    See Also
+    --------
+    ridder : find a single root with Ridders' method
+    brentq_array, brenth_array, bisect_array, newton_array
+
+"""
+
+brentq_array.__doc__ = \
+"""Find roots of many independent scalar problems with Brent's method.
+
+    Array version of brentq, solving one problem per element of the
+    brackets [a,b].  The steps taken for each problem are the same as
+    those of brentq, so the roots agree with those found by calling
+    brentq in a loop, but the problems are solved with one call of f per
+    iteration instead of one call per problem and iteration.
+""" + _array_doc + """
+    See Also
+    --------
+    brentq : find a single root with Brent's method
+    brenth_array, ridder_array, bisect_array, newton_array
+
+    Examples
+    --------
+    >>> c = np.array([1., 4., 9.])
+    >>> brentq_array(lambda x, c: x**2 - c, 0, 4, args=(c,))
+    array([ 1.,  2.,  3.])
+
+"""
+
+brenth_array.__doc__ = \
+"""Find roots of many scalar problems with Brent's method (hyperbolic).
+
+    Array version of brenth, solving one problem per element of the
+    brackets [a,b].
+""" + _array_doc + """
+    See Also
+    --------
+    brenth : find a single root with the brenth variant of Brent's method
+    brentq_array, ridder_array, bisect_array, newton_array
+
+"""
+
+def newton_array(func, x0, fprime=None, args=(), tol=1.48e-8, maxiter=50,
+                 full_output=False, disp=True):
+    """Find zeros of many independent problems with Newton's method.
+
+    Array version of newton.  The starting points x0 and the elements of
+    the extra arguments that are arrays are broadcast to a common shape,
+    giving one independent problem per element.  All problems are
+    advanced together, with one call of func (and fprime) per iteration
+    on the problems that have not converged yet.  If fprime is not
+    given, the secant method is used.
+
+    Parameters
+    ----------
+    func : function
+        Python function returning an array of the shape of its first
+        argument, called as ``func(x, *args)``.
+    x0 : array_like
+        Starting points.
+    fprime : function, optional
+        Derivative of func, called as ``fprime(x, *args)``.
+    args : tuple, optional
+        Extra arguments for func and fprime.  Array arguments hold one
+        value per problem.
+    tol : number, optional
+        A problem has converged when the step taken is less than tol.
+    maxiter : number, optional
+        Maximum number of iterations for each problem.
+    full_output : bool, optional
+        If True, also return a RootArrayResults object.
+    disp : {True, bool} optional
+        If True, raise RuntimeError if some problem did not converge.
+        Problems where fprime is zero are stopped at the current point and
+        reported as not converged.
+
+    Returns
+    -------
+    x0 : array
+        Zeros of func.
+    r : RootArrayResults (present if ``full_output = True``)
+        Object containing the number of iterations and function calls,
+        and the convergence flags of every problem.
+
+    See Also
+    --------
+    newton : find a single zero with Newton's or the secant method
+    brentq_array : vectorized Brent's method on brackets
+
+    """
+    return _solve_array(_newton_array, func, (x0,), args, tol, 0.0, maxiter,
+                        full_output, disp, fprime)
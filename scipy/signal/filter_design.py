@@ -229,6 +229,107 @@ def normalize(b,a):
     return outb, outa
 
 
+def _cplxpairs(x):
+    """Split roots into complex ones with positive imaginary part, one per
+    conjugate pair, and real ones.
+    """
+    x = atleast_1d(x) + 0j
+    tol = 100 * numpy.finfo(float).eps * (abs(x) + 1)
+    isreal = abs(x.imag) <= tol
+    cplx = x[~isreal]
+    upper = cplx[cplx.imag > 0]
+    if 2 * len(upper) != len(cplx):
+        raise ValueError, "complex roots must come in conjugate pairs"
+    return upper, numpy.sort(x[isreal].real)
+
+def _root_pairs(x, nsec):
+    """Group roots into nsec pairs, padding with roots at the origin.
+
+    Conjugate roots are kept together, and real roots are paired in order
+    of decreasing magnitude.
+    """
+    cplx, reals = _cplxpairs(x)
+    pairs = [(r, conjugate(r)) for r in cplx]
+    reals = list(reals[numpy.argsort(-abs(reals), kind='mergesort')])
+    while len(pairs) + (len(reals) + 1) // 2 < nsec:
+        reals.extend([0.0, 0.0])
+    if len(reals) % 2:
+        reals.append(0.0)
+    for i in range(0, len(reals), 2):
+        pairs.append((reals[i] + 0j, reals[i+1] + 0j))
+    return pairs
+
+def zpk2sos(z, p, k):
+    """Return second-order sections from zeros, poles and gain of a
+    discrete-time filter.
+
+    Parameters
+    ----------
+    z : ndarray
+        zeros of the transfer function.
+    p : ndarray
+        poles of the transfer function.
+    k : float
+        system gain.
+
+    Returns
+    -------
+    sos : ndarray
+        array of shape (n_sections, 6).  Each row holds the numerator
+        and denominator coefficients [b0, b1, b2, a0, a1, a2] of one
+        second-order section, with a0 = 1.  The filter is the cascade of
+        the sections, in order.
+
+    Notes
+    -----
+    Filtering with a cascade of second-order sections (see sosfilt) is
+    much less sensitive to rounding errors than filtering with the
+    polynomials of a high order filter.  Conjugate poles and zeros are
+    kept in the same section.  Each pair of poles is matched with the
+    nearest pair of zeros, starting with the poles closest to the unit
+    circle, and the sections are ordered with the poles closest to the
+    unit circle last.  The gain is applied to the first section.
+    """
+    z = atleast_1d(z)
+    p = atleast_1d(p)
+    nsec = max((len(z) + 1) // 2, (len(p) + 1) // 2, 1)
+    zpairs = _root_pairs(z, nsec)
+    ppairs = _root_pairs(p, nsec)
+    # match the poles closest to the unit circle first
+    order = numpy.argsort([abs(1 - abs(pp[0])) for pp in ppairs],
+                          kind='mergesort')
+    sections = []
+    for i in order:
+        pp = ppairs[i]
+        dist = [abs(zz[0] - pp[0]) for zz in zpairs]
+        zz = zpairs.pop(int(numpy.argmin(dist)))
+        sections.append(r_[real(poly(zz)), real(poly(pp))])
+    sections.reverse()
+    sos = numpy.array(sections)
+    sos[0, :3] *= k
+    return sos
+
+def tf2sos(b, a):
+    """Return second-order sections from the numerator and denominator
+    polynomials of a discrete-time filter.
+
+    See zpk2sos for the format of the sections.
+    """
+    return zpk2sos(*tf2zpk(b, a))
+
+def sos2tf(sos):
+    """Return the numerator and denominator polynomials of a cascade of
+    second-order sections.
+    """
+    sos = asarray(sos)
+    b = numpy.array([1.0])
+    a = numpy.array([1.0])
+    for section in sos:
+        b = numpy.polymul(b, section[:3])
+        a = numpy.polymul(a, section[3:])
+    return b, a
+
+
 def lp2lp(b,a,wo=1.0):
     """Return a low-pass filter with cuttoff frequency wo
     from a low-pass filter prototype with unity cutoff frequency.
@@ -372,12 +473,105 @@ def bilinear(b,a,fs=1.0):
 
     return normalize(bprime, aprime)
 
+def _relative_degree(z, p):
+    """Return the excess of poles over zeros."""
+    degree = len(p) - len(z)
+    if degree < 0:
+        raise ValueError, "improper transfer function: more zeros than poles"
+    return degree
+
+def lp2lp_zpk(z, p, k, wo=1.0):
+    """Return a low-pass filter with cutoff frequency wo from a low-pass
+    filter prototype with unity cutoff frequency, in zero, pole, gain
+    form.
+    """
+    z = atleast_1d(z) + 0j
+    p = atleast_1d(p) + 0j
+    wo = float(wo)
+    degree = _relative_degree(z, p)
+    return z * wo, p * wo, k * wo**degree
+
+def lp2hp_zpk(z, p, k, wo=1.0):
+    """Return a high-pass filter with cutoff frequency wo from a low-pass
+    filter prototype with unity cutoff frequency, in zero, pole, gain
+    form.
+    """
+    z = atleast_1d(z) + 0j
+    p = atleast_1d(p) + 0j
+    wo = float(wo)
+    degree = _relative_degree(z, p)
+    # the zeros at infinity move to the origin
+    z_hp = numpy.concatenate((wo / z, zeros(degree)))
+    p_hp = wo / p
+    k_hp = k * real(numpy.prod(-z) / numpy.prod(-p))
+    return z_hp, p_hp, k_hp
+
+def lp2bp_zpk(z, p, k, wo=1.0, bw=1.0):
+    """Return a band-pass filter with center frequency wo and bandwidth
+    bw from a low-pass filter prototype with unity cutoff frequency, in
+    zero, pole, gain form.
+    """
+    z = atleast_1d(z) + 0j
+    p = atleast_1d(p) + 0j
+    wo = float(wo)
+    bw = float(bw)
+    degree = _relative_degree(z, p)
+    # each root r gives the two roots of s**2 - r*bw*s + wo**2
+    z_lp = z * bw/2
+    p_lp = p * bw/2
+    z_bp = numpy.concatenate((z_lp + sqrt(z_lp**2 - wo**2),
+                              z_lp - sqrt(z_lp**2 - wo**2),
+                              zeros(degree)))
+    p_bp = numpy.concatenate((p_lp + sqrt(p_lp**2 - wo**2),
+                              p_lp - sqrt(p_lp**2 - wo**2)))
+    return z_bp, p_bp, k * bw**degree
+
+def lp2bs_zpk(z, p, k, wo=1.0, bw=1.0):
+    """Return a band-stop filter with center frequency wo and bandwidth
+    bw from a low-pass filter prototype with unity cutoff frequency, in
+    zero, pole, gain form.
+    """
+    z = atleast_1d(z) + 0j
+    p = atleast_1d(p) + 0j
+    wo = float(wo)
+    bw = float(bw)
+    degree = _relative_degree(z, p)
+    # each root r gives the two roots of r*s**2 - bw*s + r*wo**2, and
+    # the zeros at infinity move to +-j*wo
+    z_hp = (bw/2) / z
+    p_hp = (bw/2) / p
+    z_bs = numpy.concatenate((z_hp + sqrt(z_hp**2 - wo**2),
+                              z_hp - sqrt(z_hp**2 - wo**2),
+                              1j*wo*numpy.ones(degree),
+                              -1j*wo*numpy.ones(degree)))
+    p_bs = numpy.concatenate((p_hp + sqrt(p_hp**2 - wo**2),
+                              p_hp - sqrt(p_hp**2 - wo**2)))
+    k_bs = k * real(numpy.prod(-z) / numpy.prod(-p))
+    return z_bs, p_bs, k_bs
+
+def bilinear_zpk(z, p, k, fs=1.0):
+    """Return a digital filter from an analog filter using the bilinear
+    transform, in zero, pole, gain form.
+
+    The bilinear transform substitutes 2*fs*(z-1) / (z+1) for s.
+    """
+    z = atleast_1d(z) + 0j
+    p = atleast_1d(p) + 0j
+    fs2 = 2.0*fs
+    degree = _relative_degree(z, p)
+    # the zeros at infinity move to z = -1
+    z_z = numpy.concatenate(((fs2 + z) / (fs2 - z), -numpy.ones(degree)))
+    p_z = (fs2 + p) / (fs2 - p)
+    k_z = k * real(numpy.prod(fs2 - z) / numpy.prod(fs2 - p))
+    return z_z, p_z, k_z
+
 def iirdesign(wp, ws, gpass, gstop, analog=0, ftype='ellip', output='ba'):
     """Complete IIR digital and analog filter design.
 
     Given passband and stopband frequencies and gains construct an analog or
     digital IIR filter of minimum order for a given basic type.  Return the
-    output in numerator, denominator ('ba') or pole-zero ('zpk') form.
+    output in numerator, denominator ('ba'), pole-zero ('zpk') or
+    second-order sections ('sos') form.
 
     Parameters
     ----------
@@ -397,12 +591,14 @@ def iirdesign(wp, ws, gpass, gstop, analog=0, ftype='ellip', output='ba'):
                Chebyshev I : 'cheby1',
                Chebyshev II: 'cheby2',
                Bessel :      'bessel'
-    output -- Type of output:  numerator/denominator ('ba') or pole-zero ('zpk')
+    output -- Type of output:  numerator/denominator ('ba'), pole-zero ('zpk')
+              or second-order sections ('sos')
 
     Returns
     -------
       b,a -- Numerator and denominator of the iir filter.
       z,p,k -- Zeros, poles, and gain of the iir filter.
+      sos -- Second-order sections of the iir filter.
     """
 
     try:
@@ -442,7 +638,8 @@ def iirfilter(N, Wn, rp=None, rs=None, btype='band', analog=0, ftype='butter', o
               a digital filter is returned.
     ftype -- the type of IIR filter (Butterworth, Cauer (Elliptic),
              Bessel, Chebyshev1, Chebyshev2)
-    output -- 'ba' for (b,a) output, 'zpk' for (z,p,k) output.
+    output -- 'ba' for (b,a) output, 'zpk' for (z,p,k) output, 'sos' for
+              second-order sections (digital filters only, see zpk2sos).
 
     SEE ALSO butterord, cheb1ord, cheb2ord, ellipord
     """
@@ -459,8 +656,11 @@ def iirfilter(N, Wn, rp=None, rs=None, btype='band', analog=0, ftype='butter', o
     except KeyError:
         raise ValueError, "%s is not a valid basic iir filter." % ftype
 
-    if output not in ['ba', 'zpk']:
+    if output not in ['ba', 'zpk', 'sos']:
         raise ValueError, "%s is not a valid output form." % output
+    if output == 'sos' and analog:
+        raise ValueError, "second-order sections are only available for " \
+              "digital filters."
 
     #pre-warp frequencies for digital filter design
     if not analog:
@@ -492,6 +692,20 @@ def iirfilter(N, Wn, rp=None, rs=None, btype='band', analog=0, ftype='butter', o
             raise ValueError, "Both rp and rs must be provided to design an elliptic filter."
         z, p, k = typefunc(N, rp, rs)
 
+    if output == 'sos':
+        # the roots of high order polynomials are very inaccurate, so the
+        # transformations are applied to the poles and zeros
+        if btype == 'lowpass':
+            z, p, k = lp2lp_zpk(z, p, k, wo=wo)
+        elif btype == 'highpass':
+            z, p, k = lp2hp_zpk(z, p, k, wo=wo)
+        elif btype == 'bandpass':
+            z, p, k = lp2bp_zpk(z, p, k, wo=wo, bw=bw)
+        else: # 'bandstop'
+            z, p, k = lp2bs_zpk(z, p, k, wo=wo, bw=bw)
+        z, p, k = bilinear_zpk(z, p, k, fs=fs)
+        return zpk2sos(z, p, k)
+
     b, a = zpk2tf(z,p,k)
 
     # transform to lowpass, bandpass, highpass, or bandstop
@@ -522,7 +736,8 @@ def butter(N, Wn, btype='low', analog=0, output='ba'):
     Description:
 
       Design an Nth order lowpass digital or analog Butterworth filter
-      and return the filter coefficients in (B,A) or (Z,P,K) form.
+      and return the filter coefficients in (B,A), (Z,P,K) or second-order
+      sections form.
 
     See also buttord.
     """
@@ -534,7 +749,8 @@ def cheby1(N, rp, Wn, btype='low', analog=0, output='ba'):
     Description:
 
       Design an Nth order lowpass digital or analog Chebyshev type I filter
-      and return the filter coefficients in (B,A) or (Z,P,K) form.
+      and return the filter coefficients in (B,A), (Z,P,K) or second-order
+      sections form.
 
     See also cheb1ord.
     """
@@ -546,7 +762,8 @@ def cheby2(N, rs, Wn, btype='low', analog=0, output='ba'):
     Description:
 
       Design an Nth order lowpass digital or analog Chebyshev type I filter
-      and return the filter coefficients in (B,A) or (Z,P,K) form.
+      and return the filter coefficients in (B,A), (Z,P,K) or second-order
+      sections form.
 
     See also cheb2ord.
     """
@@ -558,7 +775,8 @@ def ellip(N, rp, rs, Wn, btype='low', analog=0, output='ba'):
     Description:
 
       Design an Nth order lowpass digital or analog elliptic filter
-      and return the filter coefficients in (B,A) or (Z,P,K) form.
+      and return the filter coefficients in (B,A), (Z,P,K) or second-order
+      sections form.
 
     See also ellipord.
     """
@@ -570,7 +788,8 @@ def bessel(N, Wn, btype='low', analog=0, output='ba'):
     Description:
 
       Design an Nth order lowpass digital or analog Bessel filter
-      and return the filter coefficients in (B,A) or (Z,P,K) form.
+      and return the filter coefficients in (B,A), (Z,P,K) or second-order
+      sections form.
 
     """
     return iirfilter(N, Wn, btype=btype, analog=analog, output=output, ftype='bessel')
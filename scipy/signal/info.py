@@ -7,6 +7,8 @@ Signal Processing Tools
     convolve      --  N-dimensional convolution.
     correlate     --  N-dimensional correlation.
     fftconvolve   --  N-dimensional convolution using the FFT.
+    oaconvolve    --  Convolution along one axis by the overlap-add method.
+    StreamConvolver -- Block by block convolution with a FIR kernel.
     convolve2d    --  2-dimensional convolution (more options).
     correlate2d   --  2-dimensional correlation (more options).
     sepfir2d      --  Convolve with a 2-D separable FIR filter.
@@ -31,6 +33,8 @@ Signal Processing Tools
     symiirorder1  --  2nd-order IIR filter (cascade of first-order systems).
     symiirorder2  --  4th-order IIR filter (cascade of second-order systems).
     lfilter       --  1-dimensional FIR and IIR digital linear filtering.
+    sosfilt       --  1-dimensional filtering with second-order sections.
+    StreamFilter  --  Block by block filtering, keeping the filter state.
 
     deconvolve    --  1-d deconvolution using lfilter.
 
@@ -39,6 +43,9 @@ Signal Processing Tools
 
     detrend       -- Remove linear and/or constant trends from data.
     resample      -- Resample using Fourier method.
+    resample_poly -- Resample by a rational factor with a polyphase filter.
+    StreamResampler -- Block by block polyphase resampling.
+    decimate      -- Downsample by an integer factor after lowpass filtering.
 
  Filter design:
 
@@ -62,6 +69,14 @@ Signal Processing Tools
     ellip (ellipord)  -- Elliptic (Cauer)
     bessel            -- Bessel (no order selection available -- try butterod)
 
+ Filter transformations in zero, pole, gain form:
+
+    lp2lp_zpk    -- low-pass to low-pass.
+    lp2hp_zpk    -- low-pass to high-pass.
+    lp2bp_zpk    -- low-pass to band-pass.
+    lp2bs_zpk    -- low-pass to band-stop.
+    bilinear_zpk -- analog to digital, by the bilinear transform.
+
  Linear Systems:
 
     lti     -- linear time invariant system object.
@@ -73,6 +88,9 @@ Signal Processing Tools
 
     tf2zpk -- transfer function to zero-pole-gain.
     zpk2tf -- zero-pole-gain to transfer function.
+    tf2sos -- transfer function to second-order sections.
+    zpk2sos -- zero-pole-gain to second-order sections.
+    sos2tf -- second-order sections to transfer function.
     tf2ss  -- transfer function to state-space.
     ss2tf  -- state-pace to transfer function.
     zpk2ss -- zero-pole-gain to state-space.
@@ -1,8 +1,13 @@
 # Author: Travis Oliphant
 # 1999 -- 2002
 
+import sys
 import types
 import warnings
+try:
+    import threading
+except ImportError:
+    threading = None
 
 import sigtools
 from scipy import special, linalg
@@ -160,7 +165,6 @@ def fftconvolve(in1, in2, mode="full"):
     fsize = 2**np.ceil(np.log2(size))
     IN1 = fftn(in1,fsize)
     IN1 *= fftn(in2,fsize)
-    ret = ifftn(IN1)
     fslice = tuple([slice(0, int(sz)) for sz in size])
     ret = ifftn(IN1)[fslice].copy()
     del IN1
@@ -177,6 +181,212 @@ def fftconvolve(in1, in2, mode="full"):
     elif mode == "valid":
         return _centered(ret,abs(s2-s1)+1)
 
+# cost of a forward and an inverse FFT of length n, in units of
+# n*log2(n) multiply-adds of the direct convolution
+_FFT_COST = 1.5
+
+# number of elements transformed at once by StreamConvolver
+_OA_CHUNK = 1 << 22
+
+def _oa_nfft(m, n=None):
+    """Return the FFT length with the least work per output sample for
+    overlap-add convolution with a kernel of length m, and that work.
+
+    If the signal length n is known, FFTs longer than needed to convolve
+    the whole signal at once are not considered.
+    """
+    kmin = max(int(np.ceil(np.log2(m))), 1)
+    kmax = kmin + 8
+    if n is not None:
+        kmax = max(min(kmax, int(np.ceil(np.log2(n + m - 1)))), kmin)
+    best = None
+    for k in range(kmin, kmax + 1):
+        nfft = 2**k
+        cost = _FFT_COST * nfft * k / float(nfft - m + 1)
+        if best is None or cost < best[1]:
+            best = (nfft, cost)
+    return best
+
+class StreamConvolver(object):
+    """
+    Convolve a signal fed block by block with a FIR kernel.
+
+    Each call of process() returns as many output samples as it is given
+    input samples.  The end of the convolution of a block, that overlaps
+    the following blocks, is kept and added to the output of the next
+    block, so that the outputs of all blocks followed by the result of
+    flush() form the full convolution of the signal with the kernel.
+
+    Parameters
+    ----------
+    h : array_like
+        The 1-d kernel.
+    axis : int
+        The axis of the blocks along which they are convolved
+        (*Default* = -1).  All blocks must have the same shape along the
+        other axes; each 1-d slice along axis is a separate channel.
+    method : {'auto', 'direct', 'fft'}
+        'fft' convolves with the overlap-add method: the blocks are cut
+        into segments that are transformed with FFTs of length nfft, and
+        the spectrum of the kernel is computed only once.  'direct' sums
+        the products with the kernel taps, which is faster for short
+        kernels.  'auto' picks the method needing the fewest operations
+        per output sample.
+    nfft : int
+        The FFT length of the overlap-add method, at least len(h).  By
+        default the power of two with the least work per output sample.
+
+    See also: oaconvolve, lfilter
+    """
+    def __init__(self, h, axis=-1, method='auto', nfft=None):
+        h = asarray(h)
+        if h.ndim != 1 or len(h) == 0:
+            raise ValueError, "h must be a non-empty 1-d array"
+        if method not in ['auto', 'direct', 'fft']:
+            raise ValueError, "method must be 'auto', 'direct' or 'fft'"
+        m = len(h)
+        if nfft is None:
+            nfft, cost = _oa_nfft(m)
+        else:
+            if nfft < m:
+                raise ValueError, "nfft must be at least the kernel length"
+            cost = _FFT_COST * nfft * np.log2(nfft) / float(nfft - m + 1)
+        if method == 'auto':
+            if cost < m:
+                method = 'fft'
+            else:
+                method = 'direct'
+        self.h = h
+        self.axis = axis
+        self.method = method
+        self.nfft = nfft
+        if method == 'fft':
+            self._H = fft(h, nfft)
+        self.reset()
+
+    def reset(self):
+        """Forget the previous blocks."""
+        self._tail = None
+
+    def process(self, x):
+        """
+        Convolve the next block of the signal.
+
+        Returns the output samples at the positions of the samples of x.
+        """
+        x = asarray(x)
+        axis = self.axis
+        if axis < 0:
+            axis += x.ndim
+        if axis < 0 or axis >= x.ndim:
+            raise ValueError, "axis is out of range for the block"
+        shape = list(x.shape)
+        shape[axis] = len(self.h) - 1
+        if self._tail is None:
+            self._tail = zeros(shape, np.common_type(x, self.h))
+        elif self._tail.shape != tuple(shape):
+            raise ValueError, "block shape differs from the previous blocks"
+        if self.method == 'direct':
+            y, self._tail = sigtools._linear_filter(self.h, [1], x, axis,
+                                                    self._tail)
+            return y
+        return self._process_fft(x, axis)
+
+    def _process_fft(self, x, axis):
+        m = len(self.h)
+        nfft = self.nfft
+        L = nfft - m + 1
+        # number of following segments the end of a segment overlaps
+        s = (m - 2) // L + 1
+        x = np.rollaxis(x, axis, x.ndim)
+        n = x.shape[-1]
+        lead = x.shape[:-1]
+        y = zeros(lead + (n + m - 1,), self._tail.dtype)
+        y[..., :m-1] = np.rollaxis(self._tail, axis, x.ndim)
+        complex_result = iscomplexobj(y)
+        # transform several segments of all channels at once
+        step = max(_OA_CHUNK // (int(prod(lead)) * nfft), 1) * L
+        for start in range(0, n, step):
+            stop = min(start + step, n)
+            nseg = (stop - start + L - 1) // L
+            seg = zeros(lead + (nseg * L,), x.dtype)
+            seg[..., :stop-start] = x[..., start:stop]
+            seg = seg.reshape(lead + (nseg, L))
+            Y = ifft(fft(seg, nfft, axis=-1) * self._H, axis=-1)
+            if not complex_result:
+                Y = Y.real
+            out = zeros(lead + (nseg + s, L), y.dtype)
+            for j in range(s + 1):
+                width = min(L, nfft - j * L)
+                out[..., j:j+nseg, :width] += Y[..., j*L:j*L+width]
+            out = out.reshape(lead + ((nseg + s) * L,))
+            length = min((nseg + s) * L, n + m - 1 - start)
+            y[..., start:start+length] += out[..., :length]
+        self._tail = np.rollaxis(y[..., n:], -1, axis)
+        return np.rollaxis(y[..., :n], -1, axis)
+
+    def flush(self):
+        """
+        Return the end of the convolution after the last block, of length
+        len(h) - 1 along axis, and forget the previous blocks.
+        """
+        if self._tail is None:
+            raise ValueError, "no block was processed"
+        tail = self._tail
+        self.reset()
+        return tail
+
+def oaconvolve(in1, in2, mode='full', axis=-1, method='auto'):
+    """Convolve an N-dimensional array with a 1-d kernel along one axis.
+
+    Long signals are convolved with the overlap-add method, which uses
+    FFTs of a length chosen from the kernel length instead of one FFT of
+    the whole signal, or directly for short kernels.
+
+    Parameters
+    ----------
+    in1 : array
+        The signal.
+    in2 : array
+        The 1-d kernel.
+    mode : {'full', 'same', 'valid'}
+        The size of the output along axis, as in convolve.
+    axis : int
+        The axis of in1 along which it is convolved (*Default* = -1).
+    method : {'auto', 'direct', 'fft'}
+        The convolution method, see StreamConvolver.
+
+    Returns
+    -------
+    out : array
+        The convolution of each 1-d slice of in1 along axis with in2.
+
+    See also: StreamConvolver, fftconvolve
+    """
+    in1 = asarray(in1)
+    in2 = asarray(in2)
+    if in1.ndim == 0:
+        raise ValueError, "in1 must have at least one dimension"
+    if axis < -in1.ndim or axis >= in1.ndim:
+        raise ValueError, "axis is out of range"
+    n = in1.shape[axis]
+    m = len(atleast_1d(in2))
+    if n == 0 or m == 0:
+        raise ValueError, "in1 and in2 must not be empty"
+    nfft = _oa_nfft(m, n)[0]
+    conv = StreamConvolver(in2, axis, method, nfft)
+    ret = concatenate((conv.process(in1), conv.flush()), axis)
+    if mode == "full":
+        return ret
+    size = list(ret.shape)
+    if mode == "same":
+        size[axis] = max(n, m)
+    elif mode == "valid":
+        size[axis] = abs(n - m) + 1
+    else:
+        raise ValueError, "mode must be 'full', 'same' or 'valid'"
+    return _centered(ret, size)
+
 
 def convolve(in1, in2, mode='full', old_behavior=True):
     """Convolve two N-dimensional arrays.
@@ -650,6 +860,247 @@ def lfiltic(b,a,y,x=None):
 
     return zi
 
+def _validate_sos(sos):
+    sos = atleast_1d(sos)
+    if sos.ndim == 1:
+        sos = sos[newaxis]
+    if sos.ndim != 2 or sos.shape[1] != 6:
+        raise ValueError, "sos must have shape (n_sections, 6)"
+    return sos
+
+def sosfilt(sos, x, axis=-1, zi=None):
+    """
+    Filter data along one dimension with a cascade of second-order sections.
+
+    Parameters
+    ----------
+    sos : array_like
+        Array of second-order filter sections of shape (n_sections, 6), as
+        returned by zpk2sos or tf2sos.  Each row holds the coefficients
+        [b0, b1, b2, a0, a1, a2] of one section.
+    x : array_like
+        An N-dimensional input array.
+    axis : int
+        The axis of the input data array along which to apply the
+        filter (*Default* = -1).
+    zi : array_like (optional)
+        Initial conditions for the delays of the sections, of shape
+        (n_sections, ..., 2, ...), where ..., 2, ... is the shape of x
+        with the length along axis replaced by 2.  If zi is None or not
+        given, initial rest is assumed.
+
+    Returns
+    -------
+    y : array
+        The output of the filter.
+    zf : array (optional)
+        If zi is None, this is not returned, otherwise, zf holds the
+        final delay values of the sections.
+
+    Notes
+    -----
+    The output is the same as lfilter(*sos2tf(sos), x) up to rounding,
+    but a cascade of low order sections is much less sensitive to the
+    rounding of the coefficients than a single high order filter.
+
+    See also: StreamFilter, zpk2sos, tf2sos
+    """
+    sos = _validate_sos(sos)
+    x = asarray(x)
+    if zi is None:
+        for section in sos:
+            x = sigtools._linear_filter(section[:3], section[3:], x, axis)
+        return x
+    zi = asarray(zi)
+    shape = list(x.shape)
+    shape[axis] = 2
+    if zi.shape != tuple([len(sos)] + shape):
+        raise ValueError, "zi must have shape (n_sections, ..., 2, ...)"
+    zf = []
+    for i in range(len(sos)):
+        x, z = sigtools._linear_filter(sos[i, :3], sos[i, 3:], x, axis,
+                                       zi[i])
+        zf.append(z)
+    return x, array(zf)
+
+def _run_threads(jobs):
+    """Run the callables in jobs, in parallel threads if there are several.
+
+    The first exception raised by a job is raised again once all threads
+    have finished.
+    """
+    if len(jobs) == 1:
+        jobs[0]()
+        return
+    errors = []
+    def run(job):
+        try:
+            job()
+        except:
+            errors.append(sys.exc_info())
+    threads = [threading.Thread(target=run, args=(job,)) for job in jobs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0][0], errors[0][1], errors[0][2]
+
+class StreamFilter(object):
+    """
+    Filter a signal block by block, keeping the filter state between blocks.
+
+    The signal is fed to process() in consecutive blocks, for instance
+    as they are acquired, and the output is the same as filtering the
+    whole signal at once.  The blocks may hold several channels, which
+    are filtered independently; the delays of all channels are kept
+    between calls.
+
+    Parameters
+    ----------
+    b : array_like
+        The numerator coefficient vector of the filter, or, if a is None,
+        an array of second-order sections of shape (n_sections, 6) as
+        returned by zpk2sos, tf2sos or iirfilter(..., output='sos').
+    a : array_like (optional)
+        The denominator coefficient vector of the filter.
+    axis : int
+        The axis of the blocks along which the filter is applied
+        (*Default* = -1).  All blocks must have the same shape along the
+        other axes.
+    threads : int
+        Number of threads the channels are divided over.  The channels
+        are split along the first axis other than axis (*Default* = 1).
+
+    Attributes
+    ----------
+    zi : list of arrays or None
+        The delays of the sections after the last block, or None before
+        the first block and after reset().
+
+    Examples
+    --------
+    >>> sos = butter(8, 0.1, output='sos')
+    >>> filt = StreamFilter(sos, threads=4)
+    >>> for block in blocks:            # blocks of shape (channels, n)
+    ...     filt.process(block, out=block)
+
+    See also: sosfilt, lfilter
+    """
+    def __init__(self, b, a=None, axis=-1, threads=1):
+        if a is None:
+            sos = _validate_sos(b)
+            self.sections = [(section[:3], section[3:]) for section in sos]
+        else:
+            b = atleast_1d(b)
+            a = atleast_1d(a)
+            n = max(len(a), len(b))
+            self.sections = [(r_[b, zeros(n - len(b), b.dtype)],
+                              r_[a, zeros(n - len(a), a.dtype)])]
+        if threads < 1:
+            raise ValueError, "threads must be at least 1"
+        self.axis = axis
+        self.threads = threads
+        self.zi = None
+        iscomplex = 0
+        for b, a in self.sections:
+            iscomplex = iscomplex or iscomplexobj(b) or iscomplexobj(a)
+        # the coefficients are cast to the type of the blocks, so that
+        # single precision blocks are filtered in single precision
+        if iscomplex:
+            self._probe = zeros(0, np.csingle)
+        else:
+            self._probe = zeros(0, np.single)
+        self._cast = {}
+
+    def reset(self):
+        """Reset the filter to initial rest."""
+        self.zi = None
+
+    def _coefficients(self, dtype):
+        try:
+            return self._cast[dtype]
+        except KeyError:
+            sections = [(b.astype(dtype), a.astype(dtype))
+                        for b, a in self.sections]
+            self._cast[dtype] = sections
+            return sections
+
+    def process(self, x, out=None):
+        """
+        Filter the next block of the signal.
+
+        Parameters
+        ----------
+        x : array_like
+            The next block of the signal.
+        out : array (optional)
+            Array in which the output is stored, of the shape of x.  It
+            may be x itself to filter the block in place.
+
+        Returns
+        -------
+        y : array
+            The filtered block, which is out if it was given.
+        """
+        x = asarray(x)
+        if out is None:
+            out = np.empty(x.shape, np.common_type(x, self._probe))
+        elif out.shape != x.shape:
+            raise ValueError, "out must have the shape of the block"
+        if out.dtype.char not in np.typecodes['AllFloat']:
+            raise TypeError, "out must be a floating point or complex array"
+        if x.dtype != out.dtype:
+            x = x.astype(out.dtype)
+        axis = self.axis
+        if axis < 0:
+            axis += x.ndim
+        if axis < 0 or axis >= x.ndim:
+            raise ValueError, "axis is out of range for the block"
+        shape = list(x.shape)
+        if self.zi is None:
+            self.zi = []
+            for b, a in self.sections:
+                shape[axis] = len(b) - 1
+                self.zi.append(zeros(shape, out.dtype))
+        else:
+            for zi, (b, a) in zip(self.zi, self.sections):
+                shape[axis] = len(b) - 1
+                if zi.shape != tuple(shape):
+                    raise ValueError, "block shape differs from the " \
+                          "previous blocks"
+            if self.zi[0].dtype != out.dtype:
+                self.zi = [zi.astype(out.dtype) for zi in self.zi]
+        sections = self._coefficients(out.dtype)
+
+        def job(index):
+            def run():
+                src = x[index]
+                dst = out[index]
+                for (b, a), zi in zip(sections, self.zi):
+                    zf = sigtools._linear_filter(b, a, src, axis, zi[index],
+                                                 dst)[1]
+                    zi[index] = zf
+                    src = dst
+            return run
+
+        # divide the channels over the threads along the first axis that
+        # is not filtered
+        index = [slice(None)] * x.ndim
+        others = [i for i in range(x.ndim) if i != axis]
+        if self.threads > 1 and others and threading is not None:
+            length = x.shape[others[0]]
+            nthreads = min(self.threads, length)
+            jobs = []
+            for i in range(nthreads):
+                index[others[0]] = slice(i * length // nthreads,
+                                         (i + 1) * length // nthreads)
+                jobs.append(job(tuple(index)))
+        else:
+            jobs = [job(tuple(index))]
+        _run_threads(jobs)
+        return out
+
 def deconvolve(signal, divisor):
     """Deconvolves divisor out of signal.
 
@@ -1724,7 +2175,12 @@ def decimate(x, q, n=None, ftype='iir', axis=-1):
     y : N-d array
       the down-sampled signal
 
-    See also:  resample
+    Notes
+    -----
+    With the FIR filter only the samples kept are computed, as in
+    resample_poly.
+
+    See also:  resample, resample_poly
     """
 
     if not isinstance(q, int):
@@ -1738,12 +2194,203 @@ def decimate(x, q, n=None, ftype='iir', axis=-1):
 
     if ftype == 'fir':
         b = firwin(n+1, 1./q, window='hamming')
-        a = 1.
+        return StreamResampler(1, q, axis=axis, h=b).process(x)
     else:
         b, a = cheby1(n, 0.05, 0.8/q)
 
     y = lfilter(b, a, x, axis=axis)
 
-    sl = [None]*y.ndim
+    sl = [slice(None)]*y.ndim
     sl[axis] = slice(None, None, q)
-    return y[sl]
+    return y[tuple(sl)]
+
+def _gcd(a, b):
+    while b:
+        a, b = b, a % b
+    return a
+
+def _resample_factors(up, down):
+    up = int(up)
+    down = int(down)
+    if up < 1 or down < 1:
+        raise ValueError, "up and down must be positive integers"
+    g = _gcd(up, down)
+    return up // g, down // g
+
+def _polyphase(h, up):
+    """Return the polyphase components of h, h[p::up] in row p."""
+    ntaps = (len(h) + up - 1) // up
+    hp = zeros(ntaps * up, h.dtype)
+    hp[:len(h)] = h
+    return hp.reshape(ntaps, up).transpose().copy()
+
+def _upfirdn(x, hp, up, down, t0, out):
+    """Upsample, filter and downsample along the last axis.
+
+    Adds to out[..., k] the sum over j of h[j] * u[t0 + k*down - j],
+    where u is the input upsampled by up (input sample i at u[i*up]) and
+    hp holds the polyphase components of h.  x[..., ntaps - 1 + i] holds
+    input sample i, so that the ntaps - 1 samples before the first one
+    are available.
+    """
+    ntaps = hp.shape[1]
+    count = out.shape[-1]
+    if count == 0:
+        return
+    if up == 1:
+        # decimation: filter each of the down phases of the input at the
+        # output rate, starting early enough to use the samples before
+        h = hp[0]
+        axis = x.ndim - 1
+        for d in range(min(down, ntaps)):
+            taps = h[d::down]
+            before = len(taps) - 1
+            first = t0 - d - down * before + ntaps - 1
+            last = first + down * (count + before - 1) + 1
+            y = sigtools._linear_filter(taps, [1], x[..., first:last:down],
+                                        axis)
+            out += y[..., before:]
+        return
+    # the outputs k0, k0 + up, k0 + 2*up, ... use the same polyphase
+    # component, and their inputs are down samples apart
+    for k0 in range(min(up, count)):
+        t = t0 + k0 * down
+        taps = hp[t % up]
+        first = t // up + ntaps - 1
+        last = first + ((count - k0 - 1) // up) * down + 1
+        y = out[..., k0::up]
+        for r in range(ntaps):
+            if taps[r] != 0:
+                y += taps[r] * x[..., first-r:last-r:down]
+
+def resample_poly(x, up, down, axis=-1, window=('kaiser', 5.0), h=None):
+    """Resample x by the rational factor up / down with a polyphase filter.
+
+    The signal is upsampled by up, lowpass filtered with a FIR filter and
+    downsampled by down, computing only the output samples kept.  The
+    output has ceil(len(x) * up / down) samples along axis, and the delay
+    of the filter is compensated, so that the first output sample is at
+    the position of the first input sample.
+
+    Parameters
+    ----------
+    x : array_like
+        The signal.
+    up : int
+        The upsampling factor.
+    down : int
+        The downsampling factor.
+    axis : int
+        The axis of x that is resampled (*Default* = -1).
+    window : string or tuple
+        The window used to design the FIR filter with firwin, see
+        get_window.  The filter has 20 * max(up, down) + 1 taps and a
+        cutoff at the lower of the two Nyquist frequencies.
+    h : array_like (optional)
+        The FIR filter, at the upsampled rate, used instead of the
+        designed one.  Its gain is multiplied by up.
+
+    Returns
+    -------
+    y : array
+        The resampled signal.
+
+    See also: StreamResampler, resample, decimate
+    """
+    up, down = _resample_factors(up, down)
+    if h is None:
+        n = max(up, down)
+        h = firwin(20 * n + 1, 1. / n, window=window)
+    h = up * atleast_1d(h)
+    hp = _polyphase(h, up)
+    ntaps = hp.shape[1]
+    x = asarray(x)
+    if axis < -x.ndim or axis >= x.ndim:
+        raise ValueError, "axis is out of range"
+    x = np.rollaxis(x, axis, x.ndim)
+    n = x.shape[-1]
+    count = (n * up + down - 1) // down
+    delay = (len(h) - 1) // 2
+    # zeros after the end of x needed by the last outputs
+    after = max((delay + (count - 1) * down) // up - n + 1, 0)
+    ext = zeros(x.shape[:-1] + (ntaps - 1 + n + after,), np.common_type(x, h))
+    ext[..., ntaps-1:ntaps-1+n] = x
+    y = zeros(x.shape[:-1] + (count,), ext.dtype)
+    _upfirdn(ext, hp, up, down, delay, y)
+    return np.rollaxis(y, -1, axis)
+
+class StreamResampler(object):
+    """
+    Resample a signal fed block by block by a rational factor.
+
+    The polyphase filter of resample_poly is applied to consecutive
+    blocks, keeping the last input samples and the phase of the output
+    between blocks, so that the output is the same as resampling the
+    whole signal at once.  The filter is causal: the output is delayed by
+    (len(h) - 1) / 2 samples at the upsampled rate compared to
+    resample_poly.
+
+    Parameters
+    ----------
+    up : int
+        The upsampling factor.
+    down : int
+        The downsampling factor.
+    axis : int
+        The axis of the blocks that is resampled (*Default* = -1).  All
+        blocks must have the same shape along the other axes.
+    window : string or tuple
+        The window used to design the FIR filter, see resample_poly.
+    h : array_like (optional)
+        The FIR filter used instead of the designed one, see
+        resample_poly.
+
+    See also: resample_poly
+    """
+    def __init__(self, up, down, axis=-1, window=('kaiser', 5.0), h=None):
+        up, down = _resample_factors(up, down)
+        if h is None:
+            n = max(up, down)
+            h = firwin(20 * n + 1, 1. / n, window=window)
+        self.up = up
+        self.down = down
+        self.axis = axis
+        self.h = up * atleast_1d(h)
+        self._hp = _polyphase(self.h, up)
+        self.reset()
+
+    def reset(self):
+        """Forget the previous blocks."""
+        self._history = None
+        # position of the next output sample at the upsampled rate,
+        # relative to the first sample of the next block
+        self._t = 0
+
+    def process(self, x):
+        """
+        Resample the next block of the signal.
+
+        Returns the output samples that depend only on the samples
+        received so far.
+        """
+        x = asarray(x)
+        axis = self.axis
+        if axis < 0:
+            axis += x.ndim
+        if axis < 0 or axis >= x.ndim:
+            raise ValueError, "axis is out of range for the block"
+        x = np.rollaxis(x, axis, x.ndim)
+        n = x.shape[-1]
+        ntaps = self._hp.shape[1]
+        if self._history is None:
+            self._history = zeros(x.shape[:-1] + (ntaps - 1,),
+                                  np.common_type(x, self.h))
+        elif self._history.shape[:-1] != x.shape[:-1]:
+            raise ValueError, "block shape differs from the previous blocks"
+        ext = concatenate((self._history, x), -1)
+        count = max((n * self.up - self._t + self.down - 1) // self.down, 0)
+        y = zeros(x.shape[:-1] + (count,), ext.dtype)
+        _upfirdn(ext, self._hp, self.up, self.down, self._t, y)
+        self._t += count * self.down - n * self.up
+        self._history = ext[..., n:].copy()
+        return np.rollaxis(y, -1, axis)
@@ -1298,9 +1298,10 @@ static PyObject *sigtools_median2d(PyObject *NPY_UNUSED(dummy), PyObject *args)
 }
 
 static char doc_linear_filter[] =
-    "(y,Vf) = _linear_filter(b,a,X,Dim=-1,Vi=None)  " \
+    "(y,Vf) = _linear_filter(b,a,X,Dim=-1,Vi=None,Y=None)  " \
     "implemented using Direct Form II transposed flow " \
-    "diagram. If Vi is not given, Vf is not returned.";
+    "diagram. If Vi is not given, Vf is not returned. " \
+    "If Y is given, the output is stored in Y, which may be X.";
 
 static struct PyMethodDef toolbox_module_methods[] = {
 	{"_correlateND", scipy_signal_sigtools_correlateND, METH_VARARGS, doc_correlateND},
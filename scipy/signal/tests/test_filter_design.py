@@ -3,7 +3,8 @@ import warnings
 import numpy as np
 from numpy.testing import TestCase, assert_array_almost_equal
 
-from scipy.signal import tf2zpk, bessel, BadCoefficients
+from scipy.signal import tf2zpk, zpk2tf, zpk2sos, sos2tf, bessel, \
+     butter, ellip, BadCoefficients
 
 class TestTf2zpk(TestCase):
     def test_simple(self):
@@ -36,3 +37,58 @@ class TestTf2zpk(TestCase):
                 pass
         finally:
             warnings.simplefilter("always", BadCoefficients)
+
+class TestZpk2Sos(TestCase):
+    def test_simple(self):
+        z = np.array([1., 2., 3.])
+        p = np.array([0.5, 0.2 + 0.3j, 0.2 - 0.3j])
+        sos = zpk2sos(z, p, 2.)
+        # the real pole, closest to the unit circle, comes last with the
+        # real zero closest to it
+        sos_r = np.array([[2., -10., 12., 1., -0.4, 0.13],
+                          [1., -1., 0., 1., -0.5, 0.]])
+        assert_array_almost_equal(sos, sos_r)
+
+    def test_roundtrip(self):
+        for z, p, k in [ellip(6, 0.5, 60, 0.2, output='zpk'),
+                        butter(5, [0.1, 0.3], btype='band', output='zpk')]:
+            sos = zpk2sos(z, p, k)
+            b, a = sos2tf(sos)
+            b_r, a_r = zpk2tf(z, p, k)
+            assert_array_almost_equal(b, b_r)
+            assert_array_almost_equal(a, a_r)
+            assert_array_almost_equal(sos[:,3], np.ones(len(sos)))
+
+    def test_output(self):
+        b, a = butter(8, 0.1)
+        sos = butter(8, 0.1, output='sos')
+        self.assertEqual(sos.shape, (4, 6))
+        # the zeros are exactly at z = -1
+        assert_array_almost_equal(sos[1:,:3], [[1, 2, 1]] * 3)
+        b_r, a_r = sos2tf(sos)
+        assert_array_almost_equal(b_r / b, np.ones(len(b)))
+        assert_array_almost_equal(a_r, a)
+        for btype, Wn in [('low', 0.2), ('high', 0.2), ('band', [0.2, 0.3]),
+                          ('stop', [0.2, 0.3])]:
+            b, a = ellip(4, 1, 40, Wn, btype=btype)
+            b_r, a_r = sos2tf(ellip(4, 1, 40, Wn, btype=btype,
+                                    output='sos'))
+            assert_array_almost_equal(b_r, b)
+            assert_array_almost_equal(a_r, a)
+        self.assertRaises(ValueError, butter, 4, 0.1, analog=1,
+                          output='sos')
+
+
+class TestHighOrder(TestCase):
+    def test_bandpass(self):
+        # the roots of the order 16 polynomials put poles outside the
+        # unit circle, those of the sections are accurate
+        sos = butter(8, [0.1, 0.12], btype='band', output='sos')
+        p = np.concatenate([np.roots(section[3:]) for section in sos])
+        self.assertTrue(np.all(abs(p) < 1))
+        assert_array_almost_equal(abs(p).max(), 0.99441502, decimal=7)
+        # unit gain at the center of the band
+        z = np.exp(1j * np.pi * 0.11)
+        h = np.prod([np.polyval(section[:3], z) /
+                     np.polyval(section[3:], z) for section in sos])
+        assert_array_almost_equal(abs(h), 1.0, decimal=4)
@@ -253,6 +253,52 @@ class TestFFTConvolve(TestCase):
         d = np.convolve(a, b, 'full')
         assert np.allclose(c, d, rtol=1e-10)
 
+class TestOAConvolve(TestCase):
+    def test_methods(self):
+        x = np.random.randn(500)
+        for m in [1, 6, 100]:
+            h = np.random.randn(m)
+            for method in ['auto', 'direct', 'fft']:
+                y = signal.oaconvolve(x, h, method=method)
+                assert_array_almost_equal(y, np.convolve(x, h))
+
+    def test_modes(self):
+        x = np.random.randn(50) + 1j * np.random.randn(50)
+        h = np.random.randn(7)
+        for mode in ['full', 'same', 'valid']:
+            assert_array_almost_equal(signal.oaconvolve(x, h, mode),
+                                      np.convolve(x, h, mode))
+        assert_array_almost_equal(signal.oaconvolve(h, x, 'valid'),
+                                  np.convolve(h, x, 'valid'))
+
+    def test_axis(self):
+        x = np.random.randn(40, 3, 2)
+        h = np.random.randn(9)
+        y = signal.oaconvolve(x, h, axis=0, method='fft')
+        self.assertEqual(y.shape, (48, 3, 2))
+        for i in range(3):
+            for j in range(2):
+                assert_array_almost_equal(y[:,i,j], np.convolve(x[:,i,j], h))
+
+class TestStreamConvolver(TestCase):
+    def test_blocks(self):
+        x = np.random.randn(2, 333)
+        h = np.random.randn(40)
+        y_r = np.array([np.convolve(x[0], h), np.convolve(x[1], h)])
+        for method, nfft in [('direct', None), ('fft', None), ('fft', 48)]:
+            conv = signal.StreamConvolver(h, method=method, nfft=nfft)
+            y = [conv.process(x[:,i:i+50]) for i in range(0, 333, 50)]
+            y.append(conv.flush())
+            assert_array_almost_equal(np.hstack(y), y_r)
+
+    def test_errors(self):
+        conv = signal.StreamConvolver(np.ones(5))
+        self.assertRaises(ValueError, conv.flush)
+        conv.process(np.ones((2, 10)))
+        self.assertRaises(ValueError, conv.process, np.ones((3, 10)))
+        self.assertRaises(ValueError, signal.StreamConvolver, np.ones(5),
+                          nfft=4)
+
 class TestMedFilt(TestCase):
     def test_basic(self):
         f = [[50, 50, 50, 50, 50, 92, 18, 27, 65, 46],
@@ -699,10 +745,112 @@ class TestFiltFilt:
         out = signal.filtfilt([1,2,3], [1,2,3], np.arange(12))
         assert_equal(out, arange(12))
 
+class TestSosFilt(TestCase):
+    def test_basic(self):
+        b, a = signal.butter(4, 0.2)
+        sos = signal.tf2sos(b, a)
+        x = np.random.randn(3, 50)
+        assert_array_almost_equal(signal.sosfilt(sos, x), lfilter(b, a, x))
+        assert_array_almost_equal(signal.sosfilt(sos, x.T, axis=0),
+                                  lfilter(b, a, x.T, axis=0))
+
+    def test_initial_conditions(self):
+        sos = signal.ellip(6, 0.5, 60, 0.2, output='sos')
+        x = np.random.randn(4, 60)
+        y_r = signal.sosfilt(sos, x)
+        zi = np.zeros((3, 4, 2))
+        y1, zf = signal.sosfilt(sos, x[:,:25], zi=zi)
+        y2, zf = signal.sosfilt(sos, x[:,25:], zi=zf)
+        assert_array_almost_equal(np.hstack((y1, y2)), y_r)
+        self.assertRaises(ValueError, signal.sosfilt, sos, x,
+                          zi=np.zeros((3, 2)))
+
+class TestStreamFilter(TestCase):
+    def test_sos(self):
+        sos = signal.butter(6, 0.1, output='sos')
+        x = np.random.randn(6, 200)
+        y_r = signal.sosfilt(sos, x)
+        for threads in [1, 4]:
+            filt = signal.StreamFilter(sos, threads=threads)
+            y = np.hstack([filt.process(x[:,i:i+30])
+                           for i in range(0, 200, 30)])
+            assert_array_almost_equal(y, y_r)
+
+    def test_in_place(self):
+        sos = signal.cheby1(4, 0.5, 0.3, output='sos')
+        x = np.random.randn(50, 3).astype(np.float32)
+        y_r = signal.sosfilt(sos, x.astype(np.float64), axis=0)
+        filt = signal.StreamFilter(sos, axis=0, threads=2)
+        for i in range(0, 50, 7):
+            block = x[i:i+7]
+            self.failUnless(filt.process(block, out=block) is block)
+        assert_array_almost_equal(x, y_r, decimal=5)
+
+    def test_ba(self):
+        b, a = signal.butter(3, 0.3)
+        x = np.random.randn(40)
+        filt = signal.StreamFilter(b, a)
+        y = np.concatenate((filt.process(x[:17]), filt.process(x[17:])))
+        assert_array_almost_equal(y, lfilter(b, a, x))
+        filt.reset()
+        assert_array_almost_equal(filt.process(x), lfilter(b, a, x))
+        self.assertRaises(ValueError, filt.process, np.zeros((2, 5)))
+
 class TestDecimate:
     def test_basic(self):
         x = np.arange(6)
         assert_array_equal(signal.decimate(x, 2, n=1).round(), x[::2])
 
+    def test_fir(self):
+        x = np.random.randn(3, 101)
+        b = signal.firwin(31, 1./4, window='hamming')
+        assert_array_almost_equal(signal.decimate(x, 4, ftype='fir'),
+                                  lfilter(b, 1, x)[:,::4])
+
+def _upfirdn(x, h, up, down, delay, count):
+    u = np.zeros(len(x) * up + len(h) + count * down)
+    u[:len(x) * up:up] = x
+    return np.convolve(u, h)[delay:delay + count * down:down]
+
+class TestResamplePoly(TestCase):
+    def test_factors(self):
+        x = np.random.randn(200)
+        h = np.random.randn(25)
+        for up, down in [(1, 3), (3, 1), (2, 3), (3, 2)]:
+            y = signal.resample_poly(x, up, down, h=h)
+            count = -(-len(x) * up // down)
+            assert_array_almost_equal(y, _upfirdn(x, up * h, up, down, 12,
+                                                  count))
+        # the factors are reduced to 2 / 3
+        assert_array_almost_equal(signal.resample_poly(x, 4, 6, h=h),
+                                  signal.resample_poly(x, 2, 3, h=h))
+
+    def test_axis(self):
+        x = np.random.randn(3, 60, 2)
+        y = signal.resample_poly(x, 2, 3, axis=1)
+        self.assertEqual(y.shape, (3, 40, 2))
+        assert_array_almost_equal(y[1,:,0],
+                                  signal.resample_poly(x[1,:,0], 2, 3))
+
+    def test_sine(self):
+        t = np.arange(480) / 480.
+        y = signal.resample_poly(np.sin(2 * np.pi * 5 * t), 147, 160)
+        t = np.arange(len(y)) / 441.
+        assert_array_almost_equal(y[100:-100],
+                                  np.sin(2 * np.pi * 5 * t[100:-100]), 2)
+
+class TestStreamResampler(TestCase):
+    def test_blocks(self):
+        x = np.random.randn(2, 300)
+        h = np.random.randn(31)
+        for up, down in [(1, 4), (3, 2), (2, 5)]:
+            resampler = signal.StreamResampler(up, down, h=h)
+            y = np.hstack([resampler.process(x[:,i:i+41])
+                           for i in range(0, 300, 41)])
+            count = -(-300 * up // down)
+            for i in range(2):
+                assert_array_almost_equal(y[i], _upfirdn(x[i], up * h, up,
+                                                         down, 0, count))
+
 if __name__ == "__main__":
     run_module_suite()
@@ -13,6 +13,7 @@ from bsr import *
 
 from construct import *
 from extract import *
+from storage import *
 
 #from spfuncs import *
 
@@ -292,6 +292,52 @@ def vstack(blocks, format=None, dtype=None):
     """
     return bmat([ [b] for b in blocks ], format=format, dtype=dtype)
 
+def _compressed_sparse_stack(blocks, axis, dtype):
+    """
+    Stack a sequence of CSR matrices vertically (axis=0) or CSC matrices
+    horizontally (axis=1) by concatenating their index pointers, indices
+    and data directly.  Only the arrays of the result are allocated.
+    """
+    other_axis = 1 - axis
+    constant_dim = blocks[0].shape[other_axis]
+
+    for i,A in enumerate(blocks):
+        if A.shape[other_axis] != constant_dim:
+            if axis == 0:
+                raise ValueError('blocks[%d,:] has incompatible column dimensions' % i)
+            else:
+                raise ValueError('blocks[:,%d] has incompatible row dimensions' % i)
+
+    if dtype is None:
+        dtype = upcast( *tuple([A.dtype for A in blocks]) )
+
+    nnz     = sum([ A.nnz for A in blocks ])
+    sum_dim = sum([ A.shape[axis] for A in blocks ])
+
+    data    = np.empty(nnz, dtype=dtype)
+    indices = np.empty(nnz, dtype=np.intc)
+    indptr  = np.empty(sum_dim + 1, dtype=np.intc)
+
+    nnz     = 0
+    sum_dim = 0
+    for A in blocks:
+        dim = A.shape[axis]
+        data[nnz:nnz + A.nnz]       = A.data[:A.nnz]
+        indices[nnz:nnz + A.nnz]    = A.indices[:A.nnz]
+        indptr[sum_dim:sum_dim + dim] = A.indptr[:-1]
+        indptr[sum_dim:sum_dim + dim] += nnz
+
+        sum_dim += dim
+        nnz     += A.nnz
+    indptr[-1] = nnz
+
+    if axis == 0:
+        return csr_matrix((data, indices, indptr),
+                          shape=(sum_dim, constant_dim))
+    else:
+        return csc_matrix((data, indices, indptr),
+                          shape=(constant_dim, sum_dim))
+
 def bmat(blocks, format=None, dtype=None):
     """
     Build a sparse matrix from sparse sub-blocks
@@ -321,6 +367,13 @@ def bmat(blocks, format=None, dtype=None):
             [3, 4, 0],
             [0, 0, 7]])
 
+    Notes
+    -----
+    A column of CSR blocks (as built by vstack) and a row of CSC blocks
+    (as built by hstack) are concatenated directly in the format of the
+    blocks, without converting them to COO format.  Only the arrays of
+    the result are allocated in this case.
+
     """
 
     blocks = np.asarray(blocks, dtype='object')
@@ -330,6 +383,15 @@ def bmat(blocks, format=None, dtype=None):
 
     M,N = blocks.shape
 
+    # stack CSR blocks vertically or CSC blocks horizontally without
+    # going through COO format
+    if N == 1 and format in (None, 'csr') and \
+            np.all([isinstance(b, csr_matrix) for b in blocks.flat]):
+        return _compressed_sparse_stack(blocks[:,0], 0, dtype)
+    if M == 1 and format in (None, 'csc') and \
+            np.all([isinstance(b, csc_matrix) for b in blocks.flat]):
+        return _compressed_sparse_stack(blocks[0,:], 1, dtype)
+
     block_mask   = np.zeros(blocks.shape,    dtype=np.bool)
     brow_lengths = np.zeros(blocks.shape[0], dtype=np.intc)
     bcol_lengths = np.zeros(blocks.shape[1], dtype=np.intc)
@@ -84,6 +84,21 @@ Duplicate (i,j) entries are summed when converting to CSR or CSC.
 
 This is useful for constructing finite-element stiffness and mass matrices.
 
+Example 3
+---------
+
+Store a matrix in binary format and map it back into memory:
+
+>>> from scipy import sparse
+>>> A = sparse.csr_matrix([[1,0,2],[0,0,3],[4,5,6]])
+>>> sparse.spsave('A.spm', A)
+>>> B = sparse.spload('A.spm', mmap_mode='r')
+
+Only the arrays of a given range of rows can be read as well:
+
+>>> C = sparse.spload('A.spm', rows=(1,3))
+
+
 Further Details
 ---------------
 
@@ -4,6 +4,7 @@
 #define NO_IMPORT_ARRAY
 #include "_superluobject.h"
 #include <setjmp.h>
+#include <string.h>
 
 extern jmp_buf _superlu_py_jmpbuf;
 
@@ -18,7 +19,8 @@ solves linear system of equations with one or sereral right hand sides.\n\
 parameters\n\
 ----------\n\
 \n\
-b        array, right hand side(s) of equation\n\
+b        array, right hand side(s) of equation; a 2-D array holds\n\
+         one right hand side per row\n\
 x        array, solution vector(s)\n\
 trans    'N': solve A   * x == b\n\
          'T': solve A^T * x == b\n\
@@ -57,7 +59,12 @@ SciPyLU_solve(SciPyLUObject *self, PyObject *args, PyObject *kwds) {
   if ((x = (PyArrayObject *) \
        PyArray_CopyFromObject((PyObject *)b,self->type,1,2))==NULL) return NULL;
 
-  if (b->dimensions[0] != self->n) goto fail;
+  /* a 2-D rhs holds one right-hand side per row */
+  if (b->dimensions[b->nd - 1] != self->n) {
+    PyErr_SetString(PyExc_ValueError, "right hand side array has invalid shape");
+    Py_DECREF(x);
+    return NULL;
+  }
 
 
   if (setjmp(_superlu_py_jmpbuf)) goto fail; 
@@ -124,6 +131,21 @@ SciPyLU_dealloc(SciPyLUObject *self)
   PyObject_Del(self);
 }
 
+/* return a new 1-D int array holding a copy of a permutation vector */
+static PyObject *
+intarray_from_data(int n, int *data)
+{
+  PyArrayObject *arr;
+  npy_intp dims[1];
+
+  dims[0] = n;
+  arr = (PyArrayObject *)PyArray_SimpleNew(1, dims, PyArray_INT);
+  if (arr == NULL)
+    return NULL;
+  memcpy(arr->data, data, n * sizeof(int));
+  return (PyObject *)arr;
+}
+
 static PyObject *
 SciPyLU_getattr(SciPyLUObject *self, char *name)
 {
@@ -131,8 +153,12 @@ SciPyLU_getattr(SciPyLUObject *self, char *name)
     return Py_BuildValue("(i,i)", self->m, self->n);
   if (strcmp(name, "nnz") == 0)
     return Py_BuildValue("i", ((SCformat *)self->L.Store)->nnz + ((SCformat *)self->U.Store)->nnz);
+  if (strcmp(name, "perm_c") == 0)
+    return intarray_from_data(self->n, self->perm_c);
+  if (strcmp(name, "perm_r") == 0)
+    return intarray_from_data(self->n, self->perm_r);
   if (strcmp(name, "__members__") == 0) {
-    char *members[] = {"shape", "nnz"};
+    char *members[] = {"shape", "nnz", "perm_c", "perm_r"};
     int i;
 
     PyObject *list = PyList_New(sizeof(members)/sizeof(char *));
@@ -1,5 +1,6 @@
 from warnings import warn
 
+import numpy as np
 from numpy import asarray
 from scipy.sparse import isspmatrix_csc, isspmatrix_csr, isspmatrix, \
         SparseEfficiencyWarning, csc_matrix
@@ -18,7 +19,7 @@ isUmfpack = hasattr( umfpack, 'UMFPACK_OK' )
 useUmfpack = True
 
 
-__all__ = [ 'use_solver', 'spsolve', 'splu', 'factorized' ]
+__all__ = [ 'use_solver', 'spsolve', 'splu', 'factorized', 'LUSolver' ]
 
 #convert numpy char to superLU char
 superLU_transtabl = {'f':'s', 'd':'d', 'F':'c', 'D':'z'}
@@ -47,15 +48,24 @@ def use_solver( **kwargs ):
 
 def spsolve(A, b, permc_spec=2):
     """Solve the sparse linear system Ax=b
+
+    b may be a vector or a 2-D array (or sparse matrix) holding one right
+    hand side per column.  In the latter case A is factored once and the
+    result has the same shape as b.
     """
     if isspmatrix( b ):
         b = b.toarray()
+    else:
+        b = asarray(b)
 
     if b.ndim > 1:
         if max( b.shape ) == b.size:
             b = b.squeeze()
+        elif b.ndim == 2:
+            return LUSolver(A, permc_spec=permc_spec).solve(b)
         else:
-            raise ValueError, "rhs must be a vector (has shape %s)" % (b.shape,)
+            raise ValueError, "rhs must be a vector or a 2-D array " \
+                    "(has shape %s)" % (b.shape,)
 
     if not (isspmatrix_csc(A) or isspmatrix_csr(A)):
         A = csc_matrix(A)
@@ -136,6 +146,9 @@ def factorized( A ):
       solve = factorized( A ) # Makes LU decomposition.
       x1 = solve( rhs1 ) # Uses the LU factors.
       x2 = solve( rhs2 ) # Uses again the LU factors.
+
+    See LUSolver for a factorization that can be updated when the values
+    (but not the sparsity pattern) of A change.
     """
     if isUmfpack and useUmfpack:
         if noScikit:
@@ -165,3 +178,217 @@ def factorized( A ):
         return solve
     else:
         return splu( A ).solve
+
+
+class LUSolver(object):
+    """
+    Sparse LU solver for a fixed sparsity pattern.
+
+    The matrix is factored on construction.  The fill-reducing column
+    ordering (SuperLU) or the symbolic analysis (UMFPACK) is computed only
+    once and reused by refactor(), which computes a new numeric
+    factorization when the values of the matrix change but its sparsity
+    pattern does not.  The index conversion and sorting of the pattern is
+    done only once as well.
+
+    Parameters
+    ----------
+    A : sparse matrix
+        Square matrix to factor, preferably in CSC or CSR format.
+    permc_spec : int, optional
+        Column ordering used by SuperLU (see splu).  Ignored by UMFPACK.
+    diag_pivot_thresh, drop_tol, relax, panel_size : optional
+        Passed to the SuperLU factorization (see splu).
+
+    Example
+    -------
+    >>> solver = LUSolver(A)           # ordering + LU factorization
+    >>> x = solver.solve(b)            # b may hold several columns
+    >>> solver.refactor(A_new)         # same pattern, new values
+    >>> x_new = solver(b)
+
+    """
+    def __init__(self, A, permc_spec=2, diag_pivot_thresh=1.0,
+                 drop_tol=0.0, relax=1, panel_size=10):
+        if not (isspmatrix_csc(A) or isspmatrix_csr(A)):
+            A = csc_matrix(A)
+            warn('LUSolver requires CSC or CSR matrix format',
+                    SparseEfficiencyWarning)
+
+        M, N = A.shape
+        if (M != N):
+            raise ValueError, "matrix must be square (has shape %s)" % (A.shape,)
+
+        self.shape = A.shape
+        self.permc_spec = permc_spec
+        self.lu_options = (diag_pivot_thresh, drop_tol, relax, panel_size)
+        self.use_umfpack = isUmfpack and useUmfpack
+
+        # remember how the values of A map onto the sorted CSC pattern, so
+        # that refactor() can gather the new values without converting or
+        # sorting the matrix again; A itself is left as it is
+        A = A.copy()
+        A.sum_duplicates()
+        self._format  = A.format
+        self._indptr  = A.indptr.copy()
+        self._indices = A.indices.copy()
+        tag = A.__class__((np.arange(A.nnz), A.indices, A.indptr),
+                          shape=A.shape)
+        tag = tag.tocsc()
+        tag.sort_indices()
+        self._order   = tag.data
+        self._pattern = (tag.indptr, tag.indices)
+
+        self.lu = None
+        self._perm = None
+        self.refactor(A)
+
+    def refactor(self, A):
+        """Compute a new numeric factorization
+
+        Parameters
+        ----------
+        A : sparse matrix or array
+            Either a matrix with the same sparsity pattern as the one the
+            solver was created with, or an array holding its new nonzero
+            values in the storage order of that matrix (i.e. a new value
+            for its .data attribute).
+        """
+        if isspmatrix(A):
+            if A.shape != self.shape:
+                raise ValueError, "matrix shape changed from %s to %s" \
+                        % (self.shape, A.shape)
+            if A.format == self._format and \
+                    np.array_equal(A.indptr, self._indptr) and \
+                    np.array_equal(A.indices, self._indices):
+                data = A.data[self._order]
+            else:
+                A = csc_matrix(A, copy=True)
+                A.sum_duplicates()
+                A.sort_indices()
+                if not (np.array_equal(A.indptr,  self._pattern[0]) and \
+                        np.array_equal(A.indices, self._pattern[1])):
+                    raise ValueError, "sparsity pattern of the matrix changed"
+                data = A.data
+        else:
+            data = asarray(A)
+            if data.shape != self._order.shape:
+                raise ValueError, "expected %d values (got %s)" \
+                        % (len(self._order), data.shape)
+            data = data[self._order]
+
+        if data.dtype.char not in 'fdFD':
+            #upcast to a floating point format
+            data = csc_matrix((data, self._pattern[1], self._pattern[0]),
+                              shape=self.shape).asfptype().data
+        self.dtype = data.dtype
+
+        if self.use_umfpack:
+            self._umfpack_factor(data)
+        else:
+            self._superlu_factor(data)
+
+    def _umfpack_factor(self, data):
+        if noScikit:
+            warn( 'scipy.sparse.linalg.dsolve.umfpack will be removed,'\
+                    ' install scikits.umfpack instead', DeprecationWarning )
+        if data.dtype.char not in 'dD':
+            raise ValueError, "convert matrix data to double, please, using"\
+                  " .astype(), or set linsolve.useUmfpack = False"
+
+        indptr, indices = self._pattern
+        self.matrix = csc_matrix((data, indices, indptr), shape=self.shape)
+        self.matrix.has_sorted_indices = True
+
+        if self.lu is None:
+            family = {'d' : 'di', 'D' : 'zi'}
+            self.lu = umfpack.UmfpackContext( family[data.dtype.char] )
+        # the symbolic analysis of the first call is reused as long as the
+        # pattern stays the same
+        self.lu.numeric( self.matrix )
+
+    def _superlu_factor(self, data):
+        indptr, indices = self._pattern
+        N = self.shape[0]
+        gstrf = eval('_superlu.' + superLU_transtabl[data.dtype.char] + 'gstrf')
+
+        if self._perm is None:
+            lu = gstrf(N, len(data), data, indices, indptr, self.permc_spec,
+                       *self.lu_options)
+
+            # column j of A*Pc is column perm[j] of A; store the pattern
+            # of A*Pc and the gather index mapping the values of A onto it
+            perm    = np.argsort(lu.perm_c)
+            lengths = np.diff(indptr)[perm]
+            pindptr = np.empty(N + 1, dtype=np.intc)
+            pindptr[0] = 0
+            np.cumsum(lengths, out=pindptr[1:])
+            gather  = np.arange(len(data), dtype=np.intc) + \
+                      np.repeat(indptr[perm] - pindptr[:-1], lengths)
+
+            self._perm   = perm
+            self._gather = gather
+            self._ppattern = (pindptr, indices[gather])
+            self._permuted = False
+        else:
+            # factor A*Pc with natural ordering, skipping the ordering step
+            pindptr, pindices = self._ppattern
+            lu = gstrf(N, len(data), data[self._gather], pindices, pindptr,
+                       0, *self.lu_options)
+            self._permuted = True
+
+        self.lu = lu
+
+    def solve(self, b, trans='N'):
+        """Solve A x = b (or A^T x = b for trans='T', A^H x = b for 'H')
+
+        b may be a vector or a 2-D array with one right hand side per
+        column; all columns are solved in a single call.
+        """
+        if isspmatrix(b):
+            b = b.toarray()
+        b = asarray(b)
+
+        if b.shape[0] != self.shape[0]:
+            raise ValueError, "matrix - rhs size mismatch (%s - %s)"\
+                  % (self.shape, b.shape)
+        if b.ndim not in (1, 2):
+            raise ValueError, "rhs must be a vector or a 2-D array"
+
+        if self.use_umfpack:
+            return self._umfpack_solve(b, trans)
+        else:
+            return self._superlu_solve(b, trans)
+
+    __call__ = solve
+
+    def _umfpack_solve(self, b, trans):
+        sys = {'N' : umfpack.UMFPACK_A, 'T' : umfpack.UMFPACK_Aat,
+               'H' : umfpack.UMFPACK_At}[trans]
+
+        if b.ndim == 1:
+            rhs = asarray(b, dtype=self.dtype)
+            return self.lu.solve( sys, self.matrix, rhs )
+
+        x = np.empty(b.shape, dtype=self.dtype)
+        for j in xrange(b.shape[1]):
+            rhs = np.ascontiguousarray(b[:,j], dtype=self.dtype)
+            x[:,j] = self.lu.solve( sys, self.matrix, rhs )
+        return x
+
+    def _superlu_solve(self, b, trans):
+        # SuperLU takes a 2-D rhs with one right hand side per row
+        b = asarray(b, dtype=self.dtype).T
+
+        if not self._permuted:
+            x = self.lu.solve(np.ascontiguousarray(b), trans)
+        elif trans == 'N':
+            # A*Pc y = b  =>  x[perm] = y
+            y = self.lu.solve(np.ascontiguousarray(b), trans)
+            x = np.empty_like(y)
+            x[..., self._perm] = y
+        else:
+            # (A*Pc)^T x = Pc^T b
+            x = self.lu.solve(np.ascontiguousarray(b[..., self._perm]), trans)
+
+        return x.T
@@ -1,11 +1,12 @@
 import warnings
 
+import numpy as np
 from numpy import array, finfo
 from numpy.testing import *
 
 from scipy.linalg import norm, inv
-from scipy.sparse import spdiags, SparseEfficiencyWarning
-from scipy.sparse.linalg.dsolve import spsolve, use_solver
+from scipy.sparse import spdiags, csr_matrix, SparseEfficiencyWarning
+from scipy.sparse.linalg.dsolve import spsolve, use_solver, LUSolver
 
 warnings.simplefilter('ignore',SparseEfficiencyWarning)
 
@@ -38,6 +39,98 @@ class TestLinsolve(TestCase):
 
                 assert( norm(b - Asp*x) < 10 * cond_A * eps )
 
+    def test_multiple_rhs(self):
+        A = spdiags([[1, 2, 3, 4, 5], [6, 5, 8, 9, 10]], [0, 1], 5, 5)
+        B = np.arange(15, dtype='d').reshape(5,3)
+
+        for format in ['csc','csr']:
+            Asp = A.astype('d').asformat(format)
+            X = spsolve(Asp, B)
+            assert_equal(X.shape, (5,3))
+            assert_array_almost_equal(Asp * X, B)
+
+        # a single column is still returned as a vector
+        x = spsolve(A.tocsc(), B[:,:1])
+        assert_equal(x.shape, (5,))
+
+
+class TestLUSolver(TestCase):
+    def setUp(self):
+        self.A = csr_matrix([[4, 1, 0, 0, 2],
+                             [1, 5, 0, 1, 0],
+                             [0, 0, 6, 0, 1],
+                             [3, 0, 1, 7, 0],
+                             [0, 2, 0, 0, 8]], dtype='d')
+        self.b = array([1, 2, 3, 4, 5], dtype='d')
+
+    def test_solve(self):
+        for format in ['csc','csr']:
+            A = self.A.asformat(format)
+            solver = LUSolver(A)
+            assert_array_almost_equal(A * solver.solve(self.b), self.b)
+            assert_array_almost_equal(A * solver(self.b), self.b)
+            assert_array_almost_equal(A.T * solver.solve(self.b, 'T'), self.b)
+
+            B = np.vstack((self.b, 2*self.b, self.b[::-1])).T
+            X = solver.solve(B)
+            assert_equal(X.shape, (5,3))
+            assert_array_almost_equal(A * X, B)
+
+    def test_refactor(self):
+        # with UMFPACK (when it is available) and with SuperLU
+        try:
+            use_solver( useUmfpack = True )
+            self._check_refactor()
+        finally:
+            use_solver( useUmfpack = False )
+        self._check_refactor()
+
+    def _check_refactor(self):
+        for format in ['csc','csr']:
+            A = self.A.asformat(format)
+            solver = LUSolver(A)
+
+            for k in range(3):
+                A = A.copy()
+                A.data = A.data * np.arange(1, A.nnz + 1) + k
+                solver.refactor(A)
+                assert_array_almost_equal(A * solver.solve(self.b), self.b)
+                assert_array_almost_equal(A.T * solver.solve(self.b, 'T'),
+                                          self.b)
+
+            # new values in the storage order of the original matrix
+            A.data = A.data + 1.0
+            solver.refactor(A.data)
+            assert_array_almost_equal(A * solver.solve(self.b), self.b)
+
+            # the pattern may be given in another format
+            solver.refactor(A.tocoo())
+            assert_array_almost_equal(A * solver.solve(self.b), self.b)
+
+    def test_input_unchanged(self):
+        # unsorted indices and a duplicate entry
+        indptr  = np.array([0, 2, 4, 6, 8, 11])
+        indices = np.array([4, 0, 3, 1, 2, 4, 3, 0, 1, 4, 1])
+        data    = np.array([2, 4, 1, 5, 6, 1, 7, 3, 2, 5, 3], dtype='d')
+        A = csr_matrix((data, indices, indptr), shape=(5,5))
+        for B in [A, A.tocsc()]:
+            B.has_sorted_indices = False
+            saved = (B.indptr.copy(), B.indices.copy(), B.data.copy())
+            solver = LUSolver(B)
+            solver.refactor(B)
+            solver.refactor(2*B)
+            assert_array_almost_equal(2*B * solver.solve(self.b), self.b)
+            assert_array_equal(B.indptr, saved[0])
+            assert_array_equal(B.indices, saved[1])
+            assert_array_equal(B.data, saved[2])
+
+    def test_pattern_change(self):
+        solver = LUSolver(self.A)
+        A = self.A.tolil()
+        A[0,3] = 1.0
+        assert_raises(ValueError, solver.refactor, A.tocsr())
+        assert_raises(ValueError, solver.refactor, self.A.data[1:])
+
 
 if __name__ == "__main__":
     run_module_suite()
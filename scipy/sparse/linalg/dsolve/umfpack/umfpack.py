@@ -392,12 +392,17 @@ class UmfpackContext( Struct ):
     def numeric( self, mtx ):
         """Numeric object (LU decomposition) computation using the
         symbolic decomposition. The symbolic decomposition is (re)computed
-        if necessary."""
+        if necessary, i.e. if there is none or if the sparsity pattern of
+        mtx differs from the one it was computed for."""
 
         self.free_numeric()
 
-        if self._symbolic is None:
+        if self._symbolic is None or not self._hasSamePattern( mtx ):
             self.symbolic( mtx )
+        else:
+            # the symbolic object is reused, but solve() must be called
+            # with the matrix factorized here
+            self.mtx = mtx
 
         indx = self._getIndx( mtx )
 
@@ -435,6 +440,18 @@ class UmfpackContext( Struct ):
                 raise RuntimeError, '%s failed with %s' % (self.funs.numeric,
                                                            umfStatus[status])
 
+    def _hasSamePattern( self, mtx ):
+        """Check whether mtx has the sparsity pattern the symbolic object
+        was computed for."""
+        old = self.mtx
+        if old is None:
+            return False
+        if old is mtx:
+            return True
+        return (old.shape == mtx.shape) and (old.format == mtx.format) \
+               and np.array_equal( old.indptr, mtx.indptr ) \
+               and np.array_equal( old.indices, mtx.indices )
+
     ##
     # 14.12.2005, c
     def report_symbolic( self ):
@@ -478,7 +495,6 @@ class UmfpackContext( Struct ):
         if self._numeric is not None:
             self.funs.free_numeric( self._numeric )
             self._numeric = None
-            self.free_symbolic()
 
     ##
     # 30.11.2005, c
@@ -590,7 +606,7 @@ class UmfpackContext( Struct ):
                 self.numeric( mtx )
 
         sol = self.solve( sys, mtx, rhs, autoTranspose )
-        self.free_numeric()
+        self.free()
 
         return sol
 
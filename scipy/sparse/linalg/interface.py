@@ -2,9 +2,9 @@ import numpy as np
 from scipy.sparse.sputils import isshape
 from scipy.sparse import isspmatrix
 
-__all__ = ['LinearOperator', 'aslinearoperator']
+__all__ = ['LinearOperator', 'aslinearoperator', 'block_linearoperator']
 
-class LinearOperator:
+class LinearOperator(object):
     """Common interface for performing matrix vector products
 
     Many iterative methods (e.g. cg, gmres) do not need to know the
@@ -40,6 +40,12 @@ class LinearOperator:
     where v has shape (N,) as well as the (N,1) case.  The shape of
     the return type is handled internally by LinearOperator.
 
+    LinearOperators can be combined with the usual operators: A + B,
+    A - B, A * B, alpha * A, -A, A ** k and the transposes A.T and A.H
+    are again LinearOperators.  They are evaluated lazily, so that no
+    explicit matrix is ever formed, and products with a block of vectors
+    are passed on to the matmat() routines of the operands.
+
     Examples
     --------
     >>> from scipy.sparse.linalg import LinearOperator
@@ -86,7 +92,24 @@ class LinearOperator:
         the user-defined matvec() routine, which is always provided.
         """
 
-        return np.hstack( [ self.matvec(col.reshape(-1,1)) for col in X.T ] )
+        M,N = self.shape
+        K = X.shape[1]
+
+        # fill a preallocated result column by column
+        Y = None
+        for j in xrange(K):
+            y = np.asarray(self.matvec(np.asarray(X[:,j]).reshape(N)))
+            if Y is None:
+                Y = np.empty((M,K), dtype=y.dtype)
+            Y[:,j] = y
+
+        if Y is None:
+            Y = np.zeros((M,0), dtype=getattr(self, 'dtype', X.dtype))
+
+        if isinstance(X, np.matrix):
+            Y = np.asmatrix(Y)
+
+        return Y
 
 
     def matvec(self, x):
@@ -181,6 +204,11 @@ class LinearOperator:
 
 
     def __mul__(self,x):
+        if isinstance(x, LinearOperator) or isspmatrix(x):
+            return _ProductLinearOperator(self, aslinearoperator(x))
+        elif np.isscalar(x):
+            return _ScaledLinearOperator(self, x)
+
         x = np.asarray(x)
 
         if x.ndim == 1 or x.ndim == 2 and x.shape[1] == 1:
@@ -191,6 +219,48 @@ class LinearOperator:
             raise ValueError('expected rank-1 or rank-2 array or matrix')
 
 
+    def __rmul__(self,x):
+        if np.isscalar(x):
+            return _ScaledLinearOperator(self, x)
+        else:
+            return NotImplemented
+
+    def __add__(self,x):
+        if isinstance(x, LinearOperator) or isspmatrix(x) or \
+                isinstance(x, np.ndarray):
+            return _SumLinearOperator(self, aslinearoperator(x))
+        else:
+            return NotImplemented
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return _ScaledLinearOperator(self, -1)
+
+    def __sub__(self,x):
+        if isinstance(x, LinearOperator) or isspmatrix(x) or \
+                isinstance(x, np.ndarray):
+            return self.__add__(-aslinearoperator(x))
+        else:
+            return NotImplemented
+
+    def __pow__(self,p):
+        if np.isscalar(p) and int(p) == p and p >= 0:
+            return _PowerLinearOperator(self, int(p))
+        else:
+            return NotImplemented
+
+    def transpose(self):
+        """Return the transpose A^T of this operator"""
+        return _TransposedLinearOperator(self)
+
+    def adjoint(self):
+        """Return the conjugate transpose A^H of this operator"""
+        return _AdjointLinearOperator(self)
+
+    T = property(transpose)
+    H = property(adjoint)
+
     def __repr__(self):
         M,N = self.shape
         if hasattr(self,'dtype'):
@@ -200,6 +270,278 @@ class LinearOperator:
 
         return '<%dx%d LinearOperator with %s>' % (M,N,dt)
 
+def _get_dtype(operators):
+    """Return the dtype resulting from combining the given operators
+
+    None is returned if one of them has an unspecified dtype.
+    """
+    sample = None
+    for A in operators:
+        if not hasattr(A, 'dtype'):
+            return None
+        if sample is None:
+            sample = np.zeros(1, dtype=A.dtype)
+        else:
+            sample = sample + np.zeros(1, dtype=A.dtype)
+    return sample.dtype
+
+
+class _SumLinearOperator(LinearOperator):
+    """A + B"""
+    def __init__(self, A, B):
+        if A.shape != B.shape:
+            raise ValueError('cannot add operators of shapes %s and %s' \
+                    % (A.shape, B.shape))
+        self.args = (A, B)
+        LinearOperator.__init__(self, A.shape, self._matvec,
+                                rmatvec=self._rmatvec, matmat=self._matmat,
+                                dtype=_get_dtype([A, B]))
+
+    def _matvec(self, x):
+        return self.args[0].matvec(x) + self.args[1].matvec(x)
+
+    def _rmatvec(self, x):
+        return self.args[0].rmatvec(x) + self.args[1].rmatvec(x)
+
+    def _matmat(self, X):
+        return self.args[0].matmat(X) + self.args[1].matmat(X)
+
+
+class _ProductLinearOperator(LinearOperator):
+    """A * B"""
+    def __init__(self, A, B):
+        if A.shape[1] != B.shape[0]:
+            raise ValueError('cannot multiply operators of shapes %s and %s' \
+                    % (A.shape, B.shape))
+        self.args = (A, B)
+        LinearOperator.__init__(self, (A.shape[0], B.shape[1]), self._matvec,
+                                rmatvec=self._rmatvec, matmat=self._matmat,
+                                dtype=_get_dtype([A, B]))
+
+    def _matvec(self, x):
+        return self.args[0].matvec(self.args[1].matvec(x))
+
+    def _rmatvec(self, x):
+        return self.args[1].rmatvec(self.args[0].rmatvec(x))
+
+    def _matmat(self, X):
+        return self.args[0].matmat(self.args[1].matmat(X))
+
+
+class _ScaledLinearOperator(LinearOperator):
+    """alpha * A"""
+    def __init__(self, A, alpha):
+        self.args = (A, alpha)
+        if hasattr(A, 'dtype'):
+            dtype = (np.zeros(1, dtype=A.dtype) * alpha).dtype
+        else:
+            dtype = None
+        LinearOperator.__init__(self, A.shape, self._matvec,
+                                rmatvec=self._rmatvec, matmat=self._matmat,
+                                dtype=dtype)
+
+    def _matvec(self, x):
+        return self.args[1] * self.args[0].matvec(x)
+
+    def _rmatvec(self, x):
+        return np.conj(self.args[1]) * self.args[0].rmatvec(x)
+
+    def _matmat(self, X):
+        return self.args[1] * self.args[0].matmat(X)
+
+
+class _PowerLinearOperator(LinearOperator):
+    """A ** p for an integer p >= 0"""
+    def __init__(self, A, p):
+        if A.shape[0] != A.shape[1]:
+            raise ValueError('matrix power requires a square operator')
+        self.args = (A, p)
+        LinearOperator.__init__(self, A.shape, self._matvec,
+                                rmatvec=self._rmatvec, matmat=self._matmat,
+                                dtype=getattr(A, 'dtype', None))
+
+    def _power(self, fun, x):
+        y = np.array(x, copy=True)
+        for i in xrange(self.args[1]):
+            y = fun(y)
+        return y
+
+    def _matvec(self, x):
+        return self._power(self.args[0].matvec, x)
+
+    def _rmatvec(self, x):
+        return self._power(self.args[0].rmatvec, x)
+
+    def _matmat(self, X):
+        return self._power(self.args[0].matmat, X)
+
+
+class _TransposedLinearOperator(LinearOperator):
+    """A^T, computed from the rmatvec() of A"""
+    def __init__(self, A):
+        self.args = (A,)
+        M,N = A.shape
+        LinearOperator.__init__(self, (N,M), self._matvec,
+                                rmatvec=self._rmatvec,
+                                dtype=getattr(A, 'dtype', None))
+
+    def _matvec(self, x):
+        # A^T x = conj(A^H conj(x))
+        return np.conj(self.args[0].rmatvec(np.conj(x)))
+
+    def _rmatvec(self, x):
+        return np.conj(self.args[0].matvec(np.conj(x)))
+
+    def transpose(self):
+        return self.args[0]
+
+    T = property(transpose)
+
+
+class _AdjointLinearOperator(LinearOperator):
+    """A^H, computed from the rmatvec() of A"""
+    def __init__(self, A):
+        self.args = (A,)
+        M,N = A.shape
+        LinearOperator.__init__(self, (N,M), self._matvec,
+                                rmatvec=self._rmatvec,
+                                dtype=getattr(A, 'dtype', None))
+
+    def _matvec(self, x):
+        return self.args[0].rmatvec(x)
+
+    def _rmatvec(self, x):
+        return self.args[0].matvec(x)
+
+    def adjoint(self):
+        return self.args[0]
+
+    H = property(adjoint)
+
+
+class _BlockLinearOperator(LinearOperator):
+    """[[A11, A12, ...], [A21, A22, ...], ...]"""
+    def __init__(self, blocks, row_sizes, col_sizes):
+        self.blocks = blocks
+        self.row_offsets = np.concatenate(([0], np.cumsum(row_sizes)))
+        self.col_offsets = np.concatenate(([0], np.cumsum(col_sizes)))
+
+        operators = [ A for row in blocks for A in row if A is not None ]
+        shape = (int(self.row_offsets[-1]), int(self.col_offsets[-1]))
+        LinearOperator.__init__(self, shape, self._matvec,
+                                rmatvec=self._rmatvec, matmat=self._matmat,
+                                dtype=_get_dtype(operators))
+
+    def _apply(self, X, transpose):
+        """Evaluate each block row (or block column, for the adjoint)"""
+        if transpose:
+            in_offsets, out_offsets = self.row_offsets, self.col_offsets
+        else:
+            in_offsets, out_offsets = self.col_offsets, self.row_offsets
+
+        parts = [ X[in_offsets[j]:in_offsets[j+1]] \
+                  for j in xrange(len(in_offsets) - 1) ]
+        Y = None
+
+        for i in xrange(len(out_offsets) - 1):
+            for j in xrange(len(in_offsets) - 1):
+                if transpose:
+                    A = self.blocks[j][i]
+                else:
+                    A = self.blocks[i][j]
+                if A is None:
+                    continue
+
+                if transpose:
+                    y = A.rmatvec(parts[j])
+                elif X.ndim == 1:
+                    y = A.matvec(parts[j])
+                else:
+                    y = A.matmat(parts[j])
+                y = np.asarray(y)
+
+                if Y is None:
+                    Y = np.zeros((out_offsets[-1],) + X.shape[1:],
+                                 dtype=y.dtype)
+                elif y.dtype != Y.dtype:
+                    Y = Y + np.zeros(1, dtype=y.dtype)
+                Y[out_offsets[i]:out_offsets[i+1]] += y.reshape(
+                        (out_offsets[i+1] - out_offsets[i],) + X.shape[1:])
+        return Y
+
+    def _matvec(self, x):
+        return self._apply(np.asarray(x).ravel(), False)
+
+    def _rmatvec(self, x):
+        return self._apply(np.asarray(x).ravel(), True)
+
+    def _matmat(self, X):
+        return self._apply(np.asarray(X), False)
+
+
+def block_linearoperator(blocks):
+    """Build a LinearOperator from a grid of LinearOperator blocks
+
+    Parameters
+    ----------
+    blocks
+        grid (list of lists) of LinearOperators or matrices with
+        compatible shapes; an entry of None implies an all-zero block
+
+    The blocks are applied lazily: products with the result evaluate the
+    products with the individual blocks and never form a matrix.
+
+    See Also
+    --------
+    scipy.sparse.bmat : the corresponding function for sparse matrices
+
+    Examples
+    --------
+    >>> from scipy.sparse.linalg import aslinearoperator, block_linearoperator
+    >>> from numpy import array, eye
+    >>> A = aslinearoperator(array([[1,2],[3,4]]))
+    >>> B = aslinearoperator(eye(2))
+    >>> K = block_linearoperator([[A, B], [B, None]])
+    >>> K.matvec(array([1,1,1,1]))
+    array([ 4.,  8.,  1.,  1.])
+
+    """
+    blocks = [ list(row) for row in blocks ]
+    if len(blocks) == 0 or len(blocks[0]) == 0:
+        raise ValueError('blocks must be a non-empty grid')
+
+    M = len(blocks)
+    N = len(blocks[0])
+    row_sizes = [0] * M
+    col_sizes = [0] * N
+
+    for i in xrange(M):
+        if len(blocks[i]) != N:
+            raise ValueError('blocks must form a rectangular grid')
+        for j in xrange(N):
+            if blocks[i][j] is None:
+                continue
+            A = aslinearoperator(blocks[i][j])
+            blocks[i][j] = A
+
+            if row_sizes[i] == 0:
+                row_sizes[i] = A.shape[0]
+            elif row_sizes[i] != A.shape[0]:
+                raise ValueError('blocks[%d,:] has incompatible row dimensions' % i)
+
+            if col_sizes[j] == 0:
+                col_sizes[j] = A.shape[1]
+            elif col_sizes[j] != A.shape[1]:
+                raise ValueError('blocks[:,%d] has incompatible column dimensions' % j)
+
+    if min(row_sizes) == 0:
+        raise ValueError('blocks[%d,:] is all None' % row_sizes.index(0))
+    if min(col_sizes) == 0:
+        raise ValueError('blocks[:,%d] is all None' % col_sizes.index(0))
+
+    return _BlockLinearOperator(blocks, row_sizes, col_sizes)
+
+
 def aslinearoperator(A):
     """Return A as a LinearOperator.
 
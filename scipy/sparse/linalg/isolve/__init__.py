@@ -4,6 +4,7 @@
 from iterative import *
 from minres import minres
 from lgmres import lgmres
+from block import block_cg, block_gmres
 
 __all__ = filter(lambda s:not s.startswith('_'),dir())
 from numpy.testing import Tester
@@ -0,0 +1,256 @@
+"""Block Krylov methods for linear systems with several right hand sides"""
+
+import numpy as np
+
+from utils import make_block_system
+
+__all__ = ['block_cg', 'block_gmres']
+
+
+# Part of the docstring common to the block solvers
+common_doc = \
+"""
+Parameters
+----------
+A : {sparse matrix, dense matrix, LinearOperator}
+    The N-by-N matrix of the linear system.
+B : {array, matrix}
+    Right hand sides of the linear system, one per column.  Has shape
+    (N,K) or (N,).
+
+Optional Parameters
+-------------------
+X0  : {array, matrix}
+    Starting guess for the solution, with the same shape as B.
+tol : float
+    Relative tolerance to achieve before terminating.  Each column j
+    has converged once |B[:,j] - A X[:,j]| <= tol |B[:,j]|.
+maxiter : integer
+    Maximum number of iterations.  Iteration will stop after maxiter
+    steps even if the specified tolerance has not been achieved.
+M : {sparse matrix, dense matrix, LinearOperator}
+    Preconditioner for A.  The preconditioner should approximate the
+    inverse of A.
+callback : function
+    User-supplied function to call after each iteration.  It is called
+    as callback(Xk), where Xk is the current solution block.
+work : dict
+    Storage for the work arrays.  When the same dict is passed to several
+    calls with right hand sides of the same shape, the arrays it holds
+    are reused instead of being allocated again.
+
+Outputs
+-------
+X : {array, matrix}
+    The converged solution, with the same shape as B.
+info : integer
+    Provides convergence information:
+        0  : successful exit
+        >0 : convergence to tolerance not achieved, number of iterations
+
+Notes
+-----
+All products with A and M are computed for the whole block of right hand
+sides at once with matmat().  Right hand sides that have converged are
+removed from the block (deflated), so that later iterations only work on
+the remaining ones.
+"""
+
+
+def set_docstring(header, footer):
+    def combine(fn):
+        fn.__doc__ = header + '\n' + common_doc + '\n' + footer
+        return fn
+    return combine
+
+
+def _work_array(work, name, shape, dtype):
+    """Return a work array from the work dict, allocating it if needed"""
+    if work is None:
+        return np.empty(shape, dtype=dtype)
+
+    arr = work.get(name)
+    if arr is None or arr.shape != shape or arr.dtype != dtype:
+        arr = np.empty(shape, dtype=dtype)
+        work[name] = arr
+    return arr
+
+
+def _column_norms(X):
+    return np.sqrt( (abs(X)**2).sum(axis=0) )
+
+
+def _deflate(k, order, bnorm, tol, R, *blocks):
+    """Move the converged columns of R (and blocks) behind the first k
+
+    Returns the number of columns that have not converged yet.
+    """
+    rnorm = _column_norms(R[:,:k])
+    converged = rnorm <= tol * bnorm[order[:k]]
+
+    if converged.any():
+        perm = np.concatenate((np.flatnonzero(~converged),
+                               np.flatnonzero(converged)))
+        order[:k] = order[perm]
+        for Y in (R,) + blocks:
+            Y[:,:k] = Y[:,perm]
+        k -= converged.sum()
+    return k
+
+
+def _unpermute(X, order):
+    Y = np.empty_like(X)
+    Y[:,order] = X
+    return Y
+
+
+@set_docstring('Use block Conjugate Gradient iteration to solve A X = B',
+               'The matrix A and the preconditioner M must be hermitian '
+               'positive definite.')
+def block_cg(A, B, X0=None, tol=1e-5, maxiter=None, M=None, callback=None,
+             work=None):
+    from scipy.linalg.basic import lstsq
+    A,M,X0,B,postprocess = make_block_system(A,M,X0,B)
+
+    N,K = B.shape
+    if maxiter is None:
+        maxiter = N*10
+
+    matmat, psolve = A.matmat, M.matmat
+
+    X = _work_array(work, 'X', (N,K), X0.dtype)
+    R = _work_array(work, 'R', (N,K), X0.dtype)
+    P = _work_array(work, 'P', (N,K), X0.dtype)
+    Q = _work_array(work, 'Q', (N,K), X0.dtype)
+
+    X[:] = X0
+    R[:] = B
+    R -= matmat(X)
+
+    bnorm = _column_norms(B)
+    bnorm[bnorm == 0] = 1
+
+    # order[i] is the right hand side held in column i; the first k
+    # columns of X and R have not converged yet
+    order = np.arange(K)
+    k = K
+    kp = 0
+    G = None
+
+    iter_ = 0
+    while True:
+        k = _deflate(k, order, bnorm, tol, R, X)
+        if k == 0 or iter_ == maxiter:
+            break
+
+        Z = psolve(R[:,:k])
+
+        # make the new directions A-conjugate to the previous ones
+        if kp > 0:
+            beta = lstsq(G, np.dot(Q[:,:kp].conj().T, Z))[0]
+            correction = np.dot(P[:,:kp], beta)
+            P[:,:k] = Z
+            P[:,:k] -= correction
+        else:
+            P[:,:k] = Z
+        Q[:,:k] = matmat(P[:,:k])
+
+        G = np.dot(P[:,:k].conj().T, Q[:,:k])
+        alpha = lstsq(G, np.dot(P[:,:k].conj().T, R[:,:k]))[0]
+
+        X[:,:k] += np.dot(P[:,:k], alpha)
+        R[:,:k] -= np.dot(Q[:,:k], alpha)
+        kp = k
+
+        iter_ += 1
+        if callback is not None:
+            callback(postprocess(_unpermute(X, order)))
+
+    if k == 0:
+        info = 0
+    else:
+        info = iter_
+
+    return postprocess(_unpermute(X, order)), info
+
+
+@set_docstring('Use block Generalized Minimal RESidual iteration to solve A X = B',
+               'The parameter restrt sets the number of block Arnoldi steps '
+               'between restarts (default 20).')
+def block_gmres(A, B, X0=None, tol=1e-5, restrt=20, maxiter=None, M=None,
+                callback=None, work=None):
+    from scipy.linalg.basic import lstsq
+    A,M,X0,B,postprocess = make_block_system(A,M,X0,B)
+
+    N,K = B.shape
+    if maxiter is None:
+        maxiter = N*10
+    restrt = min(restrt, N)
+
+    matmat, psolve = A.matmat, M.matmat
+
+    X = _work_array(work, 'X', (N,K), X0.dtype)
+    R = _work_array(work, 'R', (N,K), X0.dtype)
+    V = _work_array(work, 'V', (N,(restrt + 1)*K), X0.dtype)
+    H = _work_array(work, 'H', ((restrt + 1)*K, restrt*K), X0.dtype)
+    E = _work_array(work, 'E', ((restrt + 1)*K, K), X0.dtype)
+
+    X[:] = X0
+
+    bnorm = _column_norms(B)
+    bnorm[bnorm == 0] = 1
+
+    order = np.arange(K)
+    k = K
+
+    iter_ = 0
+    while True:
+        # restart from the true residual of the columns left
+        R[:,:k] = B[:,order[:k]]
+        R[:,:k] -= matmat(X[:,:k])
+
+        k = _deflate(k, order, bnorm, tol, R, X)
+        if k == 0 or iter_ >= maxiter:
+            break
+
+        tolk = tol * bnorm[order[:k]]
+
+        # block Arnoldi process for A*M, started from the residual block
+        V0, S = np.linalg.qr(R[:,:k])
+        V[:,:k] = V0
+        H[:(restrt + 1)*k, :restrt*k] = 0
+        E[:(restrt + 1)*k, :k] = 0
+        E[:k,:k] = S
+
+        for j in xrange(restrt):
+            cur = slice(j*k, (j + 1)*k)
+            nxt = slice((j + 1)*k, (j + 2)*k)
+
+            W = matmat(psolve(V[:,cur]))
+            for i in xrange(j + 1):
+                prev = slice(i*k, (i + 1)*k)
+                Hij = np.dot(V[:,prev].conj().T, W)
+                W -= np.dot(V[:,prev], Hij)
+                H[prev,cur] = Hij
+            V[:,nxt], H[nxt,cur] = np.linalg.qr(W)
+            iter_ += 1
+
+            # minimize |E - H Y| over the block Krylov space built so far
+            Hj = H[:(j + 2)*k, :(j + 1)*k]
+            Ej = E[:(j + 2)*k, :k]
+            Y = lstsq(Hj, Ej)[0]
+            if np.all(_column_norms(Ej - np.dot(Hj, Y)) <= tolk) or \
+                    iter_ >= maxiter:
+                break
+
+        X[:,:k] += psolve(np.dot(V[:,:(j + 1)*k], Y))
+
+        if callback is not None:
+            callback(postprocess(_unpermute(X, order)))
+
+    if k == 0:
+        info = 0
+    else:
+        info = iter_
+
+    return postprocess(_unpermute(X, order)), info
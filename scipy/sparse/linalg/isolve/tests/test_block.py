@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+""" Test functions for the block solvers of the sparse.linalg.isolve module
+"""
+
+from numpy.testing import *
+
+import numpy as np
+from numpy import ones, arange, array, matrix
+from scipy.sparse import spdiags
+
+from scipy.sparse.linalg.interface import LinearOperator
+from scipy.sparse.linalg.isolve import block_cg, block_gmres
+
+N = 40
+data = ones((3,N))
+data[0,:] =  2
+data[1,:] = -1
+data[2,:] = -1
+Poisson1D = spdiags( data, [0,-1,1], N, N, format='csr')
+
+data = ones((3,N))
+data[0,:] =  3
+data[1,:] = -1
+data[2,:] = -0.5
+NonSym = spdiags( data, [0,-1,1], N, N, format='csr')
+
+
+def rhs_block():
+    B = np.zeros((N,5))
+    B[:,0] = 1
+    B[:,1] = arange(N)
+    B[:,2] = np.sin(arange(N))
+    # a zero and a repeated right hand side
+    B[:,4] = B[:,1]
+    return B
+
+
+class TestBlock(TestCase):
+    def setUp(self):
+        # list of tuples (solver, matrices it applies to)
+        self.solvers = [ (block_cg,    [Poisson1D]),
+                         (block_gmres, [Poisson1D, NonSym]) ]
+
+    def test_convergence(self):
+        tol = 1e-8
+        B = rhs_block()
+        for solver, cases in self.solvers:
+            for A in cases:
+                X, info = solver(A, B, tol=tol)
+                assert_equal(info, 0)
+                assert_equal(X.shape, B.shape)
+                assert_equal(X[:,3], 0)
+                for j in range(B.shape[1]):
+                    assert( np.linalg.norm(B[:,j] - A*X[:,j]) <= \
+                            tol * max(1, np.linalg.norm(B[:,j])) )
+
+    def test_single_rhs(self):
+        b = arange(N, dtype=float)
+        for solver, cases in self.solvers:
+            x, info = solver(Poisson1D, b, tol=1e-8)
+            assert_equal(info, 0)
+            assert_equal(x.shape, (N,))
+            assert_almost_equal(Poisson1D * x, b, decimal=5)
+
+    def test_matrix_rhs(self):
+        B = matrix(rhs_block())
+        for solver, cases in self.solvers:
+            X, info = solver(Poisson1D, B, tol=1e-8)
+            assert(isinstance(X, matrix))
+
+    def test_maxiter(self):
+        B = rhs_block()
+        for solver, cases in self.solvers:
+            count = [0]
+            def callback(X):
+                count[0] += 1
+            X, info = solver(Poisson1D, B, tol=1e-14, maxiter=3,
+                             callback=callback)
+            assert(info > 0)
+            assert(count[0] <= 3)
+
+    def test_precond(self):
+        B = rhs_block()
+        diag = Poisson1D.diagonal()
+        M = LinearOperator((N,N), matvec=lambda x: x / diag,
+                           matmat=lambda X: X / diag[:,np.newaxis])
+        for solver, cases in self.solvers:
+            X, info = solver(Poisson1D, B, tol=1e-8, M=M)
+            assert_equal(info, 0)
+            assert_almost_equal(Poisson1D * X, B, decimal=5)
+
+    def test_work_reuse(self):
+        B = rhs_block()
+        for solver, cases in self.solvers:
+            work = {}
+            X1, info = solver(Poisson1D, B, tol=1e-8, work=work)
+            arrays = dict([ (k, id(v)) for k,v in work.items() ])
+            X2, info = solver(Poisson1D, 2*B, tol=1e-8, work=work)
+            assert_equal(arrays, dict([ (k, id(v)) for k,v in work.items() ]))
+            assert_almost_equal(X2, 2*X1, decimal=5)
+
+    def test_matmat_fallback(self):
+        # LinearOperator without matmat fills the block column by column
+        A = LinearOperator((N,N), matvec=lambda x: Poisson1D * x)
+        B = rhs_block()
+        assert_almost_equal(A.matmat(B), Poisson1D * B)
+        X, info = block_cg(A, B, tol=1e-8)
+        assert_equal(info, 0)
+
+
+if __name__ == "__main__":
+    run_module_suite()
@@ -123,3 +123,88 @@ def make_system(A, M, x0, b, xtype=None):
             raise ValueError('matrix and preconditioner have different shapes')
 
     return A, M, x, b, postprocess
+
+
+def make_block_system(A, M, X0, B):
+    """Make a linear system AX=B with several right hand sides
+
+    Parameters
+    ----------
+    A : LinearOperator
+        sparse or dense matrix (or any valid input to aslinearoperator)
+    M : {LinearOperator, None}
+        preconditioner
+        sparse or dense matrix (or any valid input to aslinearoperator)
+    X0 : {array_like, None}
+        initial guess to iterative method, one column per right hand side
+    B : array_like
+        right hand sides, with shape (N,K)
+
+    Returns
+    -------
+    (A, M, X, B, postprocess)
+        A : LinearOperator
+            matrix of the linear system
+        M : LinearOperator
+            preconditioner
+        X : rank 2 ndarray
+            initial guess
+        B : rank 2 ndarray
+            right hand sides
+        postprocess : function
+            converts the solution to the type of B (e.g. matrix)
+
+    """
+    A_ = A
+    A = aslinearoperator(A)
+
+    if A.shape[0] != A.shape[1]:
+        raise ValueError('expected square matrix (shape=%s)' % (A.shape,))
+
+    N = A.shape[0]
+
+    B = asanyarray(B)
+    B_shape = B.shape
+
+    if B.ndim == 1:
+        B = B.reshape(N,1)
+    if B.ndim != 2 or B.shape[0] != N:
+        raise ValueError('A and B have incompatible dimensions')
+
+    if B.dtype.char not in 'fdFD':
+        B = B.astype('d') # upcast non-FP types to double
+
+    def postprocess(X):
+        if isinstance(B,matrix):
+            X = asmatrix(X)
+        return X.reshape(B_shape)
+
+    if hasattr(A,'dtype'):
+        xtype = A.dtype.char
+    else:
+        xtype = A.matvec(B[:,0]).dtype.char
+    xtype = coerce(xtype, B.dtype.char)
+
+    B = asarray(B,dtype=xtype) #make B the same type as X
+
+    if X0 is None:
+        X = zeros(B.shape, dtype=xtype)
+    else:
+        X = array(X0, dtype=xtype)
+        if X.ndim == 1:
+            X = X.reshape(N,1)
+        if X.shape != B.shape:
+            raise ValueError('A and X have incompatible dimensions')
+
+    # process preconditioner
+    if M is None:
+        if hasattr(A_,'psolve'):
+            M = LinearOperator(A.shape, matvec=A_.psolve, dtype=A.dtype)
+        else:
+            M = LinearOperator(A.shape, matvec=id, matmat=id, dtype=A.dtype)
+    else:
+        M = aslinearoperator(M)
+        if A.shape != M.shape:
+            raise ValueError('matrix and preconditioner have different shapes')
+
+    return A, M, X, B, postprocess
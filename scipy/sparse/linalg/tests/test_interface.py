@@ -102,3 +102,112 @@ class TestAsLinearOperator(TestCase):
 
             if hasattr(M,'dtype'):
                 assert_equal(A.dtype, M.dtype)
+
+
+class TestOperatorAlgebra(TestCase):
+    def setUp(self):
+        self.D1 = np.array([[1,2,0],[0,3,1],[4,0,5]], dtype=float)
+        self.D2 = np.array([[0,1j,2],[1,0,0],[3,0,1]], dtype=complex)
+        self.A = aslinearoperator(self.D1)
+        self.B = aslinearoperator(sparse.csr_matrix(self.D2))
+
+        # count the products evaluated by A
+        self.count = {'matvec' : 0, 'matmat' : 0}
+        def matvec(x):
+            self.count['matvec'] += 1
+            return np.dot(self.D1, x)
+        def matmat(X):
+            self.count['matmat'] += 1
+            return np.dot(self.D1, X)
+        self.C = LinearOperator((3,3), matvec, matmat=matmat,
+                                rmatvec=lambda x: np.dot(self.D1.T, x),
+                                dtype=float)
+
+    def check(self, op, expected):
+        x = np.array([1, 2, 3])
+        X = np.array([[1, 2], [0, 1], [-1, 4]])
+        assert(isinstance(op, LinearOperator))
+        assert_equal(op.shape, expected.shape)
+        assert_almost_equal(op.matvec(x), np.dot(expected, x))
+        assert_almost_equal(op.matvec(x.reshape(3,1)),
+                            np.dot(expected, x).reshape(3,1))
+        assert_almost_equal(op.rmatvec(x), np.dot(expected.conj().T, x))
+        assert_almost_equal(op.matmat(X), np.dot(expected, X))
+        assert_almost_equal(op * X, np.dot(expected, X))
+
+    def test_algebra(self):
+        A, B, D1, D2 = self.A, self.B, self.D1, self.D2
+        self.check(A + B,   D1 + D2)
+        self.check(A - B,   D1 - D2)
+        self.check(A * B,   np.dot(D1, D2))
+        self.check(2 * A,   2 * D1)
+        self.check(A * 1j,  1j * D1)
+        self.check(-B,      -D2)
+        self.check(A ** 3,  np.dot(D1, np.dot(D1, D1)))
+        self.check(A ** 0,  np.eye(3))
+        self.check(B.T,     D2.T)
+        self.check(B.H,     D2.conj().T)
+        self.check((A * B + A).T.H, (np.dot(D1, D2) + D1).conj())
+        self.check(A + sparse.csr_matrix(D2), D1 + D2)
+        self.check(A - sparse.csr_matrix(D2), D1 - D2)
+        self.check(A * sparse.csr_matrix(D2), np.dot(D1, D2))
+
+    def test_dtype(self):
+        assert_equal((self.A + self.B).dtype, np.complex128)
+        assert_equal((2 * self.A).dtype, np.float64)
+        assert_equal((self.A * self.B).dtype, np.complex128)
+        assert_equal(self.B.T.dtype, np.complex128)
+
+    def test_errors(self):
+        R = aslinearoperator(np.ones((2,3)))
+        assert_raises(ValueError, lambda: self.A + R)
+        assert_raises(ValueError, lambda: R * R)
+        assert_raises(ValueError, lambda: R ** 2)
+        assert_raises(TypeError, lambda: self.A ** 0.5)
+        assert_raises(TypeError, lambda: self.A ** -1)
+        assert_raises(TypeError, lambda: self.A - 1)
+
+    def test_reflected(self):
+        # unsupported operands are left to the other operand
+        class Other(object):
+            def __rsub__(self, x):
+                return 'rsub'
+            def __radd__(self, x):
+                return 'radd'
+        assert_equal(self.A - Other(), 'rsub')
+        assert_equal(self.A + Other(), 'radd')
+
+    def test_lazy_matmat(self):
+        # products with a block of vectors go through matmat
+        op = (self.C * self.C + 2 * self.C) ** 2
+        X = np.arange(12).reshape(3,4)
+        expected = np.dot(self.D1, self.D1) + 2 * self.D1
+        expected = np.dot(expected, expected)
+        assert_almost_equal(op * X, np.dot(expected, X))
+        assert_equal(self.count['matvec'], 0)
+        assert_equal(self.count['matmat'], 6)
+
+
+class TestBlockLinearOperator(TestCase):
+    def test_blocks(self):
+        D1 = np.array([[1,2],[3,4]])
+        D2 = np.array([[5],[6]])
+        D3 = np.array([[7]])
+        K = block_linearoperator([[D1, sparse.csr_matrix(D2)],
+                                  [None, aslinearoperator(D3)]])
+        expected = np.array([[1,2,5],[3,4,6],[0,0,7]])
+
+        x = np.array([1,2,3])
+        X = np.array([[1,2],[0,1],[-1,4]])
+        assert_equal(K.shape, (3,3))
+        assert_equal(K.matvec(x), np.dot(expected, x))
+        assert_equal(K.rmatvec(x), np.dot(expected.T, x))
+        assert_equal(K.matmat(X), np.dot(expected, X))
+        assert_equal((K * K).matvec(x), np.dot(expected, np.dot(expected, x)))
+
+    def test_errors(self):
+        D1 = np.ones((2,2))
+        D2 = np.ones((3,1))
+        assert_raises(ValueError, block_linearoperator, [[D1, D2]])
+        assert_raises(ValueError, block_linearoperator, [[D1, None],[None,None]])
+        assert_raises(ValueError, block_linearoperator, [[D1],[D1, D1]])
@@ -0,0 +1,317 @@
+"""Binary on-disk storage for sparse matrices
+
+The container holds the raw index and data arrays of a CSR, CSC, COO or
+BSR matrix behind a small text header.  Every array starts at an offset
+that is a multiple of 64 bytes, so a stored matrix can be opened with
+numpy.memmap and shared read-only between processes without copying.
+
+File layout::
+
+    magic          8 bytes    '\\x93SPMATRX'
+    header length  4 bytes    little-endian unsigned int
+    header         ASCII text, padded with spaces to the alignment
+    arrays         raw array data, each one aligned to 64 bytes
+
+"""
+
+__docformat__ = "restructuredtext en"
+
+__all__ = ['spsave', 'spload']
+
+import numpy as np
+
+from base import isspmatrix
+from csr import csr_matrix
+from csc import csc_matrix
+from coo import coo_matrix
+from bsr import bsr_matrix
+
+_MAGIC     = '\x93SPMATRX'
+_VERSION   = 1
+_ALIGN     = 64
+_FORMATS   = ['csr', 'csc', 'coo', 'bsr']
+
+# arrays stored for each format, in file order
+_ARRAYS = { 'csr' : ['indptr', 'indices', 'data'],
+            'csc' : ['indptr', 'indices', 'data'],
+            'bsr' : ['indptr', 'indices', 'data'],
+            'coo' : ['row', 'col', 'data'] }
+
+
+def _aligned(n):
+    return ((n + _ALIGN - 1) // _ALIGN) * _ALIGN
+
+
+def _format_header(format, shape, blocksize, arrays):
+    """Return the padded header text given (name, array, offset) triples"""
+    lines = []
+    lines.append('version %d' % _VERSION)
+    lines.append('format %s' % format)
+    lines.append('shape %d %d' % shape)
+    lines.append('blocksize %d %d' % blocksize)
+    for name, arr, offset in arrays:
+        dims = ' '.join([str(n) for n in arr.shape])
+        lines.append('array %s %s %020d %s' % (name, arr.dtype.str, offset, dims))
+    return '\n'.join(lines) + '\n'
+
+
+def _parse_header(text):
+    header = {'arrays' : {}}
+    for line in text.splitlines():
+        fields = line.split()
+        if not fields:
+            continue
+        key, values = fields[0], fields[1:]
+        if key == 'version':
+            header['version'] = int(values[0])
+        elif key == 'format':
+            header['format'] = values[0]
+        elif key in ('shape', 'blocksize'):
+            header[key] = (int(values[0]), int(values[1]))
+        elif key == 'array':
+            name, dtype, offset = values[:3]
+            shape = tuple([int(n) for n in values[3:]])
+            header['arrays'][name] = (np.dtype(dtype), int(offset), shape)
+        else:
+            raise ValueError('unrecognized header entry %r' % key)
+
+    if header.get('version') != _VERSION:
+        raise ValueError('unsupported sparse file version %s' \
+                % header.get('version'))
+    if header.get('format') not in _FORMATS:
+        raise ValueError('unsupported sparse format %s' % header.get('format'))
+    return header
+
+
+def _read_header(fd):
+    magic = fd.read(len(_MAGIC))
+    if magic != _MAGIC:
+        raise ValueError('not a sparse matrix file (bad magic string)')
+    length = int(np.fromstring(fd.read(4), dtype='<u4')[0])
+    return _parse_header(fd.read(length))
+
+
+def spsave(file, A, format=None):
+    """Save a sparse matrix to a binary file
+
+    The index and data arrays are written unchanged after a small header,
+    so that the file can be reopened with spload(..., mmap_mode='r')
+    without copying.
+
+    Parameters
+    ----------
+    file : string
+        Name of the file to create.
+    A : sparse matrix
+        Matrix to store.
+    format : string, optional
+        Storage format, one of 'csr', 'csc', 'coo' or 'bsr'.  By default
+        the format of A is used when it is one of these, otherwise A is
+        stored as CSR.
+
+    Notes
+    -----
+    COO matrices are stored with their entries ordered by row, so that a
+    range of rows can be read back without scanning the whole file.
+
+    See Also
+    --------
+    spload : load a matrix stored by spsave
+
+    Example
+    -------
+    >>> from scipy.sparse import csr_matrix, spsave, spload
+    >>> A = csr_matrix([[1,0,2],[0,0,3],[4,5,6]])
+    >>> spsave('A.spm', A)
+    >>> B = spload('A.spm', mmap_mode='r')
+    >>> B.todense()
+    matrix([[1, 0, 2],
+            [0, 0, 3],
+            [4, 5, 6]])
+
+    """
+    if not isspmatrix(A):
+        raise TypeError('expected a sparse matrix')
+
+    if format is None:
+        if A.format in _FORMATS:
+            format = A.format
+        else:
+            format = 'csr'
+    if format not in _FORMATS:
+        raise ValueError('unsupported format %s, expected one of %s' \
+                % (format, _FORMATS))
+
+    A = A.asformat(format)
+    if A.dtype.hasobject:
+        raise ValueError('cannot store matrices of object dtype')
+
+    if format == 'coo':
+        order = np.lexsort((A.col, A.row))
+        members = { 'row'  : A.row[order],
+                    'col'  : A.col[order],
+                    'data' : A.data[order] }
+    else:
+        # the arrays may be longer than the stored entries; A may be the
+        # caller's matrix, so they are sliced rather than pruned
+        nnz = A.indptr[-1]
+        members = { 'indptr'  : A.indptr,
+                    'indices' : A.indices[:nnz],
+                    'data'    : A.data[:nnz] }
+
+    if format == 'bsr':
+        blocksize = A.blocksize
+    else:
+        blocksize = (1,1)
+
+    arrays = [ np.ascontiguousarray(members[name]) for name in _ARRAYS[format] ]
+
+    # offsets are written with a fixed width, so the header length does
+    # not depend on their values
+    entries = [ (name, arr, 0) for name,arr in zip(_ARRAYS[format], arrays) ]
+    header_len = len(_format_header(format, A.shape, blocksize, entries))
+    offset = _aligned(len(_MAGIC) + 4 + header_len)
+
+    entries = []
+    for name, arr in zip(_ARRAYS[format], arrays):
+        entries.append( (name, arr, offset) )
+        offset = _aligned(offset + arr.nbytes)
+
+    header = _format_header(format, A.shape, blocksize, entries)
+    header += ' ' * (entries[0][2] - len(_MAGIC) - 4 - len(header))
+
+    fd = open(file, 'wb')
+    try:
+        fd.write(_MAGIC)
+        fd.write(np.array([len(header)], dtype='<u4').tostring())
+        fd.write(header)
+        for name, arr, offset in entries:
+            fd.write('\0' * (offset - fd.tell()))
+            arr.tofile(fd)
+    finally:
+        fd.close()
+
+
+def _load_array(fd, file, info, mmap_mode, start=None, stop=None):
+    """Load arr[start:stop] of a stored array, reading nothing else"""
+    dtype, offset, shape = info
+
+    if start is None:
+        start = 0
+    if stop is None:
+        stop = shape[0]
+    shape = (stop - start,) + shape[1:]
+    offset += start * dtype.itemsize * int(np.prod(shape[1:]))
+    count = int(np.prod(shape))
+
+    if count == 0:
+        return np.zeros(shape, dtype=dtype)
+    elif mmap_mode is None:
+        fd.seek(offset)
+        return np.fromfile(fd, dtype=dtype, count=count).reshape(shape)
+    else:
+        return np.memmap(file, dtype=dtype, mode=mmap_mode,
+                         offset=offset, shape=shape)
+
+
+def spload(file, mmap_mode=None, rows=None):
+    """Load a sparse matrix stored by spsave
+
+    Parameters
+    ----------
+    file : string
+        Name of the file to read.
+    mmap_mode : {None, 'r', 'r+', 'c'}, optional
+        If not None, the index and data arrays are memory-mapped with
+        numpy.memmap using the given mode instead of being read into
+        memory.  With mode 'r' several processes can share one stored
+        matrix without copying it.
+    rows : tuple (start, stop), optional
+        Only load rows start to stop-1 (as in A[start:stop,:]).  Only
+        the parts of the file holding those rows are read.  Supported for
+        matrices stored in CSR, BSR (where start and stop must be
+        multiples of the row blocksize) and COO format.
+
+    Returns
+    -------
+    A : sparse matrix
+        A matrix in the format it was stored in.
+
+    See Also
+    --------
+    spsave : store a sparse matrix in binary format
+
+    """
+    if mmap_mode not in (None, 'r', 'r+', 'c'):
+        raise ValueError("mmap_mode must be one of None, 'r', 'r+' or 'c'")
+
+    fd = open(file, 'rb')
+    try:
+        header  = _read_header(fd)
+        format  = header['format']
+        arrays  = header['arrays']
+        M,N     = header['shape']
+        R,C     = header['blocksize']
+
+        def load(name, start=None, stop=None):
+            return _load_array(fd, file, arrays[name], mmap_mode, start, stop)
+
+        if rows is None:
+            start, stop = 0, M
+        else:
+            start, stop = rows
+            if start < 0 or stop > M or start > stop:
+                raise ValueError('invalid row range (%d,%d) for matrix ' \
+                        'with %d rows' % (start, stop, M))
+
+        if format == 'csc':
+            if rows is not None:
+                raise ValueError('row ranges are not supported for CSC ' \
+                        'matrices, store the matrix in CSR format instead')
+            return csc_matrix((load('data'), load('indices'), load('indptr')),
+                              shape=(M,N), copy=False)
+
+        elif format == 'coo':
+            if rows is None:
+                row = load('row')
+                col = load('col')
+                data = load('data')
+            else:
+                # entries are sorted by row, so locate the range with a
+                # binary search over the memory-mapped row indices
+                all_rows = _load_array(fd, file, arrays['row'], 'r')
+                lo = int(np.searchsorted(all_rows, start, side='left'))
+                hi = int(np.searchsorted(all_rows, stop,  side='left'))
+                del all_rows
+                row  = load('row', lo, hi) - start
+                col  = load('col', lo, hi)
+                data = load('data', lo, hi)
+            return coo_matrix((data, (row, col)), shape=(stop - start, N),
+                              copy=False)
+
+        else:
+            if format == 'bsr':
+                if start % R != 0 or stop % R != 0:
+                    raise ValueError('row range must be a multiple of the ' \
+                            'blocksize (%d,%d)' % (R,C))
+                start, stop = start // R, stop // R
+
+            if rows is None:
+                indptr = load('indptr')
+                lo, hi = None, None
+            else:
+                indptr = load('indptr', start, stop + 1)
+                lo, hi = int(indptr[0]), int(indptr[-1])
+                indptr = indptr - lo
+
+            indices = load('indices', lo, hi)
+            data    = load('data', lo, hi)
+
+            if format == 'csr':
+                return csr_matrix((data, indices, indptr),
+                                  shape=(stop - start, N), copy=False)
+            else:
+                return bsr_matrix((data, indices, indptr),
+                                  shape=(R * (stop - start), N), copy=False)
+    finally:
+        fd.close()
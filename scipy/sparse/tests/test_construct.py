@@ -5,7 +5,7 @@ from numpy import array, matrix
 from numpy.testing import *
 
 
-from scipy.sparse import csr_matrix, coo_matrix
+from scipy.sparse import csr_matrix, csc_matrix, coo_matrix
 
 from scipy.sparse.construct import *
 
@@ -173,6 +173,33 @@ class TestConstructUtils(TestCase):
 
         #TODO test failure cases
 
+    def test_compressed_stack(self):
+        A = csr_matrix([[1,0,2],[0,0,3]])
+        B = csr_matrix([[0,4,0]])
+        C = csr_matrix((2,3))
+
+        expected = matrix([[1, 0, 2],
+                           [0, 0, 3],
+                           [0, 4, 0],
+                           [0, 0, 0],
+                           [0, 0, 0]])
+        result = vstack( [A,B,C] )
+        assert_equal( result.format, 'csr' )
+        assert_equal( result.todense(), expected )
+        assert_equal( vstack( [A,B,C], format='coo' ).todense(), expected )
+        assert_equal( vstack( [A,B,C], dtype=np.float32 ).dtype, np.float32 )
+
+        result = hstack( [A.T.tocsc(),B.T.tocsc(),C.T.tocsc()] )
+        assert_equal( result.format, 'csc' )
+        assert_equal( result.todense(), expected.T )
+
+        # mixed formats go through COO
+        result = vstack( [A,B.tocoo()], format='csr' )
+        assert_equal( result.todense(), expected[:3] )
+
+        assert_raises( ValueError, vstack, [A,csr_matrix((1,2))] )
+        assert_raises( ValueError, hstack, [A.tocsc(),csc_matrix((1,1))] )
+
     def test_lil_diags(self):
         assert_array_equal(lil_diags([[1,2,3],[4,5],[6]],
                                      [0,1,2],(3,3)).todense(),
@@ -0,0 +1,107 @@
+"""test binary storage of sparse matrices"""
+
+import os
+import tempfile
+
+import numpy as np
+from numpy.testing import *
+
+from scipy.sparse import csr_matrix, csc_matrix, coo_matrix, bsr_matrix, \
+        lil_matrix
+from scipy.sparse.storage import *
+
+
+class TestStorage(TestCase):
+    def setUp(self):
+        self.fname = tempfile.mktemp('.spm')
+        self.D = np.array([[1, 0, 0, 2, 0, 0],
+                           [0, 0, 3, 0, 0, 0],
+                           [0, 0, 0, 0, 0, 0],
+                           [4, 5, 0, 0, 6, 0],
+                           [0, 0, 0, 0, 0, 7],
+                           [8, 0, 9, 0, 0, 0]], dtype=float)
+
+    def tearDown(self):
+        if os.path.exists(self.fname):
+            os.remove(self.fname)
+
+    def cases(self):
+        yield csr_matrix(self.D)
+        yield csc_matrix(self.D)
+        yield coo_matrix(self.D)
+        yield bsr_matrix(self.D, blocksize=(2,3))
+        yield csr_matrix(self.D.astype(np.complex128) * 1j)
+        yield csr_matrix((6,6))
+
+    def test_roundtrip(self):
+        for A in self.cases():
+            for mmap_mode in [None, 'r', 'c']:
+                spsave(self.fname, A)
+                B = spload(self.fname, mmap_mode=mmap_mode)
+                assert_equal(B.format, A.format)
+                assert_equal(B.dtype, A.dtype)
+                assert_equal(B.shape, A.shape)
+                assert_equal(B.toarray(), A.toarray())
+
+    def test_format(self):
+        A = lil_matrix(self.D)
+        spsave(self.fname, A)
+        assert_equal(spload(self.fname).format, 'csr')
+
+        spsave(self.fname, A, format='csc')
+        B = spload(self.fname)
+        assert_equal(B.format, 'csc')
+        assert_equal(B.toarray(), self.D)
+
+        assert_raises(ValueError, spsave, self.fname, A, format='dok')
+        assert_raises(TypeError, spsave, self.fname, self.D)
+
+    def test_input_unchanged(self):
+        # arrays longer than the number of stored entries
+        for A in [csr_matrix(self.D), bsr_matrix(self.D, blocksize=(2,3))]:
+            nnz = A.indptr[-1]
+            A.indices = np.concatenate((A.indices, A.indices[:2]))
+            A.data = np.concatenate((A.data, A.data[:2]))
+            spsave(self.fname, A)
+            assert_equal(len(A.indices), nnz + 2)
+            assert_equal(len(A.data), nnz + 2)
+            B = spload(self.fname)
+            assert_equal(len(B.data), nnz)
+            assert_equal(B.toarray(), self.D)
+
+    def test_alignment(self):
+        spsave(self.fname, csr_matrix(self.D))
+        B = spload(self.fname, mmap_mode='r')
+        for arr in [B.data, B.indices, B.indptr]:
+            assert_equal(arr.ctypes.data % 64, 0)
+
+    def test_rows(self):
+        for A in self.cases():
+            spsave(self.fname, A)
+            for mmap_mode in [None, 'r']:
+                if A.format == 'csc':
+                    assert_raises(ValueError, spload, self.fname, rows=(0,2))
+                    continue
+                for rows in [(0,6), (0,2), (2,4), (4,6), (2,2)]:
+                    B = spload(self.fname, mmap_mode=mmap_mode, rows=rows)
+                    assert_equal(B.format, A.format)
+                    assert_equal(B.toarray(), A.toarray()[rows[0]:rows[1]])
+
+    def test_invalid_rows(self):
+        spsave(self.fname, csr_matrix(self.D))
+        assert_raises(ValueError, spload, self.fname, rows=(-1,2))
+        assert_raises(ValueError, spload, self.fname, rows=(3,7))
+        assert_raises(ValueError, spload, self.fname, rows=(3,2))
+
+        spsave(self.fname, bsr_matrix(self.D, blocksize=(2,3)))
+        assert_raises(ValueError, spload, self.fname, rows=(1,3))
+
+    def test_bad_file(self):
+        fd = open(self.fname, 'wb')
+        fd.write('not a sparse matrix')
+        fd.close()
+        assert_raises(ValueError, spload, self.fname)
+
+
+if __name__ == "__main__":
+    run_module_suite()
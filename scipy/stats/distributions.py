@@ -102,7 +102,8 @@ class general_cont_ppf(object):
     def _single_call(self, q, *args):
         return optimize.brentq(self._tosolve, self.xa, self.xb, args=(q,)+args, xtol=self.xtol)
     def __call__(self, q, *args):
-        return self.vecfunc(q, *args)
+        return optimize.brentq_array(self._tosolve, self.xa, self.xb,
+                                     args=(q,)+args, xtol=self.xtol)
 
 
 # Frozen RV class
@@ -546,7 +547,9 @@ class rv_continuous(rv_generic):
         return 1.0-self._cdf(x,*args)
 
     def _ppf(self, q, *args):
-        return self.vecfunc(q,*args)
+        # solve for all the quantiles together
+        return optimize.brentq_array(self._ppf_to_solve, self.xa, self.xb,
+                                     args=(q,)+args, xtol=self.xtol)
 
     def _isf(self, q, *args):
         return self._ppf(1.0-q,*args) #use correct _ppf for subclasses